@@ -3,6 +3,12 @@ ASGI config for PackTravel project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for a forum topic's live comment stream (``/forum/topic/<id>/stream/``) are
+answered by ``forum.live.stream_comments``, which holds the connection open for
+Server-Sent Events; everything else goes to Django. The stream only exists when the
+site is served through this module, as the Procfile's ``web`` process does with
+uvicorn; topic pages fall back to polling when it is unavailable.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
@@ -13,4 +19,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "PackTravel.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready.
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+from forum.live import STREAM_PATH, stream_comments  # noqa: E402
+
+if settings.DEBUG:
+    # Serve static files in development, as `runserver` does.
+    django_application = ASGIStaticFilesHandler(django_application)
+
+
+async def application(scope, receive, send):
+    """
+    Routes comment stream requests to `stream_comments` and the rest to Django.
+    """
+    if scope["type"] == "http" and scope["method"] == "GET":
+        match = STREAM_PATH.match(scope["path"])
+        if match:
+            await stream_comments(scope, receive, send, match["topic_id"])
+            return
+    await django_application(scope, receive, send)
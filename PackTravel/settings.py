@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +44,11 @@ INSTALLED_APPS = [
     "allauth.account",
     "allauth.socialaccount",
     "allauth.socialaccount.providers.google",  # for Google OAuth 2.0
+    # project apps
+    "user",
+    "publish",
+    "forum",
+    "search",
 ]
 
 MIDDLEWARE = [
@@ -68,6 +74,9 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "libraries": {
+                "avatars": "user.templatetags.avatars",
+            },
         },
     },
 ]
@@ -120,6 +129,20 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Rides are entered as local wall-clock times; this is the zone they are in.
+# Departure timestamps are stored in UTC.
+RIDE_TIME_ZONE = os.getenv("RIDE_TIME_ZONE", "America/New_York")
+
+
+# POST rate limits (utilities.rate_limit). "memory" keeps the counters in each
+# process; "cache" shares them through the default cache, which must then be a
+# backend shared by all processes (e.g. Redis or Memcached) configured in CACHES.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+# Reverse proxies in front of the site (1 on Heroku). Clients without a session are
+# then keyed by the address in X-Forwarded-For rather than the proxy's REMOTE_ADDR.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
@@ -131,6 +154,13 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "search/static"),
 ]
 
+# Profile pictures are staged here until the background upload queue has
+# pushed them to cloud storage.
+UPLOAD_STAGING_DIR = os.getenv(
+    "UPLOAD_STAGING_DIR",
+    os.path.join(tempfile.gettempdir(), "packtravel-uploads"),
+)
+
 LOGIN_REDIRECT_URL = "/"
 LOGIN_URL = "login/"
 LOGOUT_URL = "logout/"
@@ -160,9 +190,11 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = "ncsupacktravel@gmail.com"
-EMAIL_HOST_PASSWORD = "sarm utsw ouhv wthm"
+# Every SMTP setting can be overridden from the environment, e.g. to point
+# the outbox worker at a local sink (python -m services.mail.sink).
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "ncsupacktravel@gmail.com")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "sarm utsw ouhv wthm")
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -25,6 +25,14 @@ from django.contrib.auth.views import LogoutView
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("search/", searchViews.search_index, name="search"),
+    path("search/matches/", searchViews.route_matches, name="route_matches"),
+    path("search/departures/", searchViews.routes_leaving, name="routes_leaving"),
+    path(
+        "search/destinations/",
+        searchViews.destination_suggestions,
+        name="destination_suggestions",
+    ),
+    path("search/nearest/", searchViews.nearest_routes, name="nearest_routes"),
     path("publish/", publishViews.publish_index, name="publish"),
     path("index/", userView.index, name="index"),
     path("", userView.index, name="index"),
@@ -36,6 +44,10 @@ urlpatterns = [
     path("update_route/<ride_id>", publishViews.update_route, name="update_route"),
     # path('add_route/', publishViews.add_route, name='add_route'),
     path("select_route/", publishViews.select_route, name="select_route"),
+    path(
+        "stats/destinations/",
+        publishViews.destination_statistics,
+        name="destination_statistics"),
     path(
         "display_ride/<ride_id>",
         publishViews.display_ride,
@@ -48,13 +60,14 @@ urlpatterns = [
     path("u/<userid>", userView.user_profile, name="user_profile"),
     path("edit-profile/", userView.edit_user, name="user_user"),
     path("forum/create_topic/", forumViews.create_topic, name="create_topic"),
+    path("forum/search/", forumViews.forum_search, name="forum_search"),
     path(
         "forum/rides-with-topics/",
         forumViews.rides_with_topics,
         name="rides_with_topics",
     ),
     path(
-        "forum/topics/<ride_id>/",
+        "forum/topics/<path:ride_id>/",
         forumViews.forum_topics,
         name="forum_topics"),
     path(
@@ -62,6 +75,11 @@ urlpatterns = [
         forumViews.forum_topic_details,
         name="forum_topic_details",
     ),
+    path(
+        "forum/topic/<topic_id>/comments/",
+        forumViews.topic_comments,
+        name="topic_comments",
+    ),
     path(
         "forum/add_comment/<topic_id>/",
         forumViews.add_comment,
@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for PackTravel's performance-sensitive paths.
+
+Each module in this package is a standalone script run with
+``python -m benchmarks.<name>`` and prints its timings to stdout.
+"""
@@ -0,0 +1,128 @@
+"""
+Benchmark for full-text forum search.
+
+Loads a synthetic forum into a scratch `forumSearchBenchmark` database and times
+`forum.search.search_forum` on its text indexes against a case-insensitive `$regex`
+scan of the same fields, for queries of common, rare and missing words:
+
+    python -m benchmarks.forum_search_benchmark --comments 100000 --topics 5000
+    python -m benchmarks.forum_search_benchmark --mongo-url mongodb://localhost:27017
+
+`$text` needs a real MongoDB server; the scratch database is dropped afterwards.
+"""
+
+import argparse
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from forum.search import ensure_indexes, search_forum
+
+PLACES = ["airport", "campus", "downtown", "library", "stadium", "station", "mall",
+          "hospital", "beach", "mountains", "lake", "museum"]
+QUERIES = {"common": "ride", "place": "airport", "phrase": '"early flight"',
+           "rare": "zeppelin", "missing": "xylophone"}
+
+
+def make_forum(topic_count: int, comment_count: int, seed: int = 5) -> tuple:
+    """
+    Generates topics and comments made of a filler vocabulary and place names.
+
+    One comment in ten thousand mentions "zeppelin".
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = (["ride", "share", "leaving", "friday", "morning", "early", "flight",
+                   "seat", "car", "gas", "split", "anyone", "going", "back", "late"]
+                  + [f"word{i}" for i in range(2000)])
+    base = datetime(2024, 1, 1)
+
+    def sentence(length):
+        words = list(rng.choice(vocabulary, size=length))
+        words[rng.integers(0, length)] = rng.choice(PLACES)
+        return " ".join(words)
+
+    topics = [
+        {"_id": i, "ride_id": str(rng.choice(PLACES)).title(), "title": sentence(6),
+         "content": sentence(40), "created_at": base + timedelta(hours=i)}
+        for i in range(topic_count)
+    ]
+    owners = rng.integers(0, topic_count, size=comment_count)
+    comments = [
+        {"topic_id": int(owners[i]), "creator": f"user{i % 500}",
+         "content": sentence(25) + (" zeppelin" if i % 10000 == 0 else ""),
+         "created_at": base + timedelta(minutes=i)}
+        for i in range(comment_count)
+    ]
+    return topics, comments
+
+
+def timed(function, repeat: int) -> float:
+    """
+    Returns the median latency of `function()` over `repeat` calls, in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def regex_scan(topics, comments, query: str) -> int:
+    """
+    Finds the topics and comments containing the query words with `$regex`.
+    """
+    words = re.findall(r"\w+", query)
+    pattern = {"$regex": "|".join(map(re.escape, words)), "$options": "i"}
+    found = {t["_id"] for t in topics.find(
+        {"$or": [{"title": pattern}, {"content": pattern}]}, {"_id": 1})}
+    found |= set(comments.distinct("topic_id", {"content": pattern}))
+    return len(found)
+
+
+def main():
+    """
+    Parses command-line arguments, loads the forum, runs the queries and prints a summary.
+    """
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_url, serverSelectionTimeoutMS=3000)
+    try:
+        db = client.forumSearchBenchmark
+        db.topics.drop()
+        db.comments.drop()
+        topics, comments = make_forum(args.topics, args.comments)
+        db.topics.insert_many(topics)
+        db.comments.insert_many(comments)
+        start = time.perf_counter()
+        ensure_indexes(db.topics, db.comments)
+        print(f"indexed {args.topics} topics and {args.comments} comments "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'query':>8} {'hits p1':>8} {'$text p1':>10} {'$text p5':>10} {'$regex':>10}")
+        for name, query in QUERIES.items():
+            first = search_forum(db.topics, db.comments, query)
+            text_p1 = timed(lambda: search_forum(db.topics, db.comments, query), args.repeat)
+            text_p5 = timed(
+                lambda: search_forum(db.topics, db.comments, query, page=5), args.repeat)
+            scan = timed(lambda: regex_scan(db.topics, db.comments, query),
+                         max(1, args.repeat // 4))
+            print(f"{name:>8} {len(first['hits']):>8} {text_p1:>8.1f}ms "
+                  f"{text_p5:>8.1f}ms {scan:>8.1f}ms")
+    finally:
+        client.drop_database("forumSearchBenchmark")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark for the carpool matching engine.
+
+Generates synthetic active routes around the Triangle and times ranking them for one rider, with a plain Python
+loop (scoring each route in turn, then sorting) and with the vectorised NumPy scorer plus `argpartition` top-K:
+
+    python -m benchmarks.matching_benchmark --sizes 10000 100000 --k 10
+
+The "documents" column includes building the coordinate arrays from route documents, which is what
+`match_routes` pays after fetching its candidates.
+"""
+
+import argparse
+import math
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from search.matching import _minutes, score_routes, top_k
+from utilities import GeoUtils
+
+CENTER = (35.78, -78.64)
+
+
+def make_routes(count: int, seed: int = 7) -> list:
+    """
+    Generates `count` route documents with random endpoints within ~0.5 degrees of Raleigh.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-0.5, 0.5, size=(count, 4)) + np.array(CENTER * 2)
+    base = datetime(2024, 11, 25, 6, 0)
+    offsets = rng.integers(0, 24 * 12, size=count) * 5
+    return [
+        {
+            "_id": f"route_{i}",
+            "s_location": GeoUtils.point(points[i, 0], points[i, 1]),
+            "d_location": GeoUtils.point(points[i, 2], points[i, 3]),
+            "departure": base + timedelta(minutes=int(offsets[i])),
+        }
+        for i in range(count)
+    ]
+
+
+def python_rank(routes, origin, destination, earliest, latest, k):
+    """
+    Scores and ranks routes one at a time in pure Python.
+    """
+
+    def distance(a, b):
+        lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+        h = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) *
+            math.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * GeoUtils.EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+    scored = []
+    shared = distance(origin, destination)
+    for route in routes:
+        start = route["s_location"]["coordinates"][::-1]
+        end = route["d_location"]["coordinates"][::-1]
+        detour = max(
+            distance(start, origin)
+            + shared
+            + distance(destination, end)
+            - distance(start, end),
+            0.0,
+        )
+        minutes = _minutes(route["departure"])
+        mismatch = max(_minutes(earliest) - minutes, 0) + \
+            max(minutes - _minutes(latest), 0)
+        scored.append((detour + 0.2 * mismatch, route["_id"]))
+    scored.sort()
+    return scored[:k]
+
+
+def numpy_rank(routes, origin, destination, earliest, latest, k):
+    """
+    Builds arrays from the route documents, then scores and ranks them with NumPy.
+    """
+    starts = np.array([r["s_location"]["coordinates"][::-1]
+                      for r in routes], dtype=float)
+    ends = np.array([r["d_location"]["coordinates"][::-1]
+                    for r in routes], dtype=float)
+    departures = np.array([_minutes(r["departure"])
+                          for r in routes], dtype=float)
+    return numpy_rank_arrays(starts, ends, departures,
+                             origin, destination, earliest, latest, k)
+
+
+def numpy_rank_arrays(starts, ends, departures,
+                      origin, destination, earliest, latest, k):
+    """
+    Scores and ranks prebuilt arrays with NumPy.
+    """
+    scores, _, _ = score_routes(
+        starts, ends, departures, origin, destination, _minutes(
+            earliest), _minutes(latest)
+    )
+    return top_k(scores, k)
+
+
+def timed(function, repeat: int) -> float:
+    """
+    Returns the median wall time of `repeat` calls, in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    """
+    Parses command-line arguments, runs the benchmark and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    origin, destination = (35.80, -78.70), (35.99, -78.90)
+    earliest, latest = datetime(2024, 11, 25, 8, 0), datetime(2024, 11, 25, 9, 0)
+    print(f"{'routes':>8} {'python':>10} {'documents':>10} {'arrays':>10}")
+    for size in args.sizes:
+        routes = make_routes(size)
+        starts = np.array([r["s_location"]["coordinates"][::-1]
+                          for r in routes], dtype=float)
+        ends = np.array([r["d_location"]["coordinates"][::-1]
+                        for r in routes], dtype=float)
+        departures = np.array([_minutes(r["departure"])
+                              for r in routes], dtype=float)
+
+        expected = [route_id for _, route_id in python_rank(
+            routes, origin, destination, earliest, latest, args.k)]
+        got = [routes[i]["_id"] for i in numpy_rank(
+            routes, origin, destination, earliest, latest, args.k)]
+        assert got == expected, "NumPy and Python rankings differ"
+
+        python_ms = timed(lambda: python_rank(
+            routes, origin, destination, earliest, latest, args.k), args.repeat)
+        documents_ms = timed(lambda: numpy_rank(
+            routes, origin, destination, earliest, latest, args.k), args.repeat)
+        arrays_ms = timed(lambda: numpy_rank_arrays(
+            starts, ends, departures, origin, destination, earliest, latest, args.k), args.repeat)
+        print(
+            f"{size:>8} {python_ms:>8.1f}ms {documents_ms:>8.1f}ms {arrays_ms:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
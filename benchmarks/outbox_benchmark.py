@@ -0,0 +1,63 @@
+"""
+Benchmark for email delivery through the outbox.
+
+Compares one SMTP connection per email (the old `send_mail` in the request) with the outbox worker, which sends a
+whole batch over a single connection. Both run against the local `SMTPSink` and an in-memory outbox collection:
+
+    python -m benchmarks.outbox_benchmark --count 500
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+
+def main():
+    """
+    Parses command-line arguments, runs both delivery strategies and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "PackTravel.settings")
+    django.setup()
+
+    import mongomock
+    from django.conf import settings
+    from django.core.mail import send_mail
+
+    from services import MailOutbox
+    from services.mail import SMTPSink
+
+    with SMTPSink() as sink:
+        settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+        settings.EMAIL_HOST, settings.EMAIL_PORT = sink.host, sink.port
+        settings.EMAIL_USE_TLS = False
+        settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ""
+
+        start = time.perf_counter()
+        for i in range(args.count):
+            send_mail("Hi", "Body", "bench@ncsu.edu", [f"user{i}@ncsu.edu"])
+        direct = time.perf_counter() - start
+        direct_connections = sink.connections
+
+        outbox = MailOutbox(mongomock.MongoClient().SEProject.emailOutbox)
+        for i in range(args.count):
+            outbox.enqueue(f"user{i}@ncsu.edu", "Hi", "Body", "bench@ncsu.edu")
+        start = time.perf_counter()
+        stats = outbox.deliver_pending(batch_size=args.count)
+        pooled = time.perf_counter() - start
+
+        print(
+            f"send_mail per message: {direct * 1000:.1f}ms, {direct_connections} connections")
+        print(
+            f"outbox batch:          {pooled * 1000:.1f}ms, "
+            f"{sink.connections - direct_connections} connection(s), sent={stats['sent']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for the fuel and CO2 savings report.
+
+Streams synthetic route documents through `publish.savings` in chunks and reports
+the time and peak traced memory for several collection sizes. Peak memory should
+stay roughly flat as the number of routes grows, since only one chunk and the
+running totals are held at a time:
+
+    python -m benchmarks.savings_benchmark --sizes 100000 1000000 --users 5000
+
+The routes come from a generator that behaves like a MongoDB cursor, so the numbers
+exclude network and BSON decoding time.
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from publish.savings import CHUNK_SIZE, compute_savings, route_frames
+
+
+class GeneratedRoutes:
+    """
+    A read-only stand-in for the routes collection that generates documents lazily.
+    """
+
+    def __init__(self, count: int, users: int, destinations: int = 200, seed: int = 7):
+        self.count = count
+        self.users = [ObjectId() for _ in range(users)]
+        self.destinations = [f"Destination {i}" for i in range(destinations)]
+        self.rng = np.random.default_rng(seed)
+
+    def find(self, query=None, projection=None):
+        """
+        Returns a cursor-like iterator over the generated routes.
+        """
+        return _Cursor(self._documents())
+
+    def _documents(self):
+        base = datetime(2024, 1, 1)
+        for start in range(0, self.count, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, self.count - start)
+            riders = self.rng.integers(0, 4, size=size)
+            people = self.rng.integers(0, len(self.users), size=(size, 4))
+            fuel = self.rng.uniform(0.5, 6.0, size=size)
+            minutes = self.rng.integers(0, 365 * 24 * 60, size=size)
+            dest = self.rng.integers(0, len(self.destinations), size=size)
+            for i in range(size):
+                yield {
+                    "destination": self.destinations[dest[i]],
+                    "fuel": float(fuel[i]),
+                    "creator": self.users[people[i, 0]],
+                    "users": [self.users[j] for j in people[i, 1:riders[i] + 1]],
+                    "departure_at": base + timedelta(minutes=int(minutes[i])),
+                }
+
+
+class _Cursor:
+    """
+    Iterator with the `batch_size` method `route_frames` calls.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return self.documents
+
+    def __next__(self):
+        return next(self.documents)
+
+
+def main():
+    """
+    Parses command-line arguments, runs the report for each size and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100000, 1000000])
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'routes':>10} {'seconds':>9} {'peak MiB':>9} {'users':>7} {'weeks':>6}")
+    for size in args.sizes:
+        routes = GeneratedRoutes(size, args.users)
+        tracemalloc.start()
+        start = time.perf_counter()
+        totals = compute_savings(route_frames(routes))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{size:>10} {elapsed:>9.2f} {peak / 2 ** 20:>9.1f} "
+            f"{len(totals['user']):>7} {len(totals['week']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark for nearest-route lookups.
+
+Times k-nearest queries on synthetic route endpoints around Raleigh with the in-process `RouteGrid`, with a brute-force
+NumPy scan of every endpoint, and, when a MongoDB URL is given, with a `$near` query on a 2dsphere index:
+
+    python -m benchmarks.spatial_benchmark --routes 10000 100000
+    python -m benchmarks.spatial_benchmark --mongo-url mongodb://localhost:27017
+
+The MongoDB run writes to a scratch `spatialBenchmark` database and drops it afterwards.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from search.matching import haversine_km
+from search.spatial import RouteGrid
+from utilities import GeoUtils
+
+CENTER = (35.78, -78.64)
+
+
+def make_routes(count: int, seed: int = 3) -> list:
+    """
+    Generates `count` routes with endpoints within ~0.5 degrees of Raleigh.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-0.5, 0.5, size=(count, 4)) + np.array(CENTER * 2)
+    return [
+        {
+            "_id": i,
+            "s_location": GeoUtils.point(points[i, 0], points[i, 1]),
+            "d_location": GeoUtils.point(points[i, 2], points[i, 3]),
+        }
+        for i in range(count)
+    ]
+
+
+def timed(function, queries) -> float:
+    """
+    Returns the median latency of `function(lat, long)` over `queries`, in microseconds.
+    """
+    samples = []
+    for lat, long in queries:
+        start = time.perf_counter()
+        function(lat, long)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def mongo_latency(url: str, routes: list, queries, k: int) -> float:
+    """
+    Loads the routes into a scratch collection and times `$near` queries on its 2dsphere index.
+    """
+    from pymongo import GEOSPHERE, MongoClient
+
+    client = MongoClient(url, serverSelectionTimeoutMS=3000)
+    try:
+        collection = client.spatialBenchmark.routes
+        collection.drop()
+        collection.insert_many(
+            [{"route_id": r["_id"], "kind": kind, "location": r[field]}
+             for r in routes
+             for field, kind in (("s_location", 0), ("d_location", 1))]
+        )
+        collection.create_index([("location", GEOSPHERE)])
+
+        def near(lat, long):
+            return list(
+                collection.find(
+                    {"location": {"$near": {"$geometry": {
+                        "type": "Point", "coordinates": [long, lat]}}}},
+                    {"route_id": 1, "kind": 1},
+                ).limit(k)
+            )
+
+        return timed(near, queries)
+    finally:
+        client.drop_database("spatialBenchmark")
+        client.close()
+
+
+def main():
+    """
+    Parses command-line arguments, runs the benchmark and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, nargs="+",
+                        default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--mongo-url")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    queries = rng.uniform(-0.4, 0.4, size=(args.queries, 2)) + np.array(CENTER)
+    print(f"{'routes':>8} {'grid':>10} {'numpy scan':>12} {'2dsphere':>10}")
+    for count in args.routes:
+        routes = make_routes(count)
+        grid = RouteGrid()
+        grid.load(routes)
+        lat = np.array([c for r in routes for c in (
+            r["s_location"]["coordinates"][1], r["d_location"]["coordinates"][1])])
+        long = np.array([c for r in routes for c in (
+            r["s_location"]["coordinates"][0], r["d_location"]["coordinates"][0])])
+
+        def scan(q_lat, q_long):
+            distances = haversine_km(lat, long, q_lat, q_long)
+            best = np.argpartition(distances, args.k - 1)[: args.k]
+            return best[np.argsort(distances[best])]
+
+        grid_us = timed(lambda a, b: grid.nearest(a, b, args.k), queries)
+        scan_us = timed(scan, queries)
+        mongo = (
+            f"{mongo_latency(args.mongo_url, routes, queries, args.k):>8.0f}us"
+            if args.mongo_url
+            else f"{'n/a':>10}"
+        )
+        print(f"{count:>8} {grid_us:>8.0f}us {scan_us:>10.0f}us {mongo}")
+
+
+if __name__ == "__main__":
+    main()
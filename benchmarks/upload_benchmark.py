@@ -0,0 +1,102 @@
+"""
+Benchmark for profile-picture uploads to Google Cloud Storage.
+
+Runs against a local fake GCS endpoint so no real bucket or service account is needed, e.g.:
+
+    docker run -d -p 4443:4443 fsouza/fake-gcs-server -scheme http
+    python -m benchmarks.upload_benchmark --endpoint http://localhost:4443
+
+Two modes are compared:
+- `fresh`: a new storage client per upload, which is how uploads used to work.
+- `shared`: one `GoogleCloud` instance reused for every upload.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import time
+
+from google.api_core.exceptions import Conflict
+from google.cloud import storage
+
+from services import GoogleCloud
+from services.google_cloud import CloudStorage, Credentials
+
+BUCKET = "ptravelv2-pfp"
+
+
+def ensure_bucket(endpoint: str):
+    """
+    Creates the profile-picture bucket on the fake server if it does not exist yet.
+
+    Args:
+        endpoint (str): The fake GCS endpoint.
+    """
+    client = storage.Client(
+        project="packtravel",
+        credentials=Credentials("", anonymous=True).credentials,
+        client_options={"api_endpoint": endpoint},
+    )
+    try:
+        client.create_bucket(BUCKET)
+    except Conflict:
+        pass
+
+
+def run(mode: str, endpoint: str, count: int, size: int) -> list:
+    """
+    Uploads `count` payloads of `size` bytes and returns per-upload latencies in seconds.
+
+    Args:
+        mode (str): Either "fresh" or "shared".
+        endpoint (str): The fake GCS endpoint.
+        count (int): Number of uploads.
+        size (int): Size of each payload in bytes.
+
+    Returns:
+        list: Upload latencies in seconds.
+    """
+    payload = os.urandom(size)
+    shared = GoogleCloud(endpoint=endpoint)
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        if mode == "fresh":
+            CloudStorage._local.clients = {}
+            cloud = GoogleCloud(endpoint=endpoint)
+        else:
+            cloud = shared
+        cloud.upload_file(io.BytesIO(payload), f"bench/{mode}_{i}.bin")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    """
+    Parses command-line arguments, runs both modes and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--endpoint", default="http://localhost:4443")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=256 * 1024,
+        help="payload size in bytes; above 8 MiB the resumable path is used",
+    )
+    args = parser.parse_args()
+
+    ensure_bucket(args.endpoint)
+    for mode in ("fresh", "shared"):
+        timings = run(mode, args.endpoint, args.count, args.size)
+        print(
+            f"{mode:>6}: n={len(timings)} "
+            f"mean={statistics.mean(timings) * 1000:.2f}ms "
+            f"p50={statistics.median(timings) * 1000:.2f}ms "
+            f"max={max(timings) * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,12 +22,14 @@ class Secrets:
         MongoConnectionURL (str): Connection URL for MongoDB.
         CloudCredentials (str): Path to Google Cloud credentials file.
         CloudStorageBucket (str): Name of the Google Cloud Storage bucket.
+        CloudStorageEndpoint (str): Optional storage API endpoint override (e.g. a fake GCS server).
     """
 
     GoogleMapsAPIKey = ""
     MongoConnectionURL = ""
     CloudCredentials = "credentials.json"
     CloudStorageBucket = ""
+    CloudStorageEndpoint = None
 
     def __init__(self):
         """
@@ -39,6 +41,7 @@ class Secrets:
         self.GoogleMapsAPIKey = os.getenv("GOOGLE_MAPS_API_KEY")
         self.CloudCredentials = os.getenv("GOOGLE_CLOUD_CREDENTIALS")
         self.CloudStorageBucket = os.getenv("GOOGLE_CLOUD_STORAGE_BUCKET")
+        self.CloudStorageEndpoint = os.getenv("GOOGLE_CLOUD_STORAGE_ENDPOINT")
 
 
 class URLConfig:
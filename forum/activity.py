@@ -0,0 +1,79 @@
+"""
+Denormalized comment counts and last activity on forum topics.
+
+Each topic carries `comment_count` and `last_activity_at` so topic lists can show
+reply counts and sort by recent activity from the `ride_id_1_last_activity_at_-1`
+index, without counting comments. Posting a comment updates both fields in one
+atomic update; `recompute` rebuilds them from the comments collection for topics
+created before the fields existed or after a failed write.
+
+Functions:
+    - `record_comment`: Counts a new comment on its topic.
+    - `recompute`: Rebuilds the counts and activity times of every topic.
+"""
+
+
+def record_comment(topics, topic_id, created_at) -> bool:
+    """
+    Increments a topic's `comment_count` and moves `last_activity_at` forward.
+
+    `$max` keeps `last_activity_at` from going backwards if comments are recorded
+    out of order.
+
+    Args:
+        topics (Collection): The forum topics collection.
+        topic_id (ObjectId): The topic that was commented on.
+        created_at (datetime): When the comment was posted.
+
+    Returns:
+        bool: True if the topic exists.
+    """
+    result = topics.update_one(
+        {"_id": topic_id},
+        {"$inc": {"comment_count": 1}, "$max": {"last_activity_at": created_at}},
+    )
+    return result.matched_count == 1
+
+
+def recompute(topics, comments) -> int:
+    """
+    Rebuilds `comment_count` and `last_activity_at` for every topic.
+
+    Comments are counted per topic in one aggregation; a topic's last activity is
+    its newest comment, or its creation time if it has none.
+
+    Args:
+        topics (Collection): The forum topics collection.
+        comments (Collection): The forum comments collection.
+
+    Returns:
+        int: The number of topics whose fields changed.
+    """
+    totals = {
+        row["_id"]: row
+        for row in comments.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": "$topic_id",
+                        "count": {"$sum": 1},
+                        "latest": {"$max": "$created_at"},
+                    }
+                }
+            ]
+        )
+    }
+    changed = 0
+    for topic in topics.find(
+        {}, {"created_at": 1, "comment_count": 1, "last_activity_at": 1}
+    ):
+        row = totals.get(topic["_id"], {})
+        times = [t for t in (topic.get("created_at"), row.get("latest")) if t]
+        fields = {
+            "comment_count": row.get("count", 0),
+            "last_activity_at": max(times) if times else None,
+        }
+        if any(topic.get(name) != value for name, value in fields.items()):
+            topics.update_one({"_id": topic["_id"]}, {"$set": fields})
+            changed += 1
+    return changed
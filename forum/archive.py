@@ -0,0 +1,90 @@
+"""
+Archival of inactive forum topics.
+
+Topics without activity for `TOPIC_IDLE_MONTHS` are moved, with their comments, from
+`topics` and `comments` into `topicsArchive` and `commentsArchive`. The listing,
+search and comment queries then only read the topics people still post in, while an
+archived topic stays readable at its old address: `find_topic` falls back to the
+archive, and its page is shown read-only, without the comment form or live stream.
+
+Comments are moved before their topic, so a topic in the archive always has its
+comments with it; like `publish.archive.move_documents`, the job can be run again
+after an interruption.
+
+Archived comments are paged through the same index as live ones (see
+`forum.comments.ensure_indexes`).
+
+Functions:
+    - `archive_topics`: Moves inactive topics and their comments into the archive.
+    - `find_topic`: Finds a topic in `topics`, or else in the archive.
+
+Attributes:
+    - `TOPIC_IDLE_MONTHS`: Months without activity after which a topic is archived.
+"""
+
+from datetime import datetime, timedelta
+
+from publish.archive import BATCH_SIZE, move_documents
+
+from .comments import ensure_indexes
+
+TOPIC_IDLE_MONTHS = 6
+
+
+def archive_topics(db, months: int = TOPIC_IDLE_MONTHS, now: datetime = None,
+                   batch_size: int = BATCH_SIZE) -> int:
+    """
+    Moves topics whose last activity is more than `months` ago into `topicsArchive`,
+    and their comments into `commentsArchive`.
+
+    Topics without `last_activity_at` (not yet repaired) are judged by `created_at`.
+    A month is counted as 30 days.
+
+    Args:
+        db (Database): The "SEProject" database.
+        months (int): Months without activity before a topic is archived (default:
+            `TOPIC_IDLE_MONTHS`).
+        now (datetime, optional): The current UTC time (default: utcnow).
+        batch_size (int): Topics per batch (default: `BATCH_SIZE`).
+
+    Returns:
+        int: The number of topics archived.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=30 * months)
+    query = {
+        "$or": [
+            {"last_activity_at": {"$lt": cutoff}},
+            {"last_activity_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+        ]
+    }
+    ensure_indexes(db.commentsArchive)
+    archived = 0
+    while True:
+        ids = [topic["_id"] for topic in
+               db.topics.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not ids:
+            return archived
+        move_documents(db.comments, db.commentsArchive, {"topic_id": {"$in": ids}},
+                       batch_size, now)
+        archived += move_documents(db.topics, db.topicsArchive, {"_id": {"$in": ids}},
+                                   batch_size, now)
+
+
+def find_topic(topics, topics_archive, topic_id):
+    """
+    Finds a topic, looking in the archive if it is not in `topics`.
+
+    Args:
+        topics (Collection): The forum topics collection.
+        topics_archive (Collection): The `topicsArchive` collection.
+        topic_id (ObjectId): The topic's ID.
+
+    Returns:
+        tuple: (topic or None, True if the topic is archived).
+    """
+    topic = topics.find_one({"_id": topic_id})
+    if topic is not None:
+        return topic, False
+    topic = topics_archive.find_one({"_id": topic_id})
+    return topic, topic is not None
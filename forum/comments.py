@@ -0,0 +1,166 @@
+"""
+Keyset pagination of forum comments.
+
+A topic's comments are read a page at a time in `(created_at, _id)` order through the
+`topic_id_1_created_at_1__id_1` index. Pages are addressed by opaque cursors naming
+the first or last comment shown rather than by offsets, so every page costs one
+index range scan however deep into the thread it is, and comments posted in the
+meantime do not shift what "older" means.
+
+Cursors have the form `<created_at in epoch milliseconds>-<comment _id>`. MongoDB
+stores datetimes with millisecond precision, so a cursor built from a stored comment
+matches it exactly.
+
+Functions:
+    - `ensure_indexes`: Creates the comment pagination index.
+    - `encode_cursor`: Returns the cursor of a comment.
+    - `decode_cursor`: Parses a cursor.
+    - `comments_page`: Returns the latest, older or newer page of a topic's comments.
+    - `comment_data`: Returns the JSON-serializable form of a comment.
+
+Attributes:
+    - `PAGE_SIZE`: Comments per page.
+    - `MAX_PAGE_SIZE`: Largest page a client may ask for.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def ensure_indexes(comments):
+    """
+    Creates the `(topic_id, created_at, _id)` index.
+
+    Run from the `create_indexes` command, not per request.
+
+    Args:
+        comments (Collection): The forum comments collection, or `commentsArchive`.
+    """
+    comments.create_index([("topic_id", 1), ("created_at", 1), ("_id", 1)])
+
+
+def encode_cursor(comment: dict) -> str:
+    """
+    Returns the cursor of a comment.
+
+    Args:
+        comment (dict): A stored comment with `created_at` and `_id`.
+
+    Returns:
+        str: The cursor.
+    """
+    created_at = comment["created_at"]
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    millis = (created_at - _EPOCH) // timedelta(milliseconds=1)
+    return f"{millis}-{comment['_id']}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Parses a cursor.
+
+    Args:
+        cursor (str): A cursor from `encode_cursor`.
+
+    Returns:
+        tuple: The `(created_at, _id)` it names.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    millis, _, comment_id = cursor.partition("-")
+    try:
+        return _EPOCH + timedelta(milliseconds=int(millis)), ObjectId(comment_id)
+    except (InvalidId, TypeError, OverflowError) as e:
+        raise ValueError(f"invalid cursor {cursor!r}") from e
+
+
+def comments_page(comments, topic_id: ObjectId, before: str = None, after: str = None,
+                  limit: int = PAGE_SIZE) -> dict:
+    """
+    Returns one page of a topic's comments, oldest first.
+
+    Without a cursor the latest page is returned. With `before` the page ends just
+    before that comment; with `after` it starts just after it.
+
+    Args:
+        comments (Collection): The forum comments collection.
+        topic_id (ObjectId): The topic.
+        before (str, optional): Cursor of the oldest comment already shown.
+        after (str, optional): Cursor of the newest comment already shown.
+        limit (int): Comments per page (default: `PAGE_SIZE`).
+
+    Returns:
+        dict: {"comments": [...], "older": cursor or None, "newer": cursor or None,
+        "has_older": bool, "has_newer": bool}. `older`/`newer` are the cursors of the
+        first and last comment on the page, to pass back as `before`/`after`.
+
+    Raises:
+        ValueError: If a cursor is malformed.
+    """
+    query = {"topic_id": topic_id}
+    direction = -1
+    if after:
+        query.update(_beyond(decode_cursor(after), "$gt"))
+        direction = 1
+    elif before:
+        query.update(_beyond(decode_cursor(before), "$lt"))
+
+    page = list(
+        comments.find(query)
+        .sort([("created_at", direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    more = len(page) > limit
+    page = page[:limit]
+    if direction == -1:
+        page.reverse()
+
+    return {
+        "comments": page,
+        "older": encode_cursor(page[0]) if page else before,
+        "newer": encode_cursor(page[-1]) if page else after,
+        "has_older": more if direction == -1 else bool(after),
+        "has_newer": more if direction == 1 else bool(before),
+    }
+
+
+def comment_data(comment: dict) -> dict:
+    """
+    Returns the JSON-serializable form of a comment.
+
+    Args:
+        comment (dict): A stored comment.
+
+    Returns:
+        dict: {"id", "content", "content_html", "creator", "created_at"}, with the
+        time in ISO format. `content_html` is None for comments not yet rendered.
+    """
+    return {
+        "id": str(comment["_id"]),
+        "content": comment.get("content"),
+        "content_html": comment.get("content_html"),
+        "creator": comment.get("creator"),
+        "created_at": comment["created_at"].isoformat(),
+    }
+
+
+def _beyond(position: tuple, operator: str) -> dict:
+    """
+    Returns the filter for comments strictly past `(created_at, _id)` in one direction.
+    """
+    created_at, comment_id = position
+    return {
+        "$or": [
+            {"created_at": {operator: created_at}},
+            {"created_at": created_at, "_id": {operator: comment_id}},
+        ]
+    }
@@ -0,0 +1,112 @@
+"""
+Destination listing for the forum.
+
+The forum's front page lists every destination that has routes or topics, each with
+its most recently active topics. Routes and topics are archived on different
+schedules, so a destination whose routes have all been archived stays listed while
+its topics are live. A page is built from three queries whatever the number of
+destinations: a `distinct` on the indexed route destinations, one on the indexed
+topic `ride_id`s, and one aggregation that groups the topics of the destinations on
+the page by `ride_id`.
+
+Functions:
+    - `ensure_indexes`: Creates the indexes the listing reads.
+    - `destinations_page`: Returns one page of destinations with their topics.
+
+Attributes:
+    - `PAGE_SIZE`: Destinations per page.
+    - `TOPICS_PER_RIDE`: Most recently active topics shown under each destination.
+"""
+
+PAGE_SIZE = 20
+TOPICS_PER_RIDE = 10
+
+
+def ensure_indexes(routes, topics):
+    """
+    Creates the indexes used by the listing.
+
+    `distinct("destination")` is answered from the `destination` prefix of the
+    routes' `destination_1_departure_at_1` index; topics are listed by `ride_id`, and
+    grouped and ordered by activity, through `ride_id_1_last_activity_at_-1`. Run from the `create_indexes`
+    command, not per request.
+
+    Args:
+        routes (Collection): The routes collection.
+        topics (Collection): The forum topics collection.
+    """
+    routes.create_index([("destination", 1), ("departure_at", 1)])
+    topics.create_index([("ride_id", 1), ("last_activity_at", -1)])
+
+
+def destinations_page(routes, topics, page: int = 1, per_page: int = PAGE_SIZE) -> dict:
+    """
+    Returns one page of destinations, alphabetically, with their most active topics.
+
+    Args:
+        routes (Collection): The routes collection.
+        topics (Collection): The forum topics collection.
+        page (int): The 1-based page number; out-of-range pages are clamped.
+        per_page (int): Destinations per page (default: `PAGE_SIZE`).
+
+    Returns:
+        dict: {"rides": [{"destination", "topics", "topic_count"}, ...], "page",
+        "pages", "has_previous", "has_next"}. Each topic has `id`, `title` and
+        `comment_count`, most recently active first.
+    """
+    names = set(routes.distinct("destination")) | set(topics.distinct("ride_id"))
+    names = sorted(
+        (name for name in names if name),
+        key=lambda name: (name.casefold(), name),
+    )
+    pages = max(1, -(-len(names) // per_page))
+    page = min(max(page, 1), pages)
+    shown = names[(page - 1) * per_page: page * per_page]
+
+    grouped = {}
+    if shown:
+        for row in topics.aggregate(
+            [
+                {"$match": {"ride_id": {"$in": shown}}},
+                # Topics not yet repaired have no last activity; order those by age.
+                {"$sort": {"last_activity_at": -1, "created_at": -1}},
+                {
+                    "$group": {
+                        "_id": "$ride_id",
+                        "topics": {
+                            "$push": {
+                                "id": "$_id",
+                                "title": "$title",
+                                "comment_count": {"$ifNull": ["$comment_count", 0]},
+                            }
+                        },
+                        "topic_count": {"$sum": 1},
+                    }
+                },
+                {
+                    "$project": {
+                        "topics": {"$slice": ["$topics", TOPICS_PER_RIDE]},
+                        "topic_count": 1,
+                    }
+                },
+            ]
+        ):
+            grouped[row["_id"]] = row
+
+    rides = []
+    for name in shown:
+        row = grouped.get(name, {})
+        rides.append(
+            {
+                "destination": name,
+                "topics": row.get("topics", []),
+                "topic_count": row.get("topic_count", 0),
+            }
+        )
+    return {
+        "rides": rides,
+        "page": page,
+        "pages": pages,
+        "has_previous": page > 1,
+        "has_next": page < pages,
+    }
@@ -0,0 +1,291 @@
+"""
+Live comment streaming over Server-Sent Events.
+
+`PackTravel/asgi.py` hands requests for `/forum/topic/<topic_id>/stream/` to
+`stream_comments`, a raw ASGI handler that keeps the connection open and writes one
+`comment` event per new comment:
+
+    event: comment
+    data: {"id": ..., "content": ..., "creator": ..., "created_at": ...}
+
+New comments reach open streams in two ways:
+
+1. `add_comment` publishes every comment it stores to `broker`, an in-process
+   pub/sub keyed by topic, which pushes it to the streams of that topic served by
+   the same process immediately.
+2. Every `POLL_SECONDS` each stream reads the comments stored after the last one it
+   polled with a keyset query (see `forum.comments`), which picks up comments posted
+   through other processes and any pushes dropped because a client fell behind.
+   Comments already pushed are not sent again.
+
+The stream starts after the cursor in the `Last-Event-ID` header (sent by browsers
+when they reconnect) or the `after` query parameter, and otherwise after the newest
+existing comment. Event ids (`id: <comment cursor>`) are only sent for polled
+positions: a pushed comment can be newer than a comment from another process that
+has not been polled yet, and resuming after it would skip that comment. Pushed
+events carry no id, and each poll ends with an `id:` line for the poll cursor once
+everything before it has been sent; a client may therefore get a pushed comment again
+after reconnecting, and the page ignores comments it already shows. Idle streams get
+a keep-alive comment line at every poll.
+
+All streams of a process read through one shared MongoDB client, created on first
+use.
+
+Classes:
+    - `CommentBroker`: In-process pub/sub of new comments by topic.
+
+Functions:
+    - `stream_comments`: ASGI handler streaming a topic's new comments.
+
+Attributes:
+    - `broker`: The process-wide `CommentBroker`.
+    - `STREAM_PATH`: Pattern of the stream URL path.
+    - `POLL_SECONDS`: Interval between database polls of a stream.
+    - `QUEUE_SIZE`: Pushed comments buffered per stream.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from utils import get_client
+
+from .comments import MAX_PAGE_SIZE, comment_data, comments_page, decode_cursor, encode_cursor
+
+STREAM_PATH = re.compile(r"^/forum/topic/(?P<topic_id>[^/]+)/stream/$")
+POLL_SECONDS = 5
+QUEUE_SIZE = 100
+
+_START = "0-" + "0" * 24
+
+_comments = None
+_comments_lock = threading.Lock()
+
+
+class CommentBroker:
+    """
+    In-process pub/sub of new comments by topic.
+
+    Subscribers are asyncio queues owned by the event loop serving the stream;
+    `publish` may be called from any thread, such as the one running a sync view.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, topic_id: str) -> asyncio.Queue:
+        """
+        Registers a queue for a topic's new comments. Must be called on the event loop.
+
+        Args:
+            topic_id (str): The topic's ID.
+
+        Returns:
+            asyncio.Queue: The queue new comments are put on.
+        """
+        queue = asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(topic_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, topic_id: str, queue: asyncio.Queue):
+        """
+        Removes a queue registered with `subscribe`.
+
+        Args:
+            topic_id (str): The topic's ID.
+            queue (asyncio.Queue): The queue.
+        """
+        with self._lock:
+            queues = self._subscribers.get(topic_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(topic_id, None)
+
+    def subscribers(self, topic_id: str) -> int:
+        """
+        Returns the number of streams subscribed to a topic.
+        """
+        with self._lock:
+            return len(self._subscribers.get(topic_id, {}))
+
+    def publish(self, topic_id: str, comment: dict):
+        """
+        Pushes a new comment to every subscriber of its topic.
+
+        A subscriber whose queue is full misses the push and gets the comment from its
+        next poll instead.
+
+        Args:
+            topic_id (str): The topic's ID.
+            comment (dict): The stored comment.
+        """
+        with self._lock:
+            queues = list(self._subscribers.get(topic_id, {}).items())
+        for queue, loop in queues:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, comment)
+            except RuntimeError:
+                # The loop was closed; its stream unsubscribes as it unwinds.
+                pass
+
+
+broker = CommentBroker()
+
+
+async def stream_comments(scope, receive, send, topic_id: str, comments=None,
+                          poll_seconds: float = POLL_SECONDS):
+    """
+    Streams a topic's new comments as Server-Sent Events until the client disconnects.
+
+    Args:
+        scope (dict): The ASGI HTTP scope.
+        receive (callable): The ASGI receive channel.
+        send (callable): The ASGI send channel.
+        topic_id (str): The topic's ID, from `STREAM_PATH`.
+        comments (Collection, optional): The forum comments collection (default:
+            the `comments` collection of the configured database).
+        poll_seconds (float): Interval between database polls (default: `POLL_SECONDS`).
+    """
+    headers = dict(scope.get("headers") or [])
+    params = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    cursor = (headers.get(b"last-event-id", b"").decode("latin-1")
+              or params.get("after", [""])[0] or None)
+    try:
+        topic = ObjectId(topic_id)
+        if cursor:
+            decode_cursor(cursor)
+    except (InvalidId, TypeError, ValueError):
+        await _respond(send, 400, b"Invalid topic or cursor.")
+        return
+
+    run = sync_to_async
+    if comments is None:
+        comments = await run(_comments_collection, thread_sensitive=False)()
+    if cursor is None:
+        latest = await run(comments_page, thread_sensitive=False)(comments, topic, limit=1)
+        cursor = latest["newer"] or _START
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+
+    loop = asyncio.get_running_loop()
+    queue = broker.subscribe(str(topic))
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    # Pushed comments newer than the poll cursor, so polling does not repeat them.
+    pushed = {}
+    next_poll = loop.time() + poll_seconds
+    try:
+        while not disconnected.done():
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected},
+                timeout=max(0, next_poll - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                comment = getter.result()
+                position = _position(comment)
+                if position > decode_cursor(cursor) and comment["_id"] not in pushed:
+                    pushed[comment["_id"]] = position
+                    # No id: comments before this one may not have been polled yet.
+                    await _event(send, comment)
+                continue
+            getter.cancel()
+            if disconnected.done():
+                break
+
+            sent, start = None, cursor
+            while True:
+                page = await run(comments_page, thread_sensitive=False)(
+                    comments, topic, after=cursor, limit=MAX_PAGE_SIZE)
+                for comment in page["comments"]:
+                    if comment["_id"] not in pushed:
+                        sent = encode_cursor(comment)
+                        await _event(send, comment, sent)
+                cursor = page["newer"]
+                if not page["has_newer"]:
+                    break
+            polled = decode_cursor(cursor)
+            pushed = {id_: pos for id_, pos in pushed.items() if pos > polled}
+            if cursor != start and sent != cursor:
+                # Everything up to the poll cursor has been sent, pushed or polled.
+                await send({"type": "http.response.body",
+                            "body": f"id: {cursor}\n\n".encode(), "more_body": True})
+            elif sent is None:
+                await send({"type": "http.response.body", "body": b": keep-alive\n\n",
+                            "more_body": True})
+            next_poll = loop.time() + poll_seconds
+    finally:
+        broker.unsubscribe(str(topic), queue)
+        disconnected.cancel()
+
+
+def _comments_collection():
+    """
+    Returns the forum comments collection of the configured database, through a client
+    shared by every stream of the process.
+    """
+    global _comments
+    with _comments_lock:
+        if _comments is None:
+            _comments = get_client().SEProject.comments
+        return _comments
+
+
+def _offer(queue: asyncio.Queue, comment: dict):
+    """
+    Puts a comment on a subscriber's queue unless it is full.
+    """
+    try:
+        queue.put_nowait(comment)
+    except asyncio.QueueFull:
+        pass
+
+
+def _position(comment: dict) -> tuple:
+    """
+    Returns the `(created_at, _id)` keyset position of a comment, at stored precision.
+    """
+    return decode_cursor(encode_cursor(comment))
+
+
+async def _disconnect(receive):
+    """
+    Waits until the client disconnects.
+    """
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _event(send, comment: dict, event_id: str = None):
+    """
+    Writes one `comment` event, with an `id:` line if `event_id` is given.
+    """
+    body = (f"id: {event_id}\n" if event_id else "") + (
+        f"event: comment\ndata: {json.dumps(comment_data(comment))}\n\n")
+    await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+
+
+async def _respond(send, status: int, body: bytes):
+    """
+    Writes a complete plain-text response.
+    """
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,47 @@
+"""
+Management command that renders the stored HTML of forum topics and comments.
+
+Run it once to fill `content_html` on posts created before bodies were rendered on
+write, and again after bumping `forum.markup.VERSION`. Archived topics and comments
+are rendered too. Posts already rendered with the current version are skipped unless
+`--force` is given.
+
+Usage:
+    python manage.py render_forum_content
+    python manage.py render_forum_content --force
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum.markup import backfill
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Renders `content_html` for live and archived topics and comments that lack it or
+    are outdated.
+    """
+
+    help = "Render the stored HTML of forum topics and comments."
+
+    def add_arguments(self, parser):
+        """
+        Adds the `--force` option.
+        """
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render every post, not only missing or outdated ones.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the backfill.
+        """
+        db = get_client().SEProject
+        topics = sum(backfill(collection, options["force"])
+                     for collection in (db.topics, db.topicsArchive))
+        comments = sum(backfill(collection, options["force"])
+                       for collection in (db.comments, db.commentsArchive))
+        self.stdout.write(f"rendered {topics} topics and {comments} comments")
@@ -0,0 +1,30 @@
+"""
+Management command that recomputes comment counts and last activity on forum topics.
+
+Run it once to fill `comment_count` and `last_activity_at` on existing topics, and
+again whenever the counts look wrong.
+
+Usage:
+    python manage.py repair_topic_activity
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum.activity import recompute
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Recomputes `comment_count` and `last_activity_at` from the comments collection.
+    """
+
+    help = "Recompute comment counts and last activity times of forum topics."
+
+    def handle(self, *args, **options):
+        """
+        Runs the repair.
+        """
+        db = get_client().SEProject
+        changed = recompute(db.topics, db.comments)
+        self.stdout.write(f"repaired {changed} topics")
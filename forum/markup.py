@@ -0,0 +1,119 @@
+"""
+Render-on-write HTML for forum posts.
+
+Topic and comment bodies are rendered to HTML once, when they are posted, and stored
+next to the raw text as `content_html`, so pages emit the stored HTML instead of
+formatting every post on every view. The raw `content` is kept for editing, search
+and re-rendering.
+
+The renderer escapes all user text and supports a small markdown subset; no other
+HTML can reach the output:
+
+    blank line          new paragraph
+    line break          <br>
+    - item / * item     bulleted list (a block made only of such lines)
+    **bold**, *italic*  <strong>, <em>
+    `code`              <code>, contents not formatted
+    http(s)://...       link, opened with rel="nofollow noopener"
+
+`content_version` records the renderer version a post was rendered with; after a
+change to the renderer, bump `VERSION` and run `render_forum_content` to re-render
+older posts.
+
+Functions:
+    - `render`: Renders post text to sanitized HTML.
+    - `rendered_fields`: Returns the stored fields for a post's text.
+    - `backfill`: Renders the posts of a collection that are missing or outdated.
+
+Attributes:
+    - `VERSION`: Version of the renderer.
+"""
+
+import re
+from html import escape
+
+VERSION = 1
+
+_BLOCK_BREAK = re.compile(r"\n[ \t]*\n")
+_BULLET = re.compile(r"^[ \t]*[-*][ \t]+")
+_TOKEN = re.compile(r"(`[^`\n]+`|https?://[^\s<>\"'`]+)")
+_STRONG = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*")
+_EM = re.compile(r"\*(?=\S)(.+?)(?<=\S)\*")
+_URL_TRAIL = ".,;:!?)"
+
+
+def render(text: str) -> str:
+    """
+    Renders post text to sanitized HTML.
+
+    Args:
+        text (str): The raw post text.
+
+    Returns:
+        str: The HTML, with all user text escaped.
+    """
+    text = (text or "").replace("\r\n", "\n").strip()
+    if not text:
+        return ""
+    blocks = []
+    for block in _BLOCK_BREAK.split(text):
+        lines = block.strip("\n").split("\n")
+        if all(_BULLET.match(line) for line in lines):
+            items = "".join(
+                f"<li>{_inline(_BULLET.sub('', line, count=1))}</li>" for line in lines)
+            blocks.append(f"<ul>{items}</ul>")
+        else:
+            blocks.append("<p>" + "<br>".join(_inline(line) for line in lines) + "</p>")
+    return "".join(blocks)
+
+
+def rendered_fields(text: str) -> dict:
+    """
+    Returns the fields stored with a post for its text.
+
+    Args:
+        text (str): The raw post text.
+
+    Returns:
+        dict: {"content_html": rendered HTML, "content_version": `VERSION`}.
+    """
+    return {"content_html": render(text), "content_version": VERSION}
+
+
+def backfill(collection, force: bool = False) -> int:
+    """
+    Renders the posts of a collection that have no or outdated `content_html`.
+
+    Args:
+        collection (Collection): The topics or comments collection.
+        force (bool): Re-render every post (default: False).
+
+    Returns:
+        int: The number of posts rendered.
+    """
+    query = {} if force else {"content_version": {"$ne": VERSION}}
+    rendered = 0
+    for post in collection.find(query, {"content": 1}):
+        collection.update_one(
+            {"_id": post["_id"]}, {"$set": rendered_fields(post.get("content"))})
+        rendered += 1
+    return rendered
+
+
+def _inline(text: str) -> str:
+    """
+    Renders the inline markup of one line.
+    """
+    parts = []
+    for i, part in enumerate(_TOKEN.split(text)):
+        if i % 2 == 0:
+            parts.append(_EM.sub(r"<em>\1</em>", _STRONG.sub(r"<strong>\1</strong>", escape(part))))
+        elif part.startswith("`"):
+            parts.append(f"<code>{escape(part[1:-1])}</code>")
+        else:
+            url = part.rstrip(_URL_TRAIL)
+            parts.append(
+                f'<a href="{escape(url)}" rel="nofollow noopener" target="_blank">'
+                f"{escape(url)}</a>{escape(part[len(url):])}"
+            )
+    return "".join(parts)
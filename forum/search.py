@@ -0,0 +1,228 @@
+"""
+Full-text search over the forum.
+
+Topic titles and bodies share one weighted text index (a hit in the title counts
+more) and comment bodies have their own, so a query is answered by two `$text`
+queries: one ranking topics by `textScore` and one aggregation ranking comments and
+grouping them by topic. A topic's score is the best of its own score and that of its
+best matching comment, which means the first `n` hits overall are always among the
+first `n` of each list; both queries are therefore limited to the hits up to the
+requested page, and the merged list is cut into pages of `PAGE_SIZE`. A third query
+fetches the topics that only matched through their comments.
+
+Snippets are cut around the first matching word and returned as HTML, with the text
+escaped and the query words wrapped in `<mark>`. MongoDB matches stemmed words, so
+highlighting matches words starting with a crude stem of each query word.
+
+Functions:
+    - `ensure_indexes`: Creates the text indexes.
+    - `query_terms`: Returns the words of a query that should be highlighted.
+    - `highlight`: Returns an escaped snippet of a text with the terms marked.
+    - `search_forum`: Returns one page of ranked hits grouped by topic.
+
+Attributes:
+    - `PAGE_SIZE`: Topics per page of results.
+    - `MAX_PAGE`: Deepest page a client may ask for.
+    - `COMMENTS_PER_HIT`: Matching comments shown under each topic.
+    - `SNIPPET_CHARS`: Length of a snippet, in characters.
+    - `TOPIC_WEIGHTS`: Text index weights of the topic fields.
+"""
+
+import re
+from html import escape
+
+from pymongo import TEXT
+
+PAGE_SIZE = 10
+MAX_PAGE = 20
+COMMENTS_PER_HIT = 3
+SNIPPET_CHARS = 160
+
+TOPIC_WEIGHTS = {"title": 5, "content": 1}
+
+_TOPIC_FIELDS = {"title": 1, "content": 1, "ride_id": 1, "creator": 1,
+                 "created_at": 1, "comment_count": 1}
+_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+
+def ensure_indexes(topics, comments):
+    """
+    Creates the topic and comment text indexes.
+
+    Run from the `create_indexes` command, not per request.
+
+    Args:
+        topics (Collection): The forum topics collection.
+        comments (Collection): The forum comments collection.
+    """
+    topics.create_index(
+        [(field, TEXT) for field in TOPIC_WEIGHTS],
+        weights=TOPIC_WEIGHTS,
+        name="topic_text",
+        default_language="english",
+    )
+    comments.create_index(
+        [("content", TEXT)], name="comment_text", default_language="english")
+
+
+def query_terms(query: str) -> list:
+    """
+    Returns the words of a query that should be highlighted.
+
+    Words of quoted phrases are kept and `-negated` words and phrases are dropped,
+    following the `$text` query syntax.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        list: The distinct lower-cased words, in query order.
+    """
+    terms = []
+    for negated, phrase, word in re.findall(r'(-?)(?:"([^"]*)"|([^\s"]+))', query):
+        if not negated:
+            terms += re.findall(r"\w+", (phrase or word).lower())
+    return list(dict.fromkeys(terms))
+
+
+def highlight(text: str, terms: list, width: int = SNIPPET_CHARS) -> str:
+    """
+    Returns an HTML snippet of `text` around its first matching word.
+
+    Args:
+        text (str): The text to cut the snippet from.
+        terms (list): Words to mark, e.g. from `query_terms`.
+        width (int): Snippet length in characters (default: `SNIPPET_CHARS`).
+
+    Returns:
+        str: The escaped snippet, with matches wrapped in `<mark>` and `…` where the
+        text was cut.
+    """
+    text = text or ""
+    pattern = _pattern(terms)
+    match = pattern.search(text) if pattern else None
+    start = 0
+    if match and match.end() > width:
+        start = match.start() - width // 3
+        # Start on a word boundary rather than mid-word.
+        space = text.find(" ", start, match.start())
+        start = space + 1 if space != -1 else start
+    end = start + width
+    if end < len(text) and not text[end].isspace():
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    snippet = text[start:end]
+
+    parts, last = [], 0
+    for found in (pattern.finditer(snippet) if pattern else ()):
+        parts.append(escape(snippet[last:found.start()]))
+        parts.append(f"<mark>{escape(found.group())}</mark>")
+        last = found.end()
+    parts.append(escape(snippet[last:]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+def search_forum(topics, comments, query: str, page: int = 1,
+                 per_page: int = PAGE_SIZE) -> dict:
+    """
+    Returns one page of topics matching `query`, most relevant first.
+
+    Args:
+        topics (Collection): The forum topics collection.
+        comments (Collection): The forum comments collection.
+        query (str): The search query, in `$text` syntax.
+        page (int): The 1-based page number, clamped to `MAX_PAGE`.
+        per_page (int): Topics per page (default: `PAGE_SIZE`).
+
+    Returns:
+        dict: {"hits": [...], "page": int, "has_next": bool}. Each hit is
+        {"topic": topic document, "score": float, "title": snippet, "snippet":
+        snippet of the topic body, "matches": number of matching comments,
+        "comments": [{"_id", "creator", "created_at", "snippet"}, ...]}.
+    """
+    page = max(1, min(page, MAX_PAGE))
+    limit = page * per_page + 1
+    text = {"$text": {"$search": query}}
+    hits = {}
+
+    for topic in (
+        topics.find(text, dict(_TOPIC_FIELDS, score={"$meta": "textScore"}))
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+    ):
+        hits[topic["_id"]] = _hit(topic, topic.pop("score"))
+
+    for group in comments.aggregate(
+        [
+            {"$match": text},
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {
+                "$group": {
+                    "_id": "$topic_id",
+                    "score": {"$max": {"$meta": "textScore"}},
+                    "matches": {"$sum": 1},
+                    "comments": {
+                        "$push": {
+                            "_id": "$_id",
+                            "content": "$content",
+                            "creator": "$creator",
+                            "created_at": "$created_at",
+                        }
+                    },
+                }
+            },
+            {"$sort": {"score": -1}},
+            {"$limit": limit},
+            {"$project": {"score": 1, "matches": 1,
+                          "comments": {"$slice": ["$comments", COMMENTS_PER_HIT]}}},
+        ],
+        allowDiskUse=True,
+    ):
+        hit = hits.setdefault(group["_id"], _hit(None, 0))
+        hit["score"] = max(hit["score"], group["score"])
+        hit["matches"] = group["matches"]
+        hit["comments"] = group["comments"]
+
+    missing = [topic_id for topic_id, hit in hits.items() if hit["topic"] is None]
+    if missing:
+        for topic in topics.find({"_id": {"$in": missing}}, _TOPIC_FIELDS):
+            hits[topic["_id"]]["topic"] = topic
+
+    ranked = sorted(
+        (hit for hit in hits.values() if hit["topic"] is not None),
+        key=lambda hit: hit["score"],
+        reverse=True,
+    )
+    page_hits = ranked[(page - 1) * per_page: page * per_page]
+    terms = query_terms(query)
+    for hit in page_hits:
+        topic = hit["topic"]
+        hit["title"] = highlight(topic.get("title"), terms, width=len(topic.get("title") or ""))
+        hit["snippet"] = highlight(topic.get("content"), terms)
+        for comment in hit["comments"]:
+            comment["snippet"] = highlight(comment.pop("content", ""), terms)
+    return {"hits": page_hits, "page": page, "has_next": len(ranked) > page * per_page}
+
+
+def _hit(topic, score: float) -> dict:
+    """
+    Returns an empty search hit for a topic.
+    """
+    return {"topic": topic, "score": score, "matches": 0, "comments": []}
+
+
+def _pattern(terms: list):
+    """
+    Returns a regex matching words that start with the stem of any term, or None.
+    """
+    stems = []
+    for term in terms:
+        for suffix in _SUFFIXES:
+            if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+                term = term[: -len(suffix)]
+                break
+        stems.append(re.escape(term))
+    if not stems:
+        return None
+    stems.sort(key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(stems) + r")\w*", re.IGNORECASE)
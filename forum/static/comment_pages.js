@@ -0,0 +1,125 @@
+// Loads older and newer pages of a topic's comments from /forum/topic/<id>/comments/,
+// using the keyset cursors kept on the #comments list, and appends new comments as
+// they arrive on the topic's Server-Sent Events stream. Where the stream is not
+// served, newer comments are polled for instead. Archived topics (data-archived) are
+// read-only: only their older comments are loaded, from the archive.
+document.addEventListener("DOMContentLoaded", function () {
+    const list = document.getElementById("comments");
+    if (!list) {
+        return;
+    }
+    const olderButton = document.querySelector("[data-load-older]");
+    const newerButton = document.querySelector("[data-load-newer]");
+
+    function load(params) {
+        params.set("format", "html");
+        if ("archived" in list.dataset) {
+            params.set("archived", "1");
+        }
+        return fetch(list.dataset.url + "?" + params.toString())
+            .then(function (response) { return response.ok ? response.text() : ""; })
+            .then(function (html) {
+                const template = document.createElement("template");
+                template.innerHTML = html.trim();
+                return template.content.querySelector("[data-comment-page]");
+            });
+    }
+
+    olderButton.addEventListener("click", function () {
+        load(new URLSearchParams({ before: list.dataset.older })).then(function (page) {
+            if (!page) {
+                return;
+            }
+            list.prepend(...page.children);
+            list.dataset.older = page.dataset.older;
+            olderButton.hidden = page.dataset.hasOlder !== "true";
+        });
+    });
+
+    // Cursors are "<epoch ms>-<comment id>"; ids of the same length sort as strings.
+    function isAfter(cursor, other) {
+        if (!other) {
+            return true;
+        }
+        const [millis, id] = cursor.split("-");
+        const [otherMillis, otherId] = other.split("-");
+        return Number(millis) > Number(otherMillis)
+            || (Number(millis) === Number(otherMillis) && id > otherId);
+    }
+
+    function append(items, newer) {
+        const fresh = items.filter(function (item) {
+            return !list.querySelector('[data-comment-id="' + item.dataset.commentId + '"]');
+        });
+        if (!fresh.length) {
+            return;
+        }
+        const empty = list.querySelector("[data-no-comments]");
+        if (empty) {
+            empty.remove();
+        }
+        list.append(...fresh);
+        if (newer && isAfter(newer, list.dataset.newer)) {
+            list.dataset.newer = newer;
+        }
+    }
+
+    function loadNewer() {
+        const params = new URLSearchParams();
+        if (list.dataset.newer) {
+            params.set("after", list.dataset.newer);
+        }
+        return load(params).then(function (page) {
+            if (!page || !page.children.length) {
+                return;
+            }
+            if (!list.dataset.older) {
+                list.dataset.older = page.dataset.older;
+            }
+            append(Array.from(page.children), page.dataset.newer);
+        });
+    }
+
+    function render(comment) {
+        const item = document.createElement("li");
+        item.className = "mb-3";
+        item.dataset.commentId = comment.id;
+        const card = document.createElement("div");
+        card.className = "card p-3";
+        const content = document.createElement("div");
+        if (comment.content_html !== null) {
+            // Rendered and escaped by the server when the comment was posted.
+            content.innerHTML = comment.content_html;
+        } else {
+            content.textContent = comment.content;
+        }
+        const meta = document.createElement("small");
+        meta.className = "text-muted";
+        meta.textContent = "By " + comment.creator + " on "
+            + new Date(comment.created_at).toLocaleString();
+        card.append(content, meta);
+        item.append(card);
+        return item;
+    }
+
+    if ("archived" in list.dataset) {
+        return;
+    }
+    newerButton.addEventListener("click", loadNewer);
+
+    if (!window.EventSource || !list.dataset.stream) {
+        setInterval(loadNewer, 15000);
+        return;
+    }
+    const stream = new EventSource(list.dataset.stream + "?"
+        + new URLSearchParams(list.dataset.newer ? { after: list.dataset.newer } : {}));
+    stream.addEventListener("comment", function (event) {
+        append([render(JSON.parse(event.data))], event.lastEventId);
+    });
+    stream.addEventListener("error", function () {
+        // A closed stream is not served here (e.g. under WSGI); poll instead.
+        if (stream.readyState === EventSource.CLOSED) {
+            setInterval(loadNewer, 15000);
+        }
+    });
+});
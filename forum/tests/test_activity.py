@@ -0,0 +1,116 @@
+"""
+Unit tests for comment counts and last activity on forum topics.
+
+These tests verify that posting a comment increments the topic's `comment_count`
+and moves `last_activity_at` forward, that topic lists are ordered by activity, and
+that `repair_topic_activity` rebuilds both fields from the comments collection.
+"""
+
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.activity import record_comment
+
+
+class TopicActivityTestCase(TestCase):
+    """
+    Test cases for `comment_count` and `last_activity_at`.
+    """
+
+    def setUp(self):
+        """
+        Creates two topics for one ride, the older one first.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        start = datetime(2024, 11, 1)
+        self.old_id, self.new_id = (
+            self.db.topics.insert_one(
+                {"ride_id": "RDU", "title": title, "created_at": created_at,
+                 "comment_count": 0, "last_activity_at": created_at}
+            ).inserted_id
+            for title, created_at in (("Old", start), ("New", start + timedelta(days=1)))
+        )
+        self.client = Client()
+        session = self.client.session
+        session["username"] = "user1"
+        session.save()
+
+    def test_record_comment_never_moves_back(self):
+        """
+        Each comment is counted, and an out-of-order one does not rewind activity.
+        """
+        later, earlier = datetime(2024, 11, 5), datetime(2024, 11, 3)
+
+        record_comment(self.db.topics, self.old_id, later)
+        record_comment(self.db.topics, self.old_id, earlier)
+
+        topic = self.db.topics.find_one({"_id": self.old_id})
+        self.assertEqual(topic["comment_count"], 2)
+        self.assertEqual(topic["last_activity_at"], later)
+        self.assertFalse(record_comment(self.db.topics, ObjectId(), later))
+
+    @patch("forum.views.get_client")
+    def test_comment_bumps_topic_to_top(self, mock_get_client):
+        """
+        Commenting on the older topic moves it to the top of both topic lists.
+        """
+        mock_get_client.return_value = self.mock_client
+        self.db.routes.insert_one({"destination": "RDU"})
+
+        self.client.post(
+            reverse("add_comment", args=[str(self.old_id)]), {"content": "Hi"})
+
+        topics = self.client.get(reverse("forum_topics", args=["RDU"])).context["topics"]
+        self.assertEqual([t["title"] for t in topics], ["Old", "New"])
+        self.assertEqual(topics[0]["comment_count"], 1)
+        listing = self.client.get(reverse("rides_with_topics")).context["rides_with_topics"]
+        self.assertEqual(
+            [(t["title"], t["comment_count"]) for t in listing[0]["topics"]],
+            [("Old", 1), ("New", 0)],
+        )
+
+    @patch("forum.views.get_client")
+    def test_new_topic_has_activity_fields(self, mock_get_client):
+        """
+        New topics start with no comments and their creation time as last activity.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.client.post(
+            reverse("create_topic"), {"ride_id": "RDU", "title": "Fresh", "content": "Body"})
+
+        topic = self.db.topics.find_one({"title": "Fresh"})
+        self.assertEqual(topic["comment_count"], 0)
+        self.assertEqual(topic["last_activity_at"], topic["created_at"])
+
+    @patch("forum.management.commands.repair_topic_activity.get_client")
+    def test_repair_recomputes_from_comments(self, mock_get_client):
+        """
+        The repair command recounts comments and restores the latest activity time.
+        """
+        mock_get_client.return_value = self.mock_client
+        legacy_id = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Legacy", "created_at": datetime(2024, 10, 1)}
+        ).inserted_id
+        self.db.topics.update_one({"_id": self.new_id}, {"$set": {"comment_count": 7}})
+        latest = datetime(2024, 11, 20)
+        self.db.comments.insert_many(
+            [{"topic_id": legacy_id, "created_at": datetime(2024, 10, 2)},
+             {"topic_id": legacy_id, "created_at": latest}]
+        )
+
+        call_command("repair_topic_activity", stdout=open(os.devnull, "w"))
+
+        legacy = self.db.topics.find_one({"_id": legacy_id})
+        self.assertEqual((legacy["comment_count"], legacy["last_activity_at"]), (2, latest))
+        new = self.db.topics.find_one({"_id": self.new_id})
+        self.assertEqual(new["comment_count"], 0)
+        self.assertEqual(new["last_activity_at"], new["created_at"])
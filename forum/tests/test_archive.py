@@ -0,0 +1,110 @@
+"""
+Unit tests for archiving inactive forum topics.
+
+These tests verify that `archive_topics` moves idle topics with their comments and
+keeps active ones, and that an archived topic's page and comments are still served,
+read-only, from the archive, and that `render_forum_content` renders archived posts.
+"""
+
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.archive import archive_topics
+
+
+class ArchiveTopicsTestCase(TestCase):
+    """
+    Test cases for `archive_topics` and reading archived topics.
+    """
+
+    def setUp(self):
+        """
+        Creates an idle topic, an unrepaired old topic and an active one, with comments.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.now = datetime(2024, 12, 1)
+        self.idle = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Idle", "content": "old trip",
+             "created_at": datetime(2024, 1, 1),
+             "last_activity_at": datetime(2024, 2, 1)}).inserted_id
+        self.legacy = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Legacy", "created_at": datetime(2023, 5, 1)}).inserted_id
+        self.active = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Active", "created_at": datetime(2024, 1, 1),
+             "last_activity_at": datetime(2024, 11, 1)}).inserted_id
+        for topic_id, day in [(self.idle, 1), (self.idle, 2), (self.active, 3)]:
+            self.db.comments.insert_one(
+                {"topic_id": topic_id, "content": f"c{day}", "creator": "amy",
+                 "created_at": datetime(2024, 2, day)})
+
+    def test_moves_idle_topics_with_comments(self):
+        """
+        Idle topics and their comments are moved; the active topic stays.
+        """
+        archived = archive_topics(self.db, months=6, now=self.now, batch_size=1)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual([t["_id"] for t in self.db.topics.find()], [self.active])
+        self.assertEqual(
+            {t["_id"] for t in self.db.topicsArchive.find()}, {self.idle, self.legacy})
+        self.assertEqual([c["topic_id"] for c in self.db.comments.find()], [self.active])
+        self.assertEqual(self.db.commentsArchive.count_documents({"topic_id": self.idle}), 2)
+
+    @patch("forum.views.get_client")
+    def test_archived_topic_is_read_only(self, mock_get_client):
+        """
+        An archived topic's page shows its comments without the form or stream, and
+        its comment pages are read from the archive.
+        """
+        mock_get_client.return_value = self.mock_client
+        archive_topics(self.db, months=6, now=self.now)
+
+        page = Client().get(reverse("forum_topic_details", args=[self.idle]))
+        comments = Client().get(reverse("topic_comments", args=[self.idle]),
+                                {"archived": "1"}).json()
+
+        self.assertTrue(page.context["archived"])
+        self.assertContains(page, "c2")
+        self.assertContains(page, "data-archived")
+        self.assertNotContains(page, reverse("add_comment", args=[self.idle]))
+        self.assertNotContains(page, "data-stream")
+        self.assertEqual([c["content"] for c in comments["comments"]], ["c1", "c2"])
+
+    @patch("forum.views.get_client")
+    def test_comment_on_archived_topic(self, mock_get_client):
+        """
+        Posting a comment to an archived topic answers 404 and stores nothing.
+        """
+        mock_get_client.return_value = self.mock_client
+        archive_topics(self.db, months=6, now=self.now)
+        client = Client()
+        session = client.session
+        session["username"] = "amy"
+        session.save()
+
+        response = client.post(reverse("add_comment", args=[self.idle]), {"content": "late"})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.db.comments.count_documents({"topic_id": self.idle}), 0)
+
+    @patch("forum.management.commands.render_forum_content.get_client")
+    def test_render_archived_posts(self, mock_get_client):
+        """
+        Archived topics and comments are rendered by the backfill.
+        """
+        mock_get_client.return_value = self.mock_client
+        archive_topics(self.db, months=6, now=self.now)
+
+        call_command("render_forum_content", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(self.db.topicsArchive.find_one({"_id": self.idle})["content_html"],
+                         "<p>old trip</p>")
+        self.assertEqual(self.db.commentsArchive.find_one({"content": "c1"})["content_html"],
+                         "<p>c1</p>")
@@ -0,0 +1,175 @@
+"""
+Unit tests for keyset-paginated forum comments.
+
+These tests verify that `comments_page` walks a topic's comments backwards and
+forwards without skipping or repeating any, including comments posted at the same
+millisecond, and that the `topic_comments` endpoint serves pages as JSON and as an
+HTML fragment.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.comments import comments_page, decode_cursor, encode_cursor
+
+
+class CommentsPageTestCase(TestCase):
+    """
+    Test cases for `comments_page`.
+    """
+
+    def setUp(self):
+        """
+        Creates 45 comments on a topic, in pairs sharing a timestamp, and one elsewhere.
+        """
+        self.comments = mongomock.MongoClient().SEProject.comments
+        self.topic_id = ObjectId()
+        start = datetime(2024, 11, 1, 12, 0)
+        self.comments.insert_many(
+            [
+                {"topic_id": self.topic_id, "content": f"Comment {i}",
+                 "created_at": start + timedelta(seconds=i // 2)}
+                for i in range(45)
+            ]
+            + [{"topic_id": ObjectId(), "content": "Elsewhere", "created_at": start}]
+        )
+        self.ordered = [
+            c["content"] for c in self.comments.find({"topic_id": self.topic_id})
+            .sort([("created_at", 1), ("_id", 1)])
+        ]
+
+    def test_latest_page(self):
+        """
+        Without a cursor the newest comments are returned, oldest first.
+        """
+        page = comments_page(self.comments, self.topic_id, limit=10)
+
+        self.assertEqual([c["content"] for c in page["comments"]], self.ordered[-10:])
+        self.assertTrue(page["has_older"])
+        self.assertFalse(page["has_newer"])
+
+    def test_walk_back_then_forward(self):
+        """
+        Following `older` reaches every comment once; following `newer` comes back.
+        """
+        page = comments_page(self.comments, self.topic_id, limit=10)
+        seen = [c["content"] for c in page["comments"]]
+        while page["has_older"]:
+            page = comments_page(self.comments, self.topic_id, before=page["older"], limit=10)
+            seen = [c["content"] for c in page["comments"]] + seen
+        self.assertEqual(seen, self.ordered)
+        self.assertEqual(len(page["comments"]), 5)
+
+        forward = []
+        while page["has_newer"]:
+            page = comments_page(self.comments, self.topic_id, after=page["newer"], limit=10)
+            forward += [c["content"] for c in page["comments"]]
+        self.assertEqual(forward, self.ordered[5:])
+
+    def test_new_comment_after_cursor(self):
+        """
+        Comments posted after the page are returned by `after` the newest cursor.
+        """
+        page = comments_page(self.comments, self.topic_id, limit=10)
+        self.comments.insert_one(
+            {"topic_id": self.topic_id, "content": "New", "created_at": datetime(2024, 11, 2)})
+
+        newer = comments_page(self.comments, self.topic_id, after=page["newer"])
+
+        self.assertEqual([c["content"] for c in newer["comments"]], ["New"])
+        self.assertFalse(newer["has_newer"])
+
+    def test_cursor_round_trip(self):
+        """
+        A cursor names the exact timestamp and ID of its comment.
+        """
+        comment = self.comments.find_one({"topic_id": self.topic_id})
+
+        self.assertEqual(
+            decode_cursor(encode_cursor(comment)), (comment["created_at"], comment["_id"]))
+        with self.assertRaises(ValueError):
+            decode_cursor("yesterday-abc")
+
+
+class TopicCommentsViewTestCase(TestCase):
+    """
+    Test cases for the `topic_comments` endpoint.
+    """
+
+    def setUp(self):
+        """
+        Creates a topic with 30 comments.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.topic_id = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Topic", "content": "Body", "creator": "user1",
+             "created_at": datetime(2024, 11, 1)}
+        ).inserted_id
+        self.db.comments.insert_many(
+            [
+                {"topic_id": self.topic_id, "content": f"Comment {i}", "creator": "user2",
+                 "created_at": datetime(2024, 11, 1) + timedelta(minutes=i)}
+                for i in range(30)
+            ]
+        )
+        self.url = reverse("topic_comments", args=[str(self.topic_id)])
+
+    @patch("forum.views.get_client")
+    def test_json_pages(self, mock_get_client):
+        """
+        The endpoint returns the latest page, then the one before it.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        latest = Client().get(self.url).json()
+        older = Client().get(self.url, {"before": latest["older"]}).json()
+
+        self.assertEqual(len(latest["comments"]), 20)
+        self.assertEqual(latest["comments"][-1]["content"], "Comment 29")
+        self.assertEqual([c["content"] for c in older["comments"]],
+                         [f"Comment {i}" for i in range(10)])
+        self.assertFalse(older["has_older"])
+
+    @patch("forum.views.get_client")
+    def test_html_fragment(self, mock_get_client):
+        """
+        `format=html` renders just the comment list with its cursors.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = Client().get(self.url, {"format": "html", "limit": 5})
+
+        self.assertTemplateUsed(response, "forum/comment_list.html")
+        self.assertContains(response, "Comment 29")
+        self.assertNotContains(response, "Comment 24")
+        self.assertContains(response, 'data-has-older="true"')
+
+    @patch("forum.views.get_client")
+    def test_invalid_cursor(self, mock_get_client):
+        """
+        A malformed cursor is rejected with status 400.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = Client().get(self.url, {"after": "nonsense"})
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch("forum.views.get_client")
+    def test_topic_page_shows_latest_comments(self, mock_get_client):
+        """
+        The topic page renders only the latest page and offers older comments.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = Client().get(reverse("forum_topic_details", args=[str(self.topic_id)]))
+
+        self.assertEqual(len(response.context["comments"]), 20)
+        self.assertNotContains(response, "Comment 9<")
+        self.assertTrue(response.context["page"]["has_older"])
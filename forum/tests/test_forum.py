@@ -674,3 +674,26 @@ class ForumViewsTestCase(TestCase):
 
     if __name__ == "__main__":
         unittest.main()
+
+
+class CreateTopicDestinationsTestCase(TestCase):
+    """
+    Test cases for the destination dropdown of `create_topic`.
+    """
+
+    @patch("forum.views.destination_index")
+    @patch("forum.views.get_client")
+    def test_destinations_from_index(self, mock_get_client, mock_index):
+        """
+        The dropdown lists the indexed destinations without reading any route.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        mock_index.return_value.names.return_value = ["Apex", "cary"]
+
+        with patch.object(mock_client.SEProject.routes, "find") as mock_find:
+            response = Client().get(reverse("create_topic"))
+
+        self.assertEqual(response.context["destinations"], ["Apex", "cary"])
+        self.assertContains(response, '<option value="cary">cary</option>', html=True)
+        mock_find.assert_not_called()
@@ -0,0 +1,138 @@
+"""
+Unit tests for the forum's destination listing.
+
+These tests verify that `destinations_page` lists each destination once, in order
+and in pages, with its latest topics grouped from a single aggregation, and that
+the number of queries does not grow with the number of destinations.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.listing import TOPICS_PER_RIDE, destinations_page
+
+
+class DestinationsPageTestCase(TestCase):
+    """
+    Test cases for `destinations_page`.
+    """
+
+    def setUp(self):
+        """
+        Creates routes to 25 destinations, two routes each, and topics for some of them.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.names = [f"Destination {i:02d}" for i in range(25)]
+        self.db.routes.insert_many(
+            [{"_id": ObjectId(), "destination": name} for name in self.names * 2]
+        )
+        start = datetime(2024, 11, 1)
+        self.db.topics.insert_many(
+            [
+                {"ride_id": "Destination 00", "title": f"Topic {i}",
+                 "created_at": start + timedelta(hours=i)}
+                for i in range(TOPICS_PER_RIDE + 2)
+            ]
+            + [{"ride_id": "Destination 01", "title": "Only",
+                "created_at": start}]
+        )
+
+    def test_pages_of_unique_destinations(self):
+        """
+        Destinations appear once each, alphabetically, split into pages.
+        """
+        first = destinations_page(self.db.routes, self.db.topics, 1, per_page=10)
+        last = destinations_page(self.db.routes, self.db.topics, 3, per_page=10)
+
+        self.assertEqual([r["destination"] for r in first["rides"]], self.names[:10])
+        self.assertEqual([r["destination"] for r in last["rides"]], self.names[20:])
+        self.assertEqual(first["pages"], 3)
+        self.assertTrue(first["has_next"])
+        self.assertFalse(first["has_previous"])
+        self.assertFalse(last["has_next"])
+
+    def test_out_of_range_page_is_clamped(self):
+        """
+        Pages past the end show the last page.
+        """
+        listing = destinations_page(self.db.routes, self.db.topics, 99, per_page=10)
+
+        self.assertEqual(listing["page"], 3)
+
+    def test_latest_topics_grouped(self):
+        """
+        Each destination gets its newest topics, capped, with the full count.
+        """
+        rides = destinations_page(self.db.routes, self.db.topics)["rides"]
+
+        busy, quiet, empty = rides[0], rides[1], rides[2]
+        self.assertEqual(busy["topic_count"], TOPICS_PER_RIDE + 2)
+        self.assertEqual(len(busy["topics"]), TOPICS_PER_RIDE)
+        self.assertEqual(busy["topics"][0]["title"], f"Topic {TOPICS_PER_RIDE + 1}")
+        self.assertIn("id", busy["topics"][0])
+        self.assertEqual([t["title"] for t in quiet["topics"]], ["Only"])
+        self.assertEqual((empty["topics"], empty["topic_count"]), ([], 0))
+
+    def test_query_count_does_not_grow(self):
+        """
+        A page of 25 destinations costs one distinct and one aggregation.
+        """
+        routes, topics = self.db.routes, self.db.topics
+        with patch.object(routes, "distinct", wraps=routes.distinct) as distinct, \
+                patch.object(topics, "aggregate", wraps=topics.aggregate) as aggregate:
+            destinations_page(routes, topics, per_page=25)
+
+        self.assertEqual(distinct.call_count, 1)
+        self.assertEqual(aggregate.call_count, 1)
+
+
+class RidesWithTopicsViewTestCase(TestCase):
+    """
+    Test cases for the paginated `rides_with_topics` view.
+    """
+
+    @patch("forum.views.get_client")
+    def test_page_parameter(self, mock_get_client):
+        """
+        The view renders the requested page and tolerates a bad page number.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        mock_client.SEProject.routes.insert_many(
+            [{"destination": f"Destination {i:02d}"} for i in range(30)]
+        )
+
+        second = Client().get(reverse("rides_with_topics"), {"page": "2"})
+        invalid = Client().get(reverse("rides_with_topics"), {"page": "x"})
+
+        self.assertEqual(second.context["listing"]["page"], 2)
+        self.assertEqual(
+            second.context["rides_with_topics"][0]["destination"], "Destination 20")
+        self.assertContains(second, "Page 2 of 2")
+        self.assertEqual(invalid.context["listing"]["page"], 1)
+
+    @patch("forum.views.get_client")
+    def test_destination_with_slash(self, mock_get_client):
+        """
+        A destination containing "/" links to its topic list, which serves its topics.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        db = mock_client.SEProject
+        db.routes.insert_one({"destination": "Raleigh/Durham"})
+        db.topics.insert_many(
+            [{"ride_id": "Raleigh/Durham", "title": f"Topic {i}",
+              "created_at": datetime(2024, 1, i + 1)} for i in range(TOPICS_PER_RIDE + 1)])
+
+        listing = Client().get(reverse("rides_with_topics"))
+        url = reverse("forum_topics", args=["Raleigh/Durham"])
+        topics = Client().get(url)
+
+        self.assertContains(listing, f'href="{url}"')
+        self.assertEqual(len(topics.context["topics"]), TOPICS_PER_RIDE + 1)
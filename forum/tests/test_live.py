@@ -0,0 +1,263 @@
+"""
+Unit tests for live comment streaming.
+
+These tests verify that the comment broker delivers comments published from other
+threads, that `stream_comments` sends pushed comments at once and picks up comments
+stored by other processes when it polls, without repeating any, that event ids only
+advance to polled positions, that streams share one database client, and that
+`add_comment` and the ASGI application are wired to them.
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum import live
+from forum.comments import encode_cursor
+from forum.live import CommentBroker, broker, stream_comments
+
+
+class CommentBrokerTestCase(TestCase):
+    """
+    Test cases for `CommentBroker`.
+    """
+
+    def test_publish_from_thread(self):
+        """
+        A comment published from another thread reaches the topic's subscribers only.
+        """
+        hub = CommentBroker()
+
+        async def run():
+            queue = hub.subscribe("t1")
+            other = hub.subscribe("t2")
+            thread = threading.Thread(target=hub.publish, args=("t1", {"content": "hi"}))
+            thread.start()
+            comment = await asyncio.wait_for(queue.get(), 1)
+            thread.join()
+            hub.unsubscribe("t1", queue)
+            return comment, other.empty(), hub.subscribers("t1"), hub.subscribers("t2")
+
+        self.assertEqual(asyncio.run(run()), ({"content": "hi"}, True, 0, 1))
+
+    def test_full_queue_drops(self):
+        """
+        Pushes to a full queue are dropped instead of blocking the publisher.
+        """
+        hub = CommentBroker()
+
+        async def run():
+            queue = hub.subscribe("t1")
+            for i in range(queue.maxsize + 5):
+                hub.publish("t1", {"n": i})
+            await asyncio.sleep(0)
+            return queue.qsize(), queue.maxsize
+
+        size, maxsize = asyncio.run(run())
+        self.assertEqual(size, maxsize)
+
+
+class StreamCommentsTestCase(TestCase):
+    """
+    Test cases for `stream_comments`.
+    """
+
+    def setUp(self):
+        """
+        Creates a topic with one existing comment.
+        """
+        self.comments = mongomock.MongoClient().SEProject.comments
+        self.topic_id = ObjectId()
+        self.start = datetime(2024, 11, 1, 12, 0)
+        self.comments.insert_one(
+            {"topic_id": self.topic_id, "content": "Old", "created_at": self.start})
+
+    def add(self, content, minutes, publish):
+        """
+        Stores a comment, publishing it as `add_comment` does if `publish` is set.
+        """
+        comment = {"topic_id": self.topic_id, "content": content,
+                   "created_at": self.start + timedelta(minutes=minutes)}
+        self.comments.insert_one(comment)
+        if publish:
+            broker.publish(str(self.topic_id), comment)
+
+    def run_stream(self, script, headers=(), query=b""):
+        """
+        Runs a stream while `script` adds comments, then disconnects and returns the
+        response status and the data of the events sent.
+        """
+        messages = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        async def run():
+            scope = {"type": "http", "headers": list(headers), "query_string": query}
+            task = asyncio.ensure_future(stream_comments(
+                scope, receive, send, str(self.topic_id), self.comments, poll_seconds=0.05))
+            while broker.subscribers(str(self.topic_id)) == 0 and not task.done():
+                await asyncio.sleep(0.01)
+            await script()
+            disconnect.set()
+            await asyncio.wait_for(task, 2)
+
+        asyncio.run(run())
+        body = b"".join(m.get("body", b"") for m in messages[1:]).decode()
+        self.body = body
+        events = [
+            json.loads(line[len("data: "):])["content"]
+            for line in body.splitlines() if line.startswith("data: ")
+        ]
+        return messages[0]["status"], events
+
+    def test_pushed_and_polled(self):
+        """
+        Pushed comments are sent at once, others on the next poll, each only once.
+        """
+        async def script():
+            self.add("Pushed", 1, publish=True)
+            await asyncio.sleep(0.02)
+            self.add("Other process", 2, publish=False)
+            await asyncio.sleep(0.15)
+
+        status, events = self.run_stream(script)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(events, ["Pushed", "Other process"])
+        self.assertEqual(broker.subscribers(str(self.topic_id)), 0)
+
+    def test_event_ids_follow_polls(self):
+        """
+        A pushed comment does not move the event id past an unpolled comment from
+        another process; the id advances once the poll has sent it.
+        """
+        async def script():
+            self.add("Other process", 1, publish=False)
+            self.add("Pushed", 2, publish=True)
+            await asyncio.sleep(0.15)
+
+        status, events = self.run_stream(script)
+
+        self.assertEqual(events, ["Pushed", "Other process"])
+        lines = [line for line in self.body.splitlines()
+                 if line.startswith(("id: ", "data: "))]
+        first_id = next(i for i, line in enumerate(lines) if line.startswith("id: "))
+        self.assertIn("Other process", lines[first_id + 1])
+        ids = [line[len("id: "):] for line in lines if line.startswith("id: ")]
+        self.assertEqual(ids, [encode_cursor(self.comments.find_one({"content": content}))
+                               for content in ("Other process", "Pushed")])
+
+    def test_resume_after_last_event_id(self):
+        """
+        A reconnecting client gets the comments after its `Last-Event-ID`.
+        """
+        self.add("Missed", 1, publish=False)
+        cursor = f"{int((self.start - datetime(1970, 1, 1)).total_seconds() * 1000)}-"
+        cursor += str(self.comments.find_one({"content": "Old"})["_id"])
+
+        async def script():
+            await asyncio.sleep(0.1)
+
+        status, events = self.run_stream(
+            script, headers=[(b"last-event-id", cursor.encode())])
+
+        self.assertEqual(events, ["Missed"])
+
+    def test_invalid_cursor(self):
+        """
+        A malformed cursor is rejected with 400.
+        """
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(stream_comments(
+            {"type": "http", "query_string": b"after=nope"}, None, send,
+            str(self.topic_id), self.comments))
+
+        self.assertEqual(messages[0]["status"], 400)
+
+
+class SharedClientTestCase(TestCase):
+    """
+    Test cases for the database client used by streams.
+    """
+
+    @patch("forum.live.get_client")
+    def test_streams_share_client(self, mock_get_client):
+        """
+        The comments collection is built from one client, however many streams open.
+        """
+        mock_get_client.return_value = mongomock.MongoClient()
+
+        with patch.object(live, "_comments", None):
+            first = live._comments_collection()
+            second = live._comments_collection()
+
+        self.assertIs(first, second)
+        mock_get_client.assert_called_once()
+
+
+class LiveWiringTestCase(TestCase):
+    """
+    Test cases for publishing from `add_comment` and routing in the ASGI application.
+    """
+
+    @patch("forum.views.broker")
+    @patch("forum.views.get_client")
+    def test_add_comment_publishes(self, mock_get_client, mock_broker):
+        """
+        A stored comment is published to the topic's streams.
+        """
+        mock_get_client.return_value = mongomock.MongoClient()
+        topic_id = mock_get_client.return_value.SEProject.topics.insert_one(
+            {"ride_id": "RDU", "title": "Trip"}).inserted_id
+        client = Client()
+        session = client.session
+        session["username"] = "amy"
+        session.save()
+
+        client.post(reverse("add_comment", args=[topic_id]), {"content": "Hello"})
+
+        published_topic, comment = mock_broker.publish.call_args[0]
+        self.assertEqual(published_topic, str(topic_id))
+        self.assertEqual(comment["content"], "Hello")
+        self.assertIn("_id", comment)
+
+    def test_asgi_routes_stream(self):
+        """
+        Stream paths go to `stream_comments` and other requests to Django.
+        """
+        from PackTravel import asgi
+
+        async def noop(*args):
+            pass
+
+        with patch.object(asgi, "stream_comments") as stream, \
+                patch.object(asgi, "django_application") as django:
+            stream.side_effect = noop
+            django.side_effect = noop
+            topic_id = str(ObjectId())
+            asyncio.run(asgi.application(
+                {"type": "http", "method": "GET", "path": f"/forum/topic/{topic_id}/stream/"},
+                None, None))
+            asyncio.run(asgi.application(
+                {"type": "http", "method": "GET", "path": f"/forum/topic/{topic_id}/"},
+                None, None))
+
+        self.assertEqual(stream.call_args[0][3], topic_id)
+        self.assertEqual(django.call_count, 1)
@@ -0,0 +1,139 @@
+"""
+Unit tests for render-on-write forum posts.
+
+These tests verify that `render` escapes user text and applies the markdown subset,
+that `create_topic` and `add_comment` store the rendered HTML which the topic page
+emits as is, and that `render_forum_content` backfills older posts.
+"""
+
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.markup import VERSION, render
+
+
+class RenderTestCase(TestCase):
+    """
+    Test cases for `render`.
+    """
+
+    def test_escapes_html(self):
+        """
+        Markup in the text is escaped, including inside emphasis and code.
+        """
+        self.assertEqual(
+            render('<script>alert("x")</script> **<b>** `<i>`'),
+            "<p>&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; "
+            "<strong>&lt;b&gt;</strong> <code>&lt;i&gt;</code></p>",
+        )
+
+    def test_blocks(self):
+        """
+        Blank lines separate paragraphs, line breaks become `<br>` and bullet blocks lists.
+        """
+        self.assertEqual(
+            render("Leaving at *6*\nfrom Hunt\r\n\r\n- bring snacks\n* split gas\n"),
+            "<p>Leaving at <em>6</em><br>from Hunt</p>"
+            "<ul><li>bring snacks</li><li>split gas</li></ul>",
+        )
+
+    def test_links(self):
+        """
+        URLs become links without trailing punctuation; code spans are not formatted.
+        """
+        self.assertEqual(
+            render("Map: https://maps.example.com/?a=1&b=2. `**raw** http://x`"),
+            '<p>Map: <a href="https://maps.example.com/?a=1&amp;b=2" rel="nofollow noopener"'
+            ' target="_blank">https://maps.example.com/?a=1&amp;b=2</a>. '
+            "<code>**raw** http://x</code></p>",
+        )
+
+    def test_empty(self):
+        """
+        Missing or blank text renders to nothing.
+        """
+        self.assertEqual(render(None), "")
+        self.assertEqual(render("  \n "), "")
+
+
+class RenderOnWriteTestCase(TestCase):
+    """
+    Test cases for storing and showing rendered posts.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client and a mocked database.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.client = Client()
+        session = self.client.session
+        session["username"] = "amy"
+        session.save()
+
+    @patch("forum.views.get_client")
+    def test_posts_store_html(self, mock_get_client):
+        """
+        New topics and comments store their HTML, and the topic page emits it.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.client.post(reverse("create_topic"),
+                         {"ride_id": "RDU", "title": "Trip", "content": "**Friday**"})
+        topic = self.db.topics.find_one()
+        self.client.post(reverse("add_comment", args=[topic["_id"]]),
+                         {"content": "I'm in <3"})
+        comment = self.db.comments.find_one()
+        response = self.client.get(reverse("forum_topic_details", args=[topic["_id"]]))
+
+        self.assertEqual(
+            (topic["content_html"], topic["content_version"]),
+            ("<p><strong>Friday</strong></p>", VERSION),
+        )
+        self.assertEqual(comment["content_html"], "<p>I&#x27;m in &lt;3</p>")
+        self.assertContains(response, "<strong>Friday</strong>")
+        self.assertContains(response, "<p>I&#x27;m in &lt;3</p>")
+
+    @patch("forum.views.get_client")
+    def test_unrendered_posts_are_escaped(self, mock_get_client):
+        """
+        Posts from before rendering on write are still shown escaped.
+        """
+        mock_get_client.return_value = self.mock_client
+        topic_id = self.db.topics.insert_one(
+            {"ride_id": "RDU", "title": "Old", "content": "<b>old</b>",
+             "created_at": datetime(2024, 1, 1)}).inserted_id
+
+        response = self.client.get(reverse("forum_topic_details", args=[topic_id]))
+
+        self.assertContains(response, "&lt;b&gt;old&lt;/b&gt;")
+
+    @patch("forum.management.commands.render_forum_content.get_client")
+    def test_backfill(self, mock_get_client):
+        """
+        The command renders posts that are missing or outdated and skips current ones.
+        """
+        mock_get_client.return_value = self.mock_client
+        old_id = self.db.comments.insert_one(
+            {"topic_id": ObjectId(), "content": "*old*"}).inserted_id
+        self.db.comments.insert_one(
+            {"topic_id": ObjectId(), "content": "*new*", "content_html": "kept",
+             "content_version": VERSION})
+        self.db.topics.insert_one(
+            {"content": "t", "content_html": "stale", "content_version": VERSION - 1})
+
+        call_command("render_forum_content", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(self.db.comments.find_one({"_id": old_id})["content_html"],
+                         "<p><em>old</em></p>")
+        self.assertEqual(self.db.comments.find_one({"content": "*new*"})["content_html"],
+                         "kept")
+        self.assertEqual(self.db.topics.find_one()["content_html"], "<p>t</p>")
@@ -0,0 +1,218 @@
+"""
+Unit tests for full-text forum search.
+
+mongomock does not implement `$text`, so `search_forum` is tested against mocked
+collections returning what MongoDB would, the snippet helpers are tested directly,
+and the view is tested with the search function patched.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from forum.search import (TOPIC_WEIGHTS, ensure_indexes, highlight, query_terms,
+                          search_forum)
+
+
+class SnippetTestCase(TestCase):
+    """
+    Test cases for `query_terms` and `highlight`.
+    """
+
+    def test_query_terms(self):
+        """
+        Phrase words are kept, negations dropped and duplicates removed.
+        """
+        self.assertEqual(
+            query_terms('Airport "early flight" -bus airport -"late night"'),
+            ["airport", "early", "flight"],
+        )
+
+    def test_highlight_marks_and_escapes(self):
+        """
+        Matches, including stemmed forms, are marked and the text is escaped.
+        """
+        snippet = highlight("Sharing <b>rides</b> to the airport", ["ride", "airports"])
+        self.assertEqual(
+            snippet,
+            "Sharing &lt;b&gt;<mark>rides</mark>&lt;/b&gt; to the <mark>airport</mark>",
+        )
+
+    def test_highlight_cuts_around_first_match(self):
+        """
+        A long text is cut at word boundaries around the first match.
+        """
+        text = "word " * 100 + "airport " + "word " * 100
+        snippet = highlight(text, ["airport"], width=60)
+
+        self.assertTrue(snippet.startswith("…word"))
+        self.assertTrue(snippet.endswith("…"))
+        self.assertIn("<mark>airport</mark>", snippet)
+        self.assertLessEqual(len(snippet), 60 + len("<mark></mark>") + 2)
+
+    def test_highlight_without_match(self):
+        """
+        A text without matches gives its beginning.
+        """
+        self.assertEqual(highlight("a b c", ["zzz"], width=3), "a b…")
+        self.assertEqual(highlight(None, ["zzz"]), "")
+
+
+class SearchForumTestCase(TestCase):
+    """
+    Test cases for `search_forum`.
+    """
+
+    def setUp(self):
+        """
+        Creates mocked collections: topic `a` matches itself, topic `b` only
+        through comments and topic `c` both ways.
+        """
+        self.a, self.b, self.c = ObjectId(), ObjectId(), ObjectId()
+        self.topics = MagicMock()
+        self.comments = MagicMock()
+        self.cursor = cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.__iter__.return_value = iter([
+            {"_id": self.a, "title": "Airport ride", "content": "Going to the airport",
+             "score": 3.0},
+            {"_id": self.c, "title": "Parking", "content": "Airport parking", "score": 1.0},
+        ])
+        self.topics.find.side_effect = [
+            cursor,
+            [{"_id": self.b, "title": "Friday", "content": "Anyone?"}],
+        ]
+        self.comments.aggregate.return_value = [
+            {"_id": self.b, "score": 4.0, "matches": 5, "comments": [
+                {"_id": ObjectId(), "content": "The airport at 6", "creator": "amy",
+                 "created_at": datetime(2024, 11, 1)}]},
+            {"_id": self.c, "score": 2.0, "matches": 1, "comments": [
+                {"_id": ObjectId(), "content": "airport lot B", "creator": "bo",
+                 "created_at": datetime(2024, 11, 1)}]},
+        ]
+
+    def test_ranked_and_grouped(self):
+        """
+        Hits are grouped by topic and ranked by their best score.
+        """
+        results = search_forum(self.topics, self.comments, "airport")
+
+        hits = results["hits"]
+        self.assertEqual([hit["topic"]["_id"] for hit in hits], [self.b, self.a, self.c])
+        self.assertEqual([hit["score"] for hit in hits], [4.0, 3.0, 2.0])
+        self.assertEqual(hits[0]["matches"], 5)
+        self.assertEqual(hits[0]["comments"][0]["snippet"], "The <mark>airport</mark> at 6")
+        self.assertNotIn("content", hits[0]["comments"][0])
+        self.assertEqual(hits[1]["title"], "<mark>Airport</mark> ride")
+        self.assertEqual(hits[1]["comments"], [])
+        self.assertFalse(results["has_next"])
+
+        query, projection = self.topics.find.call_args_list[0][0]
+        self.assertEqual(query, {"$text": {"$search": "airport"}})
+        self.assertEqual(projection["score"], {"$meta": "textScore"})
+        self.assertEqual(self.topics.find.call_args_list[1][0][0],
+                         {"_id": {"$in": [self.b]}})
+        pipeline = self.comments.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[0], {"$match": {"$text": {"$search": "airport"}}})
+
+    def test_pagination(self):
+        """
+        Each list is limited to the hits up to the page, and the page is cut from the merge.
+        """
+        results = search_forum(self.topics, self.comments, "airport", page=2, per_page=2)
+
+        self.assertEqual([hit["topic"]["_id"] for hit in results["hits"]], [self.c])
+        self.assertFalse(results["has_next"])
+        self.cursor.limit.assert_called_with(5)
+        pipeline = self.comments.aggregate.call_args[0][0]
+        self.assertIn({"$limit": 5}, pipeline)
+
+    def test_text_indexes(self):
+        """
+        Topics get one weighted text index and comments one on their content.
+        """
+        client = mongomock.MongoClient()
+        topics, comments = MagicMock(), MagicMock()
+        topics.database = comments.database = client.searchIndexTest
+        ensure_indexes(topics, comments)
+
+        self.assertEqual(topics.create_index.call_args[0][0],
+                         [(field, "text") for field in TOPIC_WEIGHTS])
+        self.assertEqual(topics.create_index.call_args[1]["weights"], TOPIC_WEIGHTS)
+        self.assertEqual(comments.create_index.call_args[0][0], [("content", "text")])
+
+
+class ForumSearchViewTestCase(TestCase):
+    """
+    Test cases for the `forum_search` view.
+    """
+
+    def setUp(self):
+        """
+        Sets up a client and a mocked database.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.topic_id = ObjectId()
+        self.results = {
+            "page": 1,
+            "has_next": True,
+            "hits": [{
+                "topic": {"_id": self.topic_id, "ride_id": "RDU", "comment_count": 2},
+                "score": 2.5,
+                "title": "<mark>Airport</mark> ride",
+                "snippet": "To the &lt;<mark>airport</mark>&gt;",
+                "matches": 1,
+                "comments": [{"_id": ObjectId(), "creator": "amy",
+                              "created_at": datetime(2024, 11, 1), "snippet": "x"}],
+            }],
+        }
+
+    @patch("forum.views.search_forum")
+    @patch("forum.views.get_client")
+    def test_search_page(self, mock_get_client, mock_search):
+        """
+        The page lists the hits with their highlighted snippets and a next link.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_search.return_value = self.results
+
+        response = self.client.get(reverse("forum_search"), {"q": " airport ", "page": "1"})
+
+        self.assertEqual(mock_search.call_args[0][2:], ("airport", 1))
+        self.assertContains(response, "<mark>Airport</mark> ride", html=False)
+        self.assertContains(response, "To the &lt;<mark>airport</mark>&gt;", html=False)
+        self.assertContains(response, reverse("forum_topic_details", args=[self.topic_id]))
+        self.assertContains(response, "page=2")
+
+    @patch("forum.views.search_forum")
+    @patch("forum.views.get_client")
+    def test_search_json(self, mock_get_client, mock_search):
+        """
+        `format=json` returns the hits as JSON.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_search.return_value = self.results
+
+        response = self.client.get(reverse("forum_search"), {"q": "airport", "format": "json"})
+
+        data = response.json()
+        self.assertTrue(data["has_next"])
+        self.assertEqual(data["hits"][0]["id"], str(self.topic_id))
+        self.assertEqual(data["hits"][0]["comments"][0]["created_at"], "2024-11-01T00:00:00")
+
+    @patch("forum.views.search_forum")
+    def test_empty_query(self, mock_search):
+        """
+        Without a query no search runs.
+        """
+        response = self.client.get(reverse("forum_search"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["results"])
+        mock_search.assert_not_called()
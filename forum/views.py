@@ -13,7 +13,8 @@ The module provides functionalities for:
 Dependencies:
 - Django modules: render, redirect
 - Utilities: `get_client` for MongoDB connection, `make_password` and `check_password` for authentication
-- MongoDB collections: `userDB`, `ridesDB`, `routesDB`, `topicsDB`, and `commentsDB`
+- MongoDB collections: `userDB`, `ridesDB`, `routesDB`, `topicsDB`, and `commentsDB`, and the
+  read-only `topicsArchiveDB` and `commentsArchiveDB` (see `forum.archive`)
 - BSON: `ObjectId` for MongoDB object handling
 - `datetime`: For timestamping topics and comments
 
@@ -21,14 +22,20 @@ Global Variables:
 - `client`: MongoDB client instance
 - `db`: The MongoDB database object
 - `userDB`, `ridesDB`, `routesDB`, `topicsDB`, `commentsDB`: MongoDB collections
+- `topicsArchiveDB`, `commentsArchiveDB`: Archived topics and their comments
 
 Functions:
 - `intializeDB()`: Initializes the MongoDB client and collections.
-- `rides_with_topics(request)`: Displays rides with their associated discussion topics.
+- `rides_with_topics(request)`: Displays a page of rides with their associated discussion topics.
+- `topic_destinations()`: Returns the destinations a new topic can be posted under.
 - `create_topic(request)`: Handles the creation of a new topic for a ride.
+- `create_topic_limited(request)`: Shows the topic form again when posting is rate limited.
 - `add_comment(request, topic_id)`: Adds a comment to a specific topic.
+- `add_comment_limited(request, topic_id)`: Shows the topic again when commenting is rate limited.
 - `forum_topics(request, ride_id)`: Displays all topics related to a specific ride.
-- `forum_topic_details(request, topic_id)`: Displays details of a topic and its associated comments.
+- `forum_topic_details(request, topic_id)`: Displays details of a topic and the latest page of its comments.
+- `topic_comments(request, topic_id)`: Returns a page of a topic's comments as JSON or an HTML fragment.
+- `forum_search(request)`: Full-text search over topics and comments.
 
 This module is designed to be used within a Django project, providing dynamic content management for the forum.
 
@@ -39,12 +46,28 @@ from utils import get_client
 from config import Secrets
 from bson.objectid import ObjectId
 from django.forms.utils import ErrorList
-from utilities import DateUtils
+from utilities import DateUtils, rate_limit
 from django.contrib.auth.hashers import make_password, check_password
 
 from bson import ObjectId
 from datetime import datetime
 
+from bson.errors import InvalidId
+from django.http import Http404, JsonResponse
+
+from search.autocomplete import destination_index
+
+from .comments import MAX_PAGE_SIZE as MAX_COMMENTS_PAGE_SIZE
+from .comments import PAGE_SIZE as COMMENTS_PAGE_SIZE
+from .comments import comment_data, comments_page
+from .activity import record_comment
+from .archive import find_topic
+from .live import broker
+from .markup import rendered_fields
+from .listing import destinations_page
+from .search import MAX_PAGE as MAX_SEARCH_PAGE
+from .search import search_forum
+
 client = None
 db = None
 userDB = None
@@ -53,6 +76,10 @@ routesDB = None
 secrets = None
 topicsDB = None
 commentsDB = None
+topicsArchiveDB = None
+commentsArchiveDB = None
+
+RATE_LIMITED_ERROR = "You are posting too quickly. Please wait a moment and try again."
 
 # Create your views here.
 
@@ -73,11 +100,16 @@ def intializeDB():
         userDB (Collection): The collection for user data.
         ridesDB (Collection): The collection for ride data.
         routesDB (Collection): The collection for route data.
+        topicsDB (Collection): The collection for forum topics.
+        commentsDB (Collection): The collection for forum comments.
+        topicsArchiveDB (Collection): The collection for archived topics.
+        commentsArchiveDB (Collection): The collection for archived comments.
 
     Returns:
         None
     """
     global client, db, userDB, ridesDB, routesDB, topicsDB, commentsDB
+    global topicsArchiveDB, commentsArchiveDB
     client = get_client()
     db = client.SEProject
     userDB = db.userData
@@ -85,51 +117,83 @@ def intializeDB():
     routesDB = db.routes
     topicsDB = db.topics
     commentsDB = db.comments
+    topicsArchiveDB = db.topicsArchive
+    commentsArchiveDB = db.commentsArchive
 
 
 def rides_with_topics(request):
     """
-    Displays all rides and their associated topics.
+    Displays a page of destinations and their latest topics.
+
+    The page costs two queries however many destinations there are (see
+    `forum.listing.destinations_page`).
+
+    Query parameters:
+        page: The 1-based page of destinations (default: 1).
 
     Args:
         request (HttpRequest): The request object.
 
     Returns:
-        HttpResponse: The page listing all rides with links to their topics.
+        HttpResponse: The page listing rides with links to their topics.
     """
     intializeDB()
-    rides = list(routesDB.find())  # Fetch all rides
-    rides_with_topics = []
-    visitedDest = set()
-    for ride in rides:
-        if ride["destination"] not in visitedDest:
-            visitedDest.add(ride["destination"])
-            # Fetch topics related to the ride
-            topics = list(topicsDB.find({"ride_id": ride["destination"]}))
-            for topic in topics:
-                topic["id"] = topic.pop("_id")
-            rides_with_topics.append({"ride": ride, "topics": topics})
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 1
+    listing = destinations_page(routesDB, topicsDB, page)
 
     return render(
         request,
         "forum/rides_with_topics.html",
-        {"rides_with_topics": rides_with_topics},
+        {"rides_with_topics": listing["rides"], "listing": listing},
+    )
+
+
+def topic_destinations():
+    """
+    Returns the destinations offered by the new-topic form, sorted ignoring case.
+
+    These are the destinations of the process-wide destination index (see
+    `search.autocomplete`) and those that already have topics, which stay after
+    their routes have been archived (see `publish.archive`).
+
+    Returns:
+        list: The destination names.
+    """
+    names = set(destination_index(routesDB).names())
+    names.update(name for name in topicsDB.distinct("ride_id") if name)
+    return sorted(names, key=lambda name: (name.casefold(), name))
+
+
+def create_topic_limited(request):
+    """
+    Shows the topic form again, with an error, to a rate-limited form submission.
+    """
+    intializeDB()
+    return render(
+        request,
+        "forum/create_topic.html",
+        {
+            "error": RATE_LIMITED_ERROR,
+            "destinations": topic_destinations(),
+        },
     )
 
 
+@rate_limit("create_topic", capacity=5, period=600, limited=create_topic_limited)
 def create_topic(request):
     """
     Handles the creation of a discussion topic for a ride.
+
+    POSTs are rate limited per session and identical resubmissions rejected with 429;
+    a form submission gets the form back with an error (see `utilities.rate_limit`). The topic body is rendered to HTML once here (see
+    `forum.markup`). The ride dropdown lists the destinations of the process-wide destination index
+    (see `search.autocomplete`), so the form costs no route reads once it is loaded,
+    and the destinations that have topics (see `topic_destinations`).
     """
     intializeDB()
-    rides = list(routesDB.find())  # Fetch all rides for selection
-    final_rides = []
-    visitedDest = set()
-    for ride in rides:
-        ride["id"] = ride.pop("_id")
-        if ride["destination"] not in visitedDest:
-            final_rides.append(ride)
-            visitedDest.add(ride["destination"])
     if request.method == "POST":
         ride_id = request.POST.get("ride_id")
         title = request.POST.get("title")
@@ -140,63 +204,203 @@ def create_topic(request):
             return render(
                 request,
                 "forum/create_topic.html",
-                {"error": "All fields are required!"},
+                {
+                    "error": "All fields are required!",
+                    "destinations": topic_destinations(),
+                },
             )
 
+        created_at = datetime.now()
         topic = {
             "ride_id": ride_id,
             "title": title,
             "content": content,
+            **rendered_fields(content),
             "creator": user,
-            "created_at": datetime.now(),
+            "created_at": created_at,
+            "comment_count": 0,
+            "last_activity_at": created_at,
         }
         topicsDB.insert_one(topic)
         return redirect("rides_with_topics")
 
-    return render(request, "forum/create_topic.html", {"rides": final_rides})
+    return render(request, "forum/create_topic.html",
+                  {"destinations": topic_destinations()})
+
+
+def add_comment_limited(request, topic_id):
+    """
+    Shows the topic again, with an error, to a rate-limited comment submission.
+    """
+    return forum_topic_details(request, topic_id, error=RATE_LIMITED_ERROR)
 
 
+@rate_limit("add_comment", capacity=10, period=60, limited=add_comment_limited)
 def add_comment(request, topic_id):
     """
-    Adds a comment to a specific topic.
+    Adds a comment to a specific topic, with its body rendered to HTML once (see
+    `forum.markup`), bumps the topic's reply count and activity time and pushes the
+    comment to the topic's live streams in this process. POSTs are rate limited per
+    session and identical resubmissions rejected with 429; a form submission gets the
+    topic page back with an error (see `utilities.rate_limit`).
+    Topics that are not in `topicsDB`, such as archived ones, answer 404.
     """
     intializeDB()
     if request.method == "POST":
+        if not topicsDB.count_documents({"_id": ObjectId(topic_id)}, limit=1):
+            raise Http404("Topic not found or archived")
         content = request.POST.get("content")
         user = request.session.get("username")
 
         comment = {
             "topic_id": ObjectId(topic_id),
             "content": content,
+            **rendered_fields(content),
             "creator": user,
             "created_at": datetime.now(),
         }
         commentsDB.insert_one(comment)
+        record_comment(topicsDB, comment["topic_id"], comment["created_at"])
+        broker.publish(str(comment["topic_id"]), comment)
         return redirect("forum_topic_details", topic_id=topic_id)
     return redirect("forum_topic_details", topic_id=topic_id)
 
 
 def forum_topics(request, ride_id):
     """
-    Displays all topics related to a specific ride.
+    Displays all topics related to a specific ride, most recently active first.
     """
     intializeDB()
-    topics = list(topicsDB.find({"ride_id": ride_id}))
+    topics = list(
+        topicsDB.find({"ride_id": ride_id}).sort(
+            [("last_activity_at", -1), ("created_at", -1)])
+    )
     for topic in topics:
         topic["id"] = topic.pop("_id")
     return render(request, "forum/topics.html",
                   {"topics": topics, "ride_id": ride_id})
 
 
-def forum_topic_details(request, topic_id):
+def forum_topic_details(request, topic_id, error=None):
     """
-    Displays a specific topic and its associated comments.
+    Displays a specific topic and the latest page of its comments.
+
+    Older and newer comments are loaded on demand from `topic_comments`, and new ones
+    arrive live from the topic's comment stream (see `forum.live`). Archived topics
+    are read from the archive and shown read-only (see `forum.archive`). `error` is
+    shown above the comment form.
     """
     intializeDB()
-    topic = topicsDB.find_one({"_id": ObjectId(topic_id)})
+    topic, archived = find_topic(topicsDB, topicsArchiveDB, ObjectId(topic_id))
     topic["id"] = topic.pop("_id")
-    comments = list(commentsDB.find({"topic_id": ObjectId(topic_id)}))
+    page = comments_page(commentsArchiveDB if archived else commentsDB, ObjectId(topic_id))
+    for comment in page["comments"]:
+        comment["id"] = comment["_id"]
     return render(
         request, "forum/topic_details.html", {
-            "topic": topic, "comments": comments}
+            "topic": topic, "comments": page["comments"], "page": page,
+            "archived": archived, "error": error}
     )
+
+
+def topic_comments(request, topic_id):
+    """
+    Returns one page of a topic's comments, as JSON or as an HTML fragment.
+
+    Query parameters:
+        before: Cursor of the oldest comment shown; returns the page before it.
+        after: Cursor of the newest comment shown; returns the page after it.
+        limit: Comments per page (default: 20, at most 100).
+        format: "html" for the rendered comment list; JSON otherwise.
+        archived: "1" to read the comments of an archived topic.
+
+    Args:
+        request (HttpRequest): The request object.
+        topic_id (str): The topic's ID.
+
+    Returns:
+        HttpResponse: The fragment, or JsonResponse: {"comments": [{"id", "content",
+        "creator", "created_at"}, ...], "older", "newer", "has_older", "has_newer"};
+        status 400 for an invalid topic ID or cursor.
+    """
+    intializeDB()
+    comments = commentsArchiveDB if request.GET.get("archived") == "1" else commentsDB
+    try:
+        limit = int(request.GET.get("limit", COMMENTS_PAGE_SIZE))
+        limit = max(1, min(limit, MAX_COMMENTS_PAGE_SIZE))
+    except ValueError:
+        limit = COMMENTS_PAGE_SIZE
+    try:
+        page = comments_page(
+            comments,
+            ObjectId(topic_id),
+            before=request.GET.get("before"),
+            after=request.GET.get("after"),
+            limit=limit,
+        )
+    except (InvalidId, ValueError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if request.GET.get("format") == "html":
+        for comment in page["comments"]:
+            comment["id"] = comment["_id"]
+        return render(request, "forum/comment_list.html",
+                      {"comments": page["comments"], "page": page})
+    page["comments"] = [comment_data(comment) for comment in page["comments"]]
+    return JsonResponse(page)
+
+
+def forum_search(request):
+    """
+    Searches topic titles, topic bodies and comments.
+
+    Query parameters:
+        q: The search query; quoted phrases and `-negations` follow `$text` rules.
+        page: The 1-based page of results (default: 1).
+        format: "json" for a JSON response; the search page otherwise.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        HttpResponse: The search page, or JsonResponse: {"query", "page", "has_next",
+        "hits": [{"id", "ride_id", "title", "snippet", "score", "matches",
+        "comments": [{"id", "creator", "created_at", "snippet"}, ...]}, ...]}.
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(1, min(int(request.GET.get("page", 1)), MAX_SEARCH_PAGE))
+    except ValueError:
+        page = 1
+    results = None
+    if query:
+        intializeDB()
+        results = search_forum(topicsDB, commentsDB, query, page)
+        for hit in results["hits"]:
+            hit["topic"]["id"] = hit["topic"].pop("_id")
+
+    if request.GET.get("format") == "json":
+        hits = [
+            {
+                "id": str(hit["topic"]["id"]),
+                "ride_id": hit["topic"].get("ride_id"),
+                "title": hit["title"],
+                "snippet": hit["snippet"],
+                "score": hit["score"],
+                "matches": hit["matches"],
+                "comments": [
+                    {
+                        "id": str(comment["_id"]),
+                        "creator": comment.get("creator"),
+                        "created_at": comment["created_at"].isoformat(),
+                        "snippet": comment["snippet"],
+                    }
+                    for comment in hit["comments"]
+                ],
+            }
+            for hit in (results["hits"] if results else [])
+        ]
+        return JsonResponse({"query": query, "page": page,
+                             "has_next": bool(results and results["has_next"]),
+                             "hits": hits})
+    return render(request, "forum/search.html", {"query": query, "results": results})
@@ -0,0 +1,160 @@
+"""
+Archival of past routes.
+
+Routes whose departure is more than `ROUTE_RETENTION_DAYS` in the past are moved
+from `routes` into the `routesArchive` collection, so the queries over routes only
+read the rides that can still be joined or are recently over. Archived routes are
+read-only: nothing in the application writes to the archive, the profile's
+"Past Rides" list reads them through `archived_routes`, and "My Rides" reads the
+archived routes a user joined through `archived_rides`. Archiving leaves the route
+ids in `userData.rides`, so a rider keeps the rides they took.
+
+Documents are moved in batches, copied first and deleted from the source only once
+the copy is stored; a job that is interrupted can simply be run again, copies that
+already exist in the archive are skipped.
+
+Functions:
+    - `ensure_indexes`: Creates the index the archive is read with.
+    - `move_documents`: Moves the documents matching a query into another collection.
+    - `archive_routes`: Moves past routes into the archive.
+    - `archived_routes`: Returns a creator's archived routes, newest first.
+    - `archived_rides`: Returns the archived routes among a user's rides, newest first.
+
+Attributes:
+    - `ROUTE_RETENTION_DAYS`: Days after departure that a route stays in `routes`.
+    - `BATCH_SIZE`: Documents moved per batch.
+    - `PAST_RIDES_LIMIT`: Archived routes shown on a profile.
+"""
+
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from publish import destination_stats
+
+ROUTE_RETENTION_DAYS = 30
+BATCH_SIZE = 500
+PAST_RIDES_LIMIT = 50
+
+_DUPLICATE_KEY = 11000
+
+
+def ensure_indexes(archive):
+    """
+    Creates the `(creator, date)` index on the route archive.
+
+    Run from the `create_indexes` command and the archival job, not per request.
+
+    Args:
+        archive (Collection): The `routesArchive` collection.
+    """
+    archive.create_index([("creator", 1), ("date", -1)])
+
+
+def move_documents(source, target, query: dict, batch_size: int = BATCH_SIZE,
+                   now: datetime = None, on_moved=None) -> int:
+    """
+    Moves the documents matching a query from one collection to another.
+
+    Each batch is inserted into `target` with an `archived_at` time and then deleted
+    from `source`. Documents already in `target` (from an interrupted run) are not
+    copied again.
+
+    Args:
+        source (Collection): The collection to move from.
+        target (Collection): The collection to move into.
+        query (dict): The documents to move.
+        batch_size (int): Documents per batch (default: `BATCH_SIZE`).
+        now (datetime, optional): The archival time (default: utcnow).
+        on_moved (callable, optional): Called with each batch once it has been moved.
+
+    Returns:
+        int: The number of documents moved.
+    """
+    now = now or datetime.utcnow()
+    moved = 0
+    while True:
+        batch = list(source.find(query).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return moved
+        for document in batch:
+            document["archived_at"] = now
+        try:
+            target.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != _DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+        source.delete_many({"_id": {"$in": [document["_id"] for document in batch]}})
+        if on_moved:
+            on_moved(batch)
+        moved += len(batch)
+
+
+def archive_routes(db, days: int = ROUTE_RETENTION_DAYS, now: datetime = None,
+                   batch_size: int = BATCH_SIZE) -> int:
+    """
+    Moves routes that departed more than `days` ago into `routesArchive`.
+
+    Routes without a `departure_at` are compared by their local `date`. Archived
+    routes are removed from their destination's `route_id` list and from the
+    destination statistics, as a deleted route would be.
+
+    Args:
+        db (Database): The "SEProject" database.
+        days (int): Days after departure that a route is kept (default:
+            `ROUTE_RETENTION_DAYS`).
+        now (datetime, optional): The current UTC time (default: utcnow).
+        batch_size (int): Routes per batch (default: `BATCH_SIZE`).
+
+    Returns:
+        int: The number of routes archived.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    query = {
+        "$or": [
+            {"departure_at": {"$lt": cutoff}},
+            {"departure_at": {"$exists": False}, "date": {"$lt": cutoff.strftime("%Y-%m-%d")}},
+        ]
+    }
+
+    def detach(routes):
+        ids = [route["_id"] for route in routes]
+        db.rides.update_many({"route_id": {"$in": ids}}, {"$pull": {"route_id": {"$in": ids}}})
+        for route in routes:
+            destination_stats.route_removed(db.destinationStats, route, now)
+
+    ensure_indexes(db.routesArchive)
+    return move_documents(db.routes, db.routesArchive, query, batch_size, now, detach)
+
+
+def archived_routes(archive, creator, limit: int = PAST_RIDES_LIMIT) -> list:
+    """
+    Returns the archived routes created by a user, newest first.
+
+    Args:
+        archive (Collection): The `routesArchive` collection.
+        creator (ObjectId): The creator's user ID.
+        limit (int): The most routes returned (default: `PAST_RIDES_LIMIT`).
+
+    Returns:
+        list: The archived route documents.
+    """
+    return list(archive.find({"creator": creator}).sort("date", -1).limit(limit))
+
+
+def archived_rides(archive, route_ids, limit: int = PAST_RIDES_LIMIT) -> list:
+    """
+    Returns the archived routes among a user's rides, newest first.
+
+    Args:
+        archive (Collection): The `routesArchive` collection.
+        route_ids (list): The route IDs in the user's `rides`.
+        limit (int): The most routes returned (default: `PAST_RIDES_LIMIT`).
+
+    Returns:
+        list: The archived route documents.
+    """
+    if not route_ids:
+        return []
+    return list(archive.find({"_id": {"$in": list(route_ids)}}).sort("date", -1).limit(limit))
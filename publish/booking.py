@@ -0,0 +1,146 @@
+"""
+Seat booking for routes.
+
+Each route carries a `capacity` (seats offered to other riders) and a `seats_taken`
+counter that always equals the length of its `users` list. Joining and leaving are
+single conditional `find_one_and_update` calls, so MongoDB checks the remaining seats
+and the membership in the same atomic step as the write: two riders racing for the
+last seat cannot both get it, and a rider cannot be counted twice. Routes created
+before capacities existed have no `capacity` and stay unlimited.
+
+Functions:
+    - `parse_capacity`: Reads a capacity from form input.
+    - `seats_left`: Returns the number of free seats on a route document.
+    - `join_route`: Atomically takes a seat for a user.
+    - `leave_route`: Atomically gives a user's seat back.
+    - `toggle_seat`: Joins a route, or leaves it if the user is already a member.
+
+Attributes:
+    - `DEFAULT_CAPACITY`: Capacity used when the form leaves it blank or invalid.
+    - `MAX_CAPACITY`: Largest capacity a route can offer.
+    - `JOINED`, `LEFT`, `FULL`, `MISSING`, `MEMBER`, `NOT_MEMBER`: Booking outcomes.
+"""
+
+DEFAULT_CAPACITY = 4
+MAX_CAPACITY = 60
+
+JOINED = "joined"
+LEFT = "left"
+FULL = "full"
+MISSING = "missing"
+MEMBER = "member"
+NOT_MEMBER = "not_member"
+
+
+def parse_capacity(value) -> int:
+    """
+    Reads a route capacity from form input.
+
+    Args:
+        value (str | int | None): The submitted capacity.
+
+    Returns:
+        int: The capacity clamped to `1..MAX_CAPACITY`, or `DEFAULT_CAPACITY` if it is missing or not a number.
+    """
+    try:
+        capacity = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_CAPACITY
+    return min(max(capacity, 1), MAX_CAPACITY)
+
+
+def seats_left(route: dict):
+    """
+    Returns the number of free seats on a route document.
+
+    Args:
+        route (dict): The route document.
+
+    Returns:
+        int | None: The free seats, or None if the route has no capacity limit.
+    """
+    if route.get("capacity") is None:
+        return None
+    taken = route.get("seats_taken", len(route.get("users", [])))
+    return max(route["capacity"] - taken, 0)
+
+
+def join_route(routes, user_id, route_id) -> str:
+    """
+    Takes a seat on a route for a user in one conditional update.
+
+    The update only matches while the user is not a member and `seats_taken` is below
+    `capacity`; when it does not match, the route is read once to report why.
+
+    Args:
+        routes (Collection): The routes collection.
+        user_id (ObjectId): The joining user's `_id`.
+        route_id (str): The route to join.
+
+    Returns:
+        str: `JOINED`, `FULL`, `MEMBER` or `MISSING`.
+    """
+    updated = routes.find_one_and_update(
+        {
+            "_id": route_id,
+            "users": {"$ne": user_id},
+            "$or": [
+                {"capacity": None},
+                {"$expr": {"$lt": ["$seats_taken", "$capacity"]}},
+            ],
+        },
+        {"$push": {"users": user_id}, "$inc": {"seats_taken": 1}},
+        projection={"_id": 1},
+    )
+    if updated is not None:
+        return JOINED
+    route = routes.find_one({"_id": route_id}, {"users": 1})
+    if route is None:
+        return MISSING
+    if user_id in route.get("users", []):
+        return MEMBER
+    return FULL
+
+
+def leave_route(routes, user_id, route_id) -> str:
+    """
+    Gives a user's seat on a route back in one conditional update.
+
+    Args:
+        routes (Collection): The routes collection.
+        user_id (ObjectId): The leaving user's `_id`.
+        route_id (str): The route to leave.
+
+    Returns:
+        str: `LEFT`, or `NOT_MEMBER` if the user held no seat on the route.
+    """
+    updated = routes.find_one_and_update(
+        {"_id": route_id, "users": user_id},
+        {"$pull": {"users": user_id}, "$inc": {"seats_taken": -1}},
+        projection={"_id": 1},
+    )
+    return LEFT if updated is not None else NOT_MEMBER
+
+
+def toggle_seat(routes, user_id, route_id) -> str:
+    """
+    Joins a route, or leaves it if the user is already a member.
+
+    This keeps the behaviour of the route page, where selecting the route you are on
+    takes you off it.
+
+    Args:
+        routes (Collection): The routes collection.
+        user_id (ObjectId): The user's `_id`.
+        route_id (str): The route to join or leave.
+
+    Returns:
+        str: `JOINED`, `LEFT`, `FULL` or `MISSING`.
+    """
+    outcome = join_route(routes, user_id, route_id)
+    if outcome != MEMBER:
+        return outcome
+    if leave_route(routes, user_id, route_id) == LEFT:
+        return LEFT
+    # The user left concurrently between the two updates; try the join again.
+    return join_route(routes, user_id, route_id)
@@ -0,0 +1,292 @@
+"""
+Destination clustering for Pack's Favorite.
+
+Riders spell the same place many ways ("RDU Airport", "RDU airport", "Raleigh-Durham
+International"), so counting popularity per destination string splits it across
+entries. This module groups routes whose destination coordinates lie within
+`EPS_KM` of each other with DBSCAN and stores the result on each route as
+`cluster_id`; the Pack's Favorite leaderboard then aggregates per cluster.
+
+DBSCAN runs once per distinct coordinate on 3-D unit vectors with a SciPy `cKDTree`,
+so the Euclidean radius is the chord of `EPS_KM` on the globe and tens of thousands
+of routes cluster in about a second. Routes without coordinates fall back to a cluster of their
+case-folded destination name.
+
+A core point needs `MIN_SAMPLES` routes within `EPS_KM`, counting itself. With one,
+every route would be a core point and DBSCAN would reduce to single linkage: any
+chain of routes less than `EPS_KM` apart, however sparse, would merge the places at
+its ends. Popular places have many routes at or near the same coordinates and easily
+reach the threshold; routes left as noise are grouped by their exact coordinates.
+
+Functions:
+    - `dbscan`: Labels points by density-connected clusters.
+    - `cluster_all`: Re-clusters every route, keeping existing ids where possible.
+    - `cluster_new`: Assigns clusters to routes that do not have one yet.
+    - `leaderboard`: Returns the most joined destination clusters.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+from bson import ObjectId
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from utilities import GeoUtils
+
+EPS_KM = 1.5
+MIN_SAMPLES = 3
+NOISE = -1
+
+
+def dbscan(lat_long: np.ndarray, eps_km: float = EPS_KM,
+           min_samples: int = MIN_SAMPLES) -> np.ndarray:
+    """
+    Clusters points with DBSCAN using great-circle distances.
+
+    Args:
+        lat_long (ndarray): (n, 2) array of (lat, long) in degrees.
+        eps_km (float): Neighbourhood radius, in km (default: `EPS_KM`).
+        min_samples (int): Neighbours (including itself) a point needs to be a core point.
+
+    Returns:
+        ndarray: (n,) cluster labels from 0, with `NOISE` for points in no cluster.
+    """
+    if len(lat_long) == 0:
+        return np.empty(0, dtype=int)
+    # Many routes share the exact coordinates of a popular place; cluster each
+    # distinct point once and weight it by how many routes it stands for.
+    points, inverse, weights = np.unique(
+        lat_long, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    count = len(points)
+    pairs = cKDTree(_unit_vectors(points)).query_pairs(
+        _chord(eps_km), output_type="ndarray")
+    degree = weights.copy()
+    np.add.at(degree, pairs[:, 0], weights[pairs[:, 1]])
+    np.add.at(degree, pairs[:, 1], weights[pairs[:, 0]])
+    core = degree >= min_samples
+
+    # Core points reachable from each other form the clusters.
+    core_pairs = pairs[core[pairs[:, 0]] & core[pairs[:, 1]]]
+    graph = coo_matrix(
+        (np.ones(len(core_pairs)), (core_pairs[:, 0], core_pairs[:, 1])),
+        shape=(count, count),
+    )
+    _, components = connected_components(graph, directed=False)
+    labels = np.full(count, NOISE)
+    _, labels[core] = np.unique(components[core], return_inverse=True)
+
+    # Border points join the cluster of a neighbouring core point.
+    for a, b in (pairs[:, 0], pairs[:, 1]), (pairs[:, 1], pairs[:, 0]):
+        border = core[a] & ~core[b]
+        labels[b[border]] = labels[a[border]]
+    return labels[inverse]
+
+
+def cluster_all(routes, eps_km: float = EPS_KM,
+                min_samples: int = MIN_SAMPLES) -> int:
+    """
+    Re-clusters every route and stores the result as `cluster_id`.
+
+    A new cluster keeps the id most of its routes already had, so links and caches keyed
+    by cluster survive re-runs.
+
+    Args:
+        routes (Collection): The routes collection.
+        eps_km (float): Neighbourhood radius, in km (default: `EPS_KM`).
+        min_samples (int): DBSCAN core-point threshold (default: `MIN_SAMPLES`).
+
+    Returns:
+        int: The number of routes whose cluster changed.
+    """
+    documents = list(routes.find(
+        {}, {"d_location": 1, "destination": 1, "cluster_id": 1}))
+    located = [d for d in documents if d.get("d_location")]
+    assigned = {}
+
+    labels = dbscan(_lat_long(located), eps_km, min_samples)
+    members = {}
+    for document, label in zip(located, labels):
+        members.setdefault(_group_key(document, label), []).append(document)
+    taken = set()
+    for group in sorted(members.values(), key=len, reverse=True):
+        previous = Counter(
+            d["cluster_id"] for d in group if d.get("cluster_id") and d["cluster_id"] not in taken
+        )
+        cluster_id = previous.most_common(
+            1)[0][0] if previous else _new_id()
+        taken.add(cluster_id)
+        for document in group:
+            assigned[document["_id"]] = cluster_id
+
+    for document in documents:
+        if not document.get("d_location"):
+            assigned[document["_id"]] = _name_id(document.get("destination"))
+    return _save(routes, documents, assigned)
+
+
+def cluster_new(routes, eps_km: float = EPS_KM,
+                min_samples: int = MIN_SAMPLES) -> int:
+    """
+    Assigns a cluster to every route that does not have one yet.
+
+    A new route joins the cluster of the nearest clustered route within `eps_km`;
+    new routes that are near no existing route are clustered among themselves. A full
+    `cluster_all` run re-examines these choices.
+
+    Args:
+        routes (Collection): The routes collection.
+        eps_km (float): Neighbourhood radius, in km (default: `EPS_KM`).
+        min_samples (int): DBSCAN core-point threshold (default: `MIN_SAMPLES`).
+
+    Returns:
+        int: The number of routes assigned.
+    """
+    pending = list(routes.find({"cluster_id": {"$exists": False}}, {
+                   "d_location": 1, "destination": 1}))
+    if not pending:
+        return 0
+    assigned = {}
+    located = [d for d in pending if d.get("d_location")]
+    for document in pending:
+        if not document.get("d_location"):
+            assigned[document["_id"]] = _name_id(document.get("destination"))
+
+    clustered = list(
+        routes.find(
+            {"cluster_id": {"$exists": True}, "d_location": {"$exists": True}},
+            {"d_location": 1, "cluster_id": 1},
+        )
+    )
+    unmatched = located
+    if clustered and located:
+        tree = cKDTree(_unit_vectors(_lat_long(clustered)))
+        distances, nearest = tree.query(
+            _unit_vectors(_lat_long(located)), distance_upper_bound=_chord(eps_km)
+        )
+        unmatched = []
+        for document, distance, index in zip(located, distances, nearest):
+            if math.isinf(distance):
+                unmatched.append(document)
+            else:
+                assigned[document["_id"]] = clustered[index]["cluster_id"]
+
+    labels = dbscan(_lat_long(unmatched), eps_km, min_samples)
+    new_ids = {}
+    for document, label in zip(unmatched, labels):
+        assigned[document["_id"]] = new_ids.setdefault(
+            _group_key(document, label), _new_id())
+    return _save(routes, pending, assigned)
+
+
+def leaderboard(routes, limit: int = 20) -> list:
+    """
+    Returns the destination clusters with the most joined riders.
+
+    Args:
+        routes (Collection): The routes collection.
+        limit (int): How many clusters to return (default: 20).
+
+    Returns:
+        list: [{"cluster_id", "destination", "user_count", "route_count", "names"}, ...],
+        most joined first. `destination` is the cluster's most common spelling.
+    """
+    rows = routes.aggregate(
+        [
+            {"$match": {"users.0": {"$exists": True}}},
+            {
+                "$group": {
+                    "_id": {"$ifNull": ["$cluster_id", "$destination"]},
+                    "user_count": {"$sum": {"$size": "$users"}},
+                    "route_count": {"$sum": 1},
+                    "names": {"$push": "$destination"},
+                }
+            },
+            {"$sort": {"user_count": -1}},
+            {"$limit": limit},
+        ]
+    )
+    board = []
+    for row in rows:
+        names = Counter(name for name in row["names"] if name)
+        board.append(
+            {
+                "cluster_id": row["_id"],
+                "destination": names.most_common(1)[0][0] if names else "",
+                "user_count": row["user_count"],
+                "route_count": row["route_count"],
+                "names": sorted(names),
+            }
+        )
+    return board
+
+
+def _save(routes, documents: list, assigned: dict) -> int:
+    """
+    Writes changed cluster ids back, one update per cluster.
+    """
+    changes = {}
+    for document in documents:
+        cluster_id = assigned.get(document["_id"])
+        if cluster_id and cluster_id != document.get("cluster_id"):
+            changes.setdefault(cluster_id, []).append(document["_id"])
+    for cluster_id, route_ids in changes.items():
+        routes.update_many({"_id": {"$in": route_ids}}, {
+                           "$set": {"cluster_id": cluster_id}})
+    return sum(len(route_ids) for route_ids in changes.values())
+
+
+def _group_key(document: dict, label: int):
+    """
+    Returns the group a labelled route belongs to: its DBSCAN cluster, or its exact
+    coordinates if it is noise.
+    """
+    if label == NOISE:
+        return tuple(document["d_location"]["coordinates"])
+    return int(label)
+
+
+def _lat_long(documents: list) -> np.ndarray:
+    """
+    Returns the (lat, long) destinations of route documents as an (n, 2) array.
+    """
+    if not documents:
+        return np.empty((0, 2))
+    return np.array(
+        [d["d_location"]["coordinates"][::-1] for d in documents], dtype=float
+    )
+
+
+def _unit_vectors(lat_long: np.ndarray) -> np.ndarray:
+    """
+    Converts (lat, long) degrees to 3-D unit vectors.
+    """
+    lat, long = np.radians(lat_long[:, 0]), np.radians(lat_long[:, 1])
+    return np.column_stack(
+        (np.cos(lat) * np.cos(long), np.cos(lat) * np.sin(long), np.sin(lat))
+    )
+
+
+def _chord(km: float) -> float:
+    """
+    Returns the straight-line distance between unit vectors `km` apart on the surface.
+    """
+    return 2 * math.sin(km / (2 * GeoUtils.EARTH_RADIUS_KM))
+
+
+def _new_id() -> str:
+    """
+    Returns a fresh cluster id.
+    """
+    return str(ObjectId())
+
+
+def _name_id(destination: str) -> str:
+    """
+    Returns the cluster id of routes without coordinates: their case-folded destination.
+    """
+    return "name:" + " ".join((destination or "").casefold().split())
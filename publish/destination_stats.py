@@ -0,0 +1,238 @@
+"""
+Per-destination statistics rollup.
+
+The `destinationStats` collection holds one document per destination (keyed by the
+destination string, like the `rides` collection) with running totals that are kept
+up to date with `$inc` whenever a route is created or removed or a rider joins or
+leaves. Pages that show destination numbers read them with one `_id` lookup
+instead of scanning every route:
+
+    {
+        "_id": "RDU Airport",
+        "routes": 3,            # routes that currently exist
+        "riders": 7,            # riders who joined those routes
+        "distance_km": 41.2,    # total route distance
+        "fuel_l": 3.9,          # total estimated route fuel
+        "fuel_shared_l": 8.6,   # fuel of each route times its riders
+        "updated_at": datetime,
+    }
+
+`fuel_shared_l` is the fuel riders would have burned driving the route on their own
+and counts as shared because they rode along. The average route distance is derived
+on read. Running totals can drift if a write fails between the route change and the
+rollup update; `rebuild` recomputes every document from the routes collection.
+
+Functions:
+    - `ensure_indexes`: Creates the index used to rank destinations.
+    - `route_added`: Counts a new route.
+    - `route_removed`: Removes a route from the counts.
+    - `rider_joined`: Counts a rider joining a route.
+    - `rider_left`: Removes a rider from the counts.
+    - `get_stats`: Returns the statistics of some destinations.
+    - `top_destinations`: Returns the destinations with the most riders.
+    - `rebuild`: Recomputes every destination from the routes.
+
+Attributes:
+    - `ROUTE_FIELDS`: Projection with the route fields the rollup needs.
+"""
+
+from datetime import datetime
+
+ROUTE_FIELDS = {"destination": 1, "distance": 1, "fuel": 1, "users": 1}
+
+
+def ensure_indexes(stats):
+    """
+    Creates the index used to rank destinations by riders.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+    """
+    stats.create_index([("riders", -1)])
+
+
+def route_added(stats, route: dict, now: datetime = None):
+    """
+    Counts a new route, together with any riders already on it.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        route (dict): The route document.
+        now (datetime, optional): The time of the change (default: utcnow).
+    """
+    if not route.get("destination"):
+        return
+    stats.update_one(
+        {"_id": route["destination"]},
+        {
+            "$inc": _route_totals(route, 1),
+            "$set": {"updated_at": now or datetime.utcnow()},
+        },
+        upsert=True,
+    )
+
+
+def route_removed(stats, route: dict, now: datetime = None):
+    """
+    Removes a deleted route and its riders from the counts.
+
+    Destinations left without routes are deleted.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        route (dict): The route document as it was before deletion.
+        now (datetime, optional): The time of the change (default: utcnow).
+    """
+    if not route.get("destination"):
+        return
+    stats.update_one(
+        {"_id": route["destination"]},
+        {
+            "$inc": _route_totals(route, -1),
+            "$set": {"updated_at": now or datetime.utcnow()},
+        },
+    )
+    stats.delete_one({"_id": route["destination"], "routes": {"$lte": 0}})
+
+
+def rider_joined(stats, route: dict, now: datetime = None):
+    """
+    Counts a rider joining a route.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        route (dict): The route document; only `destination` and `fuel` are read.
+        now (datetime, optional): The time of the change (default: utcnow).
+    """
+    _rider_change(stats, route, 1, now)
+
+
+def rider_left(stats, route: dict, now: datetime = None):
+    """
+    Removes a rider leaving a route from the counts.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        route (dict): The route document; only `destination` and `fuel` are read.
+        now (datetime, optional): The time of the change (default: utcnow).
+    """
+    _rider_change(stats, route, -1, now)
+
+
+def get_stats(stats, destinations) -> dict:
+    """
+    Returns the statistics of some destinations in one indexed lookup.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        destinations (Iterable[str]): The destinations to look up.
+
+    Returns:
+        dict: {destination: stats} with `avg_distance_km` added; destinations
+        without routes are missing.
+    """
+    return {
+        doc["_id"]: _with_average(doc)
+        for doc in stats.find({"_id": {"$in": list(destinations)}})
+    }
+
+
+def top_destinations(stats, limit: int = 20) -> list:
+    """
+    Returns the destinations with the most riders.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        limit (int): How many destinations to return (default: 20).
+
+    Returns:
+        list: Statistics documents with `avg_distance_km`, most riders first.
+    """
+    return [
+        _with_average(doc)
+        for doc in stats.find().sort("riders", -1).limit(limit)
+    ]
+
+
+def rebuild(stats, routes, now: datetime = None) -> int:
+    """
+    Recomputes every destination from the routes collection.
+
+    The totals are grouped on the server and then written over the existing
+    documents, and destinations that no longer have routes are removed.
+
+    Args:
+        stats (Collection): The destination statistics collection.
+        routes (Collection): The routes collection.
+        now (datetime, optional): The time of the rebuild (default: utcnow).
+
+    Returns:
+        int: The number of destinations written.
+    """
+    now = now or datetime.utcnow()
+    riders = {"$size": {"$ifNull": ["$users", []]}}
+    fuel = {"$ifNull": ["$fuel", 0]}
+    rows = routes.aggregate(
+        [
+            {"$match": {"destination": {"$nin": [None, ""]}}},
+            {
+                "$group": {
+                    "_id": "$destination",
+                    "routes": {"$sum": 1},
+                    "riders": {"$sum": riders},
+                    "distance_km": {"$sum": {"$ifNull": ["$distance", 0]}},
+                    "fuel_l": {"$sum": fuel},
+                    "fuel_shared_l": {"$sum": {"$multiply": [fuel, riders]}},
+                }
+            },
+        ]
+    )
+    written = []
+    for row in rows:
+        row["updated_at"] = now
+        stats.replace_one({"_id": row["_id"]}, row, upsert=True)
+        written.append(row["_id"])
+    stats.delete_many({"_id": {"$nin": written}})
+    return len(written)
+
+
+def _route_totals(route: dict, sign: int) -> dict:
+    """
+    Returns the `$inc` document for adding (1) or removing (-1) a route.
+    """
+    riders = len(route.get("users") or [])
+    fuel = route.get("fuel") or 0
+    return {
+        "routes": sign,
+        "riders": sign * riders,
+        "distance_km": sign * (route.get("distance") or 0),
+        "fuel_l": sign * fuel,
+        "fuel_shared_l": sign * fuel * riders,
+    }
+
+
+def _rider_change(stats, route: dict, sign: int, now: datetime):
+    """
+    Applies one rider joining (1) or leaving (-1) a route.
+    """
+    if not route.get("destination"):
+        return
+    stats.update_one(
+        {"_id": route["destination"]},
+        {
+            "$inc": {
+                "riders": sign,
+                "fuel_shared_l": sign * (route.get("fuel") or 0),
+            },
+            "$set": {"updated_at": now or datetime.utcnow()},
+        },
+    )
+
+
+def _with_average(doc: dict) -> dict:
+    """
+    Adds `avg_distance_km` to a statistics document.
+    """
+    routes = doc.get("routes", 0)
+    doc["avg_distance_km"] = doc.get("distance_km", 0) / routes if routes > 0 else 0
+    return doc
@@ -0,0 +1,52 @@
+"""
+Management command that moves old routes and inactive forum topics into the archive.
+
+Routes that departed more than `--route-days` ago go to `routesArchive` (see
+`publish.archive`); topics without activity for `--topic-months` go, with their
+comments, to `topicsArchive` and `commentsArchive` (see `forum.archive`). Meant to
+run from cron, e.g. nightly; a run that is interrupted can be started again.
+
+Usage:
+    python manage.py archive_history
+    python manage.py archive_history --route-days 60 --topic-months 12
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum.archive import TOPIC_IDLE_MONTHS, archive_topics
+from publish.archive import ROUTE_RETENTION_DAYS, archive_routes
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Archives past routes and inactive forum topics.
+    """
+
+    help = "Move past routes and inactive forum topics into the archive collections."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command-line options.
+        """
+        parser.add_argument(
+            "--route-days",
+            type=int,
+            default=ROUTE_RETENTION_DAYS,
+            help="Days after departure that a route stays in the routes collection.",
+        )
+        parser.add_argument(
+            "--topic-months",
+            type=int,
+            default=TOPIC_IDLE_MONTHS,
+            help="Months without activity after which a topic is archived.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the archival.
+        """
+        db = get_client().SEProject
+        routes = archive_routes(db, options["route_days"])
+        topics = archive_topics(db, options["topic_months"])
+        self.stdout.write(f"archived {routes} routes and {topics} topics")
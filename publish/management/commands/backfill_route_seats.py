@@ -0,0 +1,59 @@
+"""
+Management command that adds seat counts to routes created before capacities existed.
+
+Every route gets `seats_taken` recomputed from its `users` list. Routes without a
+`capacity` get `--capacity` seats (`publish.booking.DEFAULT_CAPACITY` by default), or
+as many as they already have members if that is more, so nobody loses a seat.
+
+Usage:
+    python manage.py backfill_route_seats
+    python manage.py backfill_route_seats --capacity 6
+"""
+
+from django.core.management.base import BaseCommand
+
+from publish.booking import DEFAULT_CAPACITY
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Sets `seats_taken` and a default `capacity` on every route.
+    """
+
+    help = "Recompute seats_taken on every route and give legacy routes a capacity."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command-line options.
+        """
+        parser.add_argument(
+            "--capacity",
+            type=int,
+            default=DEFAULT_CAPACITY,
+            help="Capacity given to routes that have none.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the backfill as one pipeline update on the server.
+        """
+        routes = get_client().SEProject.routes
+        members = {"$size": {"$ifNull": ["$users", []]}}
+        result = routes.update_many(
+            {},
+            [
+                {
+                    "$set": {
+                        "seats_taken": members,
+                        "capacity": {
+                            "$ifNull": [
+                                "$capacity",
+                                {"$max": [options["capacity"], members]},
+                            ]
+                        },
+                    }
+                }
+            ],
+        )
+        self.stdout.write(f"updated {result.modified_count} routes")
@@ -0,0 +1,66 @@
+"""
+Management command that clusters route destinations for Pack's Favorite.
+
+Usage:
+    python manage.py cluster_destinations                 # re-cluster every route
+    python manage.py cluster_destinations --incremental   # only routes without a cluster
+    python manage.py cluster_destinations --incremental --every 300   # keep running
+
+The `clusters` process in the Procfile runs the incremental form every few minutes,
+so new routes count towards Pack's Favorite without a manual run.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from publish.clustering import EPS_KM, cluster_all, cluster_new
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Assigns a `cluster_id` to routes by the proximity of their destinations.
+    """
+
+    help = "Cluster route destinations so nearby spellings of a place count together."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command-line options.
+        """
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only cluster routes that do not have a cluster yet.",
+        )
+        parser.add_argument(
+            "--eps-km",
+            type=float,
+            default=EPS_KM,
+            help="Destinations closer than this belong together.",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Run again every this many seconds instead of exiting.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the clustering.
+        """
+        routes = get_client().SEProject.routes
+        routes.create_index("cluster_id")
+        while True:
+            start = time.perf_counter()
+            if options["incremental"]:
+                changed = cluster_new(routes, options["eps_km"])
+            else:
+                changed = cluster_all(routes, options["eps_km"])
+            self.stdout.write(
+                f"updated {changed} routes in {time.perf_counter() - start:.2f}s")
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,53 @@
+"""
+Management command that creates the MongoDB indexes the views read through.
+
+Views do not create indexes themselves: `create_index` is a round trip to the server,
+and doing it per request (or once per client, when a client is built per request)
+repeats that work on every page view. Run this once per deploy instead; it is the
+`release` step in the Procfile. `create_index` does nothing for an index that already
+exists, so running it again is safe.
+
+Usage:
+    python manage.py create_indexes
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum import comments, listing
+from forum import search as forum_search
+from publish import archive
+from search import keywords, proximity, schedule
+from utils import get_client
+
+
+def create_indexes(db):
+    """
+    Creates every index read by the views.
+
+    Args:
+        db (Database): The "SEProject" database.
+    """
+    listing.ensure_indexes(db.routes, db.topics)
+    comments.ensure_indexes(db.comments)
+    comments.ensure_indexes(db.commentsArchive)
+    forum_search.ensure_indexes(db.topics, db.comments)
+    archive.ensure_indexes(db.routesArchive)
+    proximity.ensure_indexes(db.routes)
+    keywords.ensure_indexes(db.routes)
+    schedule.ensure_indexes(db.routes)
+
+
+class Command(BaseCommand):
+    """
+    Creates the indexes used by the forum, the search and the archive.
+    """
+
+    help = "Create the MongoDB indexes used by the views."
+
+    def handle(self, *args, **options):
+        """
+        Creates the indexes.
+        """
+        db = get_client().SEProject
+        create_indexes(db)
+        self.stdout.write("indexes created")
@@ -0,0 +1,64 @@
+"""
+Management command that delivers queued emails from the MongoDB outbox.
+
+Each loop first turns due route-change digests into outbox emails, so they go out
+over the same pooled SMTP connection as the rest of the batch.
+
+Usage:
+    python manage.py deliver_outbox            # run forever, polling every few seconds
+    python manage.py deliver_outbox --once     # deliver one batch and exit
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from services import MailOutbox, RouteNotifier
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Delivers pending outbox emails over a single SMTP connection per batch.
+    """
+
+    help = "Deliver queued emails from the emailOutbox collection."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command-line options.
+        """
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver a single batch and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the delivery loop.
+        """
+        db = get_client().SEProject
+        outbox = MailOutbox(db.emailOutbox)
+        outbox.ensure_indexes()
+        notifier = RouteNotifier(db.routeNotifications, db.userData, outbox)
+        notifier.ensure_indexes()
+        while True:
+            digests = notifier.flush()
+            if digests:
+                self.stdout.write(f"queued {digests} route digests")
+            stats = outbox.deliver_pending(batch_size=options["batch_size"])
+            if any(stats.values()):
+                self.stdout.write(
+                    f"sent={stats['sent']} retried={stats['retried']} failed={stats['failed']}"
+                )
+            if options["once"]:
+                return
+            if sum(stats.values()) < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,44 @@
+"""
+Management command that computes the fuel and CO2 savings report.
+
+Streams every route in chunks, totals the fuel and CO2 saved by shared rides per
+user, destination and week, and replaces the report in the `fuelReports` collection
+(see `publish.savings`). Meant to run from cron, e.g. nightly.
+
+Usage:
+    python manage.py fuel_report
+    python manage.py fuel_report --chunk-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from publish.savings import CHUNK_SIZE, build_report
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the fuel and CO2 savings report.
+    """
+
+    help = "Compute shared fuel and CO2 savings per user, destination and week."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command-line options.
+        """
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Routes loaded and aggregated at a time.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the report.
+        """
+        db = get_client().SEProject
+        written = build_report(
+            db.routes, db.fuelReports, chunk_size=options["chunk_size"])
+        self.stdout.write(f"wrote {written} report rows")
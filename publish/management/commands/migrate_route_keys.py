@@ -0,0 +1,154 @@
+"""
+Management command that moves routes to canonical hashed `_id`s.
+
+Routes used to be keyed by a concatenation of raw form input
+(`purpose_spoint_destination_date_hour_minute_ampm`). This command re-keys every route
+whose `_id` differs from `RouteUtils.key(route)`, then rewrites the references in
+`rides.route_id` and `userData.rides`.
+
+MongoDB cannot change an `_id` in place, so each route is copied to its new key and
+the old document deleted. The new document remembers the ids it replaced in
+`legacy_ids`, which is what the reference rewrite reads; an interrupted run can
+therefore simply be started again. Routes that normalize to the same key are merged:
+their riders are combined on the first one and `seats_taken` is recomputed.
+
+A route is not merged, and keeps its old `_id`, when the route at its key has a
+different creator or when the combined riders would exceed that route's capacity.
+Such conflicts are listed in the output to be resolved by hand; a later run tries
+them again.
+
+Merging changes route counts, so run `rebuild_destination_stats` afterwards.
+
+Usage:
+    python manage.py migrate_route_keys
+    python manage.py rebuild_destination_stats
+"""
+
+from django.core.management.base import BaseCommand
+from pymongo.errors import DuplicateKeyError
+
+from utilities import RouteUtils
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Re-keys routes and rewrites the ride and user references to them.
+    """
+
+    help = "Replace concatenated route ids with hashed canonical keys."
+
+    def handle(self, *args, **options):
+        """
+        Runs the migration.
+        """
+        db = get_client().SEProject
+        moved, merged, conflicts = self.rekey_routes(db.routes)
+        for old_id, key, reason in conflicts:
+            self.stdout.write(f"not merged: route {old_id} into {key} ({reason})")
+        renamed = self.legacy_id_map(db.routes)
+        rides = self.rewrite_references(db.rides, "route_id", renamed)
+        users = self.rewrite_references(db.userData, "rides", renamed)
+        self.stdout.write(
+            f"re-keyed {moved} routes, merged {merged} duplicates, "
+            f"left {len(conflicts)} conflicts, updated {rides} rides and {users} users"
+        )
+
+    def rekey_routes(self, routes) -> tuple:
+        """
+        Copies every route whose `_id` is not its canonical key to that key.
+
+        Args:
+            routes (Collection): The routes collection.
+
+        Returns:
+            tuple: The number of routes moved, the number merged into an existing route,
+            and the conflicts left unmerged as [(old id, key, reason), ...].
+        """
+        moved = merged = 0
+        conflicts = []
+        for route in list(routes.find()):
+            key = RouteUtils.key(route)
+            if route["_id"] == key:
+                continue
+            legacy = [route["_id"]] + route.pop("legacy_ids", [])
+            try:
+                routes.insert_one(
+                    dict(route, _id=key, legacy_ids=legacy))
+                moved += 1
+            except DuplicateKeyError:
+                reason = self.merge_conflict(routes.find_one({"_id": key}), route)
+                if reason:
+                    conflicts.append((route["_id"], key, reason))
+                    continue
+                routes.update_one(
+                    {"_id": key},
+                    {
+                        "$addToSet": {
+                            "users": {"$each": route.get("users", [])},
+                            "legacy_ids": {"$each": legacy},
+                        }
+                    },
+                )
+                routes.update_one(
+                    {"_id": key},
+                    [{"$set": {"seats_taken": {"$size": "$users"}}}],
+                )
+                merged += 1
+            routes.delete_one({"_id": route["_id"]})
+        return moved, merged, conflicts
+
+    def merge_conflict(self, target: dict, route: dict):
+        """
+        Returns why a route cannot be merged into the route at its key, if it cannot.
+
+        Args:
+            target (dict): The route already stored at the key.
+            route (dict): The route being re-keyed.
+
+        Returns:
+            str: "different creator" or "over capacity", or None if they can be merged.
+        """
+        if target.get("creator") != route.get("creator"):
+            return "different creator"
+        riders = set(target.get("users", [])) | set(route.get("users", []))
+        if target.get("capacity") is not None and len(riders) > target["capacity"]:
+            return "over capacity"
+        return None
+
+    def legacy_id_map(self, routes) -> dict:
+        """
+        Maps every replaced route id to its current key.
+
+        Args:
+            routes (Collection): The routes collection.
+
+        Returns:
+            dict: {old id: new id}.
+        """
+        renamed = {}
+        for route in routes.find({"legacy_ids.0": {"$exists": True}}, {"legacy_ids": 1}):
+            for old in route["legacy_ids"]:
+                renamed[old] = route["_id"]
+        return renamed
+
+    def rewrite_references(self, collection, field: str, renamed: dict) -> int:
+        """
+        Replaces old route ids in an array field, dropping duplicates it creates.
+
+        Args:
+            collection (Collection): The collection holding the references.
+            field (str): The array field of route ids.
+            renamed (dict): {old id: new id}.
+
+        Returns:
+            int: The number of documents changed.
+        """
+        if not renamed:
+            return 0
+        changed = 0
+        for doc in collection.find({field: {"$in": list(renamed)}}, {field: 1}):
+            ids = list(dict.fromkeys(renamed.get(i, i) for i in doc[field]))
+            collection.update_one({"_id": doc["_id"]}, {"$set": {field: ids}})
+            changed += 1
+        return changed
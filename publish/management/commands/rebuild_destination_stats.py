@@ -0,0 +1,31 @@
+"""
+Management command that rebuilds the per-destination statistics rollup.
+
+The rollup is normally kept current by the views; run this once to fill it for
+existing routes, or again to repair totals after failed writes.
+
+Usage:
+    python manage.py rebuild_destination_stats
+"""
+
+from django.core.management.base import BaseCommand
+
+from publish.destination_stats import ensure_indexes, rebuild
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the `destinationStats` collection from the routes.
+    """
+
+    help = "Recompute route, rider, distance and fuel totals for every destination."
+
+    def handle(self, *args, **options):
+        """
+        Runs the rebuild.
+        """
+        db = get_client().SEProject
+        ensure_indexes(db.destinationStats)
+        written = rebuild(db.destinationStats, db.routes)
+        self.stdout.write(f"rebuilt statistics for {written} destinations")
@@ -0,0 +1,232 @@
+"""
+Batch fuel and CO2 savings analytics.
+
+Every route stores the fuel its trip burns (`fuel`, in litres, from the Routes API's
+`fuelConsumptionMicroliters`). Each rider who joined a route would otherwise have
+driven the trip alone, so a route with `n` joined riders saves `n * fuel` litres.
+The saving is credited in equal shares to everyone in the car, the creator included,
+so per-user figures add up to the route totals.
+
+Routes are streamed from MongoDB in chunks of `CHUNK_SIZE` documents. Each chunk is
+turned into a DataFrame and reduced with vectorised pandas operations to partial
+totals per user, destination and week, which are folded into running totals; memory
+therefore grows with the number of distinct users, destinations and weeks, never
+with the number of routes. The finished report replaces the previous one in the
+`fuelReports` collection:
+
+    {"kind": "user" | "destination" | "week", "key": ..., "routes": 12, "riders": 20,
+     "fuel_saved_l": 31.4, "co2_saved_kg": 72.5, "generated_at": datetime}
+
+For users, `routes` counts every route they were on and `riders` the ones they
+joined rather than created.
+
+Functions:
+    - `ensure_indexes`: Creates the index used to read a report.
+    - `route_frames`: Streams the routes collection as DataFrame chunks.
+    - `chunk_savings`: Reduces one chunk to partial totals per dimension.
+    - `compute_savings`: Folds the totals of every chunk.
+    - `write_report`: Replaces the stored report with new totals.
+    - `build_report`: Computes and stores a report.
+
+Attributes:
+    - `CO2_KG_PER_LITRE`: CO2 emitted by burning one litre of petrol.
+    - `CHUNK_SIZE`: Routes loaded per chunk.
+    - `KINDS`: The report dimensions.
+"""
+
+from datetime import datetime
+from itertools import islice
+
+import pandas as pd
+from bson import ObjectId
+
+CO2_KG_PER_LITRE = 2.31
+CHUNK_SIZE = 10000
+KINDS = ("user", "destination", "week")
+
+_FIELDS = {"destination": 1, "fuel": 1, "users": 1,
+           "creator": 1, "departure_at": 1, "date": 1}
+_TOTALS = ["routes", "riders", "fuel_saved_l"]
+
+
+def ensure_indexes(reports):
+    """
+    Creates the index used to read one dimension of a report.
+
+    Args:
+        reports (Collection): The report collection.
+    """
+    reports.create_index([("kind", 1), ("key", 1)])
+
+
+def route_frames(routes, chunk_size: int = CHUNK_SIZE):
+    """
+    Streams the routes collection as DataFrames of at most `chunk_size` rows.
+
+    Only the fields the report needs are fetched, and the cursor's batch size matches
+    the chunk size so each chunk costs one round trip.
+
+    Args:
+        routes (Collection): The routes collection.
+        chunk_size (int): Routes per chunk (default: `CHUNK_SIZE`).
+
+    Yields:
+        DataFrame: Columns `destination`, `fuel`, `users`, `creator`, `week`.
+    """
+    cursor = routes.find({}, _FIELDS).batch_size(chunk_size)
+    while True:
+        chunk = list(islice(cursor, chunk_size))
+        if not chunk:
+            return
+        frame = pd.DataFrame(chunk, columns=list(_FIELDS))
+        frame["fuel"] = pd.to_numeric(
+            frame["fuel"], errors="coerce").fillna(0.0)
+        frame["users"] = frame["users"].apply(
+            lambda users: users if isinstance(users, list) else [])
+        frame["week"] = _week_start(frame)
+        yield frame.drop(columns=["departure_at", "date"])
+
+
+def chunk_savings(frame: pd.DataFrame) -> dict:
+    """
+    Reduces one chunk of routes to partial totals per user, destination and week.
+
+    Args:
+        frame (DataFrame): A chunk from `route_frames`.
+
+    Returns:
+        dict: {kind: DataFrame indexed by key with `routes`, `riders` and `fuel_saved_l`}.
+    """
+    riders = frame["users"].str.len().to_numpy()
+    saved = frame["fuel"].to_numpy() * riders
+    routes = frame.assign(routes=1, riders=riders, fuel_saved_l=saved)
+
+    # One row per person in the car, each credited an equal share of the saving.
+    people = routes[["users", "creator", "riders", "fuel_saved_l"]].copy()
+    people["person"] = [
+        users + ([creator] if isinstance(creator, ObjectId) else [])
+        for users, creator in zip(people["users"], people["creator"])
+    ]
+    people = people.explode("person").dropna(subset=["person"])
+    occupants = people.groupby(level=0)["person"].transform("size").to_numpy()
+    people = people.assign(
+        key=people["person"].astype(str),
+        routes=1,
+        # For users, `riders` counts the routes they joined rather than created.
+        riders=(people["person"] != people["creator"]).astype(int),
+        fuel_saved_l=people["fuel_saved_l"].to_numpy() / occupants,
+    )
+
+    return {
+        "user": people.groupby("key")[_TOTALS].sum(),
+        "destination": routes.dropna(subset=["destination"])
+        .groupby("destination")[_TOTALS].sum(),
+        "week": routes.dropna(subset=["week"]).groupby("week")[_TOTALS].sum(),
+    }
+
+
+def compute_savings(frames) -> dict:
+    """
+    Folds the partial totals of every chunk into final totals.
+
+    Args:
+        frames (Iterable[DataFrame]): Route chunks, e.g. from `route_frames`.
+
+    Returns:
+        dict: {kind: DataFrame indexed by key with `routes`, `riders`, `fuel_saved_l`
+        and `co2_saved_kg`}.
+    """
+    totals = {kind: pd.DataFrame(columns=_TOTALS, dtype=float)
+              for kind in KINDS}
+    for frame in frames:
+        for kind, partial in chunk_savings(frame).items():
+            if partial.empty:
+                continue
+            if totals[kind].empty:
+                totals[kind] = partial
+            else:
+                totals[kind] = partial.add(totals[kind], fill_value=0)
+    for kind, table in totals.items():
+        table["co2_saved_kg"] = table["fuel_saved_l"] * CO2_KG_PER_LITRE
+    return totals
+
+
+def write_report(reports, totals: dict, now: datetime = None) -> int:
+    """
+    Replaces the stored report with new totals.
+
+    The new rows are inserted before the previous report is deleted, so readers
+    never see an empty report; while both exist, readers should keep the rows with
+    the latest `generated_at`.
+
+    Args:
+        reports (Collection): The report collection.
+        totals (dict): The result of `compute_savings`.
+        now (datetime, optional): The report time (default: utcnow).
+
+    Returns:
+        int: The number of rows written.
+    """
+    now = now or datetime.utcnow()
+    # MongoDB stores milliseconds; match what is stored when deleting old rows.
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    written = 0
+    for kind, table in totals.items():
+        rows = [
+            {
+                "kind": kind,
+                "key": _key(kind, key),
+                "routes": int(row.routes),
+                "riders": int(row.riders),
+                "fuel_saved_l": float(row.fuel_saved_l),
+                "co2_saved_kg": float(row.co2_saved_kg),
+                "generated_at": now,
+            }
+            for key, row in zip(table.index, table.itertuples(index=False))
+        ]
+        if rows:
+            reports.insert_many(rows)
+            written += len(rows)
+    reports.delete_many({"generated_at": {"$ne": now}})
+    return written
+
+
+def build_report(routes, reports, chunk_size: int = CHUNK_SIZE,
+                 now: datetime = None) -> int:
+    """
+    Computes the savings report from the routes and stores it.
+
+    Args:
+        routes (Collection): The routes collection.
+        reports (Collection): The report collection.
+        chunk_size (int): Routes per chunk (default: `CHUNK_SIZE`).
+        now (datetime, optional): The report time (default: utcnow).
+
+    Returns:
+        int: The number of report rows written.
+    """
+    ensure_indexes(reports)
+    totals = compute_savings(route_frames(routes, chunk_size))
+    return write_report(reports, totals, now)
+
+
+def _week_start(frame: pd.DataFrame) -> pd.Series:
+    """
+    Returns the Monday of each route's departure week, from `departure_at` or `date`.
+    """
+    departure = pd.to_datetime(frame["departure_at"], errors="coerce", utc=True)
+    departure = departure.dt.tz_localize(None)
+    fallback = pd.to_datetime(frame["date"], errors="coerce", format="%Y-%m-%d")
+    day = departure.fillna(fallback).dt.normalize().astype("datetime64[ns]")
+    return day - pd.to_timedelta(day.dt.weekday.to_numpy(dtype=float), unit="D")
+
+
+def _key(kind: str, key):
+    """
+    Converts a grouping key back to the type stored in the report.
+    """
+    if kind == "user":
+        return ObjectId(key) if ObjectId.is_valid(key) else key
+    if kind == "week":
+        return pd.Timestamp(key).to_pydatetime()
+    return key
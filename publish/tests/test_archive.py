@@ -0,0 +1,146 @@
+"""
+Test cases for archiving past routes.
+
+These tests verify that `archive_routes` moves only routes past the retention window,
+detaching them from their destination and its statistics, that an interrupted run can
+be repeated, that `archive_history` runs the job, that the profile's past rides and
+a rider's "My Rides" include archived routes, and that the forum still lists the
+topics of a destination whose routes are all archived.
+"""
+
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from publish import destination_stats
+from publish.archive import archive_routes, move_documents
+
+
+class ArchiveRoutesTestCase(TestCase):
+    """
+    Test cases for `archive_routes` and `move_documents`.
+    """
+
+    def setUp(self):
+        """
+        Creates a route that departed long ago, a legacy one with only a date, and a
+        recent one, all to the same destination.
+        """
+        self.db = mongomock.MongoClient().SEProject
+        self.now = datetime(2024, 12, 1, 12, 0)
+        self.creator = ObjectId()
+        routes = [
+            {"_id": "old", "departure_at": datetime(2024, 9, 1, 14, 0), "date": "2024-09-01"},
+            {"_id": "legacy", "date": "2024-08-15"},
+            {"_id": "recent", "departure_at": datetime(2024, 11, 20, 14, 0), "date": "2024-11-20"},
+        ]
+        for route in routes:
+            route.update(creator=self.creator, destination="RDU", distance=10.0,
+                         fuel=1.0, users=[], seats_taken=0)
+            self.db.routes.insert_one(route)
+            destination_stats.route_added(self.db.destinationStats, route)
+        self.db.rides.insert_one({"_id": "RDU", "route_id": ["old", "legacy", "recent"]})
+
+    def test_moves_past_routes(self):
+        """
+        Routes past the window are moved and detached; recent ones are kept.
+        """
+        moved = archive_routes(self.db, days=30, now=self.now, batch_size=1)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual([r["_id"] for r in self.db.routes.find()], ["recent"])
+        archived = {r["_id"]: r for r in self.db.routesArchive.find()}
+        self.assertEqual(set(archived), {"old", "legacy"})
+        self.assertEqual(archived["old"]["archived_at"], self.now)
+        self.assertEqual(self.db.rides.find_one()["route_id"], ["recent"])
+        self.assertEqual(self.db.destinationStats.find_one({"_id": "RDU"})["routes"], 1)
+
+    def test_repeat_after_interruption(self):
+        """
+        Routes already copied by an interrupted run are deleted without failing.
+        """
+        self.db.routesArchive.insert_one(self.db.routes.find_one({"_id": "old"}))
+
+        moved = move_documents(self.db.routes, self.db.routesArchive,
+                               {"_id": {"$in": ["old", "legacy"]}})
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(self.db.routes.count_documents({}), 1)
+        self.assertEqual(self.db.routesArchive.count_documents({}), 2)
+
+    @patch("publish.management.commands.archive_history.get_client")
+    def test_command(self, mock_get_client):
+        """
+        `archive_history` archives routes and topics with the given windows.
+        """
+        mock_get_client.return_value = self.db.client
+        self.db.topics.insert_one({"title": "Old", "last_activity_at": datetime(2020, 1, 1)})
+
+        call_command("archive_history", "--route-days", "0", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(self.db.routes.count_documents({}), 0)
+        self.assertEqual(self.db.routesArchive.count_documents({}), 3)
+        self.assertEqual(self.db.topicsArchive.count_documents({}), 1)
+
+    @patch("user.views.get_client")
+    def test_profile_lists_archived_rides(self, mock_get_client):
+        """
+        The profile's past rides include the creator's archived routes as well as
+        the past routes still in `routes`.
+        """
+        mock_get_client.return_value = self.db.client
+        self.db.userData.insert_one({"_id": self.creator, "username": "amy", "rides": []})
+        archive_routes(self.db, days=30, now=self.now)
+
+        response = Client().get(reverse("user_profile", args=[str(self.creator)]))
+
+        self.assertEqual(
+            sorted(ride["_id"] for ride in response.context["pastrides"]),
+            ["legacy", "old", "recent"])
+
+    @patch("user.views.get_client")
+    def test_my_rides_lists_archived_rides(self, mock_get_client):
+        """
+        A rider's joined routes stay in "My Rides" after they are archived, read-only.
+        """
+        mock_get_client.return_value = self.db.client
+        self.db.userData.insert_one({"username": "bob", "rides": ["old", "recent"]})
+        archive_routes(self.db, days=30, now=self.now)
+        client = Client()
+        session = client.session
+        session["username"] = "bob"
+        session.save()
+
+        response = client.get(reverse("myrides"))
+
+        rides = {ride["_id"]: ride for ride in response.context["rides"]}
+        self.assertEqual(set(rides), {"old", "recent"})
+        self.assertTrue(rides["old"]["archived"])
+        self.assertNotIn("archived", rides["recent"])
+        self.assertNotContains(response, "/delete_ride/old")
+
+    @patch("forum.views.get_client")
+    def test_forum_lists_topics_of_archived_routes(self, mock_get_client):
+        """
+        A destination whose routes are all archived keeps its topics on the forum
+        front page and in the new-topic form.
+        """
+        mock_get_client.return_value = self.db.client
+        self.db.topics.insert_one({"ride_id": "RDU", "title": "Parking at RDU",
+                                   "created_at": self.now})
+        archive_routes(self.db, days=0, now=self.now)
+        self.assertEqual(self.db.routes.count_documents({}), 0)
+
+        listing = Client().get(reverse("rides_with_topics"))
+        form = Client().get(reverse("create_topic"))
+
+        rides = listing.context["rides_with_topics"]
+        self.assertEqual([ride["destination"] for ride in rides], ["RDU"])
+        self.assertEqual([t["title"] for t in rides[0]["topics"]], ["Parking at RDU"])
+        self.assertIn("RDU", form.context["destinations"])
@@ -0,0 +1,318 @@
+"""
+Unit tests for seat booking in the 'publish' application.
+
+These tests verify that joining a route takes a seat only while seats remain and the
+user is not already a member, that leaving gives the seat back, and that
+`select_route` does not confirm a join on a full route. `ConcurrentJoinTestCase`
+races hundreds of joins against a real MongoDB server; it runs when
+`MONGO_TEST_URL` points at one and is skipped otherwise.
+"""
+
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from publish.booking import (
+    DEFAULT_CAPACITY,
+    FULL,
+    JOINED,
+    LEFT,
+    MAX_CAPACITY,
+    MEMBER,
+    MISSING,
+    NOT_MEMBER,
+    join_route,
+    leave_route,
+    parse_capacity,
+    seats_left,
+    toggle_seat,
+)
+
+
+class BookingTestCase(TestCase):
+    """
+    Test cases for the conditional join and leave updates.
+    """
+
+    def setUp(self):
+        """
+        Creates a two-seat route on a mocked MongoDB collection.
+        """
+        self.routes = mongomock.MongoClient().SEProject.routes
+        self.routes.insert_one(
+            {"_id": "route_1", "users": [], "capacity": 2, "seats_taken": 0}
+        )
+
+    def test_join_takes_seat(self):
+        """
+        Joining adds the user and increments `seats_taken`.
+        """
+        user = ObjectId()
+
+        self.assertEqual(join_route(self.routes, user, "route_1"), JOINED)
+
+        route = self.routes.find_one({"_id": "route_1"})
+        self.assertEqual(route["users"], [user])
+        self.assertEqual(route["seats_taken"], 1)
+
+    def test_join_twice_is_refused(self):
+        """
+        A member cannot take a second seat.
+        """
+        user = ObjectId()
+        join_route(self.routes, user, "route_1")
+
+        self.assertEqual(join_route(self.routes, user, "route_1"), MEMBER)
+        self.assertEqual(self.routes.find_one({"_id": "route_1"})["seats_taken"], 1)
+
+    def test_full_route_is_refused(self):
+        """
+        Joins beyond the capacity do not change the route.
+        """
+        for _ in range(2):
+            join_route(self.routes, ObjectId(), "route_1")
+
+        self.assertEqual(join_route(self.routes, ObjectId(), "route_1"), FULL)
+        route = self.routes.find_one({"_id": "route_1"})
+        self.assertEqual(len(route["users"]), 2)
+        self.assertEqual(route["seats_taken"], 2)
+
+    def test_missing_route(self):
+        """
+        Joining a route that does not exist reports it as missing.
+        """
+        self.assertEqual(join_route(self.routes, ObjectId(), "nope"), MISSING)
+
+    def test_route_without_capacity_is_unlimited(self):
+        """
+        Routes created before capacities existed accept any number of riders.
+        """
+        self.routes.insert_one({"_id": "legacy", "users": []})
+
+        for _ in range(DEFAULT_CAPACITY + 3):
+            self.assertEqual(join_route(self.routes, ObjectId(), "legacy"), JOINED)
+
+    def test_leave_frees_seat(self):
+        """
+        Leaving removes the user, gives the seat back and lets someone else join.
+        """
+        first, second = ObjectId(), ObjectId()
+        join_route(self.routes, first, "route_1")
+        join_route(self.routes, second, "route_1")
+
+        self.assertEqual(leave_route(self.routes, first, "route_1"), LEFT)
+        self.assertEqual(leave_route(self.routes, first, "route_1"), NOT_MEMBER)
+        self.assertEqual(join_route(self.routes, ObjectId(), "route_1"), JOINED)
+        self.assertEqual(self.routes.find_one({"_id": "route_1"})["seats_taken"], 2)
+
+    def test_toggle_seat(self):
+        """
+        Selecting a route you are on takes you off it.
+        """
+        user = ObjectId()
+
+        self.assertEqual(toggle_seat(self.routes, user, "route_1"), JOINED)
+        self.assertEqual(toggle_seat(self.routes, user, "route_1"), LEFT)
+        self.assertEqual(self.routes.find_one({"_id": "route_1"})["users"], [])
+
+    def test_parse_capacity(self):
+        """
+        Form input is clamped, and blank or invalid input falls back to the default.
+        """
+        self.assertEqual(parse_capacity("3"), 3)
+        self.assertEqual(parse_capacity("0"), 1)
+        self.assertEqual(parse_capacity("1000"), MAX_CAPACITY)
+        self.assertEqual(parse_capacity(""), DEFAULT_CAPACITY)
+        self.assertEqual(parse_capacity(None), DEFAULT_CAPACITY)
+
+    def test_seats_left(self):
+        """
+        Free seats are counted from `capacity` and `seats_taken`.
+        """
+        self.assertEqual(seats_left({"capacity": 4, "seats_taken": 1}), 3)
+        self.assertEqual(seats_left({"capacity": 2, "seats_taken": 5}), 0)
+        self.assertIsNone(seats_left({"users": [ObjectId()]}))
+
+
+class SelectRouteBookingTestCase(TestCase):
+    """
+    Test cases for `select_route` on routes with limited seats.
+    """
+
+    def setUp(self):
+        """
+        Sets up the test client, a logged-in user and a full route.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.user_id = ObjectId()
+        self.mock_db.userData.insert_one(
+            {"_id": self.user_id, "username": "testuser", "rides": []}
+        )
+        self.mock_db.routes.insert_one(
+            {"_id": "route_1", "users": [ObjectId()], "capacity": 1, "seats_taken": 1}
+        )
+        session = self.client.session
+        session["username"] = "testuser"
+        session["email"] = "testuser@ncsu.edu"
+        session.save()
+        self.post_data = {
+            "hiddenInput": "route_1",
+            "hiddenUser": "testuser",
+            "hiddenRide": json.dumps({"_id": "ride_1", "destination": "RDU"}),
+        }
+
+    @patch("publish.views.get_client")
+    def test_full_route_not_joined(self, mock_get_client):
+        """
+        Selecting a full route leaves it, the user's rides and the outbox unchanged.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = self.client.post(reverse("select_route"), data=self.post_data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.mock_db.routes.find_one({})["seats_taken"], 1)
+        self.assertEqual(self.mock_db.userData.find_one({})["rides"], [])
+        self.assertIsNone(self.mock_db.emailOutbox.find_one({}))
+
+    @patch("publish.views.get_client")
+    def test_join_and_leave_update_rides(self, mock_get_client):
+        """
+        Joining adds the route to the user's rides once and leaving removes it.
+        """
+        mock_get_client.return_value = self.mock_client
+        self.mock_db.routes.update_one({"_id": "route_1"}, {"$set": {"capacity": 2}})
+
+        self.client.post(reverse("select_route"), data=self.post_data)
+        self.assertEqual(self.mock_db.userData.find_one({})["rides"], ["route_1"])
+        self.assertEqual(self.mock_db.routes.find_one({})["seats_taken"], 2)
+
+        # Leave a minute later; an immediate repeat is rejected as a double-click.
+        with patch("utilities.rate_limit.time.time", return_value=time.time() + 60):
+            self.client.post(reverse("select_route"), data=self.post_data)
+        self.assertEqual(self.mock_db.userData.find_one({})["rides"], [])
+        self.assertEqual(self.mock_db.routes.find_one({})["seats_taken"], 1)
+        self.assertEqual(self.mock_db.emailOutbox.count_documents({}), 1)
+
+
+class BackfillSeatsTestCase(TestCase):
+    """
+    Test cases for the `backfill_route_seats` command.
+    """
+
+    @patch("publish.management.commands.backfill_route_seats.get_client")
+    def test_backfill(self, mock_get_client):
+        """
+        Legacy routes get a capacity that fits their members and a matching count.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        routes = mock_client.SEProject.routes
+        routes.insert_many([
+            {"_id": "small", "users": [ObjectId()]},
+            {"_id": "big", "users": [ObjectId() for _ in range(DEFAULT_CAPACITY + 2)]},
+            {"_id": "set", "users": [], "capacity": 2, "seats_taken": 5},
+        ])
+
+        call_command("backfill_route_seats", stdout=open(os.devnull, "w"))
+
+        small, big, kept = (routes.find_one({"_id": i}) for i in ("small", "big", "set"))
+        self.assertEqual((small["capacity"], small["seats_taken"]), (DEFAULT_CAPACITY, 1))
+        self.assertEqual((big["capacity"], big["seats_taken"]),
+                         (DEFAULT_CAPACITY + 2, DEFAULT_CAPACITY + 2))
+        self.assertEqual((kept["capacity"], kept["seats_taken"]), (2, 0))
+
+
+@unittest.skipUnless(os.environ.get("MONGO_TEST_URL"), "MONGO_TEST_URL is not set")
+class ConcurrentJoinTestCase(TestCase):
+    """
+    Stress test racing concurrent joins against a real MongoDB server.
+    """
+
+    CAPACITY = 25
+    JOINERS = 400
+
+    def setUp(self):
+        """
+        Creates a route in a scratch database on the server from `MONGO_TEST_URL`.
+        """
+        self.mongo = MongoClient(
+            os.environ["MONGO_TEST_URL"], serverSelectionTimeoutMS=2000, maxPoolSize=100
+        )
+        try:
+            self.mongo.admin.command("ping")
+        except PyMongoError as e:
+            self.skipTest(f"MongoDB at MONGO_TEST_URL is unreachable: {e}")
+        self.database = f"packtravel_booking_{datetime.utcnow():%Y%m%d%H%M%S%f}"
+        self.routes = self.mongo[self.database].routes
+        self.routes.insert_one(
+            {"_id": "race", "users": [], "capacity": self.CAPACITY, "seats_taken": 0}
+        )
+
+    def tearDown(self):
+        """
+        Drops the scratch database.
+        """
+        self.mongo.drop_database(self.database)
+        self.mongo.close()
+
+    def _race(self, user_ids):
+        """
+        Joins every user at once from its own thread and returns the outcomes.
+        """
+        barrier = threading.Barrier(len(user_ids))
+        outcomes = [None] * len(user_ids)
+
+        def join(i):
+            barrier.wait()
+            outcomes[i] = join_route(self.routes, user_ids[i], "race")
+
+        threads = [threading.Thread(target=join, args=(i,)) for i in range(len(user_ids))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_no_overbooking(self):
+        """
+        Hundreds of simultaneous joins fill exactly `CAPACITY` seats.
+        """
+        outcomes = self._race([ObjectId() for _ in range(self.JOINERS)])
+
+        route = self.routes.find_one({"_id": "race"})
+        self.assertEqual(outcomes.count(JOINED), self.CAPACITY)
+        self.assertEqual(outcomes.count(FULL), self.JOINERS - self.CAPACITY)
+        self.assertEqual(route["seats_taken"], self.CAPACITY)
+        self.assertEqual(len(route["users"]), self.CAPACITY)
+        self.assertEqual(len(set(route["users"])), self.CAPACITY)
+
+    def test_same_user_counted_once(self):
+        """
+        The same user joining from many threads at once takes a single seat.
+        """
+        user = ObjectId()
+        outcomes = self._race([user] * 200)
+
+        route = self.routes.find_one({"_id": "race"})
+        self.assertEqual(outcomes.count(JOINED), 1)
+        self.assertEqual(route["users"], [user])
+        self.assertEqual(route["seats_taken"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
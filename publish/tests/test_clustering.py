@@ -0,0 +1,199 @@
+"""
+Unit tests for destination clustering and the Pack's Favorite leaderboard.
+
+These tests check that DBSCAN groups nearby destinations without linking sparse
+ones, that full and incremental runs store stable `cluster_id`s on routes, and that
+`packs_favorite` counts riders per cluster instead of per destination string.
+"""
+
+from unittest.mock import patch
+
+import mongomock
+import numpy as np
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from publish.clustering import NOISE, cluster_all, cluster_new, dbscan, leaderboard
+from utilities import GeoUtils
+
+RDU = (35.8801, -78.7880)
+DOWNTOWN = (35.7796, -78.6382)
+
+
+def route(route_id, destination, point=None, users=1):
+    """
+    Builds a route with a destination, optional coordinates and joined users.
+    """
+    document = {
+        "_id": route_id,
+        "destination": destination,
+        "users": [ObjectId() for _ in range(users)],
+    }
+    if point:
+        document["d_location"] = GeoUtils.point(*point)
+    return document
+
+
+class DbscanTestCase(TestCase):
+    """
+    Test cases for `dbscan`.
+    """
+
+    def test_groups_nearby_points(self):
+        """
+        Points within the radius share a label; distant points do not.
+        """
+        labels = dbscan(
+            np.array([RDU, (RDU[0] + 0.005, RDU[1]), DOWNTOWN, DOWNTOWN]),
+            eps_km=1.5, min_samples=2,
+        )
+        self.assertEqual(labels[0], labels[1])
+        self.assertEqual(labels[2], labels[3])
+        self.assertNotEqual(labels[0], labels[2])
+
+    def test_noise_with_min_samples(self):
+        """
+        Isolated points are noise when a core point needs neighbours.
+        """
+        labels = dbscan(np.array([RDU, RDU, DOWNTOWN]),
+                        eps_km=1.5, min_samples=2)
+        self.assertEqual(list(labels), [0, 0, NOISE])
+
+    def test_sparse_pair_not_linked(self):
+        """
+        Two lone routes just within the radius are not a cluster by default.
+        """
+        points = np.array([RDU, (RDU[0] + 0.011, RDU[1])])
+
+        self.assertEqual(list(dbscan(points, eps_km=1.5)), [NOISE, NOISE])
+        self.assertEqual(list(dbscan(points, eps_km=1.5, min_samples=1)), [0, 0])
+
+
+class ClusterRoutesTestCase(TestCase):
+    """
+    Test cases for `cluster_all`, `cluster_new` and `leaderboard`.
+    """
+
+    def setUp(self):
+        """
+        Creates routes with three spellings of the airport and one downtown route.
+        """
+        self.routes = mongomock.MongoClient().SEProject.routes
+        self.routes.insert_many(
+            [
+                route("a", "RDU Airport", RDU, users=2),
+                route("b", "RDU airport", (RDU[0] + 0.002, RDU[1]), users=1),
+                route("c", "Raleigh-Durham International", RDU, users=1),
+                route("d", "Downtown Raleigh", DOWNTOWN, users=3),
+                route("e", "Somewhere", None, users=0),
+            ]
+        )
+
+    def cluster_of(self, route_id):
+        """
+        Returns the stored cluster id of a route.
+        """
+        return self.routes.find_one({"_id": route_id})["cluster_id"]
+
+    def test_cluster_all(self):
+        """
+        Airport spellings share a cluster; routes without coordinates fall back to their name.
+        """
+        self.assertEqual(cluster_all(self.routes), 5)
+
+        self.assertEqual(self.cluster_of("a"), self.cluster_of("b"))
+        self.assertEqual(self.cluster_of("a"), self.cluster_of("c"))
+        self.assertNotEqual(self.cluster_of("a"), self.cluster_of("d"))
+        self.assertEqual(self.cluster_of("e"), "name:somewhere")
+
+    def test_noise_grouped_by_point(self):
+        """
+        Routes too few to form a cluster share an id only with routes at the same point.
+        """
+        self.routes.insert_many(
+            [route("f", "Chapel Hill", (35.91, -79.05)),
+             route("g", "UNC", (35.91, -79.05)),
+             route("h", "Carrboro", (35.91, -79.08))])
+
+        cluster_all(self.routes)
+
+        self.assertEqual(self.cluster_of("f"), self.cluster_of("g"))
+        self.assertNotEqual(self.cluster_of("f"), self.cluster_of("h"))
+
+    def test_rerun_keeps_ids(self):
+        """
+        Re-clustering unchanged routes keeps their ids and writes nothing.
+        """
+        cluster_all(self.routes)
+        before = self.cluster_of("a")
+
+        self.assertEqual(cluster_all(self.routes), 0)
+        self.assertEqual(self.cluster_of("a"), before)
+
+    def test_cluster_new(self):
+        """
+        New routes join the nearest existing cluster or start their own.
+        """
+        cluster_all(self.routes)
+        self.routes.insert_many(
+            [
+                route("f", "RDU", (RDU[0], RDU[1] + 0.003)),
+                route("g", "Durham", (35.99, -78.90)),
+                route("h", "Durham, NC", (35.991, -78.90)),
+                route("i", "Durham NC", (35.99, -78.901)),
+            ]
+        )
+
+        self.assertEqual(cluster_new(self.routes), 4)
+
+        self.assertEqual(self.cluster_of("f"), self.cluster_of("a"))
+        self.assertEqual(self.cluster_of("g"), self.cluster_of("h"))
+        self.assertEqual(self.cluster_of("g"), self.cluster_of("i"))
+        self.assertNotIn(self.cluster_of("g"), {
+                         self.cluster_of("a"), self.cluster_of("d")})
+        self.assertEqual(cluster_new(self.routes), 0)
+
+    def test_leaderboard(self):
+        """
+        Riders are counted per cluster and labelled with the most common spelling.
+        """
+        cluster_all(self.routes)
+
+        board = leaderboard(self.routes)
+
+        self.assertEqual(board[0]["user_count"], 4)
+        self.assertEqual(board[0]["route_count"], 3)
+        self.assertEqual(len(board[0]["names"]), 3)
+        self.assertEqual(board[1]["destination"], "Downtown Raleigh")
+        self.assertEqual(len(board), 2)
+
+
+class PacksFavoriteTestCase(TestCase):
+    """
+    Test cases for the clustered `packs_favorite` view.
+    """
+
+    @patch("publish.views.get_client")
+    def test_counts_per_cluster(self, mock_get_client):
+        """
+        The leaderboard merges spellings of one place into a single pick.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        routes = mock_client.SEProject.routes
+        routes.insert_many(
+            [
+                route("a", "RDU Airport", RDU, users=1),
+                route("b", "RDU airport", RDU, users=1),
+                route("d", "Downtown Raleigh", DOWNTOWN, users=1),
+            ]
+        )
+        cluster_all(routes)
+
+        response = Client().get(reverse("packs_favorite"))
+
+        picks = response.context["top_picks"]
+        self.assertEqual(len(picks), 2)
+        self.assertEqual(picks[0][1]["user_count"], 2)
+        self.assertEqual(picks[0][0], picks[0][1]["destination_slug"])
@@ -0,0 +1,207 @@
+"""
+Unit tests for the per-destination statistics rollup.
+
+These tests verify that the rollup counts routes, riders, distance and fuel as
+routes are added and removed and riders join and leave, that the views keep it up
+to date, and that `rebuild` reproduces the same numbers from the routes collection.
+"""
+
+import json
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from publish import destination_stats
+
+
+class DestinationStatsTestCase(TestCase):
+    """
+    Test cases for the rollup functions.
+    """
+
+    def setUp(self):
+        """
+        Creates mocked statistics and routes collections.
+        """
+        self.db = mongomock.MongoClient().SEProject
+        self.stats = self.db.destinationStats
+        self.routes = [
+            {"_id": "a", "destination": "RDU", "distance": 20.0, "fuel": 2.0,
+             "users": [ObjectId()]},
+            {"_id": "b", "destination": "RDU", "distance": 10.0, "fuel": 1.0,
+             "users": [ObjectId(), ObjectId()]},
+            {"_id": "c", "destination": "Durham", "distance": 30.0, "fuel": 3.0,
+             "users": []},
+        ]
+
+    def _add_all(self):
+        """
+        Counts every test route.
+        """
+        for route in self.routes:
+            self.db.routes.insert_one(dict(route))
+            destination_stats.route_added(self.stats, route)
+
+    def test_route_added(self):
+        """
+        Routes, riders, distance and fuel add up per destination.
+        """
+        self._add_all()
+
+        rdu = destination_stats.get_stats(self.stats, ["RDU"])["RDU"]
+        self.assertEqual(rdu["routes"], 2)
+        self.assertEqual(rdu["riders"], 3)
+        self.assertEqual(rdu["distance_km"], 30.0)
+        self.assertEqual(rdu["avg_distance_km"], 15.0)
+        self.assertEqual(rdu["fuel_l"], 3.0)
+        self.assertEqual(rdu["fuel_shared_l"], 4.0)
+
+    def test_rider_changes(self):
+        """
+        Joins and leaves move the rider count and the shared fuel.
+        """
+        self._add_all()
+
+        destination_stats.rider_joined(self.stats, self.routes[2])
+        destination_stats.rider_joined(self.stats, self.routes[2])
+        destination_stats.rider_left(self.stats, self.routes[2])
+
+        durham = self.stats.find_one({"_id": "Durham"})
+        self.assertEqual(durham["riders"], 1)
+        self.assertEqual(durham["fuel_shared_l"], 3.0)
+
+    def test_route_removed(self):
+        """
+        Removing routes subtracts them and drops destinations without routes.
+        """
+        self._add_all()
+
+        destination_stats.route_removed(self.stats, self.routes[0])
+        destination_stats.route_removed(self.stats, self.routes[2])
+
+        found = destination_stats.get_stats(self.stats, ["RDU", "Durham"])
+        self.assertEqual(list(found), ["RDU"])
+        self.assertEqual(found["RDU"]["routes"], 1)
+        self.assertEqual(found["RDU"]["riders"], 2)
+        self.assertEqual(found["RDU"]["distance_km"], 10.0)
+
+    def test_top_destinations(self):
+        """
+        Destinations are ranked by riders.
+        """
+        self._add_all()
+
+        top = destination_stats.top_destinations(self.stats, limit=1)
+
+        self.assertEqual([row["_id"] for row in top], ["RDU"])
+
+    def test_rebuild_matches_incremental(self):
+        """
+        A rebuild from the routes gives the same totals and removes stale destinations.
+        """
+        self._add_all()
+        self.stats.insert_one({"_id": "Gone", "routes": 1, "riders": 9})
+        incremental = {
+            doc["_id"]: doc for doc in self.stats.find({"_id": {"$ne": "Gone"}})
+        }
+
+        written = destination_stats.rebuild(
+            self.stats, self.db.routes, now=datetime(2024, 11, 1))
+
+        self.assertEqual(written, 2)
+        fields = ("routes", "riders", "distance_km", "fuel_l", "fuel_shared_l")
+        for doc in self.stats.find():
+            self.assertEqual(
+                {f: doc[f] for f in fields},
+                {f: incremental[doc["_id"]][f] for f in fields},
+            )
+
+
+class DestinationStatsViewsTestCase(TestCase):
+    """
+    Test cases for the views that maintain and serve the rollup.
+    """
+
+    def setUp(self):
+        """
+        Sets up the test client, a logged-in user and a counted route.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.user_id = ObjectId()
+        self.mock_db.userData.insert_one(
+            {"_id": self.user_id, "username": "testuser", "rides": []}
+        )
+        route = {"_id": "route_1", "destination": "RDU", "distance": 12.0,
+                 "fuel": 1.5, "users": [], "capacity": 4, "seats_taken": 0,
+                 "creator": ObjectId()}
+        self.mock_db.routes.insert_one(route)
+        destination_stats.route_added(self.mock_db.destinationStats, route)
+        session = self.client.session
+        session["username"] = "testuser"
+        session["email"] = "testuser@ncsu.edu"
+        session.save()
+
+    @patch("publish.views.get_client")
+    def test_select_route_counts_rider(self, mock_get_client):
+        """
+        Joining and leaving a route updates the destination's rider count.
+        """
+        mock_get_client.return_value = self.mock_client
+        data = {
+            "hiddenInput": "route_1",
+            "hiddenUser": "testuser",
+            "hiddenRide": json.dumps({"_id": "RDU", "destination": "RDU"}),
+        }
+
+        self.client.post(reverse("select_route"), data=data)
+        self.assertEqual(
+            self.mock_db.destinationStats.find_one({"_id": "RDU"})["riders"], 1)
+
+        # Leave a minute later; an immediate repeat is rejected as a double-click.
+        with patch("utilities.rate_limit.time.time", return_value=time.time() + 60):
+            self.client.post(reverse("select_route"), data=data)
+        self.assertEqual(
+            self.mock_db.destinationStats.find_one({"_id": "RDU"})["riders"], 0)
+
+    @patch("user.views.get_client")
+    def test_delete_ride_removes_route(self, mock_get_client):
+        """
+        Deleting the only route of a destination removes its statistics.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.client.get(reverse("delete_ride", args=["route_1"]))
+
+        self.assertIsNone(self.mock_db.destinationStats.find_one({"_id": "RDU"}))
+
+    @patch("publish.views.get_client")
+    def test_statistics_endpoint(self, mock_get_client):
+        """
+        The endpoint serves the rollup, by name or ranked by riders.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        by_name = self.client.get(
+            reverse("destination_statistics"), {"destination": ["RDU", "Nowhere"]}
+        ).json()["destinations"]
+        ranked = self.client.get(reverse("destination_statistics")).json()["destinations"]
+
+        self.assertEqual(len(by_name), 1)
+        self.assertEqual(by_name[0]["destination"], "RDU")
+        self.assertEqual(by_name[0]["avg_distance_km"], 12.0)
+        self.assertEqual(ranked, by_name)
+
+    def test_statistics_endpoint_requires_login(self):
+        """
+        Anonymous requests are rejected.
+        """
+        response = Client().get(reverse("destination_statistics"))
+
+        self.assertEqual(response.status_code, 401)
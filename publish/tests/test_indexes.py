@@ -0,0 +1,40 @@
+"""
+Test cases for the `create_indexes` command.
+
+These tests verify that the command creates the indexes the views read through, and
+that running it again is harmless.
+"""
+
+import os
+from unittest.mock import patch
+
+import mongomock
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class CreateIndexesTestCase(TestCase):
+    """
+    Test cases for `create_indexes`.
+    """
+
+    @patch("publish.management.commands.create_indexes.get_client")
+    def test_creates_indexes(self, mock_get_client):
+        """
+        The forum, search and archive indexes exist after the command, also when run twice.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        db = mock_client.SEProject
+
+        call_command("create_indexes", stdout=open(os.devnull, "w"))
+        call_command("create_indexes", stdout=open(os.devnull, "w"))
+
+        self.assertIn("topic_text", db.topics.index_information())
+        self.assertIn("ride_id_1_last_activity_at_-1", db.topics.index_information())
+        self.assertIn("comment_text", db.comments.index_information())
+        self.assertIn("topic_id_1_created_at_1__id_1", db.commentsArchive.index_information())
+        self.assertIn("creator_1_date_-1", db.routesArchive.index_information())
+        self.assertIn("route_text", db.routes.index_information())
+        self.assertIn("s_location_2dsphere", db.routes.index_information())
+        self.assertIn("destination_1_departure_at_1", db.routes.index_information())
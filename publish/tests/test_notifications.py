@@ -0,0 +1,257 @@
+"""
+Unit tests for the batched route-change notifications.
+
+These tests verify that `RouteNotifier` records a change for every member of a
+route except the one who made it, coalesces changes into one digest per member,
+and only turns digests into outbox emails once the coalescing window has passed.
+They also check that concurrent digest upserts do not stop the loop, that deleting a
+ride notifies its members, and that only a route's creator can notify its members
+of an update.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.test import TestCase, Client
+from django.urls import reverse
+from pymongo.errors import DuplicateKeyError
+
+from services import MailOutbox, RouteNotifier
+
+
+class RouteNotifierTestCase(TestCase):
+    """
+    Test cases for `RouteNotifier`.
+    """
+
+    def setUp(self):
+        """
+        Creates a notifier and a route with a creator and two joined members.
+        """
+        self.db = mongomock.MongoClient().SEProject
+        self.notifier = RouteNotifier(
+            self.db.routeNotifications, self.db.userData, MailOutbox(
+                self.db.emailOutbox)
+        )
+        self.notifier.ensure_indexes()
+        self.ids = [ObjectId() for _ in range(3)]
+        for i, user_id in enumerate(self.ids):
+            self.db.userData.insert_one(
+                {"_id": user_id, "username": f"user{i}", "email": f"user{i}@ncsu.edu"}
+            )
+        self.route = {
+            "_id": "route_1",
+            "destination": "RDU",
+            "creator": self.ids[0],
+            "users": self.ids[1:],
+        }
+        self.now = datetime(2024, 11, 1, 12, 0)
+
+    def test_notifies_every_member_but_the_actor(self):
+        """
+        The creator and joined users get a digest, except the user who made the change.
+        """
+        count = self.notifier.notify_members(
+            self.route, "was cancelled", exclude=self.ids[0], now=self.now
+        )
+
+        self.assertEqual(count, 2)
+        emails = {d["email"]
+                  for d in self.db.routeNotifications.find({"status": "open"})}
+        self.assertEqual(emails, {"user1@ncsu.edu", "user2@ncsu.edu"})
+
+    def test_changes_coalesce_into_one_digest(self):
+        """
+        Several changes inside the window produce a single email per member.
+        """
+        for minute in range(3):
+            self.notifier.notify_members(
+                self.route,
+                f"now leaves at 9:0{minute} AM",
+                now=self.now + timedelta(minutes=minute),
+            )
+
+        self.assertEqual(self.db.routeNotifications.count_documents({}), 3)
+        queued = self.notifier.flush(now=self.now + RouteNotifier.WINDOW)
+
+        self.assertEqual(queued, 3)
+        self.assertEqual(self.db.emailOutbox.count_documents({}), 3)
+        message = self.db.emailOutbox.find_one({"to": ["user1@ncsu.edu"]})
+        self.assertIn("RDU: now leaves at 9:02 AM", message["body"])
+        self.assertNotIn("9:00", message["body"])
+
+    def test_concurrent_digest_creation(self):
+        """
+        A member whose digest is opened concurrently still gets the change, and the
+        remaining members are notified.
+        """
+        self.db.routeNotifications.insert_one(
+            {"user_id": self.ids[1], "status": "open", "changes": []})
+        update_one = self.db.routeNotifications.update_one
+
+        def racing_update(query, update, upsert=False):
+            if upsert and query["user_id"] == self.ids[1]:
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return update_one(query, update, upsert=upsert)
+
+        with patch.object(self.db.routeNotifications, "update_one", side_effect=racing_update):
+            count = self.notifier.notify_members(self.route, "was cancelled", now=self.now)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(self.db.routeNotifications.count_documents({}), 3)
+        digest = self.db.routeNotifications.find_one({"user_id": self.ids[1]})
+        self.assertEqual([c["change"] for c in digest["changes"]], ["was cancelled"])
+
+    def test_flush_waits_for_window(self):
+        """
+        Digests younger than the window are left open.
+        """
+        self.notifier.notify_members(self.route, "was cancelled", now=self.now)
+
+        self.assertEqual(self.notifier.flush(now=self.now), 0)
+        self.assertEqual(self.db.emailOutbox.count_documents({}), 0)
+
+    def test_new_digest_after_flush(self):
+        """
+        A change after a flush opens a fresh digest instead of reusing the sent one.
+        """
+        self.notifier.notify_members(self.route, "was cancelled", now=self.now)
+        later = self.now + RouteNotifier.WINDOW
+        self.notifier.flush(now=later)
+
+        self.notifier.notify_members(self.route, "was cancelled", now=later)
+
+        self.assertEqual(
+            self.db.routeNotifications.count_documents({"status": "open"}), 3
+        )
+        self.assertEqual(
+            self.db.routeNotifications.count_documents({"status": "flushed"}), 3
+        )
+
+
+class DeleteRideNotificationTestCase(TestCase):
+    """
+    Test cases for the notifications sent when a ride is deleted.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in creator and a route with one joined member.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.creator_id, self.member_id = ObjectId(), ObjectId()
+        self.mock_db.userData.insert_many(
+            [
+                {"_id": self.creator_id, "username": "creator",
+                    "email": "creator@ncsu.edu"},
+                {"_id": self.member_id, "username": "member",
+                    "email": "member@ncsu.edu"},
+            ]
+        )
+        self.mock_db.routes.insert_one(
+            {
+                "_id": "route_1",
+                "destination": "RDU",
+                "creator": self.creator_id,
+                "users": [self.member_id],
+            }
+        )
+        session = self.client.session
+        session["username"] = "creator"
+        session.save()
+
+    @patch("user.views.get_client")
+    def test_delete_ride_notifies_members(self, mock_get_client):
+        """
+        Deleting a ride records a cancellation for its members but not for the deleter.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = self.client.get(reverse("delete_ride", args=["route_1"]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(self.mock_db.routes.find_one({"_id": "route_1"}))
+        digests = list(self.mock_db.routeNotifications.find({}))
+        self.assertEqual([d["email"] for d in digests], ["member@ncsu.edu"])
+        self.assertEqual(digests[0]["changes"][0]["change"], "was cancelled")
+
+
+class UpdateRouteNotificationTestCase(TestCase):
+    """
+    Test cases for the notifications sent when a route is updated.
+    """
+
+    def setUp(self):
+        """
+        Sets up a creator, a member and another user, and a route with one joined member.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.creator_id, self.member_id = ObjectId(), ObjectId()
+        self.mock_db.userData.insert_many(
+            [
+                {"_id": self.creator_id, "username": "creator",
+                    "email": "creator@ncsu.edu", "rides": []},
+                {"_id": self.member_id, "username": "member",
+                    "email": "member@ncsu.edu", "rides": []},
+                {"username": "other", "email": "other@ncsu.edu", "rides": []},
+            ]
+        )
+        self.mock_db.routes.insert_one(
+            {
+                "_id": "route_1",
+                "destination": "RDU",
+                "creator": self.creator_id,
+                "users": [self.member_id],
+            }
+        )
+        self.post_data = {
+            "purpose": "Trip",
+            "spoint": "Hillsborough St",
+            "destination": "RDU",
+            "date": "2030-11-30",
+            "hour": "9",
+            "minute": "30",
+            "ampm": "AM",
+            "details": "moved",
+        }
+
+    def post_update(self, username):
+        """
+        Posts an update of `route_1` as `username`.
+        """
+        session = self.client.session
+        session["username"] = username
+        session.save()
+        return self.client.post(reverse("update_route", args=["route_1"]), self.post_data)
+
+    @patch("publish.views.get_client")
+    def test_creator_update_notifies_members(self, mock_get_client):
+        """
+        The creator's update tells the members that a new version was posted.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.assertEqual(self.post_update("creator").status_code, 302)
+
+        digests = list(self.mock_db.routeNotifications.find({}))
+        self.assertEqual([d["email"] for d in digests], ["member@ncsu.edu"])
+        self.assertEqual(
+            digests[0]["changes"][0]["change"],
+            "has a new version leaving Hillsborough St on 2030-11-30 at 9:30 AM")
+
+    @patch("publish.views.get_client")
+    def test_other_user_update_notifies_nobody(self, mock_get_client):
+        """
+        An update posted by someone other than the creator sends no notifications.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.assertEqual(self.post_update("other").status_code, 302)
+
+        self.assertEqual(self.mock_db.routeNotifications.count_documents({}), 0)
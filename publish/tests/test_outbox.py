@@ -0,0 +1,203 @@
+"""
+Unit tests for the email outbox used by the 'publish' application.
+
+These tests verify that `select_route` queues its confirmation email instead of
+talking to SMTP, and that `MailOutbox` delivers queued messages over a single
+connection, retries failures with backoff and records delivery status. SMTP is
+provided by Django's in-memory backend or by the local `SMTPSink`.
+"""
+
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import mongomock
+from bson import ObjectId
+from django.core import mail
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from services import MailOutbox
+from services.mail import SMTPSink
+
+
+class OutboxTestCase(TestCase):
+    """
+    Test cases for `MailOutbox`.
+    """
+
+    def setUp(self):
+        """
+        Creates an outbox on a mocked MongoDB collection.
+        """
+        self.collection = mongomock.MongoClient().SEProject.emailOutbox
+        self.outbox = MailOutbox(self.collection)
+
+    def test_enqueue_stores_pending_message(self):
+        """
+        Enqueued messages are stored as pending and due immediately.
+        """
+        message_id = self.outbox.enqueue("a@ncsu.edu", "Hi", "Body")
+
+        message = self.collection.find_one({"_id": message_id})
+        self.assertEqual(message["status"], "pending")
+        self.assertEqual(message["to"], ["a@ncsu.edu"])
+        self.assertEqual(message["attempts"], 0)
+
+    def test_deliver_pending_sends_and_marks_sent(self):
+        """
+        Due messages are sent and marked as sent.
+        """
+        for i in range(3):
+            self.outbox.enqueue(f"user{i}@ncsu.edu", "Hi", "Body")
+
+        stats = self.outbox.deliver_pending()
+
+        self.assertEqual(stats, {"sent": 3, "retried": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            self.collection.count_documents({"status": "sent"}), 3)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        """
+        A failed send goes back to pending with a later `next_attempt_at`.
+        """
+        self.outbox.enqueue("a@ncsu.edu", "Hi", "Body")
+        connection = MagicMock()
+        connection.send_messages.side_effect = OSError("smtp down")
+        now = datetime.utcnow()
+
+        stats = self.outbox.deliver_pending(connection=connection, now=now)
+
+        self.assertEqual(stats["retried"], 1)
+        message = self.collection.find_one({})
+        self.assertEqual(message["status"], "pending")
+        self.assertEqual(message["attempts"], 1)
+        self.assertIn("smtp down", message["last_error"])
+        self.assertAlmostEqual(
+            message["next_attempt_at"],
+            now + timedelta(seconds=MailOutbox.BACKOFF_SECONDS),
+            delta=timedelta(milliseconds=1),
+        )
+        # Not due yet, so nothing is sent on the next run.
+        self.assertEqual(
+            self.outbox.deliver_pending(now=now), {
+                "sent": 0, "retried": 0, "failed": 0})
+
+    def test_gives_up_after_max_attempts(self):
+        """
+        Messages are marked failed once `MAX_ATTEMPTS` is reached.
+        """
+        message_id = self.outbox.enqueue("a@ncsu.edu", "Hi", "Body")
+        self.collection.update_one(
+            {"_id": message_id}, {"$set": {"attempts": MailOutbox.MAX_ATTEMPTS - 1}}
+        )
+        connection = MagicMock()
+        connection.open.side_effect = OSError("unreachable")
+
+        stats = self.outbox.deliver_pending(connection=connection)
+
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(
+            self.collection.find_one({"_id": message_id})["status"], "failed"
+        )
+
+    def test_stale_claims_released(self):
+        """
+        Messages stuck in "sending" after a crash are delivered again.
+        """
+        message_id = self.outbox.enqueue("a@ncsu.edu", "Hi", "Body")
+        self.collection.update_one(
+            {"_id": message_id},
+            {
+                "$set": {
+                    "status": "sending",
+                    "claimed_at": datetime.utcnow() - timedelta(hours=1),
+                }
+            },
+        )
+
+        self.assertEqual(self.outbox.deliver_pending()["sent"], 1)
+
+    def test_single_smtp_connection_per_batch(self):
+        """
+        A whole batch is delivered to a real SMTP server over one connection.
+        """
+        for i in range(5):
+            self.outbox.enqueue(f"user{i}@ncsu.edu", "Hi", "Body")
+
+        with SMTPSink() as sink, override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=sink.host,
+            EMAIL_PORT=sink.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        ):
+            stats = self.outbox.deliver_pending()
+
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(len(sink.messages), 5)
+        self.assertEqual(sink.connections, 1)
+
+
+class SelectRouteOutboxTestCase(TestCase):
+    """
+    Test cases for the email queued by `select_route`.
+    """
+
+    def setUp(self):
+        """
+        Sets up the test client and mock data.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.mock_db.userData.insert_one(
+            {"_id": ObjectId(), "username": "testuser", "rides": []}
+        )
+        session = self.client.session
+        session["username"] = "testuser"
+        session["email"] = "testuser@ncsu.edu"
+        session.save()
+        self.post_data = {
+            "hiddenInput": "route_1",
+            "hiddenUser": "testuser",
+            "hiddenRide": json.dumps({"_id": "ride_1", "destination": "RDU"}),
+        }
+
+    @patch("publish.views.get_client")
+    def test_select_route_queues_email(self, mock_get_client):
+        """
+        Joining a route writes the confirmation to the outbox without sending it.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = self.client.post(
+            reverse("select_route"), data=self.post_data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        message = self.mock_db.emailOutbox.find_one({})
+        self.assertEqual(message["to"], ["testuser@ncsu.edu"])
+        self.assertIn("RDU", message["body"])
+
+    @patch("publish.views.MailOutbox")
+    @patch("publish.views.get_client")
+    def test_select_route_survives_outbox_failure(
+            self, mock_get_client, mock_outbox):
+        """
+        A failure to queue the email does not fail the join.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_outbox.return_value.enqueue.side_effect = RuntimeError("mongo down")
+
+        response = self.client.post(
+            reverse("select_route"), data=self.post_data)
+
+        self.assertEqual(response.status_code, 302)
+
+
+if __name__ == "__main__":
+    unittest.main()
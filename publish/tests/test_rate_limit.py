@@ -0,0 +1,198 @@
+"""
+Test cases for POST rate limiting.
+
+These tests verify the token bucket and duplicate marks of both stores, that
+`RateLimiter` keys clients by session and ignores the CSRF token when comparing
+submissions, and that `select_route`, `create_topic` and `add_comment` answer 429
+without touching the database, showing the form again (or, for `select_route`, the
+ride page) to form submissions, and that anonymous clients behind a trusted proxy are
+keyed by their forwarded address.
+"""
+
+import json
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import TestCase, Client, RequestFactory
+from django.urls import reverse
+
+from utilities.rate_limit import CacheStore, MemoryStore, RateLimiter
+
+
+class StoreTestCase(TestCase):
+    """
+    Test cases for `MemoryStore` and `CacheStore`.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def check_bucket(self, store):
+        """
+        A bucket allows a burst of `capacity`, then one request per refill interval.
+        """
+        waits = [store.take("k", 3, 30, 100.0) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 10.0)
+        self.assertEqual(store.take("k", 3, 30, 110.0), 0)
+        self.assertGreater(store.take("k", 3, 30, 110.0), 0)
+        self.assertEqual(store.take("other", 3, 30, 110.0), 0)
+
+    def check_marks(self, store):
+        """
+        A key can be claimed again only once its mark has expired.
+        """
+        self.assertEqual(store.claim("m", 5, 100.0), 0)
+        self.assertGreater(store.claim("m", 5, 102.0), 0)
+        self.assertEqual(store.claim("n", 5, 102.0), 0)
+
+    def test_memory_store(self):
+        store = MemoryStore()
+        self.check_bucket(store)
+        self.check_marks(store)
+        self.assertEqual(store.claim("m", 5, 105.5), 0)
+
+    def test_cache_store(self):
+        store = CacheStore()
+        self.check_bucket(store)
+        self.check_marks(store)
+
+
+class RateLimiterTestCase(TestCase):
+    """
+    Test cases for `RateLimiter`.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.store = MemoryStore()
+        self.limiter = RateLimiter("test", capacity=5, period=60, duplicate_seconds=5)
+
+    def post(self, data, session_key=None, ip="10.0.0.1"):
+        request = self.factory.post("/x/", data, REMOTE_ADDR=ip)
+        request.session = type("Session", (), {"session_key": session_key})()
+        return request
+
+    def test_duplicates_ignore_csrf_token(self):
+        """
+        The same form sent twice is a duplicate even with a fresh CSRF token.
+        """
+        first = self.post({"a": "1", "csrfmiddlewaretoken": "x"}, "s1")
+        again = self.post({"a": "1", "csrfmiddlewaretoken": "y"}, "s1")
+        changed = self.post({"a": "2"}, "s1")
+
+        self.assertEqual(self.limiter.check(first, self.store, now=0), 0)
+        self.assertEqual(self.limiter.check(again, self.store, now=1), 4)
+        self.assertEqual(self.limiter.check(changed, self.store, now=1), 0)
+        self.assertEqual(self.limiter.check(again, self.store, now=6), 0)
+
+    def test_clients_are_separate(self):
+        """
+        Sessions have separate buckets, and clients without one are keyed by IP.
+        """
+        for i in range(5):
+            self.assertEqual(self.limiter.check(self.post({"i": i}, "s1"), self.store, 0), 0)
+        self.assertGreater(self.limiter.check(self.post({"i": 9}, "s1"), self.store, 0), 0)
+        self.assertEqual(self.limiter.check(self.post({"i": 9}, "s2"), self.store, 0), 0)
+        self.assertEqual(self.limiter.check(self.post({"i": 9}), self.store, 0), 0)
+        self.assertEqual(RateLimiter.client_key(self.post({})), "ip:10.0.0.1")
+
+    def test_forwarded_client_address(self):
+        """
+        Behind trusted proxies, anonymous clients are keyed by the forwarded address
+        the outermost proxy appended, not by the proxy or a spoofed entry.
+        """
+        request = self.post({})
+        request.META["HTTP_X_FORWARDED_FOR"] = "6.6.6.6, 203.0.113.7"
+
+        self.assertEqual(RateLimiter.client_ip(request), "10.0.0.1")
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(RateLimiter.client_ip(request), "203.0.113.7")
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=3):
+            self.assertEqual(RateLimiter.client_ip(request), "10.0.0.1")
+
+
+class RateLimitedViewsTestCase(TestCase):
+    """
+    Test cases for the rate-limited views.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+
+    @patch("publish.views.book_route")
+    @patch("publish.views.get_client")
+    def test_double_click_select_route(self, mock_get_client, mock_book):
+        """
+        A repeated selection is rejected with 429 before the route is touched.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_book.return_value = (ObjectId(), "left")
+        data = {
+            "hiddenInput": "route_1",
+            "hiddenUser": "testuser",
+            "hiddenRide": json.dumps({"_id": "RDU", "destination": "RDU"}),
+        }
+
+        first = self.client.post(reverse("select_route"), data)
+        second = self.client.post(reverse("select_route"), data)
+        scripted = self.client.post(reverse("select_route"), data,
+                                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+        self.assertEqual(first.status_code, 302)
+        self.assertRedirects(second, reverse("display_ride", args=["RDU"]),
+                             fetch_redirect_response=False)
+        self.assertEqual(second["Retry-After"], "5")
+        self.assertIn("too quickly", str(list(get_messages(second.wsgi_request))[0]))
+        self.assertEqual(scripted.status_code, 429)
+        self.assertEqual(mock_book.call_count, 1)
+
+    @patch("forum.views.get_client")
+    def test_comment_burst(self, mock_get_client):
+        """
+        Comments over the burst are rejected until the bucket refills.
+        """
+        mock_get_client.return_value = self.mock_client
+        topic_id = self.mock_client.SEProject.topics.insert_one(
+            {"ride_id": "RDU", "title": "Trip"}).inserted_id
+        url = reverse("add_comment", args=[topic_id])
+
+        codes = [self.client.post(url, {"content": f"c{i}"}).status_code for i in range(10)]
+        limited = self.client.post(url, {"content": "c10"})
+        scripted = self.client.post(url, {"content": "c11"},
+                                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+        self.assertEqual(codes, [302] * 10)
+        self.assertContains(limited, "You are posting too quickly", status_code=429)
+        self.assertTemplateUsed(limited, "forum/topic_details.html")
+        self.assertEqual(scripted.status_code, 429)
+        self.assertEqual(scripted.json(), {"error": "Too many requests"})
+        self.assertEqual(self.mock_client.SEProject.comments.count_documents({}), 10)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    @patch("forum.views.get_client")
+    def test_topic_form_resubmitted(self, mock_get_client):
+        """
+        A resubmitted topic form is shown again with an error instead of a JSON body.
+        """
+        mock_get_client.return_value = self.mock_client
+        data = {"ride_id": "RDU", "title": "Trip", "content": "Anyone?"}
+
+        first = self.client.post(reverse("create_topic"), data)
+        second = self.client.post(reverse("create_topic"), data)
+
+        self.assertEqual(first.status_code, 302)
+        self.assertContains(second, "You are posting too quickly", status_code=429)
+        self.assertTemplateUsed(second, "forum/create_topic.html")
+        self.assertIn("Retry-After", second)
+        self.assertEqual(self.mock_client.SEProject.topics.count_documents({}), 1)
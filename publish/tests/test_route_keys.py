@@ -0,0 +1,254 @@
+"""
+Unit tests for canonical route keys.
+
+These tests verify that `RouteUtils.key` gives equivalent routes the same compact
+key, that `create_route` stores routes under it without duplicating them (seating
+the creator of a duplicate through the capacity check), and that the
+`migrate_route_keys` command re-keys legacy routes, rewrites the ride and user
+references to them and reports the duplicates it cannot merge.
+"""
+
+import os
+from io import StringIO
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from utilities import RouteUtils
+
+
+def legacy_route(**fields):
+    """
+    Returns a route document keyed the old way, by concatenated form input.
+    """
+    route = {
+        "purpose": "Work",
+        "s_point": "Point A",
+        "destination": "New_York",
+        "date": "2024-11-30",
+        "hour": "10",
+        "minute": "30",
+        "ampm": "AM",
+        "users": [],
+        "creator": ObjectId(),
+    }
+    route.update(fields)
+    route["_id"] = "_".join(
+        str(route[f]) for f in RouteUtils.KEY_FIELDS)
+    return route
+
+
+class RouteKeyTestCase(TestCase):
+    """
+    Test cases for `RouteUtils.key`.
+    """
+
+    def test_key_is_fixed_width_hex(self):
+        """
+        Keys are hex strings of a fixed length however long the fields are.
+        """
+        short = RouteUtils.key(legacy_route())
+        long = RouteUtils.key(legacy_route(destination="x" * 500))
+
+        self.assertEqual(len(short), 2 * RouteUtils.KEY_BYTES)
+        self.assertEqual(len(long), len(short))
+        int(short, 16)
+
+    def test_equivalent_input_same_key(self):
+        """
+        Case, spacing and leading zeros do not change the key.
+        """
+        self.assertEqual(
+            RouteUtils.key(legacy_route(s_point="Point A", hour="9")),
+            RouteUtils.key(legacy_route(s_point="  point   a ", hour="09")),
+        )
+
+    def test_fields_do_not_run_together(self):
+        """
+        Moving text between adjacent fields gives a different key.
+        """
+        self.assertNotEqual(
+            RouteUtils.key(legacy_route(purpose="Work A", s_point="B")),
+            RouteUtils.key(legacy_route(purpose="Work", s_point="A B")),
+        )
+
+    def test_unicode_digits_are_text(self):
+        """
+        Digits `int` cannot parse, such as superscripts, are hashed as text.
+        """
+        self.assertNotEqual(RouteUtils.key({"purpose": "²"}), RouteUtils.key({"purpose": "2"}))
+        self.assertEqual(RouteUtils.normalize("٠٩"), "٠٩")
+
+
+class CreateRouteKeyTestCase(TestCase):
+    """
+    Test cases for the keys `create_route` stores.
+    """
+
+    def setUp(self):
+        """
+        Sets up the test client and a logged-in user.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.mock_db.userData.insert_one(
+            {"_id": ObjectId(), "username": "testuser", "rides": []})
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+        self.post_data = {
+            "purpose": "Work",
+            "spoint": "Point_A",
+            "destination": "New_York",
+            "date": "2024-11-30",
+            "hour": "10",
+            "minute": "30",
+            "ampm": "AM",
+            "details": "test",
+        }
+
+    @patch("publish.views.get_client")
+    def test_duplicate_route_stored_once(self, mock_get_client):
+        """
+        Posting the same route twice stores one route under its hashed key.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.client.post(reverse("create_route"), data=self.post_data)
+        self.client.post(
+            reverse("create_route"), data=dict(self.post_data, spoint="point_a "))
+
+        routes = list(self.mock_db.routes.find())
+        self.assertEqual(len(routes), 1)
+        self.assertEqual(routes[0]["_id"], RouteUtils.key(
+            dict(self.post_data, s_point="Point_A")))
+        self.assertEqual(
+            self.mock_db.rides.find_one({"_id": "New_York"})["route_id"], [routes[0]["_id"]]
+        )
+
+    @patch("publish.views.get_client")
+    def test_duplicate_route_takes_seat(self, mock_get_client):
+        """
+        Creating a route that already exists seats the user only while seats remain.
+        """
+        mock_get_client.return_value = self.mock_client
+        self.client.post(reverse("create_route"), data=dict(self.post_data, capacity="1"))
+        route_id = self.mock_db.routes.find_one()["_id"]
+        creator = self.mock_db.userData.find_one({"username": "testuser"})["_id"]
+        riders = []
+        for username in ("amy", "bob"):
+            riders.append(self.mock_db.userData.insert_one(
+                {"username": username, "rides": []}).inserted_id)
+            session = self.client.session
+            session["username"] = username
+            session.save()
+            self.client.post(reverse("create_route"), data=dict(self.post_data, capacity="1"))
+
+        route = self.mock_db.routes.find_one({"_id": route_id})
+        self.assertEqual(route["creator"], creator)
+        self.assertEqual(route["users"], [riders[0]])
+        self.assertEqual(route["seats_taken"], 1)
+        self.assertEqual(self.mock_db.userData.find_one({"_id": riders[0]})["rides"], [route_id])
+        self.assertEqual(self.mock_db.userData.find_one({"_id": riders[1]})["rides"], [])
+
+
+class MigrateRouteKeysTestCase(TestCase):
+    """
+    Test cases for the `migrate_route_keys` command.
+    """
+
+    def setUp(self):
+        """
+        Creates legacy routes, two of which normalize to the same key.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.alice, self.bob, self.creator = ObjectId(), ObjectId(), ObjectId()
+        self.first = legacy_route(users=[self.alice], seats_taken=1, creator=self.creator)
+        self.duplicate = legacy_route(s_point="point a", users=[self.bob], seats_taken=1,
+                                      creator=self.creator)
+        self.other = legacy_route(date="2024-12-01")
+        self.db.routes.insert_many([self.first, self.duplicate, self.other])
+        self.db.rides.insert_one(
+            {"_id": "New_York", "route_id": [r["_id"] for r in
+                                             (self.first, self.duplicate, self.other)]}
+        )
+        self.db.userData.insert_many([
+            {"_id": self.alice, "username": "alice", "rides": [self.first["_id"]]},
+            {"_id": self.bob, "username": "bob",
+             "rides": [self.duplicate["_id"], "unrelated"]},
+        ])
+
+    def _migrate(self):
+        """
+        Runs the command against the mocked database.
+        """
+        with patch("publish.management.commands.migrate_route_keys.get_client",
+                   return_value=self.mock_client):
+            call_command("migrate_route_keys", stdout=open(os.devnull, "w"))
+
+    def test_routes_rekeyed_and_merged(self):
+        """
+        Routes move to their keys and duplicates merge their riders.
+        """
+        self._migrate()
+
+        key, other_key = RouteUtils.key(self.first), RouteUtils.key(self.other)
+        self.assertEqual({r["_id"] for r in self.db.routes.find()}, {key, other_key})
+        merged = self.db.routes.find_one({"_id": key})
+        self.assertEqual(set(merged["users"]), {self.alice, self.bob})
+        self.assertEqual(merged["seats_taken"], 2)
+        self.assertEqual(
+            set(merged["legacy_ids"]), {self.first["_id"], self.duplicate["_id"]})
+
+    def test_references_rewritten(self):
+        """
+        Ride and user references point at the new keys, without duplicates.
+        """
+        self._migrate()
+
+        key, other_key = RouteUtils.key(self.first), RouteUtils.key(self.other)
+        self.assertEqual(
+            self.db.rides.find_one({})["route_id"], [key, other_key])
+        self.assertEqual(
+            self.db.userData.find_one({"username": "bob"})["rides"], [key, "unrelated"])
+
+    def test_conflicts_not_merged(self):
+        """
+        Duplicates from another creator or that would overbook the route keep their ids.
+        """
+        stranger = legacy_route(s_point="POINT A", creator=ObjectId())
+        crowded = legacy_route(date="2024-12-01", s_point="point a",
+                               users=[self.alice], creator=self.other["creator"])
+        self.db.routes.update_one({"_id": self.other["_id"]},
+                                  {"$set": {"capacity": 1, "users": [self.bob]}})
+        self.db.routes.insert_many([stranger, crowded])
+        out = StringIO()
+
+        with patch("publish.management.commands.migrate_route_keys.get_client",
+                   return_value=self.mock_client):
+            call_command("migrate_route_keys", stdout=out)
+
+        ids = {r["_id"] for r in self.db.routes.find()}
+        self.assertIn(stranger["_id"], ids)
+        self.assertIn(crowded["_id"], ids)
+        self.assertEqual(self.db.routes.find_one(
+            {"_id": RouteUtils.key(self.other)})["users"], [self.bob])
+        self.assertIn("different creator", out.getvalue())
+        self.assertIn("over capacity", out.getvalue())
+
+    def test_rerun_is_harmless(self):
+        """
+        Running the migration again changes nothing.
+        """
+        self._migrate()
+        before = list(self.db.routes.find()), list(self.db.rides.find())
+
+        self._migrate()
+
+        self.assertEqual((list(self.db.routes.find()), list(self.db.rides.find())), before)
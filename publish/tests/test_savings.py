@@ -0,0 +1,115 @@
+"""
+Unit tests for the fuel and CO2 savings report.
+
+These tests verify that shared fuel is counted per route as fuel times joined
+riders, credited in equal shares to everyone in the car, grouped by destination and
+departure week, that the totals do not depend on the chunk size, and that a new
+report replaces the previous one.
+"""
+
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import TestCase
+from pandas.testing import assert_frame_equal
+
+from publish import savings
+
+
+class SavingsTestCase(TestCase):
+    """
+    Test cases for `publish.savings`.
+    """
+
+    def setUp(self):
+        """
+        Creates routes with different riders, fuel and departure fields.
+        """
+        self.mock_client = mongomock.MongoClient()
+        self.db = self.mock_client.SEProject
+        self.users = [ObjectId() for _ in range(4)]
+        u = self.users
+        self.db.routes.insert_many([
+            {"destination": "RDU", "fuel": 2.0, "creator": u[0], "users": [u[1], u[2]],
+             "departure_at": datetime(2024, 11, 27, 15, tzinfo=timezone.utc)},
+            {"destination": "RDU", "fuel": 1.0, "creator": u[3], "users": [u[1]],
+             "date": "2024-12-01"},
+            {"destination": "Durham", "fuel": 4.0, "creator": u[0], "users": [],
+             "date": "2024-12-02"},
+            {"destination": "Durham", "creator": u[2], "users": [u[0]]},
+        ])
+
+    def _totals(self, chunk_size):
+        """
+        Computes the totals with the given chunk size.
+        """
+        return savings.compute_savings(savings.route_frames(self.db.routes, chunk_size))
+
+    def test_destination_totals(self):
+        """
+        Each route saves its fuel once per joined rider.
+        """
+        destinations = self._totals(10)["destination"]
+
+        self.assertEqual(destinations.loc["RDU", "fuel_saved_l"], 5.0)
+        self.assertEqual(destinations.loc["RDU", "riders"], 3)
+        self.assertEqual(destinations.loc["Durham", "routes"], 2)
+        self.assertEqual(destinations.loc["Durham", "fuel_saved_l"], 0.0)
+        self.assertAlmostEqual(
+            destinations.loc["RDU", "co2_saved_kg"], 5.0 * savings.CO2_KG_PER_LITRE)
+
+    def test_user_shares_add_up(self):
+        """
+        Everyone in a car gets an equal share, and the shares add up to the total.
+        """
+        users = self._totals(10)["user"]
+
+        self.assertAlmostEqual(users.loc[str(self.users[1]), "fuel_saved_l"], 2 / 3 * 2 + 0.5)
+        self.assertEqual(users.loc[str(self.users[1]), "riders"], 2)
+        self.assertEqual(users.loc[str(self.users[0]), "routes"], 3)
+        self.assertAlmostEqual(users["fuel_saved_l"].sum(), 5.0)
+
+    def test_weeks_start_on_monday(self):
+        """
+        Routes are grouped by the Monday of their departure week.
+        """
+        weeks = self._totals(10)["week"]
+
+        self.assertEqual(
+            [str(day.date()) for day in weeks.index], ["2024-11-25", "2024-12-02"])
+        self.assertEqual(list(weeks["routes"]), [2, 1])
+
+    def test_chunk_size_does_not_change_totals(self):
+        """
+        Streaming one route at a time gives the same totals as one chunk.
+        """
+        whole, chunked = self._totals(100), self._totals(1)
+
+        for kind in savings.KINDS:
+            assert_frame_equal(
+                whole[kind].sort_index(), chunked[kind].sort_index(), check_dtype=False
+            )
+
+    def test_report_replaces_previous(self):
+        """
+        The command writes every dimension and removes the previous report.
+        """
+        self.db.fuelReports.insert_one(
+            {"kind": "destination", "key": "Gone", "generated_at": datetime(2020, 1, 1)})
+
+        with patch("publish.management.commands.fuel_report.get_client",
+                   return_value=self.mock_client):
+            call_command("fuel_report", "--chunk-size", "2", stdout=open(os.devnull, "w"))
+
+        reports = self.db.fuelReports
+        self.assertIsNone(reports.find_one({"key": "Gone"}))
+        self.assertEqual(reports.count_documents({"kind": "user"}), 4)
+        self.assertEqual(reports.count_documents({"kind": "destination"}), 2)
+        self.assertEqual(
+            reports.find_one({"kind": "user", "key": self.users[3]})["fuel_saved_l"], 0.5)
+        self.assertEqual(
+            reports.find_one({"kind": "week", "key": datetime(2024, 11, 25)})["routes"], 2)
@@ -5,7 +5,7 @@ It interacts with the MongoDB database to manage users, rides, and routes, and u
 
 - Ride and route creation and selection
 - User authentication and route association
-- Sending email notifications to users upon successful route selection
+- Queueing email notifications to users upon successful route selection (delivered by the outbox worker)
 - MongoDB database initialization and management
 
 Dependencies:
@@ -17,7 +17,7 @@ Dependencies:
 - `services`: For external services like MapsService.
 - `config`: For accessing secrets and URL configurations.
 - `utilities`: For utility functions, such as date checks.
-- `django.core.mail`: For sending email notifications.
+- `MailOutbox`: For queueing email notifications in MongoDB.
 - `models`: For handling the database models related to rides.
 
 The module provides an interface for the front-end to interact with the backend systems to manage rides and routes for users.
@@ -33,17 +33,21 @@ from datetime import datetime
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
-from services import MapsService
+from services import MapsService, MailOutbox, RouteNotifier
 from config import Secrets, URLConfig
-from utilities import DateUtils
+from utilities import DateUtils, GeoUtils, RouteUtils, rate_limit
+from pymongo.errors import DuplicateKeyError
 from django.http import JsonResponse
-from django.core.mail import send_mail
 
 from .models import Ride
 
 from django.conf import settings
-import os
 from publish.forms import RideForm
+from search.autocomplete import record_destination
+from search.spatial import record_route
+from .booking import DEFAULT_CAPACITY, MAX_CAPACITY, FULL, JOINED, LEFT, MEMBER, join_route, parse_capacity, seats_left, toggle_seat
+from .clustering import leaderboard
+from . import destination_stats
 from utils import get_client
 import traceback
 import urllib.parse
@@ -56,11 +60,11 @@ db = None
 userDB = None
 ridesDB = None
 routesDB = None
+outboxDB = None
+notificationsDB = None
+statsDB = None
 mapsService = None
 
-EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
-EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
-
 secrets = Secrets()
 urlConfig = URLConfig()
 
@@ -74,6 +78,9 @@ def intializeDB():
     - `userDB`: The collection for storing user data within the "SEProject" database.
     - `ridesDB`: The collection for storing ride information within the "SEProject" database.
     - `routesDB`: The collection for storing route information within the "SEProject" database.
+    - `outboxDB`: The collection of queued emails within the "SEProject" database.
+    - `notificationsDB`: The collection of pending route-change digests within the "SEProject" database.
+    - `statsDB`: The per-destination statistics rollup within the "SEProject" database.
 
     Globals:
         client (MongoClient): The MongoDB client instance.
@@ -81,16 +88,22 @@ def intializeDB():
         userDB (Collection): The collection for user data.
         ridesDB (Collection): The collection for ride data.
         routesDB (Collection): The collection for route data.
+        outboxDB (Collection): The collection for queued emails.
+        notificationsDB (Collection): The collection for route-change digests.
+        statsDB (Collection): The collection for destination statistics.
 
     Returns:
         None
     """
-    global client, db, userDB, ridesDB, routesDB
+    global client, db, userDB, ridesDB, routesDB, outboxDB, notificationsDB, statsDB
     client = get_client()
     db = client.SEProject
     userDB = db.userData
     ridesDB = db.rides
     routesDB = db.routes
+    outboxDB = db.emailOutbox
+    notificationsDB = db.routeNotifications
+    statsDB = db.destinationStats
 
 
 def initializeService():
@@ -145,6 +158,8 @@ def publish_index(request):
             "username": request.session["username"],
             "alert": True,
             "gmap_api_key": secrets.GoogleMapsAPIKey,
+            "default_capacity": DEFAULT_CAPACITY,
+            "max_capacity": MAX_CAPACITY,
         },
     )
 
@@ -181,47 +196,86 @@ def display_ride(request, ride_id):
 
 def send_route_email(request, username, ride):
     """
-    Sends an email notification to the user confirming their route selection for a ride.
+    Queues an email notification confirming the user's route selection for a ride.
 
-    This function constructs an email with details about the ride and the selected route,
-    then sends the email to the user using Django's email system.
+    The message is written to the email outbox and delivered by the outbox worker
+    (`python manage.py deliver_outbox`), so a slow or failing SMTP server never
+    affects the request.
 
     Args:
         username (str): The username of the user who selected the route.
         ride (dict): The ride object containing details of the ride.
 
     Returns:
-        None
+        ObjectId: The id of the queued outbox message.
     """
-    try:
-        subject = f"Route Selected for today's Ride"
-        message = f"Hello {username},\n\nYou have successfully joined the route for the ride to {ride.get('destination')}.\n\nThanks for using our service!\n\nbest wishes,\npacktravel team"
+    subject = f"Route Selected for today's Ride"
+    message = f"Hello {username},\n\nYou have successfully joined the route for the ride to {ride.get('destination')}.\n\nThanks for using our service!\n\nbest wishes,\npacktravel team"
 
-        recipient_email = request.session.get("email", None)
+    recipient_email = request.session.get("email", None)
 
-        if recipient_email is None:
-            raise ValueError(
-                f'No email id attached to the user account {request.session.get("username", "")}'
-            )
+    if recipient_email is None:
+        raise ValueError(
+            f'No email id attached to the user account {request.session.get("username", "")}'
+        )
+
+    return MailOutbox(outboxDB).enqueue(recipient_email, subject, message)
+
+
+def notify_route_members(route, change, actor=None):
+    """
+    Tells every member of a route about a change through their batched notification digest.
+
+    Args:
+        route (dict): The route document that changed.
+        change (str): A short description of the change.
+        actor (ObjectId): The user who made the change; they are not notified.
 
-        send_mail(
-            subject,
-            message,
-            EMAIL_HOST_USER,
-            [recipient_email],
-            auth_password=EMAIL_HOST_PASSWORD,
+    Returns:
+        int: The number of members notified, or 0 if the notification could not be recorded.
+    """
+    try:
+        return RouteNotifier(notificationsDB, userDB, MailOutbox(outboxDB)).notify_members(
+            route, change, exclude=actor
         )
-    except Exception as e:
-        print(f"got error: {traceback.format_exc()}")
-        raise e
+    except Exception:
+        # The route change already happened; notifications are best effort.
+        print(f"could not notify route members: {traceback.format_exc()}")
+        return 0
+
 
+def select_route_limited(request):
+    """
+    Sends a rate-limited route selection form back to the ride page with a message.
 
+    Args:
+        request (HttpRequest): The limited POST request.
+
+    Returns:
+        HttpResponse: A redirect to the ride page, or to the home page if the form
+                      does not name a ride.
+    """
+    messages.info(request, "You are doing that too quickly. Please wait a moment and try again.")
+    try:
+        ride_id = json.loads(request.POST.get("hiddenRide", "").replace("'", '"')).get("_id")
+    except (ValueError, AttributeError):
+        ride_id = None
+    if not ride_id:
+        return redirect("index")
+    return redirect(display_ride, ride_id=ride_id)
+
+
+@rate_limit("select_route", capacity=10, period=60, limited=select_route_limited)
 def select_route(request):
     """
     Handles the route selection by a user for a specific ride.
 
     This function processes the POST request where the user selects a route for a ride.
     It attaches the user to the selected route and sends a confirmation email to the user.
+    POSTs are rate limited per session, and a repeat of the same selection within a few
+    seconds (e.g. a double-click) is rejected instead of toggling membership back: the
+    form is sent back to the ride page with a message, and scripts get 429 (see
+    `utilities.rate_limit`).
 
     Args:
         request (HttpRequest): The HTTP request object containing the form data.
@@ -243,10 +297,20 @@ def select_route(request):
                 ride_id = ride.get("_id")
 
                 if username and route_id:
-                    attach_user_to_route(username, route_id)
-
-                    send_route_email(request, username, ride)
-                    print(f"\n\n email confirmation sent sucessfully!!\n\n")
+                    _, outcome = book_route(username, route_id)
+                    if outcome == FULL:
+                        messages.info(request, "Sorry, that route is full.")
+                    if outcome in (FULL, LEFT):
+                        # Nothing was joined, so there is nothing to confirm.
+                        return redirect(display_ride, ride_id=ride_id)
+
+                    try:
+                        send_route_email(request, username, ride)
+                    except Exception:
+                        # The membership change already happened; a missing
+                        # confirmation email must not fail the request.
+                        print(
+                            f"could not queue route email: {traceback.format_exc()}")
                     # Redirect back to display the ride
                     return redirect(display_ride, ride_id=ride_id)
 
@@ -261,7 +325,12 @@ def select_route(request):
     return render(
         request,
         "publish/publish.html",
-        {"username": None, "gmap_api_key": secrets.GoogleMapsAPIKey},
+        {
+            "username": None,
+            "gmap_api_key": secrets.GoogleMapsAPIKey,
+            "default_capacity": DEFAULT_CAPACITY,
+            "max_capacity": MAX_CAPACITY,
+        },
     )
 
 
@@ -315,12 +384,12 @@ def get_routes(ride):
     docs = []
     for doc in documents:
         doc["id"] = doc["_id"]
-        route_date = doc["id"].split("_")[3]
         user = userDB.find_one({"_id": doc["creator"]})
         user["id"] = user["_id"]
         doc["creator"] = user
         doc["distance"] = round(doc["distance"], 1)
-        if not DateUtils.has_date_passed(route_date):
+        doc["seats_left"] = seats_left(doc)
+        if not DateUtils.has_date_passed(doc["date"]):
             docs.append(doc)
     return docs
 
@@ -340,7 +409,6 @@ def create_route(request):
     initializeService()
     if request.method == "POST":
         route = {
-            "_id": f"""{request.POST.get('purpose')}_{request.POST.get('s_point')}_{request.POST.get('destination')}_{request.POST.get("date")}_{request.POST.get("hour")}_{request.POST.get("minute")}_{request.POST.get("ampm")}""",
             "purpose": request.POST.get("purpose"),
             "s_point": request.POST.get("spoint"),
             "destination": request.POST.get("destination"),
@@ -351,17 +419,22 @@ def create_route(request):
             "ampm": request.POST.get("ampm"),
             "details": request.POST.get("details"),
             "users": [],
+            "capacity": parse_capacity(request.POST.get("capacity")),
+            "seats_taken": 0,
         }
+        route["_id"] = RouteUtils.key(route)
         ride_id = request.POST.get("destination")
-        route["creator"] = attach_user_to_route(
-            request.session["username"], route["_id"]
-        )
+        route["creator"] = find_user_id(request.session["username"])
         if request.POST.get("slat"):
             route["s_lat"] = request.POST.get("slat")
             route["s_long"] = request.POST.get("slong")
         if request.POST.get("dlat"):
             route["d_lat"] = request.POST.get("dlat")
             route["d_long"] = request.POST.get("dlong")
+        route.update(GeoUtils.route_locations(route))
+        departure_at = DateUtils.departure_at(route, settings.RIDE_TIME_ZONE)
+        if departure_at is not None:
+            route["departure_at"] = departure_at
 
         if request.POST.get("dlat") and request.POST.get("slat"):
             res = mapsService.get_route_details(
@@ -370,8 +443,19 @@ def create_route(request):
             route["fuel"] = res.get("fuel", 0)
             route["distance"] = res.get("distance", 0)
 
-        if routesDB.find_one({"_id": route["_id"]}) is None:
+        try:
+            # The unique `_id` index de-duplicates concurrent creations of the same route.
             routesDB.insert_one(route)
+        except DuplicateKeyError:
+            # Someone already offers this route: take a seat on it like any other rider.
+            if join_existing_route(route["creator"], route["_id"]) == FULL:
+                messages.info(request, "Sorry, that route is full.")
+            print("Route already exists")
+        else:
+            attach_user_to_route(route["creator"], route["_id"])
+            record_destination(route["destination"])
+            record_route(route)
+            destination_stats.route_added(statsDB, route)
             print("Route added")
             if ridesDB.find_one({"_id": ride_id}) is None:
                 ride = {
@@ -395,6 +479,8 @@ def create_route(request):
         {
             "username": request.session.get("username", None),
             "gmap_api_key": secrets.GoogleMapsAPIKey,
+            "default_capacity": DEFAULT_CAPACITY,
+            "max_capacity": MAX_CAPACITY,
         },
     )
 
@@ -402,8 +488,14 @@ def update_route(request, ride_id):
     """
     Handles the selection of a route for a specific ride and updates the database accordingly.
 
+    The updated route is stored as a new route; the previous one stays as it is, with
+    its members still booked on it. When the previous route's creator posts the update,
+    its members are told through their notification digest that a new version was
+    posted, so they can move to it.
+
     Args:
         request (HttpRequest): The HTTP request object containing session data and form data.
+        ride_id (str): The ID of the route being updated.
 
     Returns:
         HttpResponse: A redirect to `display_ride()` if a route is selected, or a rendered
@@ -412,8 +504,8 @@ def update_route(request, ride_id):
     intializeDB()
     initializeService()
     if request.method == "POST":
+        previous = routesDB.find_one({"_id": ride_id})
         route = {
-            "_id": f"""{request.POST.get('purpose')}_{request.POST.get('s_point')}_{request.POST.get('destination')}_{request.POST.get("date")}_{request.POST.get("hour")}_{request.POST.get("minute")}_{request.POST.get("ampm")}""",
             "purpose": request.POST.get("purpose"),
             "s_point": request.POST.get("spoint"),
             "destination": request.POST.get("destination"),
@@ -424,17 +516,22 @@ def update_route(request, ride_id):
             "ampm": request.POST.get("ampm"),
             "details": request.POST.get("details"),
             "users": [],
+            "capacity": parse_capacity(request.POST.get("capacity")),
+            "seats_taken": 0,
         }
+        route["_id"] = RouteUtils.key(route)
         ride_id = request.POST.get("destination")
-        route["creator"] = attach_user_to_route(
-            request.session["username"], route["_id"]
-        )
+        route["creator"] = find_user_id(request.session["username"])
         if request.POST.get("slat"):
             route["s_lat"] = request.POST.get("slat")
             route["s_long"] = request.POST.get("slong")
         if request.POST.get("dlat"):
             route["d_lat"] = request.POST.get("dlat")
             route["d_long"] = request.POST.get("dlong")
+        route.update(GeoUtils.route_locations(route))
+        departure_at = DateUtils.departure_at(route, settings.RIDE_TIME_ZONE)
+        if departure_at is not None:
+            route["departure_at"] = departure_at
 
         if request.POST.get("dlat") and request.POST.get("slat"):
             res = mapsService.get_route_details(
@@ -443,8 +540,19 @@ def update_route(request, ride_id):
             route["fuel"] = res.get("fuel", 0)
             route["distance"] = res.get("distance", 0)
 
-        if routesDB.find_one({"_id": route["_id"]}) is None:
+        try:
+            # The unique `_id` index de-duplicates concurrent creations of the same route.
             routesDB.insert_one(route)
+        except DuplicateKeyError:
+            # Someone already offers this route: take a seat on it like any other rider.
+            if join_existing_route(route["creator"], route["_id"]) == FULL:
+                messages.info(request, "Sorry, that route is full.")
+            print("Route already exists")
+        else:
+            attach_user_to_route(route["creator"], route["_id"])
+            record_destination(route["destination"])
+            record_route(route)
+            destination_stats.route_added(statsDB, route)
             print("Route added")
             if ridesDB.find_one({"_id": ride_id}) is None:
                 ride = {
@@ -461,6 +569,13 @@ def update_route(request, ride_id):
                     {"_id": ride_id}, {"$set": {"route_id": ride["route_id"]}}
                 )
                 print("Ride Updated")
+            if (previous is not None and route["creator"] is not None
+                    and previous.get("creator") == route["creator"]):
+                notify_route_members(
+                    previous,
+                    f"has a new version leaving {route['s_point']} on {route['date']} at {route['hour']}:{route['minute']} {route['ampm']}",
+                    actor=route["creator"],
+                )
         return redirect(display_ride, ride_id=ride_id)
     return render(
         request,
@@ -468,88 +583,178 @@ def update_route(request, ride_id):
         {
             "username": request.session.get("username", None),
             "gmap_api_key": secrets.GoogleMapsAPIKey,
+            "default_capacity": DEFAULT_CAPACITY,
+            "max_capacity": MAX_CAPACITY,
             "ride": ride_id
         },
     )
 
 
-def attach_user_to_route(username, route_id):
+def find_user_id(username):
     """
-    Attaches a selected route to the user's list of rides in the database.
+    Looks up a user's `_id` by username.
 
     Args:
-        username (str): The username of the user who selected a route.
-        route_id (str): The ID of the route to be attached to the user's list of rides.
+        username (str): The username to look up.
 
     Returns:
-        ObjectId: The unique ID (`_id`) of the user if found and updated.
-        HttpResponse: A redirect to 'home/home.html' if the user is not found.
+        ObjectId: The unique ID (`_id`) of the user, or None if the user is not found.
     """
     intializeDB()
-    remove = False
-    user = userDB.find_one({"username": username})
-    if user is None:
-        return redirect("home/home.html", {"username": None})
+    user = userDB.find_one({"username": username}, {"_id": 1})
+    return user["_id"] if user else None
 
-    user["rides"].append(route_id)
 
-    userDB.update_one({"username": username},
-                      {"$set": {"rides": user["rides"]}})
+def attach_user_to_route(user_id, route_id):
+    """
+    Attaches a newly inserted route to its creator's list of rides in the database.
 
-    route = routesDB.find_one({"_id": route_id})
-    if route is None:
-        return user["_id"]
-    users = route.get("users", [])
+    Args:
+        user_id (ObjectId): The `_id` of the route's creator.
+        route_id (str): The ID of the route to be attached to the user's list of rides.
+    """
+    userDB.update_one({"_id": user_id}, {"$addToSet": {"rides": route_id}})
 
-    for i in range(len(users)):
-        if users[i] == user["_id"]:
-            remove = True
-            del users[i]
 
-    if not remove:
-        users.append(user["_id"])
+def join_existing_route(user_id, route_id):
+    """
+    Seats a user on a route that already exists when they try to create it again.
+
+    The seat is taken through `publish.booking.join_route`, so a full route is not
+    overbooked. The route's own creator is left as its creator rather than seated.
+
+    Args:
+        user_id (ObjectId): The `_id` of the user creating the route.
+        route_id (str): The ID of the existing route.
+
+    Returns:
+        str: The outcome from `publish.booking.join_route`, or `MEMBER` for the creator.
+    """
+    if user_id is None or routesDB.find_one({"_id": route_id, "creator": user_id}, {"_id": 1}):
+        return MEMBER
+    outcome = join_route(routesDB, user_id, route_id)
+    if outcome == JOINED:
+        record_seat_change(user_id, route_id, outcome)
+    return outcome
+
+
+def record_seat_change(user_id, route_id, outcome):
+    """
+    Updates the user's `rides` list and the destination statistics after a seat change.
+
+    Args:
+        user_id (ObjectId): The `_id` of the user who joined or left.
+        route_id (str): The ID of the route.
+        outcome (str): `JOINED` or `LEFT`.
+    """
+    route = routesDB.find_one(
+        {"_id": route_id}, {"destination": 1, "fuel": 1}) or {}
+    if outcome == JOINED:
+        userDB.update_one({"_id": user_id}, {
+                          "$addToSet": {"rides": route_id}})
+        destination_stats.rider_joined(statsDB, route)
+    else:
+        userDB.update_one({"_id": user_id}, {"$pull": {"rides": route_id}})
+        destination_stats.rider_left(statsDB, route)
+
+
+def book_route(username, route_id):
+    """
+    Joins a user to a route, or takes them off it if they are already a member.
+
+    The seat is taken with a single conditional update (see `publish.booking`), so
+    concurrent joins cannot overbook a route. The user's `rides` list and the
+    destination statistics are only changed once the seat change has succeeded.
+
+    Args:
+        username (str): The username of the user who selected a route.
+        route_id (str): The ID of the route to join or leave.
+
+    Returns:
+        tuple: The user's `_id` (or a redirect if the user is not found) and the outcome
+               from `publish.booking.toggle_seat`.
+    """
+    intializeDB()
+    user = userDB.find_one({"username": username}, {"_id": 1})
+    if user is None:
+        return redirect("home/home.html", {"username": None}), None
 
-    routesDB.update_one({"_id": route_id}, {"$set": {"users": users}})
-    return user["_id"]
+    outcome = toggle_seat(routesDB, user["_id"], route_id)
+    if outcome in (JOINED, LEFT):
+        record_seat_change(user["_id"], route_id, outcome)
+    return user["_id"], outcome
 
 
 def packs_favorite(request):
     """
     View function to display the 'Pack's Favorite' page.
+
+    Popularity is counted per destination cluster, and each pick links to the
+    cluster's most common spelling. Distance and fuel figures for a pick are summed
+    from the destination statistics rollup of its spellings.
     """
     # Replace this list with data fetched from your database
     try:
         intializeDB()
 
-        rides = routesDB.find({"users": {"$ne": []}})
-        reco_obj = {}
-        obj = {}
-        for ride in rides:
-            # Add ride _id, user count, and destination to reco_obj
-            destination = ride["destination"]
-            destination_slug = urllib.parse.quote(
-                destination
-            )  # URL-encode the destination
-            user_count = len(ride["users"])
-
-            # Check if this destination already exists in reco_obj
-            if destination_slug in reco_obj:
-                reco_obj[destination_slug]["user_count"] += user_count
-            else:
-                reco_obj[destination_slug] = {
-                    "user_count": user_count,
-                    "destination": destination,
-                    "destination_slug": destination_slug,
-                }
-
-        sorted_reco = sorted(
-            reco_obj.items(), key=lambda x: x[1]["user_count"], reverse=True
+        # Routes to the same place under different spellings share a
+        # cluster_id (see publish.clustering), so popularity adds up per place.
+        picks = leaderboard(routesDB, limit=20)
+        stats = destination_stats.get_stats(
+            statsDB, {name for pick in picks for name in pick["names"]}
         )
-
-        # show only top 20 picks at most
-        top_picks = sorted_reco[:20]
+        top_picks = []
+        for pick in picks:
+            pick["destination_slug"] = urllib.parse.quote(pick["destination"])
+            rows = [stats[name] for name in pick["names"] if name in stats]
+            pick["fuel_shared_l"] = round(
+                sum(row["fuel_shared_l"] for row in rows), 1)
+            pick["avg_distance_km"] = round(
+                sum(row["distance_km"] for row in rows)
+                / max(sum(row["routes"] for row in rows), 1),
+                1,
+            )
+            top_picks.append((pick["destination_slug"], pick))
 
         return render(request, "publish/packs_favorite.html",
                       {"top_picks": top_picks})
     except Exception as e:
         print(f"error in fav : {traceback.format_exc()}")
+
+
+def destination_statistics(request):
+    """
+    Returns precomputed per-destination statistics for dashboards.
+
+    The numbers come from the `destinationStats` rollup, so the response costs one
+    indexed lookup no matter how many routes exist.
+
+    Query parameters:
+        destination: A destination to look up; may be repeated. When absent, the
+            destinations with the most riders are returned.
+        limit: Maximum number of destinations when ranking (default: 20, at most 100).
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse: {"destinations": [{"destination", "routes", "riders", "distance_km",
+                      "avg_distance_km", "fuel_l", "fuel_shared_l"}, ...]}, or an error with status 401.
+    """
+    if not request.session.has_key("username"):
+        return JsonResponse({"error": "Please login to view statistics!"}, status=401)
+    intializeDB()
+    names = request.GET.getlist("destination")
+    if names:
+        found = destination_stats.get_stats(statsDB, names)
+        rows = [found[name] for name in names if name in found]
+    else:
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 20)), 100))
+        except ValueError:
+            limit = 20
+        rows = destination_stats.top_destinations(statsDB, limit)
+    for row in rows:
+        row["destination"] = row.pop("_id")
+        row.pop("updated_at", None)
+    return JsonResponse({"destinations": rows})
@@ -0,0 +1,188 @@
+"""
+In-memory destination autocomplete.
+
+Destinations are free text, so riders type near-duplicates of places that already
+have rides. `DestinationIndex` keeps every known destination in a sorted array of
+lower-cased names; a prefix lookup is two `bisect` calls that bound the matching
+slice, and the most popular names in that slice (by number of routes) are returned.
+The index is built from one `$group` aggregation the first time it is queried in a
+process, refreshed every `REFRESH_SECONDS` so rides created by other processes show
+up, and updated in place when this process creates a route. Forms that offer every
+destination, such as the forum's new-topic form, read the same index.
+
+Classes:
+    DestinationIndex: Popularity-weighted prefix index of destination names.
+
+Functions:
+    - `destination_index`: Returns the process-wide index, loading it on first use.
+    - `record_destination`: Adds the destination of a newly created route to the index.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from utils import get_client
+
+REFRESH_SECONDS = 600
+
+
+class DestinationIndex:
+    """
+    A sorted-array prefix index of destination names weighted by popularity.
+
+    Attributes:
+        loaded_at (float): `time.monotonic()` of the last full load, or None.
+
+    Methods:
+        load(counts: dict): Replaces the index with `{name: count}`.
+        add(name: str, count: int): Adds a destination or raises its popularity.
+        suggest(prefix: str, limit: int) -> list: Returns the most popular names starting with `prefix`.
+        names() -> list: Returns every destination name in case-insensitive order.
+    """
+
+    def __init__(self, counts: dict = None):
+        """
+        Initializes the index, optionally with `{name: count}`.
+        """
+        self._keys = []
+        self._names = []
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        if counts:
+            self.load(counts)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def load(self, counts: dict):
+        """
+        Replaces the index contents.
+
+        Args:
+            counts (dict): Route counts keyed by destination name.
+        """
+        entries = sorted(
+            (name.casefold(), name) for name in counts if name and name.strip()
+        )
+        with self._lock:
+            self._keys = [key for key, _ in entries]
+            self._names = [name for _, name in entries]
+            self._counts = {name: counts[name] for _, name in entries}
+            self.loaded_at = time.monotonic()
+
+    def add(self, name: str, count: int = 1):
+        """
+        Adds a destination, or raises the popularity of a known one.
+
+        Args:
+            name (str): The destination name.
+            count (int): How many routes to add to its popularity (default: 1).
+        """
+        if not name or not name.strip():
+            return
+        with self._lock:
+            if name in self._counts:
+                self._counts[name] += count
+                return
+            key = name.casefold()
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._names.insert(position, name)
+            self._counts[name] = count
+
+    def names(self) -> list:
+        """
+        Returns every destination name, sorted ignoring case.
+
+        Returns:
+            list: The names.
+        """
+        with self._lock:
+            return list(self._names)
+
+    def suggest(self, prefix: str, limit: int = 8) -> list:
+        """
+        Returns the most popular destinations starting with `prefix`, ignoring case.
+
+        Args:
+            prefix (str): What the user has typed so far.
+            limit (int): Maximum number of suggestions (default: 8).
+
+        Returns:
+            list: [{"name": str, "count": int}, ...], most popular first.
+        """
+        key = prefix.strip().casefold()
+        if not key:
+            return []
+        with self._lock:
+            start = bisect_left(self._keys, key)
+            # Every key with this prefix sorts before prefix + the highest code point.
+            end = bisect_left(self._keys, key + "\U0010ffff", start)
+            best = heapq.nsmallest(
+                limit,
+                range(start, end),
+                key=lambda i: (-self._counts[self._names[i]], self._keys[i]),
+            )
+            return [
+                {"name": self._names[i], "count": self._counts[self._names[i]]}
+                for i in best
+            ]
+
+
+_index = DestinationIndex()
+_load_lock = threading.Lock()
+
+
+def destination_index(routes=None) -> DestinationIndex:
+    """
+    Returns the process-wide destination index, (re)loading it when it is missing or stale.
+
+    Args:
+        routes (Collection): The routes collection to load from (default: the app database).
+
+    Returns:
+        DestinationIndex: The loaded index.
+    """
+    if _is_fresh():
+        return _index
+    with _load_lock:
+        if not _is_fresh():
+            if routes is None:
+                routes = get_client().SEProject.routes
+            _index.load(
+                {
+                    row["_id"]: row["count"]
+                    for row in routes.aggregate(
+                        [
+                            {"$match": {"destination": {"$type": "string"}}},
+                            {"$group": {"_id": "$destination",
+                                        "count": {"$sum": 1}}},
+                        ]
+                    )
+                }
+            )
+    return _index
+
+
+def record_destination(name: str):
+    """
+    Adds a newly created route's destination to the index if this process has loaded it.
+
+    Args:
+        name (str): The destination of the new route.
+    """
+    if _index.loaded_at is not None:
+        _index.add(name)
+
+
+def _is_fresh() -> bool:
+    """
+    Returns True if the index was loaded less than `REFRESH_SECONDS` ago.
+    """
+    return (
+        _index.loaded_at is not None
+        and time.monotonic() - _index.loaded_at < REFRESH_SECONDS
+    )
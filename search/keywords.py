@@ -0,0 +1,85 @@
+"""
+Keyword search over routes.
+
+A single weighted text index covers each route's `destination`, `s_point`, `purpose`
+and `details`, so a query like "airport friday evening" is answered by MongoDB's
+`$text` operator: matching routes are ranked by `textScore` (a hit in the destination
+counts more than one in the free-text details), only the fields shown in the results
+are projected, and results are paginated with `skip`/`limit`.
+
+Functions:
+    - `ensure_indexes`: Creates the weighted text index.
+    - `search_routes`: Returns one page of relevance-ranked routes.
+"""
+
+from datetime import datetime, timezone
+
+from pymongo import TEXT
+
+PAGE_SIZE = 20
+MAX_PAGE = 50
+
+TEXT_WEIGHTS = {"destination": 8, "s_point": 4, "purpose": 2, "details": 1}
+
+RESULT_FIELDS = {
+    "destination": 1,
+    "s_point": 1,
+    "purpose": 1,
+    "details": 1,
+    "type": 1,
+    "date": 1,
+    "hour": 1,
+    "minute": 1,
+    "ampm": 1,
+    "score": {"$meta": "textScore"},
+}
+
+
+def ensure_indexes(routes):
+    """
+    Creates the weighted text index over the searchable route fields.
+
+    Args:
+        routes (Collection): The routes collection.
+    """
+    routes.create_index(
+        [(field, TEXT) for field in TEXT_WEIGHTS],
+        weights=TEXT_WEIGHTS,
+        name="route_text",
+        default_language="english",
+    )
+
+
+def search_routes(
+    routes, query: str, page: int = 1, per_page: int = PAGE_SIZE, now: datetime = None
+) -> tuple:
+    """
+    Returns one page of upcoming routes matching `query`, most relevant first.
+
+    Args:
+        routes (Collection): The routes collection.
+        query (str): The keywords; quoted phrases and `-negations` follow `$text` rules.
+        page (int): The 1-based page number, clamped to `MAX_PAGE`.
+        per_page (int): Results per page (default: `PAGE_SIZE`).
+        now (datetime): Routes departing before this time are skipped (default: now).
+
+    Returns:
+        tuple: (routes, has_next), where routes is a list of projected route documents
+        with a `score` field.
+    """
+    page = max(1, min(page, MAX_PAGE))
+    cursor = (
+        routes.find(
+            {
+                "$text": {"$search": query},
+                "departure_at": {"$gte": now or datetime.now(timezone.utc)},
+            },
+            RESULT_FIELDS,
+        )
+        .sort([("score", {"$meta": "textScore"})])
+        .skip((page - 1) * per_page)
+        # One extra document tells whether there is a next page without a count.
+        .limit(per_page + 1)
+    )
+    results = list(cursor)
+    return results[:per_page], len(results) > per_page
@@ -0,0 +1,47 @@
+"""
+Management command that adds normalized departure timestamps to routes.
+
+Routes created before `departure_at` existed only have the local `date`, `hour`,
+`minute` and `ampm` strings. This command stores the matching UTC timestamp, reading
+the strings in `settings.RIDE_TIME_ZONE`, and creates the departure-time indexes.
+
+Usage:
+    python manage.py backfill_departure_times
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from search.schedule import ensure_indexes
+from utilities import DateUtils
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Adds `departure_at` to routes that are missing it.
+    """
+
+    help = "Store a UTC departure_at timestamp on every route and index it."
+
+    def handle(self, *args, **options):
+        """
+        Runs the backfill.
+        """
+        routes = get_client().SEProject.routes
+        ensure_indexes(routes)
+        updated = skipped = 0
+        for route in routes.find(
+            {"departure_at": {"$exists": False}},
+            {"date": 1, "hour": 1, "minute": 1, "ampm": 1},
+        ):
+            departure_at = DateUtils.departure_at(
+                route, settings.RIDE_TIME_ZONE)
+            if departure_at is None:
+                skipped += 1
+                continue
+            routes.update_one({"_id": route["_id"]}, {
+                              "$set": {"departure_at": departure_at}})
+            updated += 1
+        self.stdout.write(
+            f"updated {updated} routes, skipped {skipped} without a valid time")
@@ -0,0 +1,49 @@
+"""
+Management command that converts stored route coordinates to GeoJSON points.
+
+Routes created before proximity search kept only the `s_lat`, `s_long`, `d_lat` and
+`d_long` strings posted by the form. This command adds the matching `s_location` and
+`d_location` points and creates the 2dsphere indexes the search relies on.
+
+Usage:
+    python manage.py backfill_route_locations
+"""
+
+from django.core.management.base import BaseCommand
+
+from search.proximity import ensure_indexes
+from utilities import GeoUtils
+from utils import get_client
+
+
+class Command(BaseCommand):
+    """
+    Adds GeoJSON origin/destination points to routes that are missing them.
+    """
+
+    help = "Convert route coordinate strings to GeoJSON points and index them."
+
+    def handle(self, *args, **options):
+        """
+        Runs the backfill.
+        """
+        routes = get_client().SEProject.routes
+        ensure_indexes(routes)
+        updated = skipped = 0
+        for route in routes.find(
+            {
+                "$or": [
+                    {"s_location": {"$exists": False}},
+                    {"d_location": {"$exists": False}},
+                ]
+            },
+            {"s_lat": 1, "s_long": 1, "d_lat": 1, "d_long": 1},
+        ):
+            locations = GeoUtils.route_locations(route)
+            if not locations:
+                skipped += 1
+                continue
+            routes.update_one({"_id": route["_id"]}, {"$set": locations})
+            updated += 1
+        self.stdout.write(
+            f"updated {updated} routes, skipped {skipped} without coordinates")
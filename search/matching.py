@@ -0,0 +1,234 @@
+"""
+Carpool matching engine.
+
+Given a rider's origin, destination and departure window, `match_routes` ranks the
+routes they could join. Candidates are first narrowed in MongoDB with indexed
+`$geoWithin` filters on the route endpoints and a `departure_at` range around the
+window, then scored together with NumPy:
+
+- detour: the extra distance the driver covers to pick the rider up and drop them off,
+  `d(s, o) + d(o, t) + d(t, e) - d(s, e)` for a route from `s` to `e` and a rider from
+  `o` to `t`, using great-circle distances.
+- time mismatch: how many minutes the route departs outside the rider's window.
+
+The score is `detour_km * KM_WEIGHT + mismatch_minutes * MINUTE_WEIGHT`; lower is better,
+and the best `k` are picked with `argpartition` so only those are fully sorted.
+
+Functions:
+    - `haversine_km`: Vectorised great-circle distance between coordinate arrays.
+    - `score_routes`: Scores a set of candidate routes for a rider.
+    - `top_k`: Returns the indices of the `k` lowest scores, best first.
+    - `candidate_routes`: Fetches the routes near the rider's endpoints and window.
+    - `match_routes`: Returns the best routes for a rider, annotated with their costs.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from utilities import GeoUtils
+
+KM_WEIGHT = 1.0
+MINUTE_WEIGHT = 0.2
+SEARCH_RADIUS_KM = 15
+MAX_TIME_OFFSET = timedelta(hours=3)
+DEFAULT_K = 10
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Computes great-circle distances between arrays (or scalars) of coordinates in degrees.
+
+    Returns:
+        ndarray: The distances in kilometres.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * GeoUtils.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def score_routes(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    departures: np.ndarray,
+    origin: tuple,
+    destination: tuple,
+    earliest: float,
+    latest: float,
+) -> tuple:
+    """
+    Scores candidate routes for a rider.
+
+    Args:
+        starts (ndarray): (n, 2) array of route start (lat, long).
+        ends (ndarray): (n, 2) array of route end (lat, long).
+        departures (ndarray): (n,) route departure times, in minutes since the epoch.
+        origin (tuple): The rider's (lat, long) start.
+        destination (tuple): The rider's (lat, long) destination.
+        earliest (float): Start of the rider's window, in minutes since the epoch.
+        latest (float): End of the rider's window, in minutes since the epoch.
+
+    Returns:
+        tuple: (scores, detour_km, mismatch_minutes) arrays of shape (n,).
+    """
+    o_lat, o_long = origin
+    t_lat, t_long = destination
+    pickup = haversine_km(starts[:, 0], starts[:, 1], o_lat, o_long)
+    shared = haversine_km(o_lat, o_long, t_lat, t_long)
+    dropoff = haversine_km(t_lat, t_long, ends[:, 0], ends[:, 1])
+    direct = haversine_km(starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1])
+    detour = np.maximum(pickup + shared + dropoff - direct, 0.0)
+    mismatch = np.maximum(earliest - departures, 0.0) + np.maximum(
+        departures - latest, 0.0
+    )
+    return detour * KM_WEIGHT + mismatch * MINUTE_WEIGHT, detour, mismatch
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the `k` lowest scores, best first.
+
+    Args:
+        scores (ndarray): The scores.
+        k (int): How many indices to return.
+
+    Returns:
+        ndarray: Up to `k` indices into `scores`.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=int)
+    if k < len(scores):
+        best = np.argpartition(scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(scores[best], kind="stable")]
+
+
+def candidate_routes(
+    routes,
+    origin: dict,
+    destination: dict,
+    earliest: datetime,
+    latest: datetime,
+    radius_km: float = SEARCH_RADIUS_KM,
+) -> list:
+    """
+    Fetches the routes whose endpoints are near the rider's and that depart around the window.
+
+    Args:
+        routes (Collection): The routes collection.
+        origin (dict): GeoJSON point of the rider's start.
+        destination (dict): GeoJSON point of the rider's destination.
+        earliest (datetime): Start of the rider's window (UTC).
+        latest (datetime): End of the rider's window (UTC).
+        radius_km (float): Maximum distance of either endpoint (default: `SEARCH_RADIUS_KM`).
+
+    Returns:
+        list: Candidate routes with only the fields needed to score and display them.
+    """
+    radius = GeoUtils.km_to_radians(radius_km)
+    return list(
+        routes.find(
+            {
+                "s_location": {
+                    "$geoWithin": {"$centerSphere": [origin["coordinates"], radius]}
+                },
+                "d_location": {
+                    "$geoWithin": {
+                        "$centerSphere": [destination["coordinates"], radius]
+                    }
+                },
+                "departure_at": {
+                    "$gte": earliest - MAX_TIME_OFFSET,
+                    "$lte": latest + MAX_TIME_OFFSET,
+                },
+            },
+            {
+                "s_location": 1,
+                "d_location": 1,
+                "s_point": 1,
+                "destination": 1,
+                "departure_at": 1,
+                "date": 1,
+                "hour": 1,
+                "minute": 1,
+                "ampm": 1,
+            },
+        )
+    )
+
+
+def match_routes(
+    routes,
+    origin: dict,
+    destination: dict,
+    earliest: datetime,
+    latest: datetime,
+    k: int = DEFAULT_K,
+) -> list:
+    """
+    Returns the `k` best routes for a rider.
+
+    Args:
+        routes (Collection): The routes collection.
+        origin (dict): GeoJSON point of the rider's start.
+        destination (dict): GeoJSON point of the rider's destination.
+        earliest (datetime): Start of the rider's departure window (UTC).
+        latest (datetime): End of the rider's departure window (UTC).
+        k (int): How many routes to return (default: `DEFAULT_K`).
+
+    Returns:
+        list: Route documents, best first, with `score`, `detour_km` and
+        `time_offset_minutes` fields.
+    """
+    candidates = [
+        (route, route["departure_at"])
+        for route in candidate_routes(routes, origin, destination, earliest, latest)
+    ]
+    if not candidates:
+        return []
+
+    starts = np.array(
+        [route["s_location"]["coordinates"][::-1]
+            for route, _ in candidates], dtype=float
+    )
+    ends = np.array(
+        [route["d_location"]["coordinates"][::-1]
+            for route, _ in candidates], dtype=float
+    )
+    departures = np.array(
+        [_minutes(departure) for _, departure in candidates], dtype=float
+    )
+    scores, detour, mismatch = score_routes(
+        starts,
+        ends,
+        departures,
+        origin["coordinates"][::-1],
+        destination["coordinates"][::-1],
+        _minutes(earliest),
+        _minutes(latest),
+    )
+
+    matches = []
+    for i in top_k(scores, k):
+        route = candidates[i][0]
+        route["score"] = round(float(scores[i]), 2)
+        route["detour_km"] = round(float(detour[i]), 1)
+        route["time_offset_minutes"] = int(round(float(mismatch[i])))
+        matches.append(route)
+    return matches
+
+
+def _minutes(moment: datetime) -> float:
+    """
+    Converts a datetime to minutes since the epoch; naive datetimes are taken to be UTC,
+    as MongoDB returns them.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH).total_seconds() / 60
@@ -0,0 +1,84 @@
+"""
+Proximity search over routes.
+
+Routes store their origin (`s_location`) and destination (`d_location`) as GeoJSON
+points, each covered by a 2dsphere index. `find_routes_near` answers "routes starting
+within X km of me and ending within Y km of my destination" with a single aggregation:
+`$geoNear` walks the origin index outwards from the user's position, and its query
+restricts the candidates with `$geoWithin`/`$centerSphere` on the destination, so no
+route is ever loaded into Python just to be filtered out.
+
+Functions:
+    - `ensure_indexes`: Creates the 2dsphere indexes used by the search.
+    - `find_routes_near`: Returns upcoming routes near an origin and a destination.
+"""
+
+from datetime import datetime, timezone
+
+from pymongo import GEOSPHERE
+
+from utilities import GeoUtils
+
+MAX_RESULTS = 50
+
+
+def ensure_indexes(routes):
+    """
+    Creates the 2dsphere indexes on route origins and destinations.
+
+    Args:
+        routes (Collection): The routes collection.
+    """
+    routes.create_index([("s_location", GEOSPHERE)])
+    routes.create_index([("d_location", GEOSPHERE)])
+
+
+def find_routes_near(
+    routes,
+    origin: dict,
+    origin_km: float,
+    destination: dict,
+    destination_km: float,
+    limit: int = MAX_RESULTS,
+    now: datetime = None,
+) -> list:
+    """
+    Finds upcoming routes that start near `origin` and end near `destination`.
+
+    Args:
+        routes (Collection): The routes collection.
+        origin (dict): GeoJSON point of the user's start.
+        origin_km (float): Maximum distance, in km, between the route's start and `origin`.
+        destination (dict): GeoJSON point of the user's destination.
+        destination_km (float): Maximum distance, in km, between the route's end and `destination`.
+        limit (int): Maximum number of routes returned (default: `MAX_RESULTS`).
+        now (datetime): Routes departing before this time are skipped (default: now).
+
+    Returns:
+        list: Route documents ordered by the distance of their start from `origin`,
+        each with an `origin_distance` field in metres.
+    """
+    pipeline = [
+        {
+            "$geoNear": {
+                "near": origin,
+                "key": "s_location",
+                "distanceField": "origin_distance",
+                "maxDistance": origin_km * 1000,
+                "spherical": True,
+                "query": {
+                    "d_location": {
+                        "$geoWithin": {
+                            "$centerSphere": [
+                                destination["coordinates"],
+                                GeoUtils.km_to_radians(destination_km),
+                            ]
+                        }
+                    },
+                    "departure_at": {"$gte": now or datetime.now(timezone.utc)},
+                },
+            }
+        },
+        {"$limit": limit},
+    ]
+    return list(routes.aggregate(pipeline))
@@ -0,0 +1,110 @@
+"""
+Departure-time search over routes.
+
+Every route stores its departure as `departure_at`, a UTC timestamp built from the
+local `date`, `hour`, `minute` and `ampm` fields in `settings.RIDE_TIME_ZONE`. A
+question like "leaving between 8:00 and 9:30 on Friday" becomes a single range scan
+on the `departure_at` index (or on `destination, departure_at` when a destination is
+given) instead of loading every route and filtering the strings in Python.
+
+Functions:
+    - `ensure_indexes`: Creates the departure-time indexes.
+    - `local_window`: Turns a day and two local times into a UTC window.
+    - `find_routes_leaving`: Returns the routes departing inside a window.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from pymongo import ASCENDING
+
+from utilities import DateUtils
+
+MAX_RESULTS = 50
+
+WEEKDAYS = ["monday", "tuesday", "wednesday",
+            "thursday", "friday", "saturday", "sunday"]
+
+
+def ensure_indexes(routes):
+    """
+    Creates the indexes used by departure-time queries.
+
+    Args:
+        routes (Collection): The routes collection.
+    """
+    routes.create_index([("departure_at", ASCENDING)])
+    routes.create_index([("destination", ASCENDING),
+                        ("departure_at", ASCENDING)])
+
+
+def local_window(
+    day: str, start: str, end: str, time_zone: str, today: date = None
+) -> tuple:
+    """
+    Turns a day and a range of local times into a UTC departure window.
+
+    Args:
+        day (str): A "YYYY-MM-DD" date, or a weekday name for its next occurrence (today included).
+        start (str): The earliest local time, "HH:MM".
+        end (str): The latest local time, "HH:MM".
+        time_zone (str): The IANA time zone the times are in.
+        today (date): The current local date (default: today).
+
+    Returns:
+        tuple: The (earliest, latest) aware UTC datetimes.
+
+    Raises:
+        ValueError: If the day or times cannot be parsed, or the window ends before it starts.
+    """
+    day = day.strip().lower()
+    if day in WEEKDAYS:
+        today = today or date.today()
+        day = today + timedelta(days=(WEEKDAYS.index(day) - today.weekday()) % 7)
+    else:
+        day = date.fromisoformat(day)
+    earliest = DateUtils.to_utc(
+        datetime.combine(day, time.fromisoformat(start)), time_zone)
+    latest = DateUtils.to_utc(
+        datetime.combine(day, time.fromisoformat(end)), time_zone)
+    if latest < earliest:
+        raise ValueError("The window ends before it starts")
+    return earliest, latest
+
+
+def find_routes_leaving(
+    routes,
+    earliest: datetime,
+    latest: datetime,
+    destination: str = None,
+    limit: int = MAX_RESULTS,
+) -> list:
+    """
+    Returns the routes departing between `earliest` and `latest`, soonest first.
+
+    Args:
+        routes (Collection): The routes collection.
+        earliest (datetime): Start of the window (UTC).
+        latest (datetime): End of the window (UTC).
+        destination (str): Only return routes to this destination (optional).
+        limit (int): Maximum number of routes returned (default: `MAX_RESULTS`).
+
+    Returns:
+        list: Route documents with the fields needed to list them.
+    """
+    query = {"departure_at": {"$gte": earliest, "$lte": latest}}
+    if destination:
+        query["destination"] = destination
+    return list(
+        routes.find(
+            query,
+            {
+                "s_point": 1,
+                "destination": 1,
+                "departure_at": 1,
+                "type": 1,
+                "details": 1,
+            },
+        )
+        .sort("departure_at", ASCENDING)
+        .limit(limit)
+    )
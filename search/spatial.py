@@ -0,0 +1,326 @@
+"""
+In-process spatial grid of route endpoints.
+
+Interactive map panning asks "which routes are near this point" many times a second,
+which is too often for a database round trip each time. `RouteGrid` keeps the origin
+and destination of every active route in a uniform latitude/longitude grid held in
+memory, and answers k-nearest-neighbour queries by scanning rings of cells outwards
+from the query point until no unscanned cell can hold a closer point.
+
+Storage is array-backed: coordinates live in contiguous NumPy float arrays that grow
+by doubling, each grid cell holds a compact `array('q')` of point slots, and a removed
+route only clears its slots' `alive` flag until the next rebuild.
+
+Classes:
+    RouteGrid: Uniform grid index of route origins and destinations.
+
+Functions:
+    - `route_grid`: Returns the process-wide grid, loading it on first use.
+    - `record_route`: Adds a newly created route to the loaded grid.
+    - `forget_route`: Removes a deleted route from the loaded grid.
+"""
+
+import math
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils import get_client
+
+from .matching import haversine_km
+
+CELL_DEGREES = 0.01
+MAX_RINGS = 50
+REFRESH_SECONDS = 600
+
+ORIGIN, DESTINATION = 0, 1
+KINDS = {"origin": ORIGIN, "destination": DESTINATION}
+
+_KM_PER_DEGREE = 111.32
+
+
+class RouteGrid:
+    """
+    A uniform grid of route origins and destinations supporting k-nearest queries.
+
+    Attributes:
+        cell_degrees (float): The edge length of a cell, in degrees.
+        loaded_at (float): `time.monotonic()` of the last full load, or None.
+
+    Methods:
+        load(routes: list): Replaces the grid with the endpoints of `routes`.
+        add(route: dict): Adds the endpoints of a route.
+        remove(route_id): Removes the endpoints of a route.
+        nearest(lat: float, long: float, k: int, kind: int) -> list: Returns the `k` closest endpoints.
+    """
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES, capacity: int = 1024):
+        """
+        Initializes an empty grid.
+
+        Args:
+            cell_degrees (float): The edge length of a cell, in degrees (default: `CELL_DEGREES`).
+            capacity (int): Initial number of point slots (default: 1024).
+        """
+        self.cell_degrees = cell_degrees
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._reset(capacity)
+
+    def __len__(self):
+        return self._size - self._removed
+
+    def _reset(self, capacity: int):
+        """
+        Drops every point and allocates `capacity` empty slots.
+        """
+        self._lat = np.empty(capacity, dtype=np.float64)
+        self._long = np.empty(capacity, dtype=np.float64)
+        self._kind = np.empty(capacity, dtype=np.uint8)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._route_ids = [None] * capacity
+        self._slots = {}
+        self._cells = {}
+        self._size = 0
+        self._removed = 0
+
+    def load(self, routes: list):
+        """
+        Replaces the grid contents with the endpoints of `routes`.
+
+        Args:
+            routes (list): Route documents with GeoJSON `s_location`/`d_location` fields.
+        """
+        with self._lock:
+            self._reset(max(1024, 2 * len(routes)))
+            for route in routes:
+                self._add(route)
+            self.loaded_at = time.monotonic()
+
+    def add(self, route: dict):
+        """
+        Adds (or replaces) the endpoints of a route.
+
+        Args:
+            route (dict): A route document with GeoJSON `s_location`/`d_location` fields.
+        """
+        with self._lock:
+            self._remove(route["_id"])
+            self._add(route)
+
+    def remove(self, route_id):
+        """
+        Removes the endpoints of a route, if present.
+
+        Args:
+            route_id: The route's `_id`.
+        """
+        with self._lock:
+            self._remove(route_id)
+
+    def nearest(
+        self, lat: float, long: float, k: int = 10, kind: int = None
+    ) -> list:
+        """
+        Returns the `k` endpoints closest to a point.
+
+        Args:
+            lat (float): The latitude of the point.
+            long (float): The longitude of the point.
+            k (int): How many endpoints to return (default: 10).
+            kind (int): Only return `ORIGIN` or `DESTINATION` endpoints (default: both).
+
+        Returns:
+            list: [{"route_id", "kind", "distance_km"}, ...], closest first.
+        """
+        if k <= 0:
+            return []
+        row, column = self._cell(lat, long)
+        # The narrowest a cell gets near this latitude bounds how far away any point
+        # outside the scanned rings can be.
+        cell_km = (
+            self.cell_degrees
+            * _KM_PER_DEGREE
+            * max(math.cos(math.radians(min(abs(lat) + self.cell_degrees * MAX_RINGS, 89.0))), 0.01)
+        )
+        with self._lock:
+            candidates = array("q")
+            for ring in range(MAX_RINGS + 1):
+                for cell in self._ring(row, column, ring):
+                    slots = self._cells.get(cell)
+                    if slots:
+                        candidates.extend(slots)
+                if len(candidates) >= k:
+                    chosen, distances = self._closest(
+                        candidates, lat, long, k, kind)
+                    if len(chosen) >= k and distances[-1] <= ring * cell_km:
+                        break
+                if len(candidates) >= self._size:
+                    chosen, distances = self._closest(
+                        candidates, lat, long, k, kind)
+                    break
+            else:
+                # Too sparse around this point for the rings: scan everything.
+                chosen, distances = self._closest(
+                    array("q", range(self._size)), lat, long, k, kind)
+            return [
+                {
+                    "route_id": self._route_ids[slot],
+                    "kind": "origin" if self._kind[slot] == ORIGIN else "destination",
+                    "distance_km": round(float(distance), 3),
+                }
+                for slot, distance in zip(chosen, distances)
+            ]
+
+    def _closest(self, candidates, lat, long, k, kind) -> tuple:
+        """
+        Returns the `k` closest live candidate slots and their distances, closest first.
+        """
+        slots = np.frombuffer(candidates, dtype=np.int64)
+        slots = slots[self._alive[slots]]
+        if kind is not None:
+            slots = slots[self._kind[slots] == kind]
+        if len(slots) == 0:
+            return slots, np.empty(0)
+        distances = haversine_km(
+            self._lat[slots], self._long[slots], lat, long)
+        if len(slots) > k:
+            best = np.argpartition(distances, k - 1)[:k]
+            slots, distances = slots[best], distances[best]
+        order = np.argsort(distances, kind="stable")
+        return slots[order], distances[order]
+
+    def _add(self, route: dict):
+        """
+        Stores the endpoints of a route; the caller holds the lock.
+        """
+        slots = []
+        for field, kind in (("s_location", ORIGIN), ("d_location", DESTINATION)):
+            location = route.get(field)
+            if not location:
+                continue
+            long, lat = location["coordinates"]
+            slot = self._allocate()
+            self._lat[slot], self._long[slot] = lat, long
+            self._kind[slot] = kind
+            self._alive[slot] = True
+            self._route_ids[slot] = route["_id"]
+            self._cells.setdefault(
+                self._cell(lat, long), array("q")).append(slot)
+            slots.append(slot)
+        if slots:
+            self._slots[route["_id"]] = slots
+
+    def _remove(self, route_id):
+        """
+        Clears the endpoints of a route; the caller holds the lock.
+        """
+        for slot in self._slots.pop(route_id, ()):
+            self._alive[slot] = False
+            self._route_ids[slot] = None
+            self._removed += 1
+
+    def _allocate(self) -> int:
+        """
+        Returns a free slot, doubling the arrays when they are full.
+        """
+        if self._size == len(self._lat):
+            capacity = 2 * len(self._lat)
+            for name in ("_lat", "_long", "_kind", "_alive"):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[: len(old)] = old
+                setattr(self, name, grown)
+            self._route_ids.extend([None] * (capacity - len(self._route_ids)))
+        self._size += 1
+        return self._size - 1
+
+    def _cell(self, lat: float, long: float) -> tuple:
+        """
+        Returns the (row, column) of the cell containing a point.
+        """
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor(long / self.cell_degrees),
+        )
+
+    @staticmethod
+    def _ring(row: int, column: int, ring: int):
+        """
+        Yields the cells at Chebyshev distance `ring` from (row, column).
+        """
+        if ring == 0:
+            yield row, column
+            return
+        for c in range(column - ring, column + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, column - ring
+            yield r, column + ring
+
+
+_grid = RouteGrid()
+_load_lock = threading.Lock()
+
+
+def route_grid(routes=None) -> RouteGrid:
+    """
+    Returns the process-wide grid of upcoming routes, (re)loading it when missing or stale.
+
+    Args:
+        routes (Collection): The routes collection to load from (default: the app database).
+
+    Returns:
+        RouteGrid: The loaded grid.
+    """
+    if _is_fresh():
+        return _grid
+    with _load_lock:
+        if not _is_fresh():
+            if routes is None:
+                routes = get_client().SEProject.routes
+            _grid.load(
+                list(
+                    routes.find(
+                        {"departure_at": {"$gte": datetime.now(timezone.utc)}},
+                        {"s_location": 1, "d_location": 1},
+                    )
+                )
+            )
+    return _grid
+
+
+def record_route(route: dict):
+    """
+    Adds a newly created route to the grid if this process has loaded it.
+
+    Args:
+        route (dict): The new route document.
+    """
+    if _grid.loaded_at is not None:
+        _grid.add(route)
+
+
+def forget_route(route_id):
+    """
+    Removes a deleted route from the grid if this process has loaded it.
+
+    Args:
+        route_id: The deleted route's `_id`.
+    """
+    if _grid.loaded_at is not None:
+        _grid.remove(route_id)
+
+
+def _is_fresh() -> bool:
+    """
+    Returns True if the grid was loaded less than `REFRESH_SECONDS` ago.
+    """
+    return (
+        _grid.loaded_at is not None
+        and time.monotonic() - _grid.loaded_at < REFRESH_SECONDS
+    )
@@ -0,0 +1,30 @@
+// Suggests known destinations for inputs marked with data-destination-suggest,
+// using the server-side prefix index at /search/destinations/.
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("input[data-destination-suggest]").forEach(function (input) {
+        const list = document.createElement("datalist");
+        list.id = input.id + "Suggestions";
+        input.setAttribute("list", list.id);
+        input.after(list);
+
+        let timer = null;
+        input.addEventListener("input", function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                if (!input.value.trim()) {
+                    list.replaceChildren();
+                    return;
+                }
+                fetch("/search/destinations/?q=" + encodeURIComponent(input.value))
+                    .then(function (response) { return response.ok ? response.json() : { suggestions: [] }; })
+                    .then(function (data) {
+                        list.replaceChildren(...data.suggestions.map(function (suggestion) {
+                            const option = document.createElement("option");
+                            option.value = suggestion.name;
+                            return option;
+                        }));
+                    });
+            }, 100);
+        });
+    });
+});
@@ -0,0 +1,157 @@
+"""
+Test cases for destination autocomplete.
+
+These tests cover prefix lookups and popularity ordering in `DestinationIndex`,
+incremental updates, lazy loading of the process-wide index and the JSON endpoint.
+"""
+
+from unittest.mock import patch
+
+import mongomock
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search import autocomplete
+from search.autocomplete import DestinationIndex, destination_index, record_destination
+
+
+class DestinationIndexTestCase(TestCase):
+    """
+    Test cases for `DestinationIndex`.
+    """
+
+    def setUp(self):
+        """
+        Builds an index of a few destinations.
+        """
+        self.index = DestinationIndex(
+            {
+                "Raleigh, NC, USA": 5,
+                "Raleigh-Durham International Airport": 9,
+                "Rale Street": 1,
+                "Durham, NC, USA": 7,
+            }
+        )
+
+    def test_prefix_ordered_by_popularity(self):
+        """
+        Matching names come back most popular first, ignoring case.
+        """
+        names = [s["name"] for s in self.index.suggest("rALe")]
+        self.assertEqual(
+            names,
+            ["Raleigh-Durham International Airport",
+                "Raleigh, NC, USA", "Rale Street"],
+        )
+
+    def test_limit_and_no_match(self):
+        """
+        The limit is honoured and unknown or empty prefixes return nothing.
+        """
+        self.assertEqual(len(self.index.suggest("r", limit=1)), 1)
+        self.assertEqual(self.index.suggest("chapel"), [])
+        self.assertEqual(self.index.suggest("  "), [])
+
+    def test_names(self):
+        """
+        Every name is listed in case-insensitive order, including added ones.
+        """
+        self.index.add("cary")
+        self.assertEqual(
+            self.index.names(),
+            ["cary", "Durham, NC, USA", "Rale Street", "Raleigh, NC, USA",
+             "Raleigh-Durham International Airport"],
+        )
+
+    def test_add_is_incremental(self):
+        """
+        New destinations are inserted in order and known ones gain popularity.
+        """
+        self.index.add("Ralston")
+        self.index.add("Rale Street", 10)
+
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(
+            self.index.suggest("ral")[0], {"name": "Rale Street", "count": 11})
+        self.assertEqual(self.index.suggest("ralst"), [
+                         {"name": "Ralston", "count": 1}])
+
+
+class DestinationIndexLoadingTestCase(TestCase):
+    """
+    Test cases for the process-wide index.
+    """
+
+    def setUp(self):
+        """
+        Forgets any index loaded by an earlier test and prepares mocked routes.
+        """
+        autocomplete._index = DestinationIndex()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_client.SEProject.routes.insert_many(
+            [
+                {"_id": "a", "destination": "Raleigh, NC, USA"},
+                {"_id": "b", "destination": "Raleigh, NC, USA"},
+                {"_id": "c", "destination": "Durham, NC, USA"},
+            ]
+        )
+
+    def tearDown(self):
+        """
+        Leaves an empty index for later tests.
+        """
+        autocomplete._index = DestinationIndex()
+
+    @patch("search.autocomplete.get_client")
+    def test_loads_once_with_counts(self, mock_get_client):
+        """
+        The index is built from route counts on first use and then reused.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.assertEqual(
+            destination_index().suggest("ra"), [
+                {"name": "Raleigh, NC, USA", "count": 2}]
+        )
+        destination_index()
+        self.assertEqual(mock_get_client.call_count, 1)
+
+    @patch("search.autocomplete.get_client")
+    def test_record_destination(self, mock_get_client):
+        """
+        New routes update a loaded index, and are ignored before it is loaded.
+        """
+        mock_get_client.return_value = self.mock_client
+        record_destination("Cary, NC, USA")
+        self.assertIsNone(autocomplete._index.loaded_at)
+
+        destination_index()
+        record_destination("Cary, NC, USA")
+
+        self.assertEqual(
+            destination_index().suggest("cary"), [
+                {"name": "Cary, NC, USA", "count": 1}]
+        )
+
+    @patch("search.autocomplete.get_client")
+    def test_endpoint(self, mock_get_client):
+        """
+        The endpoint returns suggestions as JSON for logged-in users.
+        """
+        mock_get_client.return_value = self.mock_client
+        client = Client()
+        self.assertEqual(
+            client.get(reverse("destination_suggestions"), {
+                       "q": "du"}).status_code,
+            401,
+        )
+        session = client.session
+        session["username"] = "testuser"
+        session.save()
+
+        response = client.get(reverse("destination_suggestions"), {"q": "du"})
+
+        self.assertEqual(
+            response.json(),
+            {"suggestions": [{"name": "Durham, NC, USA", "count": 1}]},
+        )
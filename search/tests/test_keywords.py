@@ -0,0 +1,133 @@
+"""
+Test cases for keyword search over routes.
+
+mongomock does not implement `$text`, so the query, projection, sort and pagination
+sent to MongoDB are checked on a mocked collection, and the view is tested with the
+search function patched.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search.keywords import PAGE_SIZE, TEXT_WEIGHTS, ensure_indexes, search_routes
+
+
+class SearchRoutesTestCase(TestCase):
+    """
+    Test cases for `search_routes`.
+    """
+
+    def setUp(self):
+        """
+        Creates a mocked collection whose cursor methods chain.
+        """
+        self.routes = MagicMock()
+        self.cursor = self.routes.find.return_value
+        self.cursor.sort.return_value = self.cursor
+        self.cursor.skip.return_value = self.cursor
+        self.cursor.limit.return_value = self.cursor
+
+    def test_ranked_projected_query(self):
+        """
+        The query uses `$text`, projects the score and sorts by it.
+        """
+        self.cursor.__iter__.return_value = iter(
+            [{"_id": "r1", "score": 2.5}])
+
+        routes, has_next = search_routes(
+            self.routes, "airport friday", now=datetime(2024, 11, 1))
+
+        self.assertEqual(routes, [{"_id": "r1", "score": 2.5}])
+        self.assertFalse(has_next)
+        query, projection = self.routes.find.call_args[0]
+        self.assertEqual(query["$text"], {"$search": "airport friday"})
+        self.assertEqual(query["departure_at"], {
+                         "$gte": datetime(2024, 11, 1)})
+        self.assertEqual(projection["score"], {"$meta": "textScore"})
+        self.assertNotIn("users", projection)
+        self.cursor.sort.assert_called_with(
+            [("score", {"$meta": "textScore"})])
+
+    def test_pagination(self):
+        """
+        Pages skip earlier results and fetch one extra document to detect a next page.
+        """
+        self.cursor.__iter__.return_value = iter(
+            [{"_id": i} for i in range(PAGE_SIZE + 1)])
+
+        routes, has_next = search_routes(self.routes, "airport", page=3)
+
+        self.assertEqual(len(routes), PAGE_SIZE)
+        self.assertTrue(has_next)
+        self.cursor.skip.assert_called_with(2 * PAGE_SIZE)
+        self.cursor.limit.assert_called_with(PAGE_SIZE + 1)
+
+    def test_text_index(self):
+        """
+        One weighted text index covers the searchable fields.
+        """
+        routes = MagicMock()
+        ensure_indexes(routes)
+
+        keys = routes.create_index.call_args[0][0]
+        options = routes.create_index.call_args[1]
+        self.assertEqual(keys, [(field, "text") for field in TEXT_WEIGHTS])
+        self.assertEqual(options["weights"], TEXT_WEIGHTS)
+
+
+class KeywordSearchViewTestCase(TestCase):
+    """
+    Test cases for the keyword mode of `search_index`.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client and a mocked database.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+
+    @patch("search.views.search_routes")
+    @patch("search.views.get_client")
+    def test_query_lists_results(self, mock_get_client, mock_search):
+        """
+        A `q` parameter adds the ranked results and the page to the context.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_search.return_value = (
+            [{"_id": "r1", "destination": "RDU", "score": 3.0}], True)
+
+        response = self.client.get(
+            reverse("search"), {"q": " airport ", "page": "2"})
+
+        self.assertEqual(mock_search.call_args[0][1:], ("airport", 2))
+        self.assertEqual(
+            response.context["keywords"],
+            {
+                "query": "airport",
+                "routes": [{"id": "r1", "destination": "RDU", "score": 3.0}],
+                "page": 2,
+                "has_next": True,
+            },
+        )
+        self.assertContains(response, "page=3")
+
+    @patch("search.views.search_routes")
+    @patch("search.views.get_client")
+    def test_no_query(self, mock_get_client, mock_search):
+        """
+        Without a query no keyword search runs.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = self.client.get(reverse("search"))
+
+        self.assertIsNone(response.context["keywords"])
+        mock_search.assert_not_called()
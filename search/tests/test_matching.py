@@ -0,0 +1,204 @@
+"""
+Test cases for the carpool matching engine.
+
+These tests check the detour and time-mismatch scoring, the top-K selection, the
+candidate query sent to MongoDB and the JSON endpoint. mongomock does not implement
+`$geoWithin`, so candidate fetching is checked on a mocked collection.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search.matching import (
+    haversine_km,
+    match_routes,
+    score_routes,
+    top_k,
+    _minutes,
+)
+from utilities import GeoUtils
+
+
+def route(route_id, start, end, hour, minute=0):
+    """
+    Builds a route document with the fields the matcher reads.
+    """
+    return {
+        "_id": route_id,
+        "s_location": GeoUtils.point(*start),
+        "d_location": GeoUtils.point(*end),
+        "departure_at": datetime(2024, 11, 25, hour, minute),
+    }
+
+
+class ScoringTestCase(TestCase):
+    """
+    Test cases for `score_routes` and `top_k`.
+    """
+
+    def test_haversine(self):
+        """
+        One degree of latitude is about 111 km.
+        """
+        self.assertAlmostEqual(float(haversine_km(0, 0, 1, 0)), 111.3, delta=0.1)
+
+    def test_route_through_rider_has_no_detour(self):
+        """
+        A route passing through the rider's endpoints costs nothing in the window.
+        """
+        starts = np.array([[35.0, -78.0], [35.0, -79.0]])
+        ends = np.array([[35.2, -78.0], [35.2, -79.0]])
+        departures = np.array([_minutes(datetime(2024, 11, 25, 8, 30))] * 2)
+
+        scores, detour, mismatch = score_routes(
+            starts,
+            ends,
+            departures,
+            (35.05, -78.0),
+            (35.15, -78.0),
+            _minutes(datetime(2024, 11, 25, 8)),
+            _minutes(datetime(2024, 11, 25, 9)),
+        )
+
+        self.assertAlmostEqual(detour[0], 0, places=6)
+        self.assertGreater(detour[1], 100)
+        self.assertEqual(list(mismatch), [0, 0])
+        self.assertLess(scores[0], scores[1])
+
+    def test_time_mismatch_outside_window(self):
+        """
+        Departures before or after the window are penalised by their distance from it.
+        """
+        points = np.array([[35.0, -78.0]] * 3)
+        departures = np.array([470.0, 500.0, 560.0])
+
+        _, _, mismatch = score_routes(
+            points, points, departures, (35.0, -78.0), (35.0, -78.0), 480, 540
+        )
+
+        self.assertEqual(list(mismatch), [10, 0, 20])
+
+    def test_top_k(self):
+        """
+        The lowest scores come back best first, for any k.
+        """
+        scores = np.array([5.0, 1.0, 3.0, 0.5, 4.0])
+        self.assertEqual(list(top_k(scores, 2)), [3, 1])
+        self.assertEqual(list(top_k(scores, 10)), [3, 1, 2, 4, 0])
+        self.assertEqual(list(top_k(scores, 0)), [])
+
+
+class MatchRoutesTestCase(TestCase):
+    """
+    Test cases for `match_routes`.
+    """
+
+    def test_ranks_candidates(self):
+        """
+        Candidates are fetched with indexed filters and ranked by detour and time.
+        """
+        routes = MagicMock()
+        routes.find.return_value = [
+            route("far", (35.3, -78.3), (35.7, -78.3), 8, 30),
+            route("late", (35.0, -78.0), (35.2, -78.0), 11),
+            route("best", (35.0, -78.0), (35.2, -78.0), 8, 15),
+        ]
+
+        matches = match_routes(
+            routes,
+            GeoUtils.point(35.05, -78.0),
+            GeoUtils.point(35.15, -78.0),
+            datetime(2024, 11, 25, 8, tzinfo=timezone.utc),
+            datetime(2024, 11, 25, 9, tzinfo=timezone.utc),
+            k=2,
+        )
+
+        self.assertEqual([m["_id"] for m in matches], ["best", "late"])
+        self.assertEqual(matches[0]["detour_km"], 0)
+        self.assertEqual(matches[1]["time_offset_minutes"], 120)
+        query = routes.find.call_args[0][0]
+        self.assertIn("$geoWithin", query["s_location"])
+        self.assertIn("$geoWithin", query["d_location"])
+        self.assertEqual(
+            query["departure_at"],
+            {
+                "$gte": datetime(2024, 11, 25, 5, tzinfo=timezone.utc),
+                "$lte": datetime(2024, 11, 25, 12, tzinfo=timezone.utc),
+            },
+        )
+
+
+class RouteMatchesViewTestCase(TestCase):
+    """
+    Test cases for the `route_matches` endpoint.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client and a valid trip.
+        """
+        self.client = Client()
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+        self.params = {
+            "slat": "35.05",
+            "slong": "-78.0",
+            "dlat": "35.15",
+            "dlong": "-78.0",
+            "earliest": "2024-11-25T08:00",
+            "latest": "2024-11-25T09:00",
+        }
+
+    @patch("search.views.match_routes")
+    @patch("search.views.get_client")
+    def test_returns_matches(self, mock_get_client, mock_match):
+        """
+        Matches are returned as JSON with their id exposed.
+        """
+        mock_match.return_value = [{"_id": "r1", "score": 1.5}]
+
+        response = self.client.get(reverse("route_matches"), self.params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+                         "matches": [{"id": "r1", "score": 1.5}]})
+        args = mock_match.call_args[0]
+        # 8:00 in New York is 13:00 UTC in November.
+        self.assertEqual(args[3], datetime(
+            2024, 11, 25, 13, tzinfo=timezone.utc))
+        self.assertEqual(args[5], 10)
+
+    @patch("search.views.match_routes")
+    @patch("search.views.get_client")
+    def test_k_is_bounded(self, mock_get_client, mock_match):
+        """
+        `k` is kept between 1 and 50.
+        """
+        mock_match.return_value = []
+
+        sizes = []
+        for k in ["0", "-5", "500"]:
+            self.client.get(reverse("route_matches"), {**self.params, "k": k})
+            sizes.append(mock_match.call_args[0][5])
+
+        self.assertEqual(sizes, [1, 1, 50])
+
+    def test_rejects_invalid_window(self):
+        """
+        A window ending before it starts is rejected.
+        """
+        self.params["latest"] = "2024-11-25T07:00"
+        response = self.client.get(reverse("route_matches"), self.params)
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_login(self):
+        """
+        Anonymous users get a 401.
+        """
+        response = Client().get(reverse("route_matches"), self.params)
+        self.assertEqual(response.status_code, 401)
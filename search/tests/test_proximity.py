@@ -0,0 +1,190 @@
+"""
+Test cases for the proximity ride search.
+
+These tests cover the GeoJSON conversion in `GeoUtils`, the `$geoNear` pipeline built
+by `find_routes_near`, the nearby mode of the search view and the backfill command.
+mongomock does not implement `$geoNear`, so the pipeline itself is checked on a mocked
+collection.
+"""
+
+from datetime import datetime
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search.proximity import find_routes_near
+from utilities import GeoUtils
+
+
+class GeoUtilsTestCase(TestCase):
+    """
+    Test cases for `GeoUtils`.
+    """
+
+    def test_point_from_form_strings(self):
+        """
+        Posted coordinate strings become a GeoJSON point in [long, lat] order.
+        """
+        self.assertEqual(
+            GeoUtils.point("35.7796", "-78.6382"),
+            {"type": "Point", "coordinates": [-78.6382, 35.7796]},
+        )
+
+    def test_point_rejects_missing_or_invalid(self):
+        """
+        Missing, non-numeric and out-of-range coordinates give no point.
+        """
+        self.assertIsNone(GeoUtils.point("", "-78.6"))
+        self.assertIsNone(GeoUtils.point(None, None))
+        self.assertIsNone(GeoUtils.point("abc", "1"))
+        self.assertIsNone(GeoUtils.point("95", "1"))
+
+    def test_route_locations(self):
+        """
+        Only the locations with valid coordinates are returned.
+        """
+        locations = GeoUtils.route_locations(
+            {"s_lat": "35.78", "s_long": "-78.64", "d_lat": ""})
+        self.assertEqual(list(locations), ["s_location"])
+
+
+class FindRoutesNearTestCase(TestCase):
+    """
+    Test cases for `find_routes_near`.
+    """
+
+    def test_single_indexed_pipeline(self):
+        """
+        The search is one `$geoNear` on the origin with the destination filter in its query.
+        """
+        routes = MagicMock()
+        routes.aggregate.return_value = iter([{"_id": "r1"}])
+        origin = GeoUtils.point(35.78, -78.64)
+        destination = GeoUtils.point(35.88, -78.79)
+
+        result = find_routes_near(
+            routes, origin, 5, destination, 10, limit=20, now=datetime(2024, 11, 1))
+
+        self.assertEqual(result, [{"_id": "r1"}])
+        pipeline = routes.aggregate.call_args[0][0]
+        geo_near = pipeline[0]["$geoNear"]
+        self.assertEqual(geo_near["key"], "s_location")
+        self.assertEqual(geo_near["maxDistance"], 5000)
+        self.assertEqual(
+            geo_near["query"]["d_location"]["$geoWithin"]["$centerSphere"],
+            [[-78.79, 35.88], 10 / GeoUtils.EARTH_RADIUS_KM],
+        )
+        self.assertEqual(
+            geo_near["query"]["departure_at"], {"$gte": datetime(2024, 11, 1)})
+        self.assertEqual(pipeline[1], {"$limit": 20})
+
+
+class NearbySearchViewTestCase(TestCase):
+    """
+    Test cases for the nearby mode of `search_index`.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client and a mocked database.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+
+    @patch("search.views.find_routes_near")
+    @patch("search.views.get_client")
+    def test_nearby_routes_listed(self, mock_get_client, mock_find):
+        """
+        A start and a destination in the query string run the proximity search.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_find.return_value = [
+            {"_id": "r1", "destination": "RDU", "origin_distance": 1234.0}
+        ]
+
+        response = self.client.get(
+            reverse("search"),
+            {"slat": "35.78", "slong": "-78.64", "dlat": "35.88",
+                "dlong": "-78.79", "origin_km": "3"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        args = mock_find.call_args[0]
+        self.assertEqual(args[2], 3.0)
+        self.assertEqual(args[4], 10)
+        self.assertEqual(
+            response.context["nearby"], [
+                {"id": "r1", "destination": "RDU", "origin_km": 1.2}]
+        )
+
+    @patch("search.views.find_routes_near")
+    @patch("search.views.get_client")
+    def test_radii_are_bounded(self, mock_get_client, mock_find):
+        """
+        Non-finite and non-positive radii fall back to the defaults; large ones are clamped.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_find.return_value = []
+        trip = {"slat": "35.78", "slong": "-78.64", "dlat": "35.88", "dlong": "-78.79"}
+
+        radii = []
+        for origin_km, destination_km in [("nan", "-2"), ("inf", "0"), ("5000", "12")]:
+            response = self.client.get(
+                reverse("search"),
+                {**trip, "origin_km": origin_km, "destination_km": destination_km})
+            self.assertEqual(response.status_code, 200)
+            args = mock_find.call_args[0]
+            radii.append((args[2], args[4]))
+
+        self.assertEqual(radii, [(5, 10), (5, 10), (100, 12.0)])
+
+    @patch("search.views.find_routes_near")
+    @patch("search.views.get_client")
+    def test_plain_search_skips_proximity(self, mock_get_client, mock_find):
+        """
+        Without coordinates the page lists rides only.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        response = self.client.get(reverse("search"))
+
+        self.assertIsNone(response.context["nearby"])
+        mock_find.assert_not_called()
+
+
+class BackfillRouteLocationsTestCase(TestCase):
+    """
+    Test cases for the `backfill_route_locations` command.
+    """
+
+    @patch("search.management.commands.backfill_route_locations.get_client")
+    def test_backfill_converts_strings(self, mock_get_client):
+        """
+        Routes with coordinate strings gain GeoJSON points; routes without are skipped.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        routes = mock_client.SEProject.routes
+        routes.insert_many(
+            [
+                {"_id": "r1", "s_lat": "35.78", "s_long": "-78.64",
+                    "d_lat": "35.88", "d_long": "-78.79"},
+                {"_id": "r2"},
+            ]
+        )
+        out = StringIO()
+
+        call_command("backfill_route_locations", stdout=out)
+
+        route = routes.find_one({"_id": "r1"})
+        self.assertEqual(route["s_location"]["coordinates"], [-78.64, 35.78])
+        self.assertEqual(route["d_location"]["coordinates"], [-78.79, 35.88])
+        self.assertNotIn("s_location", routes.find_one({"_id": "r2"}))
+        self.assertIn("updated 1 routes, skipped 1", out.getvalue())
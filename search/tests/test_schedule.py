@@ -0,0 +1,205 @@
+"""
+Test cases for departure-time search.
+
+These tests cover the UTC conversion of local route times, the parsing of
+"leaving between 8:00 and 9:30 on Friday" windows, the indexed range query behind
+the departures endpoint and the `backfill_departure_times` command.
+"""
+
+from datetime import date, datetime, timezone
+from io import StringIO
+from unittest.mock import patch
+
+import mongomock
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search.schedule import ensure_indexes, find_routes_leaving, local_window
+from utilities import DateUtils
+
+
+class DepartureTimeTestCase(TestCase):
+    """
+    Test cases for `DateUtils.departure_at` and `local_window`.
+    """
+
+    def test_departure_at_is_utc(self):
+        """
+        Local route fields are read in the ride time zone and stored in UTC, across DST.
+        """
+        winter = {"date": "2024-11-25", "hour": "8",
+                  "minute": "30", "ampm": "AM"}
+        summer = {"date": "2024-07-01", "hour": "12",
+                  "minute": "00", "ampm": "PM"}
+
+        self.assertEqual(
+            DateUtils.departure_at(winter, "America/New_York"),
+            datetime(2024, 11, 25, 13, 30, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            DateUtils.departure_at(summer, "America/New_York"),
+            datetime(2024, 7, 1, 16, 0, tzinfo=timezone.utc),
+        )
+        self.assertIsNone(DateUtils.departure_at(
+            {"date": "2024-11-25"}, "UTC"))
+
+    def test_weekday_window(self):
+        """
+        A weekday name means its next occurrence, today included.
+        """
+        earliest, latest = local_window(
+            "Friday", "08:00", "09:30", "America/New_York", today=date(2024, 11, 27)
+        )
+
+        self.assertEqual(earliest, datetime(
+            2024, 11, 29, 13, 0, tzinfo=timezone.utc))
+        self.assertEqual(latest, datetime(
+            2024, 11, 29, 14, 30, tzinfo=timezone.utc))
+
+    def test_invalid_window(self):
+        """
+        Malformed and backwards windows are rejected.
+        """
+        with self.assertRaises(ValueError):
+            local_window("someday", "08:00", "09:00", "UTC")
+        with self.assertRaises(ValueError):
+            local_window("2024-11-29", "10:00", "09:00", "UTC")
+
+
+class FindRoutesLeavingTestCase(TestCase):
+    """
+    Test cases for `find_routes_leaving`.
+    """
+
+    def setUp(self):
+        """
+        Creates indexed routes departing at different times.
+        """
+        self.routes = mongomock.MongoClient().SEProject.routes
+        ensure_indexes(self.routes)
+        for route_id, hour, destination in [
+            ("early", 12, "RDU"),
+            ("in1", 13, "RDU"),
+            ("in2", 14, "Durham"),
+            ("late", 15, "RDU"),
+        ]:
+            self.routes.insert_one(
+                {
+                    "_id": route_id,
+                    "destination": destination,
+                    "departure_at": datetime(2024, 11, 29, hour, 15),
+                }
+            )
+
+    def test_range_query(self):
+        """
+        Only routes inside the window come back, soonest first.
+        """
+        routes = find_routes_leaving(
+            self.routes, datetime(2024, 11, 29, 13), datetime(
+                2024, 11, 29, 14, 30)
+        )
+        self.assertEqual([r["_id"] for r in routes], ["in1", "in2"])
+
+    def test_destination_filter(self):
+        """
+        A destination narrows the range query.
+        """
+        routes = find_routes_leaving(
+            self.routes,
+            datetime(2024, 11, 29, 13),
+            datetime(2024, 11, 29, 14, 30),
+            destination="Durham",
+        )
+        self.assertEqual([r["_id"] for r in routes], ["in2"])
+
+    def test_indexes(self):
+        """
+        The departure-time indexes exist.
+        """
+        self.assertIn("departure_at_1", self.routes.index_information())
+        self.assertIn("destination_1_departure_at_1",
+                      self.routes.index_information())
+
+
+class RoutesLeavingViewTestCase(TestCase):
+    """
+    Test cases for the `routes_leaving` endpoint.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in client and one route leaving at 8:15 New York time.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_client.SEProject.routes.insert_one(
+            {
+                "_id": "r1",
+                "destination": "RDU",
+                "departure_at": datetime(2024, 11, 29, 13, 15),
+            }
+        )
+        session = self.client.session
+        session["username"] = "testuser"
+        session.save()
+
+    @patch("search.views.get_client")
+    def test_day_window(self, mock_get_client):
+        """
+        `?day=...&from=...&to=...` is read in the ride time zone.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        inside = self.client.get(
+            reverse("routes_leaving"), {
+                "day": "2024-11-29", "from": "08:00", "to": "09:30"}
+        )
+        outside = self.client.get(
+            reverse("routes_leaving"), {
+                "day": "2024-11-29", "from": "09:00", "to": "09:30"}
+        )
+
+        self.assertEqual([r["id"] for r in inside.json()["routes"]], ["r1"])
+        self.assertEqual(outside.json()["routes"], [])
+
+    def test_bad_window(self):
+        """
+        A malformed window is rejected.
+        """
+        response = self.client.get(
+            reverse("routes_leaving"), {"day": "2024-11-29", "from": "late"})
+        self.assertEqual(response.status_code, 400)
+
+
+class BackfillDepartureTimesTestCase(TestCase):
+    """
+    Test cases for the `backfill_departure_times` command.
+    """
+
+    @patch("search.management.commands.backfill_departure_times.get_client")
+    def test_backfill(self, mock_get_client):
+        """
+        Routes with valid time fields gain `departure_at`; the rest are skipped.
+        """
+        mock_client = mongomock.MongoClient()
+        mock_get_client.return_value = mock_client
+        routes = mock_client.SEProject.routes
+        routes.insert_many(
+            [
+                {"_id": "r1", "date": "2024-11-25", "hour": "5",
+                    "minute": "05", "ampm": "PM"},
+                {"_id": "r2", "date": "2024-11-25"},
+            ]
+        )
+        out = StringIO()
+
+        call_command("backfill_departure_times", stdout=out)
+
+        self.assertEqual(
+            routes.find_one({"_id": "r1"})["departure_at"], datetime(
+                2024, 11, 25, 22, 5)
+        )
+        self.assertNotIn("departure_at", routes.find_one({"_id": "r2"}))
+        self.assertIn("updated 1 routes, skipped 1", out.getvalue())
@@ -0,0 +1,159 @@
+"""
+Test cases for the in-process route grid.
+
+These tests check k-nearest results against a brute-force scan, incremental adds and
+removals, array growth, the process-wide grid loading and the JSON endpoint.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import mongomock
+import numpy as np
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from search import spatial
+from search.matching import haversine_km
+from search.spatial import DESTINATION, ORIGIN, RouteGrid, forget_route, record_route, route_grid
+from utilities import GeoUtils
+
+
+def route(route_id, start, end):
+    """
+    Builds a route document with GeoJSON endpoints.
+    """
+    return {
+        "_id": route_id,
+        "s_location": GeoUtils.point(*start),
+        "d_location": GeoUtils.point(*end),
+    }
+
+
+class RouteGridTestCase(TestCase):
+    """
+    Test cases for `RouteGrid`.
+    """
+
+    def test_matches_brute_force(self):
+        """
+        Nearest endpoints agree with a full scan, inside and far outside the data.
+        """
+        rng = np.random.default_rng(5)
+        points = rng.uniform(-0.3, 0.3, size=(2000, 4)) + \
+            np.array([35.78, -78.64] * 2)
+        grid = RouteGrid(capacity=16)
+        grid.load([route(i, p[:2], p[2:]) for i, p in enumerate(points)])
+        lat = np.concatenate([points[:, 0], points[:, 2]])
+        long = np.concatenate([points[:, 1], points[:, 3]])
+
+        for query in [(35.78, -78.64), (35.5, -78.9), (36.9, -80.0)]:
+            expected = np.sort(haversine_km(lat, long, *query))[:7]
+            got = [r["distance_km"] for r in grid.nearest(*query, k=7)]
+            self.assertEqual(got, list(np.round(expected, 3)))
+
+    def test_kind_filter(self):
+        """
+        Origins and destinations can be queried separately.
+        """
+        grid = RouteGrid()
+        grid.load([route("a", (35.0, -78.0), (36.0, -79.0))])
+
+        self.assertEqual(
+            [(r["route_id"], r["kind"])
+             for r in grid.nearest(36.0, -79.0, k=1, kind=ORIGIN)],
+            [("a", "origin")],
+        )
+        self.assertEqual(
+            grid.nearest(36.0, -79.0, k=1, kind=DESTINATION)[0]["distance_km"], 0
+        )
+
+    def test_add_and_remove(self):
+        """
+        Added routes become visible, re-added routes move and removed routes disappear.
+        """
+        grid = RouteGrid(capacity=1)
+        grid.load([])
+        grid.add(route("a", (35.0, -78.0), (35.1, -78.0)))
+        grid.add(route("b", (35.5, -78.0), (35.6, -78.0)))
+        grid.add(route("a", (40.0, -70.0), (40.1, -70.0)))
+
+        self.assertEqual(len(grid), 4)
+        self.assertEqual(grid.nearest(35.0, -78.0, k=1)[0]["route_id"], "b")
+
+        grid.remove("b")
+
+        self.assertEqual(len(grid), 2)
+        self.assertEqual(
+            {r["route_id"] for r in grid.nearest(35.0, -78.0, k=5)}, {"a"})
+
+
+class RouteGridLoadingTestCase(TestCase):
+    """
+    Test cases for the process-wide grid and the `nearest_routes` endpoint.
+    """
+
+    def setUp(self):
+        """
+        Forgets any grid loaded by an earlier test and prepares mocked routes.
+        """
+        spatial._grid = RouteGrid()
+        self.mock_client = mongomock.MongoClient()
+        future = datetime.now(timezone.utc) + timedelta(days=1)
+        past = datetime.now(timezone.utc) - timedelta(days=1)
+        self.mock_client.SEProject.routes.insert_many(
+            [
+                dict(route("up", (35.0, -78.0), (35.1, -78.0)),
+                     departure_at=future),
+                dict(route("gone", (35.0, -78.0), (35.1, -78.0)),
+                     departure_at=past),
+            ]
+        )
+
+    def tearDown(self):
+        """
+        Leaves an empty grid for later tests.
+        """
+        spatial._grid = RouteGrid()
+
+    @patch("search.spatial.get_client")
+    def test_loads_upcoming_routes(self, mock_get_client):
+        """
+        Only upcoming routes are loaded, and create/delete hooks keep the grid current.
+        """
+        mock_get_client.return_value = self.mock_client
+
+        self.assertEqual(
+            {r["route_id"] for r in route_grid().nearest(35.0, -78.0, k=5)}, {"up"}
+        )
+        record_route(route("new", (35.0, -78.0), (35.0, -78.0)))
+        forget_route("up")
+
+        self.assertEqual(
+            {r["route_id"] for r in route_grid().nearest(35.0, -78.0, k=5)}, {"new"}
+        )
+        self.assertEqual(mock_get_client.call_count, 1)
+
+    @patch("search.spatial.get_client")
+    def test_endpoint(self, mock_get_client):
+        """
+        The endpoint returns the nearest endpoints as JSON and validates its input.
+        """
+        mock_get_client.return_value = self.mock_client
+        client = Client()
+        session = client.session
+        session["username"] = "testuser"
+        session.save()
+
+        response = client.get(
+            reverse("nearest_routes"),
+            {"lat": "35.1", "long": "-78.0", "k": "1", "kind": "destination"},
+        )
+        bad = client.get(reverse("nearest_routes"), {
+                         "lat": "x", "long": "-78.0"})
+
+        self.assertEqual(
+            response.json(),
+            {"routes": [{"route_id": "up", "kind": "destination", "distance_km": 0.0}]},
+        )
+        self.assertEqual(bad.status_code, 400)
@@ -6,10 +6,24 @@ This module contains the views that handle the search-related functionality for
 Functions:
     - `intializeDB`: Initializes the connection to the MongoDB database and sets up global variables for collections.
     - `search_index`: Handles the logic for searching available rides, checking if routes are still available, and rendering the search results page.
+    - `nearby_routes`: Runs the proximity search when the user gives a start and a destination.
+    - `keyword_routes`: Runs the ranked keyword search when the user gives a query.
+    - `route_matches`: Returns the routes best matching a rider's trip and departure window as JSON.
+    - `departure_window`: Parses a local departure window from the query string.
+    - `routes_leaving`: Returns the routes departing inside a time window as JSON.
+    - `destination_suggestions`: Returns destination autocomplete suggestions as JSON.
+    - `nearest_routes`: Returns the route endpoints nearest a map point as JSON.
 
 Dependencies:
     - `get_client`: Utility function for establishing a MongoDB client connection.
     - `DateUtils.has_date_passed`: Utility function to check if a route's date has passed.
+    - `GeoUtils.point`: Utility function to build GeoJSON points from posted coordinates.
+    - `find_routes_near`: Indexed `$geoNear` query for routes near a start and a destination.
+    - `match_routes`: Ranks candidate routes by detour and departure-time mismatch.
+    - `find_routes_leaving`: Indexed `departure_at` range query.
+    - `destination_index`: In-memory prefix index of destinations weighted by popularity.
+    - `search_routes`: Relevance-ranked `$text` search over route fields.
+    - `route_grid`: In-process grid of route endpoints for k-nearest lookups.
     - `Secrets`: Configuration class that stores secret keys like the Google Maps API key.
     - `RideForm`: Form used for creating a ride (though not directly used in this snippet).
     - `UserCreationForm`: Django form for user registration (though not directly used here).
@@ -17,17 +31,29 @@ Dependencies:
 """
 
 from http.client import HTTPResponse
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 
 # from numpy import True_, dtype
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
-from utilities import DateUtils
+from utilities import DateUtils, GeoUtils
 
+from publish.destination_stats import get_stats
 from publish.forms import RideForm
 from utils import get_client
 from config import Secrets
+from .autocomplete import destination_index
+from .keywords import MAX_PAGE, search_routes
+from .matching import DEFAULT_K, match_routes
+from .proximity import find_routes_near
+from .schedule import find_routes_leaving, local_window
+from .spatial import KINDS, route_grid
 
 client = None
 db = None
@@ -36,6 +62,10 @@ ridesDB = None
 routesDB = None
 secrets = Secrets()
 
+DEFAULT_ORIGIN_KM = 5
+DEFAULT_DESTINATION_KM = 10
+MAX_RADIUS_KM = 100
+
 
 def intializeDB():
     """
@@ -65,12 +95,87 @@ def intializeDB():
     routesDB = db.routes
 
 
+def radius_km(value, default: float) -> float:
+    """
+    Parses a search radius from the query string.
+
+    Missing, malformed, non-finite and non-positive values fall back to the default, as
+    `$geoNear` rejects them; larger values are clamped to `MAX_RADIUS_KM`.
+
+    Args:
+        value (str): The query parameter, or None.
+        default (float): The radius used when the value is not acceptable.
+
+    Returns:
+        float: The radius in kilometres.
+    """
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(radius) or radius <= 0:
+        return default
+    return min(radius, MAX_RADIUS_KM)
+
+
+def nearby_routes(params):
+    """
+    Runs the proximity search for the start and destination in the query string.
+
+    Args:
+        params (QueryDict): The GET parameters: `slat`, `slong`, `dlat`, `dlong` and the
+            optional radii `origin_km` and `destination_km` (see `radius_km`).
+
+    Returns:
+        list: The matching routes, or None if the parameters do not describe a search.
+    """
+    origin = GeoUtils.point(params.get("slat"), params.get("slong"))
+    destination = GeoUtils.point(params.get("dlat"), params.get("dlong"))
+    if origin is None or destination is None:
+        return None
+    origin_km = radius_km(params.get("origin_km"), DEFAULT_ORIGIN_KM)
+    destination_km = radius_km(params.get("destination_km"), DEFAULT_DESTINATION_KM)
+    routes = find_routes_near(
+        routesDB, origin, origin_km, destination, destination_km)
+    for route in routes:
+        route["id"] = route.pop("_id")
+        route["origin_km"] = round(route.pop("origin_distance") / 1000, 1)
+    return routes
+
+
+def keyword_routes(params) -> dict:
+    """
+    Runs the keyword search for the `q` query parameter.
+
+    Args:
+        params (QueryDict): The GET parameters: `q` and the optional 1-based `page`.
+
+    Returns:
+        dict: {"query", "routes", "page", "has_next"}, or None if there is no query.
+    """
+    query = params.get("q", "").strip()
+    if not query:
+        return None
+    try:
+        page = int(params.get("page", 1))
+    except ValueError:
+        page = 1
+    page = max(1, min(page, MAX_PAGE))
+    routes, has_next = search_routes(routesDB, query, page)
+    for route in routes:
+        route["id"] = route.pop("_id")
+    return {"query": query, "routes": routes, "page": page, "has_next": has_next}
+
+
 def search_index(request):
     """
     Handles the search functionality for available rides.
 
     This view retrieves all available rides from the database, processes them to count the number of active routes
     (routes with dates that have not passed), and displays the search results on the 'search.html' template.
+    Rider and distance figures per ride come from the destination statistics rollup.
+    When the query string carries a start and a destination, the routes starting and ending near them are
+    listed as well, and a `q` keyword query adds a page of relevance-ranked matching routes.
     If the user is not logged in, they will be redirected to the login page with a message.
 
     Args:
@@ -84,17 +189,29 @@ def search_index(request):
         request.session["alert"] = "Please login to create a ride."
         messages.info(request, "Please login to search a ride!")
         return redirect("index")
+    nearby = nearby_routes(request.GET)
+    keywords = keyword_routes(request.GET)
     all_rides = list(ridesDB.find())
+    stats = get_stats(db.destinationStats, [ride["_id"] for ride in all_rides])
+    # Route ids are opaque keys, so the dates come from the route documents.
+    route_dates = {
+        route["_id"]: route.get("date")
+        for route in routesDB.find(
+            {"_id": {"$in": [i for ride in all_rides for i in ride["route_id"]]}},
+            {"date": 1},
+        )
+    }
     processed, routes = list(), list()
     for ride in all_rides:
         route_count = 0
         routes = ride["route_id"]
         for route in routes:
-            route_date = route.split("_")[3]
-            if not DateUtils.has_date_passed(route_date):
+            route_date = route_dates.get(route)
+            if route_date and not DateUtils.has_date_passed(route_date):
                 route_count += 1
         ride["id"] = ride.pop("_id")
         ride["count"] = route_count
+        ride["stats"] = stats.get(ride["id"])
         processed.append(ride)
     return render(
         request,
@@ -102,6 +219,174 @@ def search_index(request):
         {
             "username": request.session["username"],
             "rides": processed,
+            "nearby": nearby,
+            "keywords": keywords,
+            "origin_km": request.GET.get("origin_km", DEFAULT_ORIGIN_KM),
+            "destination_km": request.GET.get("destination_km", DEFAULT_DESTINATION_KM),
             "gmap_api_key": secrets.GoogleMapsAPIKey,
         },
     )
+
+
+def departure_window(params) -> tuple:
+    """
+    Parses a departure window, in `settings.RIDE_TIME_ZONE`, from the query string.
+
+    The window is either `earliest` and `latest` as "YYYY-MM-DDTHH:MM", or a `day` (a
+    "YYYY-MM-DD" date or a weekday name such as "friday") with `from` and `to` times.
+
+    Args:
+        params (QueryDict): The GET parameters.
+
+    Returns:
+        tuple: The (earliest, latest) aware UTC datetimes.
+
+    Raises:
+        ValueError: If the window is missing, malformed or ends before it starts.
+    """
+    if params.get("day"):
+        return local_window(
+            params["day"],
+            params.get("from", ""),
+            params.get("to", ""),
+            settings.RIDE_TIME_ZONE,
+        )
+    earliest = DateUtils.to_utc(
+        datetime.fromisoformat(params.get("earliest", "")), settings.RIDE_TIME_ZONE
+    )
+    latest = DateUtils.to_utc(
+        datetime.fromisoformat(params.get("latest", "")), settings.RIDE_TIME_ZONE
+    )
+    if latest < earliest:
+        raise ValueError("The window ends before it starts")
+    return earliest, latest
+
+
+def route_matches(request):
+    """
+    Returns the routes that best match a rider's trip, ranked by detour and departure time.
+
+    Query parameters:
+        slat, slong: The rider's start.
+        dlat, dlong: The rider's destination.
+        earliest, latest or day, from, to: The departure window (see `departure_window`).
+        k: How many matches to return (default: `DEFAULT_K`, between 1 and 50).
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse: {"matches": [...]} best first, or an error with status 400/401.
+    """
+    if not request.session.has_key("username"):
+        return JsonResponse({"error": "Please login to search a ride!"}, status=401)
+    origin = GeoUtils.point(request.GET.get("slat"), request.GET.get("slong"))
+    destination = GeoUtils.point(
+        request.GET.get("dlat"), request.GET.get("dlong"))
+    try:
+        earliest, latest = departure_window(request.GET)
+        k = max(1, min(int(request.GET.get("k", DEFAULT_K)), 50))
+    except ValueError:
+        return JsonResponse({"error": "Invalid departure window"}, status=400)
+    if origin is None or destination is None:
+        return JsonResponse({"error": "Invalid trip"}, status=400)
+
+    intializeDB()
+    matches = match_routes(routesDB, origin, destination, earliest, latest, k)
+    for match in matches:
+        match["id"] = match.pop("_id")
+    return JsonResponse({"matches": matches})
+
+
+def routes_leaving(request):
+    """
+    Returns the routes departing inside a time window, soonest first.
+
+    Query parameters:
+        earliest, latest or day, from, to: The departure window (see `departure_window`),
+            e.g. `?day=friday&from=08:00&to=09:30`.
+        destination: Only list routes to this destination (optional).
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse: {"routes": [...]}, or an error with status 400/401.
+    """
+    if not request.session.has_key("username"):
+        return JsonResponse({"error": "Please login to search a ride!"}, status=401)
+    try:
+        earliest, latest = departure_window(request.GET)
+    except ValueError:
+        return JsonResponse({"error": "Invalid departure window"}, status=400)
+
+    intializeDB()
+    routes = find_routes_leaving(
+        routesDB, earliest, latest, request.GET.get("destination"))
+    for route in routes:
+        route["id"] = route.pop("_id")
+    return JsonResponse({"routes": routes})
+
+
+def destination_suggestions(request):
+    """
+    Returns the most popular known destinations starting with what the user typed.
+
+    The lookup is served from the in-memory `destination_index`, so it does not touch
+    MongoDB except when the index is first loaded or refreshed.
+
+    Query parameters:
+        q: The text typed so far.
+        limit: Maximum number of suggestions (default: 8, at most 20).
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse: {"suggestions": [{"name", "count"}, ...]}, or an error with status 401.
+    """
+    if not request.session.has_key("username"):
+        return JsonResponse({"error": "Please login to search a ride!"}, status=401)
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 8)), 20))
+    except ValueError:
+        limit = 8
+    return JsonResponse(
+        {"suggestions": destination_index().suggest(
+            request.GET.get("q", ""), limit)}
+    )
+
+
+def nearest_routes(request):
+    """
+    Returns the route origins and/or destinations nearest a point, for map panning.
+
+    The lookup is served from the in-process `route_grid`, so it does not touch
+    MongoDB except when the grid is first loaded or refreshed.
+
+    Query parameters:
+        lat, long: The point.
+        k: How many endpoints to return (default: 10, at most 100).
+        kind: "origin" or "destination" to only return that endpoint (optional).
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse: {"routes": [{"route_id", "kind", "distance_km"}, ...]}, or an error
+        with status 400/401.
+    """
+    if not request.session.has_key("username"):
+        return JsonResponse({"error": "Please login to search a ride!"}, status=401)
+    point = GeoUtils.point(request.GET.get("lat"), request.GET.get("long"))
+    kind = request.GET.get("kind")
+    try:
+        k = max(1, min(int(request.GET.get("k", 10)), 100))
+    except ValueError:
+        k = None
+    if point is None or k is None or (kind and kind not in KINDS):
+        return JsonResponse({"error": "Invalid point"}, status=400)
+    long, lat = point["coordinates"]
+    return JsonResponse(
+        {"routes": route_grid().nearest(lat, long, k, KINDS.get(kind))}
+    )
@@ -4,11 +4,16 @@ Imports for integrating Google services.
 This module imports classes responsible for interacting with Google services:
 - `MapsService`: Handles communication with Google Maps APIs for location-based services.
 - `GoogleCloud`: Manages interactions with Google Cloud services, such as storage or other cloud-related functionality.
+- `MailOutbox`: Queues outgoing email in MongoDB for delivery by a background worker.
+- `RouteNotifier`: Batches route-change notifications into per-member digests.
 
 Dependencies:
     - `MapsService`: Class for accessing Google Maps services like geolocation and route mapping.
     - `GoogleCloud`: Class for accessing and interacting with Google Cloud resources.
+    - `MailOutbox`: Class for enqueuing and delivering email through an outbox collection.
+    - `RouteNotifier`: Class for fanning out route changes to all members of a route.
 """
 
 from .google_maps import MapsService
 from .google_cloud import GoogleCloud
+from .mail import MailOutbox, RouteNotifier
@@ -2,14 +2,15 @@
 GoogleCloud class for managing interactions with Google Cloud services, focusing on file storage.
 
 This class provides functionality to interact with Google Cloud Storage, using credentials and a specified storage service. It allows file uploads to a defined Google Cloud bucket.
+Credentials are parsed once per process and the storage client is reused across uploads, so a GoogleCloud instance is cheap to create and safe to share.
 
 Attributes:
     credentials (Credentials): The credentials used for authenticating with Google Cloud services.
     StorageService (CloudStorage): The service used for managing cloud storage interactions, such as uploading files.
 
 Methods:
-    __init__(credentials_path: str, bucket_path: str): Initializes the GoogleCloud class with the provided credentials and storage service.
-    upload_file(file, file_name: str): Uploads a file to Google Cloud Storage with the specified file name.
+    __init__(credentials_path: str, bucket_path: str, endpoint: str): Initializes the GoogleCloud class with the provided credentials and storage service.
+    upload_file(file, file_name: str, content_type: str): Uploads a file to Google Cloud Storage with the specified file name.
 """
 
 from .cloud_storage import CloudStorage
@@ -29,25 +30,33 @@ class GoogleCloud:
         self,
         credentials_path: str = "credentials.json",
         bucket_path: str = "ptravelv2-pfp",
+        endpoint: str = None,
     ):
         """
         Initializes the GoogleCloud class with credentials and storage service.
 
+        Args:
+            credentials_path (str): Path to the service account JSON file.
+            bucket_path (str): Name of the storage bucket.
+            endpoint (str): Optional storage API endpoint. When set, anonymous credentials
+                            are used so a local fake GCS server can stand in for the real one.
         """
-        self.credentials = Credentials(credentials_path)
-        self.StorageService = CloudStorage(self.credentials, "")
+        self.credentials = Credentials(
+            credentials_path, anonymous=bool(endpoint))
+        self.StorageService = CloudStorage(self.credentials, "", endpoint)
 
-    def upload_file(self, file, file_name: str = ""):
+    def upload_file(self, file, file_name: str = "", content_type: str = None):
         """
         Uploads a file to Google Cloud Storage.
 
         Args:
             file: The file object to upload.
             file_name (str): The destination name for the file in cloud storage (default: "").
+            content_type (str): Optional MIME type of the file (default: None).
 
         Returns:
             The result of the upload operation from CloudStorage.
         """
         return self.StorageService.__upload_file__(
-            file, destination_blob_name=file_name
+            file, destination_blob_name=file_name, content_type=content_type
         )
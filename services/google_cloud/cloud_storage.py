@@ -2,16 +2,22 @@
 CloudStorage class for handling file uploads to a Google Cloud Storage bucket.
 
 This class provides functionality for uploading files to Google Cloud Storage using the specified credentials and bucket name. It uses Google Cloud's storage client to manage interactions with the cloud service.
+The storage client is created lazily and reused for every upload made from the same thread, and files larger than `RESUMABLE_THRESHOLD` are streamed to the bucket in `CHUNK_SIZE` pieces through a resumable upload instead of being sent in a single request.
 
 Attributes:
     credentials (Credentials): Google Cloud credentials used for authenticating and interacting with Google Cloud services.
     PfpBucket (str): The name of the Google Cloud Storage bucket where files will be uploaded.
+    endpoint (str): Optional API endpoint override, e.g. a local fake GCS server.
 
 Methods:
-    __init__(credentials: Credentials, pfp_bucket: str): Initializes the CloudStorage class with provided credentials and bucket name.
-    __upload_file__(file, destination_blob_name: str): Uploads the specified file to Google Cloud Storage and returns the public URL of the uploaded file.
+    __init__(credentials: Credentials, pfp_bucket: str, endpoint: str): Initializes the CloudStorage class with provided credentials and bucket name.
+    __client__(): Returns the storage client shared by the calling thread.
+    __upload_file__(file, destination_blob_name: str, content_type: str): Uploads the specified file to Google Cloud Storage and returns the public URL of the uploaded file.
 """
 
+import os
+import threading
+
 from .credentials import Credentials
 from google.cloud import storage
 
@@ -23,31 +29,105 @@ class CloudStorage:
 
     credentials: Credentials = None
     PfpBucket: str = ""
+    endpoint: str = None
+
+    # Resumable uploads require chunks that are a multiple of 256 KiB.
+    CHUNK_SIZE = 4 * 1024 * 1024
+    RESUMABLE_THRESHOLD = 8 * 1024 * 1024
 
-    def __init__(self, credentials: Credentials, pfp_bucket: str = ""):
+    # storage.Client wraps a requests.Session, which is not guaranteed to be
+    # thread-safe, so each thread keeps its own client built from the shared
+    # credentials.
+    _local = threading.local()
+
+    def __init__(
+        self, credentials: Credentials, pfp_bucket: str = "", endpoint: str = None
+    ):
         """
         Initializes the CloudStorage class with specified credentials and bucket name.
 
         Args:
             credentials (Credentials): Google Cloud credentials for authentication.
             pfp_bucket (str): The name of the Google Cloud Storage bucket (default: "").
+            endpoint (str): Optional API endpoint, e.g. "http://localhost:4443" for a fake GCS server (default: None).
         """
         self.credentials = credentials
         self.PfpBucket = pfp_bucket
+        self.endpoint = endpoint
+
+    def __client__(self) -> storage.Client:
+        """
+        Returns the storage client for the calling thread, creating it on first use.
+
+        Returns:
+            storage.Client: A client bound to this instance's credentials and endpoint.
+        """
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
 
-    def __upload_file__(self, file, destination_blob_name: str) -> str:
+        # Keyed on the credentials' identity, not the object: anonymous credentials
+        # are built per instance but all share the endpoint's client.
+        key = (self.credentials.key, self.endpoint)
+        if key not in clients:
+            if self.endpoint:
+                clients[key] = storage.Client(
+                    project="packtravel",
+                    credentials=self.credentials.credentials,
+                    client_options={"api_endpoint": self.endpoint},
+                )
+            else:
+                clients[key] = storage.Client(
+                    credentials=self.credentials.credentials)
+        return clients[key]
+
+    def __upload_file__(
+        self, file, destination_blob_name: str, content_type: str = None
+    ) -> str:
         """
         Uploads a file to the specified Google Cloud Storage bucket.
 
         Args:
             file: The file object to be uploaded.
             destination_blob_name (str): The name of the file as it will appear in the cloud storage.
+            content_type (str): Optional MIME type of the uploaded object (default: None).
 
         Returns:
             str: The public URL of the uploaded file.
         """
-        client = storage.Client(credentials=self.credentials.credentials)
-        bucket = client.bucket("ptravelv2-pfp")
-        blob = bucket.blob(destination_blob_name)
-        blob.upload_from_file(file)
+        size = _file_size(file)
+        chunk_size = None
+        if size is None or size > self.RESUMABLE_THRESHOLD:
+            chunk_size = self.CHUNK_SIZE
+
+        bucket = self.__client__().bucket("ptravelv2-pfp")
+        blob = bucket.blob(destination_blob_name, chunk_size=chunk_size)
+        blob.upload_from_file(
+            file,
+            rewind=True,
+            size=size,
+            content_type=content_type)
         return blob.public_url
+
+
+def _file_size(file):
+    """
+    Determines the size of a file object without reading it into memory.
+
+    Args:
+        file: A Django uploaded file or any seekable file-like object.
+
+    Returns:
+        int: The size in bytes, or None if it cannot be determined.
+    """
+    size = getattr(file, "size", None)
+    if size is not None:
+        return size
+    try:
+        position = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
@@ -2,14 +2,20 @@
 Credentials class to manage Google Cloud service account credentials.
 
 This class is used to handle the authentication process by loading the credentials from a service account file, allowing interactions with Google Cloud services.
+Service account files are parsed once per process: every ``Credentials`` built for the same path shares the same underlying credentials object.
 
 Attributes:
     credentials (google.oauth2.service_account.Credentials): The loaded service account credentials used for authenticating requests to Google Cloud services.
+    key (str): Stable identity of the credentials: the service account file path, or "anonymous".
 
 Methods:
-    __init__(credentials_path: str): Initializes the Credentials class by loading the credentials from the specified service account file.
+    __init__(credentials_path: str, anonymous: bool): Initializes the Credentials class by loading the credentials from the specified service account file.
+    load(credentials_path: str): Returns the cached credentials for a service account file, reading it on first use.
 """
 
+import threading
+
+from google.auth.credentials import AnonymousCredentials
 from google.oauth2 import service_account
 
 
@@ -19,15 +25,43 @@ class Credentials:
     """
 
     credentials = None
+    key: str = None
+
+    _cache: dict = {}
+    _lock = threading.Lock()
 
-    def __init__(self, credentials_path: str):
+    def __init__(self, credentials_path: str, anonymous: bool = False):
         """
         Initializes the Credentials class by loading the credentials from the specified service account file.
 
         Args:
             credentials_path (str): The path to the service account JSON file containing the credentials.
+            anonymous (bool): Use anonymous credentials instead of a service account, e.g. against a local fake GCS endpoint (default: False).
+
+        """
+        if anonymous:
+            self.key = "anonymous"
+            self.credentials = AnonymousCredentials()
+        else:
+            self.key = credentials_path
+            self.credentials = self.load(credentials_path)
+
+    @classmethod
+    def load(cls, credentials_path: str):
+        """
+        Returns the service account credentials for a file, reading it only on first use.
+
+        Args:
+            credentials_path (str): The path to the service account JSON file.
 
+        Returns:
+            google.oauth2.service_account.Credentials: The shared credentials for that file.
         """
-        self.credentials = service_account.Credentials.from_service_account_file(
-            credentials_path
-        )
+        with cls._lock:
+            if credentials_path not in cls._cache:
+                cls._cache[credentials_path] = (
+                    service_account.Credentials.from_service_account_file(
+                        credentials_path
+                    )
+                )
+            return cls._cache[credentials_path]
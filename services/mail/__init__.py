@@ -0,0 +1,12 @@
+"""
+Email delivery services.
+
+This package provides:
+- `MailOutbox`: A MongoDB-backed outbox; requests enqueue messages and a worker delivers them over a pooled SMTP connection.
+- `RouteNotifier`: Coalesces route changes into one digest email per member and time window.
+- `SMTPSink`: A local in-memory SMTP server for tests and benchmarks.
+"""
+
+from .outbox import MailOutbox
+from .notifications import RouteNotifier
+from .sink import SMTPSink
@@ -0,0 +1,167 @@
+"""
+RouteNotifier class for batched notifications to the members of a route.
+
+When a route changes, every affected member (its creator and the users who joined it) gets a change entry appended
+to their open digest in the `routeNotifications` collection. Changes are coalesced for `WINDOW`: `flush` turns each
+digest that has been open for at least that long into a single email in the outbox, and the outbox worker then
+delivers all of them over one pooled SMTP connection. A busy route therefore sends each member at most one email
+per window instead of one per change.
+
+Digest document fields:
+    user_id (ObjectId), email (str), username (str), status ("open" | "flushed"),
+    opened_at (datetime), flushed_at (datetime), changes (list of {route_id, destination, change, at})
+
+Methods:
+    __init__(digests, users, outbox: MailOutbox): Initializes the notifier.
+    ensure_indexes(): Creates the indexes used to find open and due digests.
+    notify_members(route: dict, change: str, exclude, now: datetime): Records a change for every member of a route.
+    flush(now: datetime): Turns due digests into outbox emails.
+"""
+
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .outbox import MailOutbox
+
+
+class RouteNotifier:
+    """
+    Collects route changes per member and emails them as periodic digests.
+
+    Attributes:
+        digests (Collection): The digest collection.
+        users (Collection): The user collection, used to look up member emails.
+        outbox (MailOutbox): Where digest emails are queued.
+        WINDOW (timedelta): How long changes are coalesced before a digest is sent.
+    """
+
+    WINDOW = timedelta(minutes=10)
+
+    def __init__(self, digests, users, outbox: MailOutbox):
+        """
+        Initializes the notifier.
+
+        Args:
+            digests (Collection): The MongoDB collection holding digests.
+            users (Collection): The MongoDB collection holding users.
+            outbox (MailOutbox): The outbox digest emails are queued in.
+        """
+        self.digests = digests
+        self.users = users
+        self.outbox = outbox
+
+    def ensure_indexes(self):
+        """
+        Creates a unique index on open digests per user and an index for finding due digests.
+        """
+        self.digests.create_index(
+            [("user_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"status": "open"},
+        )
+        self.digests.create_index(
+            [("status", ASCENDING), ("opened_at", ASCENDING)])
+
+    def notify_members(
+        self, route: dict, change: str, exclude=None, now: datetime = None
+    ) -> int:
+        """
+        Records a change to `route` in the open digest of each of its members.
+
+        A member's open digest is created by an upsert. MongoDB does not retry upserts
+        on a partial unique index, so when two notifications open the same digest at
+        once the loser gets DuplicateKeyError; it then appends to the digest the winner
+        created.
+
+        Args:
+            route (dict): The route document (its `creator` and `users` are the members).
+            change (str): A short human-readable description of the change.
+            exclude (ObjectId): A member not to notify, usually the user who made the change.
+            now (datetime): The current time (default: `datetime.utcnow()`).
+
+        Returns:
+            int: The number of members notified.
+        """
+        now = now or datetime.utcnow()
+        member_ids = set(route.get("users", []))
+        if route.get("creator") is not None:
+            member_ids.add(route["creator"])
+        member_ids.discard(exclude)
+        if not member_ids:
+            return 0
+
+        entry = {
+            "route_id": route["_id"],
+            "destination": route.get("destination"),
+            "change": change,
+            "at": now,
+        }
+        notified = 0
+        for member in self.users.find(
+            {"_id": {"$in": list(member_ids)}, "email": {"$ne": None}},
+            {"email": 1, "username": 1},
+        ):
+            query = {"user_id": member["_id"], "status": "open"}
+            update = {
+                "$push": {"changes": entry},
+                "$setOnInsert": {
+                    "email": member["email"],
+                    "username": member.get("username"),
+                    "opened_at": now,
+                },
+            }
+            try:
+                self.digests.update_one(query, update, upsert=True)
+            except DuplicateKeyError:
+                self.digests.update_one(query, update)
+            notified += 1
+        return notified
+
+    def flush(self, now: datetime = None) -> int:
+        """
+        Queues one email per digest that has been open for at least `WINDOW`.
+
+        Args:
+            now (datetime): The current time (default: `datetime.utcnow()`).
+
+        Returns:
+            int: The number of digest emails queued.
+        """
+        now = now or datetime.utcnow()
+        queued = 0
+        while True:
+            digest = self.digests.find_one_and_update(
+                {"status": "open", "opened_at": {"$lte": now - self.WINDOW}},
+                {"$set": {"status": "flushed", "flushed_at": now}},
+                sort=[("opened_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if digest is None:
+                return queued
+            subject, body = self._render(digest)
+            self.outbox.enqueue(digest["email"], subject, body)
+            queued += 1
+
+    def _render(self, digest: dict) -> tuple:
+        """
+        Builds the subject and body of a digest email, keeping only the latest change per route.
+        """
+        latest = {}
+        for entry in digest["changes"]:
+            latest[entry["route_id"]] = entry
+        lines = [
+            f"- {entry['destination']}: {entry['change']}" for entry in latest.values()]
+        subject = (
+            "A ride you are part of has changed"
+            if len(latest) == 1
+            else f"{len(latest)} rides you are part of have changed"
+        )
+        body = (
+            f"Hello {digest.get('username') or ''},\n\n"
+            "The following rides you are part of were updated:\n\n"
+            + "\n".join(lines)
+            + "\n\nbest wishes,\npacktravel team"
+        )
+        return subject, body
@@ -0,0 +1,212 @@
+"""
+MailOutbox class for reliable, asynchronous email delivery.
+
+Requests never talk to SMTP directly. They write the message to a MongoDB outbox collection with `enqueue`, and a worker
+(`python manage.py deliver_outbox`) calls `deliver_pending`, which claims due messages atomically, sends them over a single
+SMTP connection and records the outcome on each document. Failed sends are retried with exponential backoff until
+`MAX_ATTEMPTS` is reached.
+
+Outbox document fields:
+    to (list), subject (str), body (str), from_email (str),
+    status ("pending" | "sending" | "sent" | "failed"), attempts (int),
+    next_attempt_at (datetime), created_at (datetime), claimed_at (datetime),
+    sent_at (datetime), last_error (str)
+
+Methods:
+    __init__(collection): Initializes the outbox on a MongoDB collection.
+    ensure_indexes(): Creates the index used to find due messages.
+    enqueue(to, subject: str, body: str, from_email: str): Stores a message for delivery.
+    deliver_pending(connection, batch_size: int, now: datetime): Sends due messages over one connection.
+    release_stale(now: datetime): Returns messages claimed by a crashed worker to the queue.
+"""
+
+import traceback
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from pymongo import ASCENDING, ReturnDocument
+
+
+class MailOutbox:
+    """
+    A MongoDB-backed outbox of email messages.
+
+    Attributes:
+        collection (Collection): The outbox collection.
+        MAX_ATTEMPTS (int): Send attempts before a message is marked "failed".
+        BACKOFF_SECONDS (int): Base retry delay, doubled after each failed attempt.
+        CLAIM_TIMEOUT (timedelta): How long a message may stay "sending" before it is considered abandoned.
+    """
+
+    MAX_ATTEMPTS = 6
+    BACKOFF_SECONDS = 30
+    CLAIM_TIMEOUT = timedelta(minutes=10)
+
+    collection = None
+
+    def __init__(self, collection):
+        """
+        Initializes the outbox.
+
+        Args:
+            collection (Collection): The MongoDB collection holding outbox messages.
+        """
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """
+        Creates the index used to find due messages in delivery order.
+        """
+        self.collection.create_index(
+            [("status", ASCENDING), ("next_attempt_at", ASCENDING)]
+        )
+
+    def enqueue(self, to, subject: str, body: str, from_email: str = None):
+        """
+        Stores a message for asynchronous delivery.
+
+        Args:
+            to (str | list): Recipient address or addresses.
+            subject (str): The email subject.
+            body (str): The plain-text body.
+            from_email (str): Sender address (default: `settings.EMAIL_HOST_USER`).
+
+        Returns:
+            ObjectId: The id of the outbox document.
+        """
+        now = datetime.utcnow()
+        message = {
+            "to": [to] if isinstance(to, str) else list(to),
+            "subject": subject,
+            "body": body,
+            "from_email": from_email or settings.EMAIL_HOST_USER,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "sent_at": None,
+            "last_error": None,
+        }
+        return self.collection.insert_one(message).inserted_id
+
+    def release_stale(self, now: datetime = None) -> int:
+        """
+        Puts messages left in "sending" by a crashed worker back into the queue.
+
+        Args:
+            now (datetime): The current time (default: `datetime.utcnow()`).
+
+        Returns:
+            int: The number of released messages.
+        """
+        now = now or datetime.utcnow()
+        result = self.collection.update_many(
+            {"status": "sending", "claimed_at": {"$lt": now - self.CLAIM_TIMEOUT}},
+            {"$set": {"status": "pending"}},
+        )
+        return result.modified_count
+
+    def deliver_pending(
+        self, connection=None, batch_size: int = 100, now: datetime = None
+    ) -> dict:
+        """
+        Claims up to `batch_size` due messages and sends them over a single SMTP connection.
+
+        Args:
+            connection: An open-able Django email connection (default: `get_connection()`).
+            batch_size (int): Maximum number of messages to send in this call (default: 100).
+            now (datetime): The current time (default: `datetime.utcnow()`).
+
+        Returns:
+            dict: Counts of messages {"sent", "retried", "failed"} in this batch.
+        """
+        now = now or datetime.utcnow()
+        self.release_stale(now)
+        claimed = self._claim(batch_size, now)
+        stats = {"sent": 0, "retried": 0, "failed": 0}
+        if not claimed:
+            return stats
+
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            error = traceback.format_exc()
+            for message in claimed:
+                stats[self._record_failure(message, error, now)] += 1
+            return stats
+
+        try:
+            for message in claimed:
+                email = EmailMessage(
+                    message["subject"],
+                    message["body"],
+                    message["from_email"],
+                    message["to"],
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([email])
+                except Exception:
+                    stats[self._record_failure(
+                        message, traceback.format_exc(), now)] += 1
+                    # The session may be unusable after an SMTP error; start a fresh one.
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        pass
+                    continue
+                self.collection.update_one(
+                    {"_id": message["_id"]},
+                    {
+                        "$set": {"status": "sent", "sent_at": datetime.utcnow()},
+                        "$inc": {"attempts": 1},
+                    },
+                )
+                stats["sent"] += 1
+        finally:
+            connection.close()
+        return stats
+
+    def _claim(self, batch_size: int, now: datetime) -> list:
+        """
+        Atomically moves up to `batch_size` due messages to "sending".
+        """
+        claimed = []
+        while len(claimed) < batch_size:
+            message = self.collection.find_one_and_update(
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"$set": {"status": "sending", "claimed_at": now}},
+                sort=[("next_attempt_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if message is None:
+                break
+            claimed.append(message)
+        return claimed
+
+    def _record_failure(self, message: dict, error: str, now: datetime) -> str:
+        """
+        Schedules a retry for a failed message, or marks it failed after `MAX_ATTEMPTS`.
+
+        Returns:
+            str: "retried" or "failed".
+        """
+        attempts = message.get("attempts", 0) + 1
+        print(
+            f"Email {message['_id']} to {message['to']} failed (attempt {attempts}): {error}")
+        if attempts >= self.MAX_ATTEMPTS:
+            update = {"status": "failed"}
+            outcome = "failed"
+        else:
+            update = {
+                "status": "pending",
+                "next_attempt_at": now
+                + timedelta(seconds=self.BACKOFF_SECONDS * 2 ** (attempts - 1)),
+            }
+            outcome = "retried"
+        update.update(attempts=attempts, last_error=error)
+        self.collection.update_one({"_id": message["_id"]}, {"$set": update})
+        return outcome
@@ -0,0 +1,169 @@
+"""
+SMTPSink, a minimal local SMTP server for tests and benchmarks.
+
+The sink accepts every message, keeps it in memory and counts connections, which makes it easy to check that the
+outbox worker reuses one SMTP session for many messages. It speaks just enough SMTP for Django's SMTP backend
+(no TLS, no AUTH).
+
+Usage:
+    with SMTPSink() as sink:
+        # point EMAIL_HOST/EMAIL_PORT at sink.host/sink.port with EMAIL_USE_TLS=False
+        ...
+        print(len(sink.messages), sink.connections)
+
+It can also be run on its own:
+
+    python -m services.mail.sink --port 1025
+"""
+
+import argparse
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one SMTP session.
+    """
+
+    def reply(self, line: str):
+        """
+        Writes one response line to the client.
+        """
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        """
+        Runs the SMTP dialogue, storing every message received.
+        """
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 packtravel-sink ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-packtravel-sink")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 packtravel-sink")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    data.append(data_line)
+                with sink.lock:
+                    sink.messages.append(
+                        {
+                            "from": sender,
+                            "to": recipients,
+                            "data": b"".join(data).decode(errors="replace"),
+                        }
+                    )
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    """
+    Threaded TCP server carrying a reference to its sink.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    An in-memory SMTP server running on a background thread.
+
+    Attributes:
+        host (str): Address the sink listens on.
+        port (int): Port the sink listens on (an ephemeral port by default).
+        messages (list): Received messages as {"from", "to", "data"} dicts.
+        connections (int): Number of SMTP connections accepted.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Creates the sink; call `start()` or use it as a context manager.
+
+        Args:
+            host (str): Address to listen on (default: "127.0.0.1").
+            port (int): Port to listen on; 0 picks a free port (default: 0).
+        """
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        """
+        Starts serving on a daemon thread.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the server and releases the port.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """
+    Runs the sink in the foreground, printing each received message.
+    """
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port)
+    print(f"SMTP sink listening on {sink.host}:{sink.port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{len(sink.messages)} messages over {sink.connections} connections")
+        sink._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the Google Cloud storage service.
+
+These tests verify that service-account credentials are read once per process,
+that the storage client is reused across uploads, and that large files are
+streamed through a chunked resumable upload. The Google client libraries are
+mocked so no network access or credentials file is required.
+"""
+
+import io
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from services import GoogleCloud
+from services.google_cloud import CloudStorage, Credentials
+
+
+class GoogleCloudTestCase(unittest.TestCase):
+    """
+    Test cases for `Credentials`, `CloudStorage` and `GoogleCloud`.
+    """
+
+    def setUp(self):
+        """
+        Clears the process-wide credential cache and this thread's storage clients.
+        """
+        Credentials._cache.clear()
+        CloudStorage._local.clients = {}
+
+    @patch("services.google_cloud.credentials.service_account")
+    def test_credentials_loaded_once_per_path(self, mock_service_account):
+        """
+        Creating several Credentials for the same file reads it only once.
+        """
+        mock_service_account.Credentials.from_service_account_file.return_value = (
+            MagicMock())
+
+        first = Credentials("credentials.json")
+        second = Credentials("credentials.json")
+
+        self.assertIs(first.credentials, second.credentials)
+        mock_service_account.Credentials.from_service_account_file.assert_called_once_with(
+            "credentials.json")
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    @patch("services.google_cloud.credentials.service_account")
+    def test_client_reused_across_uploads(
+            self, mock_service_account, mock_storage):
+        """
+        Repeated uploads from the same thread share one storage client.
+        """
+        cloud = GoogleCloud("credentials.json")
+        cloud.upload_file(io.BytesIO(b"a"), "a.png")
+        GoogleCloud("credentials.json").upload_file(io.BytesIO(b"b"), "b.png")
+
+        mock_storage.Client.assert_called_once()
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    @patch("services.google_cloud.credentials.service_account")
+    def test_client_per_thread(self, mock_service_account, mock_storage):
+        """
+        Each thread gets its own storage client.
+        """
+        cloud = GoogleCloud("credentials.json")
+        cloud.upload_file(io.BytesIO(b"a"), "a.png")
+        worker = threading.Thread(
+            target=cloud.upload_file, args=(io.BytesIO(b"b"), "b.png")
+        )
+        worker.start()
+        worker.join()
+
+        self.assertEqual(mock_storage.Client.call_count, 2)
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    @patch("services.google_cloud.credentials.service_account")
+    def test_small_file_single_request(
+            self, mock_service_account, mock_storage):
+        """
+        Small files are uploaded without a chunk size.
+        """
+        bucket = mock_storage.Client.return_value.bucket.return_value
+        GoogleCloud("credentials.json").upload_file(
+            io.BytesIO(b"x" * 10), "small.png", content_type="image/png"
+        )
+
+        bucket.blob.assert_called_once_with("small.png", chunk_size=None)
+        bucket.blob.return_value.upload_from_file.assert_called_once()
+        kwargs = bucket.blob.return_value.upload_from_file.call_args.kwargs
+        self.assertEqual(kwargs["size"], 10)
+        self.assertEqual(kwargs["content_type"], "image/png")
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    @patch("services.google_cloud.credentials.service_account")
+    def test_large_file_chunked(self, mock_service_account, mock_storage):
+        """
+        Files above the resumable threshold are streamed in chunks.
+        """
+        bucket = mock_storage.Client.return_value.bucket.return_value
+        large = MagicMock()
+        large.size = CloudStorage.RESUMABLE_THRESHOLD + 1
+
+        GoogleCloud("credentials.json").upload_file(large, "large.png")
+
+        bucket.blob.assert_called_once_with(
+            "large.png", chunk_size=CloudStorage.CHUNK_SIZE
+        )
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    def test_endpoint_uses_anonymous_credentials(self, mock_storage):
+        """
+        An endpoint override skips the service-account file and targets that endpoint.
+        """
+        GoogleCloud(endpoint="http://localhost:4443").upload_file(
+            io.BytesIO(b"a"), "a.png"
+        )
+
+        kwargs = mock_storage.Client.call_args.kwargs
+        self.assertEqual(
+            kwargs["client_options"], {
+                "api_endpoint": "http://localhost:4443"})
+
+    @patch("services.google_cloud.cloud_storage.storage")
+    def test_endpoint_client_reused(self, mock_storage):
+        """
+        Instances targeting the same endpoint share one client per thread.
+        """
+        for name in ("a.png", "b.png", "c.png"):
+            GoogleCloud(endpoint="http://localhost:4443").upload_file(
+                io.BytesIO(b"a"), name)
+
+        mock_storage.Client.assert_called_once()
+        self.assertEqual(len(CloudStorage._local.clients), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
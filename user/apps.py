@@ -7,6 +7,9 @@ is inherited from Django's AppConfig, and is typically used for application-spec
 setup such as default settings, model registration, etc.
 """
 
+import os
+import sys
+
 from django.apps import AppConfig
 
 
@@ -29,3 +32,30 @@ class UserConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        """
+        Starts the profile-picture upload queue in processes that serve requests, so
+        jobs left on disk by a stopped process are picked up without waiting for the
+        next upload. Management commands other than `runserver` do not start it.
+        """
+        if serves_requests(sys.argv):
+            from .views import initializeUploads
+
+            initializeUploads()
+
+
+def serves_requests(argv: list) -> bool:
+    """
+    Returns whether the process was started to serve requests rather than to run a
+    management command.
+
+    Args:
+        argv (list): The process's command line.
+
+    Returns:
+        bool: False for `manage.py <command>` unless the command is `runserver`.
+    """
+    if os.path.basename(argv[0]) != "manage.py":
+        return True
+    return argv[1:2] == ["runserver"]
@@ -0,0 +1,46 @@
+"""
+Template filters for rendering user avatars.
+
+Profile pictures are stored as several square variants (see `ImageUtils`), so
+templates ask for the pixel size they display and get the smallest variant
+that is at least that large. While a new picture is still being uploaded in
+the background, users without an older picture get a placeholder avatar.
+
+Usage:
+    {% load avatars %}
+    <img src="{{ user|avatar_url:150 }}" width="150" height="150">
+"""
+
+from django import template
+from django.templatetags.static import static
+
+register = template.Library()
+
+
+@register.filter
+def avatar_url(user, size=64):
+    """
+    Returns the URL of the smallest profile picture variant covering `size` pixels.
+
+    Args:
+        user (dict): A user document with optional `pfp_variants` and `pfp` fields.
+        size (int): The displayed edge length in pixels.
+
+    Returns:
+        str: The chosen variant URL, the largest variant if none is big enough,
+             the legacy `pfp` URL for users without variants, or the placeholder
+             avatar while an upload is pending.
+    """
+    if not isinstance(user, dict):
+        return ""
+    variants = sorted(user.get("pfp_variants") or [], key=lambda v: v["size"])
+    for variant in variants:
+        if variant["size"] >= int(size):
+            return variant["url"]
+    if variants:
+        return variants[-1]["url"]
+    if user.get("pfp"):
+        return user["pfp"]
+    if user.get("pfp_pending"):
+        return static("avatar_placeholder.svg")
+    return ""
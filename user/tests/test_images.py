@@ -0,0 +1,279 @@
+"""
+Unit tests for profile picture processing.
+
+These tests cover the Pillow-based pipeline in `ImageUtils` (validation,
+metadata stripping, resizing and re-encoding), the `avatar_url` template
+filter that picks the smallest adequate variant, and the registration flow
+that stages the upload for the background queue, which then uploads the
+variants instead of the original file, and that a profile edit without a new
+picture leaves a queued one pending.
+"""
+
+import tempfile
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+import mongomock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+from django.urls import reverse
+from PIL import Image
+
+from user import views
+from user.templatetags.avatars import avatar_url
+from user.uploads import UploadQueue
+from utilities import ImageUtils, ImageProcessingError
+
+
+def make_image(size=(1200, 800), image_format="JPEG", exif=True):
+    """
+    Builds an in-memory image, optionally carrying EXIF metadata.
+    """
+    image = Image.new("RGB", size, (200, 30, 30))
+    buffer = BytesIO()
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = "CameraMaker"
+        image.save(buffer, format=image_format, exif=metadata.tobytes())
+    else:
+        image.save(buffer, format=image_format)
+    buffer.seek(0)
+    return buffer
+
+
+class ImageUtilsTestCase(unittest.TestCase):
+    """
+    Test cases for `ImageUtils.process_profile_picture`.
+    """
+
+    def test_variants_are_square_and_sized(self):
+        """
+        One square variant is produced per configured size.
+        """
+        result = ImageUtils.process_profile_picture(make_image())
+
+        self.assertEqual(
+            [v["size"] for v in result["variants"]], list(ImageUtils.VARIANT_SIZES)
+        )
+        for variant in result["variants"]:
+            with Image.open(BytesIO(variant["data"])) as image:
+                self.assertEqual(image.size, (variant["size"], variant["size"]))
+
+    def test_metadata_is_stripped(self):
+        """
+        EXIF data from the upload is not carried into the variants.
+        """
+        result = ImageUtils.process_profile_picture(make_image())
+
+        for variant in result["variants"]:
+            with Image.open(BytesIO(variant["data"])) as image:
+                self.assertEqual(len(image.getexif()), 0)
+
+    def test_jpeg_output_and_bytes_saved(self):
+        """
+        JPEG output can be requested and savings are reported per size.
+        """
+        result = ImageUtils.process_profile_picture(
+            make_image(), quality=60, image_format="JPEG"
+        )
+
+        self.assertEqual(result["variants"][0]["content_type"], "image/jpeg")
+        smallest = result["variants"][0]
+        self.assertEqual(
+            result["bytes_saved"][smallest["size"]],
+            result["original_bytes"] - smallest["bytes"],
+        )
+
+    def test_transparent_png_to_jpeg(self):
+        """
+        Transparent images are flattened when encoded as JPEG.
+        """
+        buffer = BytesIO()
+        Image.new("RGBA", (100, 100), (0, 0, 0, 0)).save(buffer, format="PNG")
+        buffer.seek(0)
+
+        result = ImageUtils.process_profile_picture(buffer, image_format="JPEG")
+        self.assertEqual(len(result["variants"]), len(ImageUtils.VARIANT_SIZES))
+
+    def test_invalid_file_rejected(self):
+        """
+        Non-image data raises `ImageProcessingError`.
+        """
+        with self.assertRaises(ImageProcessingError):
+            ImageUtils.process_profile_picture(BytesIO(b"not an image"))
+
+    def test_oversized_image_rejected(self):
+        """
+        Images above `MAX_PIXELS` are rejected before decoding.
+        """
+        with patch.object(ImageUtils, "MAX_PIXELS", 100):
+            with self.assertRaises(ImageProcessingError):
+                ImageUtils.process_profile_picture(make_image(size=(20, 20)))
+
+
+class AvatarUrlFilterTestCase(unittest.TestCase):
+    """
+    Test cases for the `avatar_url` template filter.
+    """
+
+    user = {
+        "pfp": "lg.webp",
+        "pfp_variants": [
+            {"size": 512, "url": "lg.webp"},
+            {"size": 64, "url": "sm.webp"},
+            {"size": 160, "url": "md.webp"},
+        ],
+    }
+
+    def test_smallest_adequate_variant(self):
+        """
+        The smallest variant at least as large as the display size is chosen.
+        """
+        self.assertEqual(avatar_url(self.user, 24), "sm.webp")
+        self.assertEqual(avatar_url(self.user, 150), "md.webp")
+        self.assertEqual(avatar_url(self.user, 1000), "lg.webp")
+
+    def test_legacy_user(self):
+        """
+        Users without variants fall back to their original `pfp` URL.
+        """
+        self.assertEqual(avatar_url({"pfp": "old.png"}, 150), "old.png")
+        self.assertEqual(avatar_url(None, 150), "")
+
+    def test_pending_placeholder(self):
+        """
+        A pending upload shows the placeholder only when there is no older picture.
+        """
+        self.assertTrue(
+            avatar_url({"pfp": "", "pfp_pending": True}, 64).endswith(
+                "avatar_placeholder.svg"
+            )
+        )
+        self.assertEqual(
+            avatar_url({"pfp": "old.png", "pfp_pending": True}, 64), "old.png"
+        )
+
+
+class RegisterPictureTestCase(TestCase):
+    """
+    Test cases for registering with a profile picture.
+    """
+
+    def setUp(self):
+        """
+        Sets up the test client, a mocked MongoDB instance and an unstarted upload queue.
+        """
+        self.client = Client()
+        self.mock_client = mongomock.MongoClient()
+        self.mock_db = self.mock_client.SEProject
+        self.staging = tempfile.TemporaryDirectory()
+        self.queue = UploadQueue(
+            views.save_profile_picture, self.staging.name, backoff_seconds=0
+        )
+
+    def tearDown(self):
+        """
+        Removes the staging directory.
+        """
+        self.staging.cleanup()
+
+    @patch("user.views.googleCloud", None)
+    @patch("user.views.GoogleCloud")
+    @patch("user.views.get_client")
+    def test_register_uploads_variants(self, mock_get_client, mock_GoogleCloud):
+        """
+        Registration returns before uploading; the queue then uploads one object
+        per variant and stores their URLs.
+        """
+        mock_get_client.return_value = self.mock_client
+        mock_GoogleCloud.return_value.upload_file.side_effect = (
+            lambda file, name, content_type=None: f"https://cdn/{name}"
+        )
+
+        post_data = {
+            "username": "picuser",
+            "unityid": "pu123",
+            "first_name": "Pic",
+            "last_name": "User",
+            "email": "picuser@ncsu.edu",
+            "password1": "Test@password123",
+            "password2": "Test@password123",
+            "phone_number": "1234567890",
+            "profile_picture": SimpleUploadedFile(
+                "me.jpg", make_image().read(), content_type="image/jpeg"
+            ),
+        }
+        with patch("user.validators.userDB", self.mock_db.userData), patch(
+            "user.views.uploadQueue", self.queue
+        ):
+            response = self.client.post(reverse("register"), data=post_data)
+
+            self.assertEqual(response.status_code, 302)
+            user = self.mock_db.userData.find_one({"username": "picuser"})
+            self.assertTrue(user["pfp_pending"])
+            self.assertEqual(user["pfp"], "")
+            mock_GoogleCloud.return_value.upload_file.assert_not_called()
+
+            self.queue.drain()
+
+        user = self.mock_db.userData.find_one({"username": "picuser"})
+        self.assertNotIn("pfp_pending", user)
+        self.assertEqual(
+            mock_GoogleCloud.return_value.upload_file.call_count,
+            len(ImageUtils.VARIANT_SIZES),
+        )
+        self.assertEqual(
+            [v["size"] for v in user["pfp_variants"]], list(ImageUtils.VARIANT_SIZES)
+        )
+        self.assertEqual(user["pfp"], user["pfp_variants"][-1]["url"])
+
+    @patch("user.views.get_client")
+    def test_register_rejects_invalid_picture(self, mock_get_client):
+        """
+        A file that is not an image is rejected in the request itself.
+        """
+        mock_get_client.return_value = self.mock_client
+        post_data = {
+            "username": "badpic",
+            "unityid": "bp123",
+            "first_name": "Bad",
+            "last_name": "Pic",
+            "email": "badpic@ncsu.edu",
+            "password1": "Test@password123",
+            "password2": "Test@password123",
+            "phone_number": "1234567890",
+            "profile_picture": SimpleUploadedFile(
+                "me.jpg", b"not an image", content_type="image/jpeg"
+            ),
+        }
+        with patch("user.validators.userDB", self.mock_db.userData):
+            response = self.client.post(reverse("register"), data=post_data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(
+            self.mock_db.userData.find_one({"username": "badpic"}))
+
+    @patch("user.views.get_client")
+    def test_edit_without_picture_keeps_pending(self, mock_get_client):
+        """
+        Editing the name while a picture is still queued keeps the placeholder.
+        """
+        mock_get_client.return_value = self.mock_client
+        self.mock_db.userData.insert_one(
+            {"username": "picuser", "fname": "Pic", "pfp": "", "pfp_pending": True})
+        session = self.client.session
+        session["username"] = "picuser"
+        session.save()
+
+        response = self.client.post(reverse("user_user"), data={
+            "first_name": "Renamed", "last_name": "User", "phone_number": "1234567890"})
+
+        self.assertEqual(response.status_code, 302)
+        user = self.mock_db.userData.find_one({"username": "picuser"})
+        self.assertEqual(user["fname"], "Renamed")
+        self.assertTrue(user["pfp_pending"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+"""
+Unit tests for the background profile-picture upload queue.
+
+These tests run the queue on the calling thread with `drain()` and verify
+staging, retries with backoff, permanent failures and recovery of jobs left
+on disk by an earlier process, also when the app starts without a new upload.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+from django.apps import apps
+from django.test import override_settings
+
+from user.apps import serves_requests
+from user.uploads import UploadQueue
+
+
+class PermanentError(Exception):
+    """
+    An error type the queue is configured never to retry.
+    """
+
+
+class UploadQueueTestCase(unittest.TestCase):
+    """
+    Test cases for `UploadQueue`.
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary staging directory.
+        """
+        self.staging = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Removes the staging directory.
+        """
+        self.staging.cleanup()
+
+    def test_submit_stages_and_processes(self):
+        """
+        Submitted files are staged to disk, handed to the handler and cleaned up.
+        """
+        received = []
+        upload_queue = UploadQueue(
+            lambda key, file: received.append((key, file.read())), self.staging.name
+        )
+
+        upload_queue.submit("alice", BytesIO(b"picture"))
+        self.assertEqual(len(os.listdir(self.staging.name)), 2)
+
+        upload_queue.drain()
+        self.assertEqual(received, [("alice", b"picture")])
+        self.assertEqual(os.listdir(self.staging.name), [])
+
+    def test_retries_until_success(self):
+        """
+        A failing handler is retried until it succeeds.
+        """
+        handler = MagicMock(side_effect=[OSError("timeout"), OSError("timeout"), None])
+        upload_queue = UploadQueue(handler, self.staging.name, backoff_seconds=0)
+
+        upload_queue.submit("alice", BytesIO(b"picture"))
+        upload_queue.drain()
+
+        self.assertEqual(handler.call_count, 3)
+        self.assertEqual(os.listdir(self.staging.name), [])
+
+    def test_gives_up_after_max_attempts(self):
+        """
+        After `max_attempts` failures the job is dropped and `on_failure` is called.
+        """
+        on_failure = MagicMock()
+        upload_queue = UploadQueue(
+            MagicMock(side_effect=OSError("down")),
+            self.staging.name,
+            max_attempts=3,
+            backoff_seconds=0,
+            on_failure=on_failure,
+        )
+
+        upload_queue.submit("alice", BytesIO(b"picture"))
+        upload_queue.drain()
+
+        on_failure.assert_called_once()
+        self.assertEqual(on_failure.call_args.args[0], "alice")
+        self.assertEqual(os.listdir(self.staging.name), [])
+
+    def test_permanent_error_not_retried(self):
+        """
+        Permanent errors abandon the job on the first attempt.
+        """
+        handler = MagicMock(side_effect=PermanentError("bad image"))
+        upload_queue = UploadQueue(
+            handler,
+            self.staging.name,
+            backoff_seconds=0,
+            permanent_errors=(PermanentError,),
+        )
+
+        upload_queue.submit("alice", BytesIO(b"picture"))
+        upload_queue.drain()
+
+        handler.assert_called_once()
+
+    def test_recovers_staged_jobs(self):
+        """
+        Jobs staged by an earlier queue are processed when a new queue starts.
+        """
+        UploadQueue(MagicMock(), self.staging.name).submit(
+            "alice", BytesIO(b"picture"))
+
+        handler = MagicMock()
+        upload_queue = UploadQueue(handler, self.staging.name)
+        upload_queue.start()
+        for _ in range(50):
+            if handler.called:
+                break
+            time.sleep(0.05)
+
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args.args[0], "alice")
+
+    def test_recovers_abandoned_claims(self):
+        """
+        A job left claimed by a dead worker is retried once the claim is stale, and
+        its files are removed after it succeeds; fresh claims are left alone.
+        """
+        earlier = UploadQueue(MagicMock(), self.staging.name)
+        stale = earlier.submit("alice", BytesIO(b"picture"))
+        fresh = earlier.submit("bob", BytesIO(b"picture"))
+        for job_id in (stale, fresh):
+            os.rename(os.path.join(self.staging.name, f"{job_id}.json"),
+                      os.path.join(self.staging.name, f"{job_id}.working"))
+        hour_ago = time.time() - 3600
+        os.utime(os.path.join(self.staging.name, f"{stale}.working"), (hour_ago, hour_ago))
+
+        handler = MagicMock()
+        upload_queue = UploadQueue(handler, self.staging.name, stale_seconds=60)
+        self.assertEqual(upload_queue._recover(), [stale])
+        upload_queue.drain()
+
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args.args[0], "alice")
+        self.assertEqual(
+            sorted(os.listdir(self.staging.name)), [f"{fresh}.bin", f"{fresh}.working"])
+
+
+class UploadQueueStartupTestCase(unittest.TestCase):
+    """
+    Test cases for starting the upload queue with the app.
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary staging directory.
+        """
+        self.staging = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Removes the staging directory.
+        """
+        self.staging.cleanup()
+
+    def test_app_start_processes_staged_jobs(self):
+        """
+        A job staged before the process started is processed once the app is ready,
+        without another upload.
+        """
+        UploadQueue(MagicMock(), self.staging.name).submit("alice", BytesIO(b"picture"))
+        handler = MagicMock()
+
+        with override_settings(UPLOAD_STAGING_DIR=self.staging.name), \
+                patch("user.views.uploadQueue", None), \
+                patch("user.views.save_profile_picture", handler), \
+                patch("sys.argv", ["uvicorn", "PackTravel.asgi:application"]):
+            apps.get_app_config("user").ready()
+            for _ in range(50):
+                if handler.called:
+                    break
+                time.sleep(0.05)
+
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args.args[0], "alice")
+
+    def test_serves_requests(self):
+        """
+        Servers and `runserver` start the queue; other management commands do not.
+        """
+        self.assertTrue(serves_requests(["uvicorn", "PackTravel.asgi:application"]))
+        self.assertTrue(serves_requests(["manage.py", "runserver"]))
+        self.assertFalse(serves_requests(["manage.py", "test"]))
+        self.assertFalse(serves_requests(["/app/manage.py", "deliver_outbox"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
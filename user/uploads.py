@@ -0,0 +1,249 @@
+"""
+Background upload queue for profile pictures.
+
+Registration and profile edits used to block on Google Cloud Storage. Instead,
+the uploaded file is staged to local disk and a daemon worker thread hands it
+to a handler (which processes, uploads and patches the user document),
+retrying with exponential backoff when the handler fails.
+
+Each staged job is a pair of files in the staging directory:
+- `<job_id>.bin`: the raw upload.
+- `<job_id>.json`: the job metadata (key and attempt count).
+
+A job is claimed by atomically renaming its `.json` file to `.working`, so
+several processes can share one staging directory without double-processing.
+Queued jobs left over from a crashed process are picked up again on the next
+start, and web processes start the queue as soon as the app loads (see
+`user.apps`). A claim whose `.working` file has not changed for `stale_seconds`
+belongs to a worker that died mid-job (a crash or redeploy); it is renamed back
+to `.json` and retried, on start and periodically while the worker runs.
+
+Classes:
+    UploadQueue: Stages uploads and processes them on a background thread.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+
+class UploadQueue:
+    """
+    A disk-backed queue of pending uploads processed by a background worker.
+
+    Attributes:
+        handler (callable): Called as `handler(key, file)` to process a staged upload.
+        staging_dir (str): Directory holding staged uploads.
+        max_attempts (int): Attempts before a job is abandoned.
+        backoff_seconds (float): Base delay of the exponential retry backoff.
+        permanent_errors (tuple): Exception types that are never retried.
+        on_failure (callable): Called as `on_failure(key, error)` when a job is abandoned.
+        stale_seconds (float): Age after which a claimed job is considered abandoned.
+    """
+
+    def __init__(
+        self,
+        handler,
+        staging_dir: str,
+        max_attempts: int = 5,
+        backoff_seconds: float = 2.0,
+        permanent_errors: tuple = (),
+        on_failure=None,
+        stale_seconds: float = 600.0,
+    ):
+        """
+        Initializes the queue and creates the staging directory.
+
+        Args:
+            handler (callable): Processes a staged upload; raising means the attempt failed.
+            staging_dir (str): Directory where uploads are staged.
+            max_attempts (int): Attempts before a job is abandoned (default: 5).
+            backoff_seconds (float): Base retry delay, doubled per failed attempt (default: 2.0).
+            permanent_errors (tuple): Exception types that abandon the job immediately.
+            on_failure (callable): Optional callback for abandoned jobs.
+            stale_seconds (float): Age after which a claimed job left by a dead
+                worker is retried (default: 600).
+        """
+        self.handler = handler
+        self.staging_dir = staging_dir
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.permanent_errors = permanent_errors
+        self.on_failure = on_failure
+        self.stale_seconds = stale_seconds
+        self._recovered_at = 0.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        os.makedirs(staging_dir, exist_ok=True)
+
+    def submit(self, key: str, file) -> str:
+        """
+        Stages an uploaded file to disk and schedules it for processing.
+
+        Args:
+            key (str): Identifies what the upload belongs to, e.g. a username.
+            file: The uploaded file object.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        data_path = self._path(job_id, "bin")
+        with open(data_path + ".tmp", "wb") as staged:
+            if hasattr(file, "chunks"):
+                for chunk in file.chunks():
+                    staged.write(chunk)
+            else:
+                file.seek(0)
+                staged.write(file.read())
+        os.replace(data_path + ".tmp", data_path)
+        self._write_meta(job_id, {"key": key, "attempts": 0}, "json")
+        self._queue.put(job_id)
+        return job_id
+
+    def start(self):
+        """
+        Starts the worker thread, re-queuing jobs staged by earlier processes and
+        jobs whose worker died while processing them.
+        """
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._recover()
+            for name in os.listdir(self.staging_dir):
+                if name.endswith(".json"):
+                    self._queue.put(name[: -len(".json")])
+            self._worker = threading.Thread(
+                target=self._run, name="upload-queue", daemon=True
+            )
+            self._worker.start()
+
+    def drain(self):
+        """
+        Processes every queued job on the calling thread until the queue is empty.
+        """
+        while True:
+            try:
+                job_id = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(job_id)
+
+    def _run(self):
+        """
+        Worker loop: processes jobs as they arrive and periodically recovers stale claims.
+        """
+        while True:
+            try:
+                self._process(self._queue.get(timeout=self.stale_seconds))
+            except queue.Empty:
+                pass
+            if time.time() - self._recovered_at >= self.stale_seconds:
+                self._recover()
+
+    def _recover(self):
+        """
+        Renames claims untouched for `stale_seconds` back to `.json`.
+
+        Returns:
+            list: The ids of the recovered jobs, which are queued again.
+        """
+        now = time.time()
+        self._recovered_at = now
+        recovered = []
+        for name in os.listdir(self.staging_dir):
+            if not name.endswith(".working"):
+                continue
+            job_id = name[: -len(".working")]
+            working = self._path(job_id, "working")
+            try:
+                if now - os.path.getmtime(working) < self.stale_seconds:
+                    continue
+                # Only one process wins the rename, so a job is recovered once.
+                os.rename(working, self._path(job_id, "json"))
+            except FileNotFoundError:
+                continue
+            print(f"Recovered upload {job_id} abandoned by a stopped worker")
+            self._queue.put(job_id)
+            recovered.append(job_id)
+        return recovered
+
+    def _process(self, job_id: str):
+        """
+        Claims and runs a single job, scheduling a retry or giving up on failure.
+        """
+        working = self._path(job_id, "working")
+        try:
+            os.rename(self._path(job_id, "json"), working)
+        except FileNotFoundError:
+            # Another worker claimed it first.
+            return
+        # The claim's age is measured from now, not from when the job was staged.
+        os.utime(working)
+        with open(working) as meta_file:
+            meta = json.load(meta_file)
+
+        try:
+            with open(self._path(job_id, "bin"), "rb") as staged:
+                self.handler(meta["key"], staged)
+        except Exception as e:
+            meta["attempts"] += 1
+            print(
+                f"Upload {job_id} for {meta['key']} failed (attempt {meta['attempts']}): {traceback.format_exc()}"
+            )
+            if (
+                isinstance(e, self.permanent_errors)
+                or meta["attempts"] >= self.max_attempts
+            ):
+                self._discard(job_id)
+                if self.on_failure:
+                    self.on_failure(meta["key"], e)
+                return
+            self._write_meta(job_id, meta, "json")
+            os.remove(working)
+            self._retry(job_id, self.backoff_seconds *
+                        2 ** (meta["attempts"] - 1))
+            return
+
+        self._discard(job_id)
+
+    def _retry(self, job_id: str, delay: float):
+        """
+        Puts a job back on the queue after `delay` seconds.
+        """
+        if delay <= 0:
+            self._queue.put(job_id)
+            return
+        timer = threading.Timer(delay, self._queue.put, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _discard(self, job_id: str):
+        """
+        Removes every staged file belonging to a job.
+        """
+        for extension in ("bin", "json", "working"):
+            try:
+                os.remove(self._path(job_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def _write_meta(self, job_id: str, meta: dict, extension: str):
+        """
+        Atomically writes a job's metadata file.
+        """
+        path = self._path(job_id, extension)
+        with open(path + ".tmp", "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(path + ".tmp", path)
+
+    def _path(self, job_id: str, extension: str) -> str:
+        """
+        Returns the staging path of one of a job's files.
+        """
+        return os.path.join(self.staging_dir, f"{job_id}.{extension}")
@@ -12,6 +12,9 @@ External dependencies:
 - `Secrets`: Stores sensitive credentials for cloud and database access.
 - `utils.get_client`: Establishes a connection to MongoDB.
 - `DateUtils`: Provides utilities for date manipulation.
+- `ImageUtils`: Validates profile pictures and renders their resized variants.
+- `UploadQueue`: Uploads profile pictures in the background so requests never wait on cloud storage.
+- `RouteNotifier`: Tells the members of a deleted ride through their batched notification digest.
 - `bson.objectid.ObjectId`: Used for handling MongoDB's ObjectId format.
 - `django.contrib.auth.hashers`: Used for password hashing and verification.
 - `django.contrib.messages`: Displays messages to the user.
@@ -20,13 +23,20 @@ External dependencies:
 from django.shortcuts import render, redirect
 from utils import get_client
 from .forms import RegisterForm, LoginForm, EditUserForm
-from services import GoogleCloud
+from services import GoogleCloud, MailOutbox, RouteNotifier
 from config import Secrets
 from bson.objectid import ObjectId
 from django.forms.utils import ErrorList
-from utilities import DateUtils
+from utilities import DateUtils, ImageUtils, ImageProcessingError
 from django.contrib.auth.hashers import make_password, check_password
 from django.contrib import messages
+from django.conf import settings
+from io import BytesIO
+from .uploads import UploadQueue
+from search.spatial import forget_route
+from publish import destination_stats
+from publish.archive import archived_rides, archived_routes
+import traceback
 
 client = None
 db = None
@@ -35,6 +45,7 @@ ridesDB = None
 routesDB = None
 googleCloud = None
 secrets = None
+uploadQueue = None
 
 
 def initializeCloud():
@@ -52,7 +63,96 @@ def initializeCloud():
     if not googleCloud:
         googleCloud = GoogleCloud(
             secrets.CloudCredentials,
-            secrets.CloudStorageBucket)
+            secrets.CloudStorageBucket,
+            secrets.CloudStorageEndpoint,
+        )
+
+
+def initializeUploads():
+    """
+    Creates the background profile-picture upload queue and starts its worker.
+
+    Globals:
+        uploadQueue (UploadQueue): Queue staging uploads under `settings.UPLOAD_STAGING_DIR`.
+    """
+    global uploadQueue
+    if not uploadQueue:
+        uploadQueue = UploadQueue(
+            save_profile_picture,
+            settings.UPLOAD_STAGING_DIR,
+            permanent_errors=(ImageProcessingError,),
+            on_failure=abandon_profile_picture,
+        )
+        uploadQueue.start()
+
+
+def save_profile_picture(username, image):
+    """
+    Upload-queue handler: uploads a staged picture and patches the user's `pfp` fields.
+
+    Args:
+        username (str): The user the picture belongs to.
+        image: The staged image file.
+    """
+    public_url, variants = upload_profile_picture(username, image)
+    intializeDB()
+    userDB.update_one(
+        {"username": username},
+        {
+            "$set": {"pfp": public_url, "pfp_variants": variants},
+            "$unset": {"pfp_pending": ""},
+        },
+    )
+
+
+def abandon_profile_picture(username, error):
+    """
+    Upload-queue failure callback: stops showing the placeholder for a picture that will never land.
+
+    Args:
+        username (str): The user the picture belonged to.
+        error (Exception): The last error raised by the handler.
+    """
+    intializeDB()
+    userDB.update_one({"username": username}, {"$unset": {"pfp_pending": ""}})
+
+
+def upload_profile_picture(username, image):
+    """
+    Processes a profile picture and uploads every size variant to Google Cloud Storage.
+
+    The upload is validated, stripped of metadata and re-encoded by `ImageUtils`, so only
+    the small variants are stored; the original file is never uploaded.
+
+    Args:
+        username (str): The username the picture belongs to.
+        image: The uploaded image file.
+
+    Returns:
+        tuple: The URL of the largest variant (stored as `pfp`) and a list of
+               {"size": int, "url": str} entries, smallest first.
+
+    Raises:
+        ImageProcessingError: If the upload is not a usable image.
+    """
+    initializeCloud()
+    processed = ImageUtils.process_profile_picture(image)
+    variants = []
+    for variant in processed["variants"]:
+        url = googleCloud.upload_file(
+            BytesIO(variant["data"]),
+            f"{username}_{variant['size']}.{variant['extension']}",
+            content_type=variant["content_type"],
+        )
+        variants.append({"size": variant["size"], "url": url})
+
+    saved = ", ".join(
+        f"{size}px: {saved} bytes" for size, saved in processed["bytes_saved"].items()
+    )
+    print(
+        f"Profile picture for {username}: original {processed['original_bytes']} bytes, saved {saved}"
+    )
+    return variants[-1]["url"], variants
 
 
 def intializeDB():
@@ -139,15 +239,17 @@ def register(request):
     """
 
     intializeDB()
-    initializeCloud()
     if request.method == "POST":
-        public_url = ""
         form = RegisterForm(request.POST, request.FILES)
         if form.is_valid():
             image = form.cleaned_data["profile_picture"]
             if image is not None:
-                image.name = f"{form.cleaned_data['username']}.png"
-                public_url = googleCloud.upload_file(image, image.name)
+                try:
+                    ImageUtils.validate(image)
+                except ImageProcessingError as e:
+                    form.add_error("profile_picture", str(e))
+                    return render(
+                        request, "user/register.html", {"form": form})
 
             userObj = {
                 "username": form.cleaned_data["username"],
@@ -158,10 +260,15 @@ def register(request):
                 "password": make_password(form.cleaned_data["password1"]),
                 "phone": form.cleaned_data["phone_number"],
                 "rides": [],
-                "pfp": public_url,
+                "pfp": "",
+                "pfp_variants": [],
+                "pfp_pending": image is not None,
             }
 
             savedUser = userDB.insert_one(userObj)
+            if image is not None:
+                initializeUploads()
+                uploadQueue.submit(userObj["username"], image)
             request.session["username"] = userObj["username"]
             request.session["unityid"] = userObj["unityid"]
             request.session["fname"] = userObj["fname"]
@@ -200,6 +307,9 @@ def user_profile(request, userid):
     """
     Renders the user's profile page or a 404 page if the user ID is not found.
 
+    Past rides include the user's most recent archived routes, read from
+    `routesArchive` (see `publish.archive`).
+
     Args:
         request (HttpRequest): The request object.
         userid (str): The ID of the user profile to display.
@@ -233,6 +343,7 @@ def user_profile(request, userid):
             past_rides.append(route)
         else:
             current_rides.append(route)
+    past_rides.extend(archived_routes(db.routesArchive, ObjectId(user_id)))
 
     if profile:
         return render(
@@ -299,6 +410,9 @@ def my_rides(request):
     """
     Renders the user's rides if logged in, otherwise redirects to home.
 
+    Rides whose routes have been archived are read from `routesArchive` and shown
+    without the delete button (see `publish.archive`).
+
     Args:
         request (HttpRequest): The request object.
 
@@ -322,6 +436,13 @@ def my_rides(request):
             if user_routes[i] == route["_id"]:
                 route["id"] = route["_id"]
                 processed.append(route)
+    # Rides whose routes have been archived are shown read-only (see `publish.archive`).
+    live = {route["_id"] for route in processed}
+    for route in archived_rides(
+            db.routesArchive, [ride for ride in user_routes if ride not in live]):
+        route["id"] = route["_id"]
+        route["archived"] = True
+        processed.append(route)
 
     return render(
         request,
@@ -332,7 +453,7 @@ def my_rides(request):
 
 def delete_ride(request, ride_id):
     """
-    Deletes a specified ride from the routes collection.
+    Deletes a specified ride from the routes collection and notifies its other members.
 
     Args:
         request (HttpRequest): The request object.
@@ -345,7 +466,21 @@ def delete_ride(request, ride_id):
     user = userDB.find_one({"username": request.session["username"]})
     if user is None:
         pass
+    route = routesDB.find_one({"_id": ride_id})
     routesDB.delete_one({"_id": ride_id})
+    forget_route(ride_id)
+    if route is not None:
+        destination_stats.route_removed(db.destinationStats, route)
+        try:
+            RouteNotifier(
+                db.routeNotifications, userDB, MailOutbox(db.emailOutbox)
+            ).notify_members(
+                route, "was cancelled", exclude=user["_id"] if user else None
+            )
+        except Exception:
+            # The ride is already gone; notifications are best effort.
+            print(
+                f"could not notify route members: {traceback.format_exc()}")
     return redirect("/myrides")
 
 def edit_user(request):
@@ -365,23 +500,30 @@ def edit_user(request):
         form = EditUserForm(request.POST, request.FILES)
         if form.is_valid():
             image = form.cleaned_data.get("profile_picture")
-            public_url = user.get("pfp")
             if image:
-                initializeCloud()
-                image.name = f"{request.session['username']}.png"
-                public_url = googleCloud.upload_file(image, image.name)
-
+                try:
+                    ImageUtils.validate(image)
+                except ImageProcessingError as e:
+                    form.add_error("profile_picture", str(e))
+                    return render(
+                        request,
+                        "user/edit_user.html",
+                        {"username": request.session["username"], "form": form},
+                    )
+
+            changes = {
+                "fname": form.cleaned_data["first_name"],
+                "lname": form.cleaned_data["last_name"],
+                "phone": form.cleaned_data["phone_number"],
+            }
+            if image:
+                # Without a new picture, a picture still in the queue stays pending.
+                changes["pfp_pending"] = True
             userDB.update_one(
-                {"username": request.session["username"]},
-                {
-                    "$set": {
-                        "fname": form.cleaned_data["first_name"],
-                        "lname": form.cleaned_data["last_name"],
-                        "phone": form.cleaned_data["phone_number"],
-                        "pfp": public_url,
-                    }
-                },
-            )
+                {"username": request.session["username"]}, {"$set": changes})
+            if image:
+                initializeUploads()
+                uploadQueue.submit(request.session["username"], image)
 
             request.session["fname"] = form.cleaned_data["first_name"]
             request.session["lname"] = form.cleaned_data["last_name"]
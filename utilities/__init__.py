@@ -1 +1,5 @@
 from .date import DateUtils
+from .geo import GeoUtils
+from .image import ImageUtils, ImageProcessingError
+from .route import RouteUtils
+from .rate_limit import RateLimiter, rate_limit
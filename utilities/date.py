@@ -8,9 +8,13 @@ has passed compared to the current date.
 Functions:
     DateUtils:
         - has_date_passed: Checks if a given date has passed compared to today's date.
+        - route_departure: Combines the date and time fields of a route into a datetime.
+        - to_utc: Interprets a local wall-clock time in a time zone and converts it to UTC.
+        - departure_at: Returns the UTC departure timestamp of a route.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
 
 class DateUtils:
@@ -23,6 +27,12 @@ class DateUtils:
     Methods:
         has_date_passed(date: str) -> bool:
             Checks if the given date has passed compared to today's date.
+        route_departure(route: dict) -> datetime:
+            Returns the departure time of a route, or None if its fields are incomplete.
+        to_utc(moment: datetime, time_zone: str) -> datetime:
+            Converts a naive local time in `time_zone` to an aware UTC datetime.
+        departure_at(route: dict, time_zone: str) -> datetime:
+            Returns the aware UTC departure of a route entered in `time_zone`.
     """
 
     @classmethod
@@ -41,3 +51,55 @@ class DateUtils:
         today = datetime.today().date()
 
         return given_date < today
+
+    @classmethod
+    def route_departure(cls, route: dict) -> datetime:
+        """
+        Combines the `date`, `hour`, `minute` and `ampm` fields of a route into a datetime.
+
+        Args:
+            route (dict): The route document.
+
+        Returns:
+            datetime: The naive local departure time, or None if the fields are missing or invalid.
+        """
+        try:
+            return datetime.strptime(
+                f"{route['date']} {route['hour']}:{route['minute']} {route['ampm']}",
+                "%Y-%m-%d %I:%M %p",
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def to_utc(cls, moment: datetime, time_zone: str) -> datetime:
+        """
+        Interprets a naive wall-clock time in `time_zone` and converts it to UTC.
+
+        Args:
+            moment (datetime): The local time; aware datetimes are only converted.
+            time_zone (str): An IANA time zone name, e.g. "America/New_York".
+
+        Returns:
+            datetime: The aware UTC datetime.
+        """
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=ZoneInfo(time_zone))
+        return moment.astimezone(timezone.utc)
+
+    @classmethod
+    def departure_at(cls, route: dict, time_zone: str) -> datetime:
+        """
+        Returns the UTC departure timestamp of a route whose time was entered in `time_zone`.
+
+        Args:
+            route (dict): The route document.
+            time_zone (str): The IANA time zone the route's fields are in.
+
+        Returns:
+            datetime: The aware UTC departure, or None if the route's fields are incomplete.
+        """
+        departure = cls.route_departure(route)
+        if departure is None:
+            return None
+        return cls.to_utc(departure, time_zone)
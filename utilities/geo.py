@@ -0,0 +1,86 @@
+"""
+Module for geographic utility functions.
+
+This module contains the `GeoUtils` class, which converts the latitude/longitude
+strings posted by the ride forms into GeoJSON points that MongoDB can index with
+a 2dsphere index, and converts distances for spherical queries.
+
+Functions:
+    GeoUtils:
+        - point: Builds a GeoJSON point from a latitude and longitude.
+        - route_locations: Builds the origin/destination points of a route document.
+        - km_to_radians: Converts a distance on the Earth's surface to radians.
+"""
+
+
+class GeoUtils:
+    """
+    A utility class for working with geographic coordinates.
+
+    Attributes:
+        EARTH_RADIUS_KM (float): The equatorial radius used by MongoDB's `$centerSphere`.
+
+    Methods:
+        point(lat, long) -> dict:
+            Returns a GeoJSON point, or None if the coordinates are missing or invalid.
+        route_locations(route: dict) -> dict:
+            Returns the `s_location`/`d_location` points of a route.
+        km_to_radians(km: float) -> float:
+            Converts kilometres to radians on the Earth's surface.
+    """
+
+    EARTH_RADIUS_KM = 6378.1
+
+    @classmethod
+    def point(cls, lat, long) -> dict:
+        """
+        Builds a GeoJSON point from a latitude and longitude.
+
+        Args:
+            lat (str | float): The latitude, in degrees.
+            long (str | float): The longitude, in degrees.
+
+        Returns:
+            dict: {"type": "Point", "coordinates": [long, lat]}, or None if either
+            value is missing, not a number or out of range.
+        """
+        try:
+            lat, long = float(lat), float(long)
+        except (TypeError, ValueError):
+            return None
+        if not (-90 <= lat <= 90 and -180 <= long <= 180):
+            return None
+        return {"type": "Point", "coordinates": [long, lat]}
+
+    @classmethod
+    def route_locations(cls, route: dict) -> dict:
+        """
+        Builds the GeoJSON origin and destination of a route from its coordinate fields.
+
+        Args:
+            route (dict): A route with `s_lat`, `s_long`, `d_lat` and `d_long` fields.
+
+        Returns:
+            dict: The `s_location` and `d_location` points that could be built.
+        """
+        locations = {}
+        origin = cls.point(route.get("s_lat"), route.get("s_long"))
+        if origin:
+            locations["s_location"] = origin
+        destination = cls.point(route.get("d_lat"), route.get("d_long"))
+        if destination:
+            locations["d_location"] = destination
+        return locations
+
+    @classmethod
+    def km_to_radians(cls, km: float) -> float:
+        """
+        Converts a distance on the Earth's surface to radians, as `$centerSphere` expects.
+
+        Args:
+            km (float): The distance in kilometres.
+
+        Returns:
+            float: The distance in radians.
+        """
+        return km / cls.EARTH_RADIUS_KM
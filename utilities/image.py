@@ -0,0 +1,193 @@
+"""
+Module for profile picture processing.
+
+This module contains the `ImageUtils` class, which turns an uploaded profile
+picture into a set of small, re-encoded avatar variants. Every variant is
+decoded and re-saved with Pillow, so EXIF data, embedded thumbnails and other
+metadata from the original file are never uploaded.
+
+Classes:
+    ImageProcessingError: Raised when an upload is not an acceptable image.
+    ImageUtils:
+        - validate: Cheaply checks that an upload is an acceptable image.
+        - process_profile_picture: Validates an upload and renders its size variants.
+"""
+
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+
+class ImageProcessingError(ValueError):
+    """
+    Raised when an uploaded file cannot be used as a profile picture.
+    """
+
+
+class ImageUtils:
+    """
+    A utility class for processing profile pictures.
+
+    Attributes:
+        VARIANT_SIZES (tuple): Edge lengths, in pixels, of the square avatars rendered per upload.
+        QUALITY (int): Default encoder quality for WebP/JPEG output.
+        MAX_PIXELS (int): Largest accepted source image, in pixels.
+        ALLOWED_FORMATS (set): Source formats accepted by the pipeline.
+
+    Methods:
+        validate(file) -> None:
+            Checks the format and dimensions of an upload without decoding it.
+        process_profile_picture(file, quality: int, image_format: str) -> dict:
+            Validates an uploaded image and returns its encoded size variants.
+    """
+
+    VARIANT_SIZES = (64, 160, 512)
+    QUALITY = 80
+    MAX_PIXELS = 40_000_000
+    ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF", "BMP"}
+
+    @classmethod
+    def validate(cls, file) -> None:
+        """
+        Checks that an upload is a supported, reasonably sized image without decoding its pixels.
+
+        Args:
+            file: The uploaded file object. It is rewound afterwards.
+
+        Raises:
+            ImageProcessingError: If the file is not a supported, reasonably sized image.
+        """
+        cls._probe(cls._read(file))
+        file.seek(0)
+
+    @classmethod
+    def process_profile_picture(
+        cls, file, quality: int = QUALITY, image_format: str = None
+    ) -> dict:
+        """
+        Validates an uploaded image and renders one square variant per `VARIANT_SIZES` entry.
+
+        Args:
+            file: The uploaded file object.
+            quality (int): Encoder quality between 1 and 100 (default: `QUALITY`).
+            image_format (str): "WEBP" or "JPEG"; defaults to WebP when Pillow supports it.
+
+        Returns:
+            dict: {
+                "original_bytes": size of the upload,
+                "variants": [{"size", "data", "content_type", "extension", "bytes"}, ...],
+                "bytes_saved": bytes saved per size compared to serving the original,
+            }
+
+        Raises:
+            ImageProcessingError: If the file is not a supported, reasonably sized image.
+        """
+        if image_format is None:
+            image_format = "WEBP" if features.check("webp") else "JPEG"
+        raw = cls._read(file)
+        image = cls._open(raw)
+
+        variants = []
+        for size in cls.VARIANT_SIZES:
+            data = cls._encode(
+                ImageOps.fit(image, (size, size), Image.LANCZOS),
+                image_format,
+                quality,
+            )
+            variants.append(
+                {
+                    "size": size,
+                    "data": data,
+                    "content_type": f"image/{image_format.lower()}",
+                    "extension": image_format.lower(),
+                    "bytes": len(data),
+                }
+            )
+
+        return {
+            "original_bytes": len(raw),
+            "variants": variants,
+            "bytes_saved": {
+                variant["size"]: len(raw) - variant["bytes"] for variant in variants
+            },
+        }
+
+    @classmethod
+    def _read(cls, file) -> bytes:
+        """
+        Reads the whole upload into memory, rewinding it first when possible.
+        """
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return file.read()
+
+    @classmethod
+    def _probe(cls, raw: bytes) -> None:
+        """
+        Checks the header of an image: format, dimensions and structural integrity.
+
+        Raises:
+            ImageProcessingError: If the data is not a supported or sane image.
+        """
+        try:
+            with Image.open(BytesIO(raw)) as probe:
+                if probe.format not in cls.ALLOWED_FORMATS:
+                    raise ImageProcessingError(
+                        f"Unsupported image format: {probe.format}")
+                width, height = probe.size
+                if width * height > cls.MAX_PIXELS:
+                    raise ImageProcessingError("Image dimensions are too large")
+                probe.verify()
+        except (
+            UnidentifiedImageError,
+            Image.DecompressionBombError,
+            OSError,
+            SyntaxError,
+        ) as e:
+            raise ImageProcessingError("File is not a valid image") from e
+
+    @classmethod
+    def _open(cls, raw: bytes) -> Image.Image:
+        """
+        Verifies and decodes an image, applying its EXIF orientation.
+
+        Raises:
+            ImageProcessingError: If the data is not a supported or sane image.
+        """
+        cls._probe(raw)
+        try:
+            image = Image.open(BytesIO(raw))
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+        except (
+            UnidentifiedImageError,
+            Image.DecompressionBombError,
+            OSError,
+            SyntaxError,
+        ) as e:
+            raise ImageProcessingError("File is not a valid image") from e
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert(
+                "RGBA" if "transparency" in image.info or "A" in image.mode else "RGB"
+            )
+        return image
+
+    @classmethod
+    def _encode(cls, image: Image.Image, image_format: str,
+                quality: int) -> bytes:
+        """
+        Encodes an image without any of the source metadata.
+        """
+        if image_format == "JPEG" and image.mode != "RGB":
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        options = {"quality": quality}
+        if image_format == "JPEG":
+            options.update(optimize=True, progressive=True)
+        else:
+            options.update(method=4)
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, **options)
+        return buffer.getvalue()
@@ -0,0 +1,306 @@
+"""
+Module for rate limiting POST requests.
+
+This module contains the `RateLimiter` class and the `rate_limit` view decorator,
+which reject POSTs with status 429 before the view runs, so a script hammering an
+endpoint or a double-clicked form never reaches the database:
+
+1. Each client has a token bucket per limited view: it holds up to `capacity`
+   tokens, refills at `capacity` tokens per `period` seconds, and every POST takes
+   one token.
+2. A POST whose form data is identical to one the same client sent to the same URL
+   in the last `duplicate_seconds` is rejected as a duplicate.
+
+Clients are keyed by session, or by IP address when they have no session. Behind a
+reverse proxy (such as the Heroku router) `REMOTE_ADDR` is the proxy's address, so
+every anonymous client would share one bucket; set `RATE_LIMIT_TRUSTED_PROXIES` to
+the number of proxies in front of the site to read the client's address from
+`X-Forwarded-For` instead. Only the entries those proxies appended are trusted, as a
+client can send any `X-Forwarded-For` it likes. The counters live in a store chosen by the `RATE_LIMIT_STORE` setting: `MemoryStore`
+keeps them in the process, `CacheStore` shares them between processes through
+Django's default cache. Limiting is switched off with `RATE_LIMIT_ENABLED = False`.
+
+Classes:
+    MemoryStore: In-process token buckets and duplicate markers.
+    CacheStore: Token buckets and duplicate markers in Django's cache.
+    RateLimiter: Applies a token bucket and duplicate suppression to requests.
+
+Functions:
+    - get_store: Returns the store selected by the settings.
+    - rate_limit: View decorator returning 429 for limited POSTs.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+DUPLICATE_SECONDS = 5
+MAX_KEYS = 10000
+
+
+class MemoryStore:
+    """
+    In-process token buckets and duplicate markers.
+
+    Entries that have expired are pruned once the store holds more than `MAX_KEYS`
+    of them.
+
+    Methods:
+        take(key: str, capacity: int, period: float, now: float) -> float:
+            Takes a token; returns 0, or the seconds until one is available.
+        claim(key: str, seconds: float, now: float) -> float:
+            Marks a key for `seconds`; returns 0, or the seconds left on an existing mark.
+        clear(): Forgets every bucket and mark.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._marks = {}
+
+    def take(self, key: str, capacity: int, period: float, now: float) -> float:
+        """
+        Takes one token from a bucket, refilling it for the time since its last use.
+        """
+        rate = capacity / period
+        with self._lock:
+            tokens, stamp, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+                return (1 - tokens) / rate
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > MAX_KEYS:
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+            return 0
+
+    def claim(self, key: str, seconds: float, now: float) -> float:
+        """
+        Marks a key for `seconds` unless it is already marked.
+        """
+        with self._lock:
+            expires = self._marks.get(key, 0)
+            if expires > now:
+                return expires - now
+            self._marks[key] = now + seconds
+            if len(self._marks) > MAX_KEYS:
+                self._marks = {k: v for k, v in self._marks.items() if v > now}
+            return 0
+
+    def clear(self):
+        """
+        Forgets every bucket and mark.
+        """
+        with self._lock:
+            self._buckets.clear()
+            self._marks.clear()
+
+
+class CacheStore:
+    """
+    Token buckets and duplicate markers kept in Django's default cache.
+
+    Use a cache shared by every process, such as Redis or Memcached. Marks use the
+    atomic `cache.add`; a bucket is read and written back, so processes racing on the
+    same bucket may let a request or two more through than the limit.
+
+    Methods:
+        take(key: str, capacity: int, period: float, now: float) -> float:
+            Takes a token; returns 0, or the seconds until one is available.
+        claim(key: str, seconds: float, now: float) -> float:
+            Marks a key for `seconds`; returns 0, or `seconds` if it is already marked.
+    """
+
+    def take(self, key: str, capacity: int, period: float, now: float) -> float:
+        """
+        Takes one token from a bucket, refilling it for the time since its last use.
+        """
+        rate = capacity / period
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(period))
+        return 0
+
+    def claim(self, key: str, seconds: float, now: float) -> float:
+        """
+        Marks a key for `seconds` unless it is already marked.
+        """
+        return 0 if cache.add(key, now, timeout=math.ceil(seconds)) else seconds
+
+
+_memory = MemoryStore()
+
+
+def get_store():
+    """
+    Returns the store selected by the `RATE_LIMIT_STORE` setting.
+
+    Returns:
+        MemoryStore | CacheStore: The process-wide memory store for "memory" (the
+        default), or a cache store for "cache".
+    """
+    if getattr(settings, "RATE_LIMIT_STORE", "memory") == "cache":
+        return CacheStore()
+    return _memory
+
+
+class RateLimiter:
+    """
+    Applies a token bucket and duplicate suppression to the requests of one view.
+
+    Attributes:
+        scope (str): Name of the limited action; buckets are separate per scope.
+        capacity (int): Requests allowed in a burst.
+        period (float): Seconds to refill a whole bucket.
+        duplicate_seconds (float): Window in which identical submissions are rejected.
+
+    Methods:
+        client_key(request) -> str: Returns the key of the client sending a request.
+        client_ip(request) -> str: Returns the address of the client sending a request.
+        check(request, store, now) -> float: Returns 0, or the seconds to wait.
+    """
+
+    def __init__(self, scope: str, capacity: int, period: float,
+                 duplicate_seconds: float = DUPLICATE_SECONDS):
+        self.scope = scope
+        self.capacity = capacity
+        self.period = period
+        self.duplicate_seconds = duplicate_seconds
+
+    @classmethod
+    def client_key(cls, request) -> str:
+        """
+        Returns the key of the client sending a request: its session, or its IP address.
+
+        Args:
+            request (HttpRequest): The request.
+
+        Returns:
+            str: The client key.
+        """
+        session = getattr(request, "session", None)
+        if session is not None and session.session_key:
+            return f"session:{session.session_key}"
+        return f"ip:{cls.client_ip(request)}"
+
+    @staticmethod
+    def client_ip(request) -> str:
+        """
+        Returns the address of the client sending a request.
+
+        With `RATE_LIMIT_TRUSTED_PROXIES` set to n, this is the n-th address from the
+        end of `X-Forwarded-For`, the one the outermost trusted proxy saw; otherwise,
+        or when the header is shorter, it is `REMOTE_ADDR`.
+
+        Args:
+            request (HttpRequest): The request.
+
+        Returns:
+            str: The client's IP address.
+        """
+        proxies = getattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 0)
+        forwarded = [
+            address.strip()
+            for address in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if address.strip()
+        ]
+        if proxies and len(forwarded) >= proxies:
+            return forwarded[-proxies]
+        return request.META.get("REMOTE_ADDR", "")
+
+    def check(self, request, store=None, now: float = None) -> float:
+        """
+        Takes a token for the request and rejects it if it repeats a recent submission.
+
+        Args:
+            request (HttpRequest): The POST request.
+            store (MemoryStore | CacheStore, optional): The store (default: `get_store()`).
+            now (float, optional): The current `time.time()`.
+
+        Returns:
+            float: 0 if the request may proceed, otherwise the seconds to wait.
+        """
+        store = store or get_store()
+        now = time.time() if now is None else now
+        client = _digest(self.client_key(request))
+        wait = store.take(f"rl:{self.scope}:{client}", self.capacity, self.period, now)
+        if wait or not self.duplicate_seconds:
+            return wait
+        fields = sorted(
+            (name, request.POST.getlist(name))
+            for name in request.POST
+            if name != "csrfmiddlewaretoken"
+        )
+        submission = _digest(f"{client}|{request.path}|{fields!r}")
+        return store.claim(f"rl:dup:{self.scope}:{submission}", self.duplicate_seconds, now)
+
+
+def rate_limit(scope: str, capacity: int, period: float,
+               duplicate_seconds: float = DUPLICATE_SECONDS, limited=None):
+    """
+    Decorates a view so POSTs over the limit or repeating a recent submission get 429.
+
+    Other methods pass through unchanged. A limited POST is answered with a JSON
+    error, or, when it is a plain form submission and `limited` is given, with the
+    response of `limited`: a page showing the form again with a message, or a
+    redirect back to where the form was.
+
+    Args:
+        scope (str): Name of the limited action.
+        capacity (int): Requests allowed in a burst.
+        period (float): Seconds to refill a whole bucket.
+        duplicate_seconds (float): Window in which identical submissions are rejected
+            (default: `DUPLICATE_SECONDS`; 0 disables the check).
+        limited (callable, optional): View called with the view's arguments to answer
+            limited form submissions; a page it renders is sent with status 429,
+            a redirect as it is.
+
+    Returns:
+        callable: The decorator.
+    """
+    limiter = RateLimiter(scope, capacity, period, duplicate_seconds)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method == "POST" and getattr(settings, "RATE_LIMIT_ENABLED", True):
+                wait = limiter.check(request)
+                if wait:
+                    if limited is not None and not _wants_json(request):
+                        response = limited(request, *args, **kwargs)
+                        if response.status_code == 200:
+                            response.status_code = 429
+                    else:
+                        response = JsonResponse({"error": "Too many requests"}, status=429)
+                    response["Retry-After"] = str(max(1, math.ceil(wait)))
+                    return response
+            return view(request, *args, **kwargs)
+
+        wrapped.limiter = limiter
+        return wrapped
+
+    return decorator
+
+
+def _wants_json(request) -> bool:
+    """
+    Returns whether a request was sent by a script rather than by submitting a form.
+    """
+    return (request.headers.get("X-Requested-With") == "XMLHttpRequest"
+            or "application/json" in request.headers.get("Accept", ""))
+
+
+def _digest(value: str) -> str:
+    """
+    Returns a short hash of a value, safe to use in any cache key.
+    """
+    return hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
@@ -0,0 +1,75 @@
+"""
+Module for route key utility functions.
+
+This module contains the `RouteUtils` class, which derives the canonical `_id` of a
+route document. The key is a fixed-width hash of the route's normalized fields, so
+it stays short in every index and reference array, identical routes entered with
+different spacing or capitalization map to the same document, and no code needs to
+split an id to recover a route's fields.
+
+Functions:
+    RouteUtils:
+        - normalize: Normalizes one route field for hashing.
+        - key: Returns the canonical `_id` of a route.
+"""
+
+import hashlib
+
+
+class RouteUtils:
+    """
+    A utility class for working with route identifiers.
+
+    Attributes:
+        KEY_FIELDS (tuple): The route fields that identify a route, in hashing order.
+        KEY_BYTES (int): The digest size of the key; the hex key is twice as long.
+
+    Methods:
+        normalize(value) -> str:
+            Returns a case-folded, whitespace-collapsed string for a field value.
+        key(route: dict) -> str:
+            Returns the hex key of a route built from `KEY_FIELDS`.
+    """
+
+    KEY_FIELDS = ("purpose", "s_point", "destination",
+                  "date", "hour", "minute", "ampm")
+    KEY_BYTES = 12
+
+    @classmethod
+    def normalize(cls, value) -> str:
+        """
+        Normalizes a route field so equivalent inputs hash alike.
+
+        ASCII numbers are written without leading zeros, so an hour of "09" and 9
+        match; other digits, such as superscripts, are kept as text.
+
+        Args:
+            value: The field value.
+
+        Returns:
+            str: The normalized value, or an empty string if it is missing.
+        """
+        if value is None:
+            return ""
+        text = " ".join(str(value).split()).casefold()
+        return str(int(text)) if text.isascii() and text.isdigit() else text
+
+    @classmethod
+    def key(cls, route: dict) -> str:
+        """
+        Returns the canonical `_id` of a route.
+
+        Fields are joined with an ASCII unit separator, which cannot be typed into
+        the forms, so no two different routes share the hashed input.
+
+        Args:
+            route (dict): The route document or form fields.
+
+        Returns:
+            str: A `2 * KEY_BYTES` character hex string.
+        """
+        canonical = "\x1f".join(cls.normalize(route.get(field))
+                                for field in cls.KEY_FIELDS)
+        return hashlib.blake2b(
+            canonical.encode("utf-8"), digest_size=cls.KEY_BYTES
+        ).hexdigest()